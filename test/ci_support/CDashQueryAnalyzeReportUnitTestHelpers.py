@@ -7,6 +7,14 @@
 
 import re
 import shutil
+import threading
+
+try:
+  # Python 2
+  from SocketServer import ThreadingMixIn, TCPServer, StreamRequestHandler
+except ImportError:
+  # Python 3
+  from socketserver import ThreadingMixIn, TCPServer, StreamRequestHandler
 
 
 # Copy a list of files from one directory to another
@@ -109,3 +117,90 @@ def assertFileContentsAsStringArray(testObj, filename, expecteStrList):
   with open(filename, 'r') as fileHandle:
     fileStrList = fileHandle.read().split("\n")
   testObj.assertEqual(fileStrList, expecteStrList)
+
+
+# Local SMTP server that stands in for a real mail server in unit tests
+#
+# Usage:
+#
+#   smtpServer = startLocalSmtpStandInServer()
+#   ... Send emails to smtpServer.getSmtpServerStr() ...
+#   smtpServer.shutdown(); smtpServer.server_close()
+#
+# The messages received are stored in messagesList as the tuples
+# (mailFrom, rcptToList, dataStr) and the number of connections is stored in
+# numConnections.  Recipient addresses containing 'refuse' are refused.
+#
+class LocalSmtpStandInServer(ThreadingMixIn, TCPServer):
+
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self):
+    TCPServer.__init__(self, ('127.0.0.1', 0), LocalSmtpStandInRequestHandler)
+    self.lock = threading.Lock()
+    self.messagesList = []
+    self.numConnections = 0
+
+  def getSmtpServerStr(self):
+    return "127.0.0.1:"+str(self.server_address[1])
+
+
+class LocalSmtpStandInRequestHandler(StreamRequestHandler):
+
+  def handle(self):
+    server = self.server
+    with server.lock:
+      server.numConnections += 1
+    mailFrom = None
+    rcptToList = []
+    self.reply("220 localhost SMTP stand-in")
+    while True:
+      line = self.rfile.readline()
+      if not line: return
+      line = line.decode('utf-8').rstrip("\r\n")
+      cmnd = line.split(" ", 1)[0].upper()
+      if cmnd in ("EHLO", "HELO"):
+        self.reply("250 localhost")
+      elif cmnd == "MAIL":
+        mailFrom = line.split(":", 1)[1].strip().strip("<>")
+        rcptToList = []
+        self.reply("250 OK")
+      elif cmnd == "RCPT":
+        rcptTo = line.split(":", 1)[1].strip().strip("<>")
+        if "refuse" in rcptTo:
+          self.reply("550 No such user")
+        else:
+          rcptToList.append(rcptTo)
+          self.reply("250 OK")
+      elif cmnd == "DATA":
+        self.reply("354 End data with <CR><LF>.<CR><LF>")
+        dataLinesList = []
+        while True:
+          dataLine = self.rfile.readline().decode('utf-8')
+          if dataLine.rstrip("\r\n") == ".": break
+          dataLinesList.append(dataLine)
+        with server.lock:
+          server.messagesList.append(
+            (mailFrom, rcptToList, "".join(dataLinesList)) )
+        self.reply("250 OK")
+      elif cmnd == "QUIT":
+        self.reply("221 Bye")
+        return
+      else:
+        # RSET, NOOP, etc.
+        self.reply("250 OK")
+
+  def reply(self, line):
+    self.wfile.write((line+"\r\n").encode('utf-8'))
+    self.wfile.flush()
+
+
+# Create a LocalSmtpStandInServer object and start serving in a daemon thread
+def startLocalSmtpStandInServer():
+  smtpServer = LocalSmtpStandInServer()
+  serverThread = threading.Thread(target=smtpServer.serve_forever,
+    kwargs={'poll_interval':0.05})
+  serverThread.daemon = True
+  serverThread.start()
+  return smtpServer
@@ -0,0 +1,527 @@
+# @HEADER
+# ************************************************************************
+#
+#            TriBITS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+
+# Benchmark for the CDash analysis and reporting in CDashQueryAnalyzeReport
+#
+# Usage:
+#
+#   CDashQueryAnalyzeReport_Benchmark.py [options]
+#
+# Generates synthetic cdash/api/v1/index.php and cdash/api/v1/queryTests.php
+# JSON payloads (5000 builds, 200000 nonpassing tests, 1000 tests with issue
+# trackers, and 60 days of test history for 2000 of the tests by default) and
+# times the stages:
+#
+# * 'parse': json.loads() of the index.php and queryTests.php payloads
+# * 'flatten': flattenCDashIndexBuildsToListOfDicts() and
+#   flattenCDashQueryTestsToListOfDicts()
+# * 'slod': SearchableListOfDicts objects for the builds (with the 'test'
+#   index), the nonpassing tests and the tests with issue trackers
+# * 'split_partition': splitting the nonpassing tests into the test-sets
+#   (with/without issue trackers and Failed/Not Run) as done in
+#   cdash_analyze_and_report.py
+# * 'history_statistics': getTestHistoryStatisticsForTests() for the tests
+#   with test history
+# * 'html_rendering': the HTML report page for the tests with test history
+#   in each test-set using SingleTestsetReporter and
+#   writeFullCDashHtmlReportPage()
+#
+# The minimum time for each stage over --num-repeats runs is printed and can
+# be written to a JSON file with --write-results-to-file=<file>.json.  If
+# --baseline-file=<file>.json is given (a file written with
+# --write-results-to-file for the same scale), then a stage is reported as
+# regressed if its time is more than --max-slowdown times the baseline time
+# plus --noise-seconds and the script returns 1.  The last line of output is
+# 'PASSED: ...' or 'FAILED: ...'.
+#
+
+from FindCISupportDir import *
+import CDashQueryAnalyzeReport as CDQAR
+
+import sys
+import json
+import random
+import datetime
+import time
+from optparse import OptionParser
+
+
+g_stageNamesList = [
+  'parse',
+  'flatten',
+  'slod',
+  'split_partition',
+  'history_statistics',
+  'html_rendering',
+  ]
+
+
+g_scaleOptionsList = [
+  ('numBuilds', 'num_builds'),
+  ('numTests', 'num_tests'),
+  ('numTestsWithIssueTrackers', 'num_tests_with_issue_trackers'),
+  ('numTestsWithHistory', 'num_tests_with_history'),
+  ('testHistoryDays', 'test_history_days'),
+  ]
+
+
+def getCmndLineOptions(cmndLineArgs=None):
+  clp = OptionParser(usage="%prog [options]")
+  clp.add_option(
+    "--num-builds", dest="numBuilds", type="int", default=5000,
+    help="Number of builds in the index.php payload. [default = 5000]" )
+  clp.add_option(
+    "--num-tests", dest="numTests", type="int", default=200000,
+    help="Number of nonpassing tests in the queryTests.php payload."+\
+    " [default = 200000]" )
+  clp.add_option(
+    "--num-tests-with-issue-trackers", dest="numTestsWithIssueTrackers",
+    type="int", default=1000,
+    help="Number of the nonpassing tests with issue trackers. [default = 1000]" )
+  clp.add_option(
+    "--num-tests-with-history", dest="numTestsWithHistory", type="int",
+    default=2000,
+    help="Number of the nonpassing tests with test history (and shown in the"+\
+    " HTML tables). [default = 2000]" )
+  clp.add_option(
+    "--test-history-days", dest="testHistoryDays", type="int", default=60,
+    help="Number of days of test history for each test. [default = 60]" )
+  clp.add_option(
+    "--num-repeats", dest="numRepeats", type="int", default=1,
+    help="Number of times to run each stage (the minimum time is used)."+\
+    " [default = 1]" )
+  clp.add_option(
+    "--seed", dest="seed", type="int", default=1,
+    help="Seed for the random synthetic data. [default = 1]" )
+  clp.add_option(
+    "--write-results-to-file", dest="writeResultsToFile", type="string",
+    default="",
+    help="Write the scale and the times for the stages to this JSON file."+\
+    " [default = '']" )
+  clp.add_option(
+    "--baseline-file", dest="baselineFile", type="string", default="",
+    help="JSON file written with --write-results-to-file to compare the"+\
+    " times for the stages against. [default = '']" )
+  clp.add_option(
+    "--max-slowdown", dest="maxSlowdown", type="float", default=1.25,
+    help="A stage is regressed if its time is more than this times the"+\
+    " baseline time (plus --noise-seconds). [default = 1.25]" )
+  clp.add_option(
+    "--noise-seconds", dest="noiseSeconds", type="float", default=0.05,
+    help="Time added to the allowed time for each stage to avoid reporting"+\
+    " regressions for the timing noise of fast stages. [default = 0.05]" )
+  (options, args) = clp.parse_args(cmndLineArgs)
+  if args:
+    raise Exception("Error, unexpected arguments "+str(args)+"!")
+  if options.numTestsWithIssueTrackers > options.numTests:
+    raise Exception("Error, --num-tests-with-issue-trackers="+\
+      str(options.numTestsWithIssueTrackers)+" > --num-tests="+\
+      str(options.numTests)+"!")
+  if options.numTestsWithHistory > options.numTests:
+    raise Exception("Error, --num-tests-with-history="+\
+      str(options.numTestsWithHistory)+" > --num-tests="+\
+      str(options.numTests)+"!")
+  return options
+
+
+def getScaleDict(inOptions):
+  return dict( (scaleKey, getattr(inOptions, optionName)) \
+    for (optionName, scaleKey) in g_scaleOptionsList )
+
+
+#
+# Synthetic CDash data
+#
+
+
+g_benchmarkDate = "2019-03-01"
+g_benchmarkTestingDayStartTimeUtc = "04:00"
+g_buildGroupNamesList = ["Nightly", "Continuous", "Experimental"]
+
+
+def getSiteName(build_i):
+  return "site_"+str(build_i % 50)
+
+
+def getBuildName(build_i):
+  return "Project-build-"+str(build_i).zfill(5)
+
+
+# Return the JSON string for a cdash/api/v1/index.php query with numBuilds
+# builds in the build groups g_buildGroupNamesList
+def getSyntheticCDashIndexBuildsJsonStr(numBuilds, rand):
+  buildgroups = [ {'name':groupName, 'builds':[]} \
+    for groupName in g_buildGroupNamesList ]
+  for build_i in range(numBuilds):
+    buildgroup = buildgroups[build_i % len(buildgroups)]
+    buildgroup['builds'].append( {
+      'site' : getSiteName(build_i),
+      'buildname' : getBuildName(build_i),
+      'buildstarttime' : g_benchmarkDate+"T05:"+str(build_i % 60).zfill(2)+\
+        ":00 UTC",
+      'id' : 4000000 + build_i,
+      'update' : { 'errors' : 0 },
+      'configure' : { 'error' : int(rand.random() < 0.02), 'warning' : 0 },
+      'compilation' : { 'error' : int(rand.random() < 0.05),
+        'warning' : rand.randint(0, 200) },
+      'test' : { 'fail' : rand.randint(0, 50), 'notrun' : rand.randint(0, 5),
+        'pass' : rand.randint(500, 2000) },
+      } )
+  return json.dumps( {
+    'all_buildgroups' : [ {'id':i+1, 'name':groupName} \
+      for (i, groupName) in enumerate(g_buildGroupNamesList) ],
+    'buildgroups' : buildgroups,
+    } )
+
+
+def getSyntheticTestDict(test_i, numBuilds, date, status):
+  build_i = test_i % numBuilds
+  buildId = 4000000 + build_i
+  return {
+    'buildName' : getBuildName(build_i),
+    'buildSummaryLink' : 'buildSummary.php?buildid='+str(buildId),
+    'buildstarttime' : date+"T05:"+str(build_i % 60).zfill(2)+":00 UTC",
+    'details' : "Completed ("+status+")\n",
+    'site' : getSiteName(build_i),
+    'status' : status,
+    'testDetailsLink' : 'testDetails.php?test='+str(50000000+test_i)+\
+      '&build='+str(buildId),
+    'testname' : "Package"+str(test_i % 37)+"_test_"+str(test_i // numBuilds),
+    'time' : 10.1,
+    }
+
+
+# Return the JSON string for a cdash/api/v1/queryTests.php query with
+# numTests nonpassing tests spread over the builds
+def getSyntheticCDashQueryTestsJsonStr(numTests, numBuilds, rand):
+  testsLOD = []
+  for test_i in range(numTests):
+    if rand.random() < 0.9: status = "Failed"
+    else: status = "Not Run"
+    testsLOD.append(getSyntheticTestDict(test_i, numBuilds, g_benchmarkDate,
+      status))
+  return json.dumps( { 'version' : '2.6', 'builds' : testsLOD } )
+
+
+# Return the list of dicts for the tests with issue trackers (a random sample
+# of numTestsWithIssueTrackers of the numTests nonpassing tests)
+def getSyntheticTestsWithIssueTrackersLOD(numTestsWithIssueTrackers, numTests,
+    numBuilds, rand,
+  ):
+  testsWithIssueTrackersLOD = []
+  for test_i in sorted(rand.sample(range(numTests), numTestsWithIssueTrackers)):
+    testDict = getSyntheticTestDict(test_i, numBuilds, g_benchmarkDate, "Failed")
+    issueTrackerNum = str(1000 + test_i % 97)
+    testsWithIssueTrackersLOD.append( {
+      'site' : testDict['site'],
+      'buildName' : testDict['buildName'],
+      'testname' : testDict['testname'],
+      'issue_tracker' : '#'+issueTrackerNum,
+      'issue_tracker_url' : 'https://github.com/org/repo/issues/'+issueTrackerNum,
+      } )
+  return testsWithIssueTrackersLOD
+
+
+# Return the test history list of dicts for a test for testHistoryDays days
+# with about 5% of the days missing
+def getSyntheticTestHistoryLOD(testDict, testHistoryDays, rand):
+  currentDateDT = datetime.datetime.strptime(g_benchmarkDate, "%Y-%m-%d")
+  timeStr = testDict['buildstarttime'].split("T", 1)[1]
+  testHistoryLOD = []
+  for day_i in range(testHistoryDays):
+    if rand.random() < 0.05: continue
+    dateStr = (currentDateDT - datetime.timedelta(days=day_i)).strftime("%Y-%m-%d")
+    if day_i == 0: status = testDict['status']
+    elif rand.random() < 0.7: status = "Passed"
+    else: status = "Failed"
+    testHistoryDict = dict(testDict)
+    testHistoryDict['buildstarttime'] = dateStr+"T"+timeStr
+    testHistoryDict['status'] = status
+    testHistoryLOD.append(testHistoryDict)
+  return testHistoryLOD
+
+
+# Synthetic CDash data for the benchmark
+class SyntheticCDashData(object):
+
+  def __init__(self, inOptions):
+    rand = random.Random(inOptions.seed)
+    self.cdashIndexBuildsJsonStr = \
+      getSyntheticCDashIndexBuildsJsonStr(inOptions.numBuilds, rand)
+    self.cdashQueryTestsJsonStr = getSyntheticCDashQueryTestsJsonStr(
+      inOptions.numTests, inOptions.numBuilds, rand)
+    self.testsWithIssueTrackersLOD = getSyntheticTestsWithIssueTrackersLOD(
+      inOptions.numTestsWithIssueTrackers, inOptions.numTests,
+      inOptions.numBuilds, rand)
+    testsWithHistoryLOD = json.loads(self.cdashQueryTestsJsonStr)['builds'][
+      0:inOptions.numTestsWithHistory]
+    self.testHistoryLODList = [
+      getSyntheticTestHistoryLOD(testDict, inOptions.testHistoryDays, rand) \
+      for testDict in testsWithHistoryLOD ]
+
+
+#
+# Stages
+#
+
+
+# Run all of the stages once on a fresh copy of the data and return the dict
+# {<stageName>:<seconds>, ...}
+def runStages(inOptions, syntheticData):
+
+  stageTimesDict = {}
+  def timeStage(stageName, func):
+    t0 = time.time()
+    result = func()
+    stageTimesDict[stageName] = time.time() - t0
+    return result
+
+  # parse
+  (fullCDashIndexBuildsJson, fullCDashQueryTestsJson) = timeStage('parse',
+    lambda: ( json.loads(syntheticData.cdashIndexBuildsJsonStr),
+      json.loads(syntheticData.cdashQueryTestsJsonStr) ) )
+
+  # flatten
+  (buildsLOD, nonpassingTestsLOD) = timeStage('flatten',
+    lambda: (
+      CDQAR.flattenCDashIndexBuildsToListOfDicts(fullCDashIndexBuildsJson),
+      CDQAR.flattenCDashQueryTestsToListOfDicts(fullCDashQueryTestsJson) ) )
+  assertEqualNum("builds", len(buildsLOD), inOptions.numBuilds)
+  assertEqualNum("nonpassing tests", len(nonpassingTestsLOD), inOptions.numTests)
+
+  # slod
+  testsWithIssueTrackersLOD = [ dict(testDict) for testDict in \
+    syntheticData.testsWithIssueTrackersLOD ]
+  def createSLODs():
+    buildsSLOD = CDQAR.createSearchableListOfBuilds(buildsLOD)
+    testToBuildSLOD = CDQAR.addTestToBuildIndex(buildsSLOD)
+    nonpassingTestsSLOD = CDQAR.createSearchableListOfTests(
+      nonpassingTestsLOD, removeExactDuplicateElements=True,
+      checkDictsAreSame_in=CDQAR.checkCDashTestDictsAreSame )
+    testsWithIssueTrackersSLOD = \
+      CDQAR.createSearchableListOfTests(testsWithIssueTrackersLOD)
+    return (testToBuildSLOD, nonpassingTestsSLOD, testsWithIssueTrackersSLOD)
+  (testToBuildSLOD, nonpassingTestsSLOD, testsWithIssueTrackersSLOD) = \
+    timeStage('slod', createSLODs)
+
+  # split_partition
+  testsetAcroList = ['twoif', 'twoinr', 'twif', 'twinr']
+  def splitPartition():
+    (nonpassingTestsMatchingBuildsLOD, nonpassingTestsNotMatchingBuildsLOD) = \
+      CDQAR.splitListOnMatch(nonpassingTestsLOD,
+        CDQAR.MatchDictKeysValuesFunctor(testToBuildSLOD))
+    CDQAR.foreachTransform(nonpassingTestsMatchingBuildsLOD,
+      CDQAR.AddIssueTrackerInfoToTestDictFunctor(testsWithIssueTrackersSLOD))
+    (testsWithIssueTrackersLOD, testsWithoutIssueTrackersLOD) = \
+      CDQAR.splitListOnMatch(nonpassingTestsMatchingBuildsLOD,
+        CDQAR.MatchDictKeysValuesFunctor(testsWithIssueTrackersSLOD))
+    (twoifLOD, twoinrLOD) = CDQAR.splitListOnMatch(
+      testsWithoutIssueTrackersLOD, CDQAR.isTestFailed)
+    (twifLOD, twinrLOD) = CDQAR.splitListOnMatch(
+      testsWithIssueTrackersLOD, CDQAR.isTestFailed)
+    return dict(zip(testsetAcroList, [twoifLOD, twoinrLOD, twifLOD, twinrLOD]))
+  testsetLODsDict = timeStage('split_partition', splitPartition)
+  assertEqualNum("nonpassing tests in test-sets",
+    sum([ len(lod) for lod in testsetLODsDict.values() ]), inOptions.numTests)
+  assertEqualNum("nonpassing tests with issue trackers",
+    len(testsetLODsDict['twif']) + len(testsetLODsDict['twinr']),
+    inOptions.numTestsWithIssueTrackers)
+
+  # history_statistics
+  testHistoryStatsList = timeStage('history_statistics',
+    lambda: CDQAR.getTestHistoryStatisticsForTests(
+      syntheticData.testHistoryLODList, g_benchmarkDate,
+      g_benchmarkTestingDayStartTimeUtc, inOptions.testHistoryDays ) )
+  assertEqualNum("tests with history statistics", len(testHistoryStatsList),
+    inOptions.numTestsWithHistory)
+
+  # html_rendering (the tests with test history in each test-set)
+  testsWithHistoryDict = {}
+  for ((sortedTestHistoryLOD, testHistoryStats, testStatus), testDict) in \
+    zip(testHistoryStatsList, nonpassingTestsLOD)\
+    :
+    testDict.update(testHistoryStats)
+    testDict['test_history_num_days'] = inOptions.testHistoryDays
+    testsWithHistoryDict[id(testDict)] = testDict
+  testsetWithHistoryLODsDict = dict( (testsetAcro, [ testDict \
+      for testDict in testsetLODsDict[testsetAcro] \
+      if id(testDict) in testsWithHistoryDict ]) \
+    for testsetAcro in testsetAcroList )
+  def renderHtml():
+    cdashReportData = CDQAR.CDashReportData()
+    testsetReporter = CDQAR.SingleTestsetReporter(cdashReportData, verbose=False)
+    for testsetAcro in testsetAcroList:
+      testsetLOD = testsetWithHistoryLODsDict[testsetAcro]
+      testsetReporter.reportSingleTestset(
+        CDQAR.getStandardTestsetTypeInfo(testsetAcro), len(testsetLOD),
+        testsetLOD )
+    htmlStrParts = []
+    CDQAR.writeFullCDashHtmlReportPage(htmlStrParts.append, cdashReportData,
+      pageTitle="Benchmark", pageStyle=CDQAR.getDefaultHtmlPageStyleStr())
+    return "".join(htmlStrParts)
+  htmlPageStr = timeStage('html_rendering', renderHtml)
+  if inOptions.numTestsWithHistory > 0:
+    assertEqualNum("HTML table rows", htmlPageStr.count("<tr>\n") - \
+      htmlPageStr.count("<tr>\n<th>"), inOptions.numTestsWithHistory)
+
+  return stageTimesDict
+
+
+def assertEqualNum(what, num, numExpected):
+  if num != numExpected:
+    raise Exception("Error, the number of "+what+" = "+str(num)+" is not"+\
+      " the expected "+str(numExpected)+"!")
+
+
+# Run the stages inOptions.numRepeats times and return the dict
+# {<stageName>:<min-seconds>, ...}
+def runBenchmark(inOptions, syntheticData):
+  minStageTimesDict = {}
+  for repeat_i in range(max(inOptions.numRepeats, 1)):
+    stageTimesDict = runStages(inOptions, syntheticData)
+    for (stageName, seconds) in stageTimesDict.items():
+      minStageTimesDict[stageName] = \
+        min(seconds, minStageTimesDict.get(stageName, seconds))
+  return minStageTimesDict
+
+
+# Return the list of the stage names in stageTimesDict that regressed compared
+# to baselineResultsDict
+def getRegressedStagesList(stageTimesDict, baselineResultsDict, maxSlowdown,
+    noiseSeconds,
+  ):
+  baselineStagesDict = baselineResultsDict['stages']
+  regressedStagesList = []
+  for stageName in g_stageNamesList:
+    baselineStageDict = baselineStagesDict.get(stageName, None)
+    if baselineStageDict == None:
+      continue
+    allowedSeconds = baselineStageDict['seconds'] * maxSlowdown + noiseSeconds
+    if stageTimesDict[stageName] > allowedSeconds:
+      regressedStagesList.append(stageName)
+  return regressedStagesList
+
+
+def readBaselineResultsFile(baselineFile, scaleDict):
+  with open(baselineFile, 'r') as baselineFileObj:
+    baselineResultsDict = json.load(baselineFileObj)
+  if baselineResultsDict['scale'] != scaleDict:
+    raise Exception("Error, the scale "+str(baselineResultsDict['scale'])+\
+      " in the baseline file '"+baselineFile+"' does not match the scale "+\
+      str(scaleDict)+" for this run!")
+  return baselineResultsDict
+
+
+def getStageTimesTableStr(stageTimesDict, baselineResultsDict,
+    regressedStagesList,
+  ):
+  lines = []
+  lines.append("Stage".ljust(20)+"  "+"Seconds".rjust(10)+"  "+\
+    "Baseline".rjust(10)+"  "+"Ratio".rjust(8))
+  lines.append("-"*54)
+  for stageName in g_stageNamesList:
+    seconds = stageTimesDict[stageName]
+    line = stageName.ljust(20)+"  "+("%.3f" % seconds).rjust(10)
+    if baselineResultsDict and stageName in baselineResultsDict['stages']:
+      baselineSeconds = baselineResultsDict['stages'][stageName]['seconds']
+      line += "  "+("%.3f" % baselineSeconds).rjust(10)
+      if baselineSeconds > 0:
+        line += "  "+("%.2f" % (seconds / baselineSeconds)).rjust(8)
+      else:
+        line += "  "+"-".rjust(8)
+      if stageName in regressedStagesList:
+        line += "  REGRESSED"
+    lines.append(line)
+  return "\n".join(lines)+"\n"
+
+
+#
+# Run the benchmark
+#
+
+if __name__ == '__main__':
+
+  inOptions = getCmndLineOptions()
+  scaleDict = getScaleDict(inOptions)
+
+  if inOptions.baselineFile:
+    baselineResultsDict = readBaselineResultsFile(inOptions.baselineFile,
+      scaleDict)
+  else:
+    baselineResultsDict = None
+
+  print("\nGenerating synthetic CDash data: "+\
+    ", ".join([ key+"="+str(scaleDict[key]) for key in sorted(scaleDict.keys()) ]))
+  t0 = time.time()
+  syntheticData = SyntheticCDashData(inOptions)
+  print("  Took "+("%.3f" % (time.time()-t0))+" sec")
+
+  print("\nRunning the stages "+str(inOptions.numRepeats)+" time(s) ...\n")
+  stageTimesDict = runBenchmark(inOptions, syntheticData)
+
+  if baselineResultsDict:
+    regressedStagesList = getRegressedStagesList(stageTimesDict,
+      baselineResultsDict, inOptions.maxSlowdown, inOptions.noiseSeconds)
+  else:
+    regressedStagesList = []
+
+  print(getStageTimesTableStr(stageTimesDict, baselineResultsDict,
+    regressedStagesList))
+
+  if inOptions.writeResultsToFile:
+    print("Writing results file '"+inOptions.writeResultsToFile+"' ...\n")
+    resultsDict = {
+      'scale' : scaleDict,
+      'num_repeats' : inOptions.numRepeats,
+      'python_version' : sys.version.split()[0],
+      'stages' : dict( (stageName, {'seconds':stageTimesDict[stageName]}) \
+        for stageName in g_stageNamesList ),
+      }
+    with open(inOptions.writeResultsToFile, 'w') as resultsFile:
+      json.dump(resultsDict, resultsFile, indent=2, sort_keys=True)
+
+  if regressedStagesList:
+    print("FAILED: Regressed stages: "+", ".join(regressedStagesList))
+    sys.exit(1)
+  if baselineResultsDict:
+    print("PASSED: No stages regressed compared to '"+inOptions.baselineFile+"'")
+  else:
+    print("PASSED: Ran all of the stages")
+  sys.exit(0)
@@ -40,13 +40,33 @@
 import os
 import sys
 import copy
+import pickle
 import shutil
 import unittest
 import pprint
+import time
+import json
+import gzip
+import io
+import threading
+import socket
+import errno
+
+try:
+  # Python 2
+  from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+  from SocketServer import ThreadingMixIn
+  from urlparse import parse_qs
+except ImportError:
+  # Python 3
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from socketserver import ThreadingMixIn
+  from urllib.parse import parse_qs
 
 from FindCISupportDir import *
 from CDashQueryAnalyzeReport import *
 from CDashQueryAnalyzeReportUnitTestHelpers import *
+import cdash_build_testing_date as CBTD
 from Python2and3 import u, stru
 
 g_testBaseDir = getScriptBaseDir()
@@ -347,6 +367,112 @@ class test_foreachTransform(unittest.TestCase):
       [dm(1),dm(4),dm(9),dm(16)])
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.foreachTransformConcurrently()
+#
+#############################################################################
+
+# Transform functor that takes longer for the earlier elements so that the
+# threads finish out of order
+class SlowSqrnumFunctor(object):
+  def __init__(self, numEles):
+    self.numEles = numEles
+  def __call__(self, num):
+    time.sleep(0.002*(self.numEles-num))
+    return num*num
+
+def sqrnumFailOnEven(num):
+  if num % 2 == 0:
+    raise Exception("Error, num="+str(num)+" is even!")
+  return num*num
+
+def sqrnumPrintSlowly(num):
+  print("sqrnum("+str(num)+"): begin")
+  time.sleep(0.002*(num%3))
+  print("sqrnum("+str(num)+"): end")
+  return num*num
+
+class StdoutPartsWriter(object):
+  def __init__(self):
+    self.strParts = []
+  def write(self, s):
+    self.strParts.append(s)
+  def flush(self):
+    None
+
+class test_foreachTransformConcurrently(unittest.TestCase):
+
+  def test_many_int_1_thread(self):
+    self.assertEqual(foreachTransformConcurrently([1,2,3,4,5],sqrnum,1),
+      [1,4,9,16,25])
+
+  def test_many_int_4_threads(self):
+    self.assertEqual(foreachTransformConcurrently([1,2,3,4,5],sqrnum,4),
+      [1,4,9,16,25])
+
+  def test_many_int_more_threads_than_eles(self):
+    self.assertEqual(foreachTransformConcurrently([1,2,3],sqrnum,10), [1,4,9])
+
+  def test_deterministic_order(self):
+    numList = list(range(20))
+    self.assertEqual(
+      foreachTransformConcurrently(numList, SlowSqrnumFunctor(20), 8),
+      [num*num for num in range(20)])
+
+  def test_0_int(self):
+    self.assertEqual(foreachTransformConcurrently([],sqrnum,4), [])
+
+  def test_max_concurrency_0(self):
+    numList = [1,2,3]
+    try:
+      foreachTransformConcurrently(numList, sqrnum, 0)
+      self.assertTrue(False, "Error, should have thrown!")
+    except Exception as errObj:
+      self.assertEqual(str(errObj), "Error, maxConcurrency=0 must be >= 1!")
+    self.assertEqual(numList, [1,2,3])
+
+  def test_output_not_interleaved(self):
+    numList = list(range(12))
+    origStdout = sys.stdout
+    sys.stdout = StdoutPartsWriter()
+    try:
+      foreachTransformConcurrently(numList, sqrnumPrintSlowly, 4)
+      stdoutWriter = sys.stdout
+    finally:
+      sys.stdout = origStdout
+    self.assertEqual(numList, [num*num for num in range(12)])
+    stdoutLinesList = "".join(stdoutWriter.strParts).splitlines()
+    self.assertEqual(len(stdoutLinesList), 24)
+    for i in range(0, 24, 2):
+      beginLine = stdoutLinesList[i]
+      self.assertTrue(beginLine.endswith("): begin"), beginLine)
+      self.assertEqual(stdoutLinesList[i+1], beginLine.replace("begin", "end"))
+
+  def test_many_dict(self):
+    dm = dictnum
+    numList = [dm(1),dm(2),dm(3),dm(4)]
+    foreachTransformConcurrently(numList,sqrdictnum,3)
+    self.assertEqual(numList, [dm(1),dm(4),dm(9),dm(16)])
+
+  def test_failed_eles(self):
+    numList = [1,2,3,4,5]
+    try:
+      foreachTransformConcurrently(numList, sqrnumFailOnEven, 3,
+        getElementDescr=lambda num: "num="+str(num))
+      self.assertTrue(False, "Error, should have thrown!")
+    except ForeachTransformError as errObj:
+      self.assertEqual(errObj.failedElementsList,
+        [ (1, "num=2", "Error, num=2 is even!"),
+          (3, "num=4", "Error, num=4 is even!") ] )
+      self.assertEqual(str(errObj),
+        "Error, failed to transform 2 of 5 elements:\n"+\
+        "\n  [1] num=2:\n    Error, num=2 is even!\n"+\
+        "\n  [3] num=4:\n    Error, num=4 is even!\n" )
+    # The other elements still got transformed
+    self.assertEqual(numList, [1,2,9,4,25])
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.NotMatchFunctor()
@@ -427,6 +553,416 @@ class test_removeElementsFromListGivenIndexes(unittest.TestCase):
       list_expected )
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.iterateJsonObjectArrayElements()
+#
+#############################################################################
+
+g_jsonStreamData = {
+  u('numTests'): 12345,
+  u('builds'): [
+    { u('testname'):u('test_')+str(i), u('time'):1.5e-3*i, u('status'):u('Failed'),
+      u('details'):u('Completed (Failed) \u00e9\n'), u('label'):None,
+      u('flag'):(i%2==0) } \
+    for i in range(50) ],
+  u('version'): [ -1.25e+2, u('a'), { u('b'):True } ],
+  }
+
+
+def iterateJsonArrayFromBytes(jsonBytes, arrayKey, otherData_out=None, chunkSize=7):
+  return list(iterateJsonObjectArrayElements(io.BytesIO(jsonBytes).read,
+    arrayKey, otherData_out, chunkSize=chunkSize))
+
+
+class test_iterateJsonObjectArrayElements(unittest.TestCase):
+
+  def test_all_chunk_sizes(self):
+    jsonBytes = json.dumps(g_jsonStreamData, indent=1).encode('utf-8')
+    for chunkSize in (1, 2, 3, 7, 64, 100000):
+      otherData = {}
+      arrayElements = iterateJsonArrayFromBytes(jsonBytes, 'builds', otherData,
+        chunkSize)
+      self.assertEqual(arrayElements, g_jsonStreamData['builds'])
+      self.assertEqual(otherData,
+        { 'numTests':12345, 'version':g_jsonStreamData['version'] } )
+
+  def test_is_generator(self):
+    jsonBytes = json.dumps(g_jsonStreamData).encode('utf-8')
+    bytesIO = io.BytesIO(jsonBytes)
+    arrayElementsIter = iterateJsonObjectArrayElements(bytesIO.read, 'builds',
+      chunkSize=100)
+    self.assertEqual(next(arrayElementsIter), g_jsonStreamData['builds'][0])
+    self.assertTrue(bytesIO.tell() < len(jsonBytes)/2)
+
+  def test_empty_object_and_array(self):
+    self.assertEqual(iterateJsonArrayFromBytes(b'{}', 'builds'), [])
+    self.assertEqual(iterateJsonArrayFromBytes(b' { "builds" : [ ] } ', 'builds'), [])
+    otherData = {}
+    self.assertEqual(
+      iterateJsonArrayFromBytes(b'{"other":[1,2]}', 'builds', otherData), [])
+    self.assertEqual(otherData, {'other':[1,2]})
+
+  def test_bad_json(self):
+    self.assertRaises(ValueError, iterateJsonArrayFromBytes,
+      b'{"builds":[{"a":1},{"a":2]}', 'builds')
+    self.assertRaises(ValueError, iterateJsonArrayFromBytes,
+      b'{"builds":[{"a":1}', 'builds')
+    self.assertRaises(ValueError, iterateJsonArrayFromBytes,
+      b'[1, 2]', 'builds')
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.TimingRegistry
+#
+#############################################################################
+
+
+class FakeClock(object):
+  def __init__(self):
+    self.time = 100.0
+  def __call__(self):
+    return self.time
+
+
+@timeFunctionCalls('timed_func')
+def timedSquareFunc(x):
+  return x*x
+
+
+class test_TimingRegistry(unittest.TestCase):
+
+  def test_timer(self):
+    clock = FakeClock()
+    timingRegistry = TimingRegistry(getTime_in=clock)
+    with timingRegistry.timer('a'):
+      clock.time += 2.0
+    with timingRegistry.timer('a'):
+      clock.time += 0.5
+    self.assertEqual(timingRegistry.getTimer('a'), (2, 2.5))
+    self.assertEqual(timingRegistry.getTimer('b'), (0, 0.0))
+
+  def test_timer_exception(self):
+    clock = FakeClock()
+    timingRegistry = TimingRegistry(getTime_in=clock)
+    try:
+      with timingRegistry.timer('a'):
+        clock.time += 1.0
+        raise Exception("Error, some error!")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, some error!")
+    self.assertEqual(timingRegistry.getTimer('a'), (1, 1.0))
+
+  def test_counters_and_cache_hit_ratios(self):
+    timingRegistry = TimingRegistry()
+    timingRegistry.incrementCounter('c.cache_hits', 3)
+    timingRegistry.incrementCounter('c.cache_misses')
+    timingRegistry.incrementCounter('d.cache_misses', 2)
+    timingRegistry.incrementCounter('bytes', 100)
+    self.assertEqual(timingRegistry.getCounter('c.cache_hits'), 3)
+    self.assertEqual(timingRegistry.getCounter('bytes'), 100)
+    self.assertEqual(timingRegistry.getCounter('none'), 0)
+    self.assertEqual(timingRegistry.getCacheHitRatios(), {'c':0.75, 'd':0.0})
+
+  def test_getDataDict_addDataDict(self):
+    clock = FakeClock()
+    timingRegistry = TimingRegistry(getTime_in=clock)
+    with timingRegistry.timer('a'):
+      clock.time += 1.5
+    timingRegistry.incrementCounter('c.cache_hits')
+    dataDict = timingRegistry.getDataDict()
+    self.assertEqual(dataDict, {
+      'timers' : {'a':{'count':1, 'seconds':1.5}},
+      'counters' : {'c.cache_hits':1},
+      'cache_hit_ratios' : {'c':1.0},
+      } )
+    timingRegistry.addDataDict(dataDict)
+    timingRegistry.incrementCounter('c.cache_misses', 2)
+    self.assertEqual(timingRegistry.getDataDict(), {
+      'timers' : {'a':{'count':2, 'seconds':3.0}},
+      'counters' : {'c.cache_hits':2, 'c.cache_misses':2},
+      'cache_hit_ratios' : {'c':0.5},
+      } )
+    timingRegistry.reset()
+    self.assertEqual(timingRegistry.getDataDict(),
+      {'timers':{}, 'counters':{}, 'cache_hit_ratios':{}} )
+
+  def test_getSummaryTableStr(self):
+    clock = FakeClock()
+    timingRegistry = TimingRegistry(getTime_in=clock)
+    with timingRegistry.timer('b'):
+      clock.time += 0.25
+    with timingRegistry.timer('a'):
+      clock.time += 1.0
+    timingRegistry.incrementCounter('c.cache_hits', 3)
+    timingRegistry.incrementCounter('c.cache_misses')
+    self.assertEqual(timingRegistry.getSummaryTableStr(),
+      "Timer                      Count       Seconds\n"+\
+      "----------------------------------------------\n"+\
+      "a                              1         1.000\n"+\
+      "b                              1         0.250\n"+\
+      "\n"+\
+      "Counter                    Value\n"+\
+      "--------------------------------\n"+\
+      "c.cache_hits                   3\n"+\
+      "c.cache_misses                 1\n"+\
+      "\n"+\
+      "Cache                  Hit Ratio\n"+\
+      "--------------------------------\n"+\
+      "c                          0.750\n" )
+
+  def test_timeFunctionCalls_default_registry(self):
+    clock = FakeClock()
+    timingRegistry = TimingRegistry(getTime_in=clock)
+    oldTimingRegistry = setDefaultTimingRegistry(timingRegistry)
+    try:
+      self.assertEqual(getDefaultTimingRegistry(), timingRegistry)
+      self.assertEqual(timedSquareFunc(3), 9)
+      self.assertEqual(timedSquareFunc(4), 16)
+    finally:
+      setDefaultTimingRegistry(oldTimingRegistry)
+    self.assertEqual(getDefaultTimingRegistry(), oldTimingRegistry)
+    self.assertEqual(timingRegistry.getTimer('timed_func'), (2, 0.0))
+    self.assertEqual(timedSquareFunc.__name__, 'timedSquareFunc')
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.CDashQuerySession
+#
+#############################################################################
+
+
+class LocalCDashStandInServer(ThreadingMixIn, HTTPServer):
+  daemon_threads = True
+  allow_reuse_address = True
+
+
+# Request handler for a local HTTP/1.1 server that stands in for CDash
+#
+# Supported paths:
+#
+# * /api/v1/<anything>: Returns the JSON data {'path':<path>} (gzip
+#   compressed if the client accepts it)
+# * /redirect: Redirects to /api/v1/redirected
+# * /notfound: Returns status 404
+# * /drop/<anything>: Same as /api/v1/<anything> but the server then closes
+#   the connection without telling the client (like an expired keep-alive
+#   connection)
+# * /slow/<anything>: Same as /api/v1/<anything> but the server waits 1 second
+#   before sending the response
+#
+class LocalCDashStandInRequestHandler(BaseHTTPRequestHandler):
+
+  protocol_version = "HTTP/1.1"
+
+  def setup(self):
+    BaseHTTPRequestHandler.setup(self)
+    with self.server.statsLock:
+      self.server.numConnections += 1
+
+  def do_GET(self):
+    with self.server.statsLock:
+      self.server.requestPaths.append(self.path)
+      self.server.requestHeaders.append(dict(self.headers.items()))
+    if self.path == "/redirect":
+      self.sendBody(302, b"", extraHeaders={'Location':'/api/v1/redirected'})
+    elif self.path == "/notfound":
+      self.sendBody(404, b"Not found")
+    elif self.path.startswith("/slow/"):
+      time.sleep(1.0)
+      try:
+        self.sendBody(200, json.dumps({'path':self.path}).encode('utf-8'))
+      except socket.error:
+        pass  # The client already timed out and closed the connection
+    elif self.path.startswith("/api/v1/") or self.path.startswith("/drop/"):
+      body = json.dumps({'path':self.path}).encode('utf-8')
+      extraHeaders = { 'Content-Type':'application/json' }
+      if 'gzip' in self.headers.get('Accept-Encoding', ''):
+        body = gzipCompressBytes(body)
+        extraHeaders['Content-Encoding'] = 'gzip'
+      self.sendBody(200, body, extraHeaders)
+      if self.path.startswith("/drop/"):
+        self.close_connection = True
+    else:
+      self.sendBody(400, b"Bad request")
+
+  def sendBody(self, status, body, extraHeaders={}):
+    self.send_response(status)
+    for (headerName, headerValue) in extraHeaders.items():
+      self.send_header(headerName, headerValue)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+
+class test_CDashQuerySession(unittest.TestCase):
+
+  def setUp(self):
+    self.server = LocalCDashStandInServer(('127.0.0.1', 0),
+      LocalCDashStandInRequestHandler)
+    self.server.statsLock = threading.Lock()
+    self.server.numConnections = 0
+    self.server.requestPaths = []
+    self.server.requestHeaders = []
+    self.serverThread = threading.Thread(target=self.server.serve_forever,
+      kwargs={'poll_interval':0.05})
+    self.serverThread.daemon = True
+    self.serverThread.start()
+    self.baseUrl = "http://127.0.0.1:"+str(self.server.server_address[1])
+
+  def tearDown(self):
+    self.server.shutdown()
+    self.server.server_close()
+
+  def test_keep_alive_gzip(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    timingRegistry = TimingRegistry()
+    oldTimingRegistry = setDefaultTimingRegistry(timingRegistry)
+    try:
+      for i in range(3):
+        data = cdashQuerySession.getJsonData(
+          self.baseUrl+"/api/v1/index.php?project=ProjName&date="+str(i))
+        self.assertEqual(data, {'path':'/api/v1/index.php?project=ProjName&date='+str(i)})
+    finally:
+      setDefaultTimingRegistry(oldTimingRegistry)
+    cdashQuerySession.close()
+    self.assertEqual(timingRegistry.getCounter('cdash_query.requests'), 3)
+    self.assertEqual(timingRegistry.getTimer('cdash_query.download')[0], 3)
+    self.assertTrue(timingRegistry.getCounter('cdash_query.bytes_downloaded') > 0)
+    self.assertEqual(cdashQuerySession.numRequests, 3)
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 1)
+    self.assertEqual(self.server.numConnections, 1)
+    self.assertEqual(self.server.requestHeaders[0]['Accept-Encoding'], 'gzip')
+
+  def test_redirect(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    data = cdashQuerySession.getJsonData(self.baseUrl+"/redirect")
+    cdashQuerySession.close()
+    self.assertEqual(data, {'path':'/api/v1/redirected'})
+    self.assertEqual(self.server.requestPaths, ['/redirect', '/api/v1/redirected'])
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 1)
+
+  def test_http_error_status(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    try:
+      cdashQuerySession.getJsonData(self.baseUrl+"/notfound")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the query URL '"+self.baseUrl+"/notfound' returned HTTP status"+\
+        " 404 Not Found!")
+    cdashQuerySession.close()
+
+  def test_not_http_url(self):
+    cdashQuerySession = CDashQuerySession()
+    try:
+      cdashQuerySession.getJsonData("ftp://some.site/file.json")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the URL 'ftp://some.site/file.json' is not an http or https URL!")
+
+  def test_reconnect_after_server_closes_connection(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    data = cdashQuerySession.getJsonData(self.baseUrl+"/drop/first")
+    self.assertEqual(data, {'path':'/drop/first'})
+    # Make sure the server has closed its end of the connection
+    for i in range(100):
+      if self.server.numConnections == 1 and len(self.server.requestPaths) == 1:
+        break
+      time.sleep(0.01)
+    time.sleep(0.05)
+    data = cdashQuerySession.getJsonData(self.baseUrl+"/api/v1/second")
+    cdashQuerySession.close()
+    self.assertEqual(data, {'path':'/api/v1/second'})
+    self.assertEqual(cdashQuerySession.numRequests, 2)
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 2)
+
+  def test_concurrent_max_connections_per_host(self):
+    cdashQuerySession = CDashQuerySession(timeout=10, maxConnectionsPerHost=2)
+    urlList = [ self.baseUrl+"/api/v1/queryTests.php?i="+str(i) \
+      for i in range(12) ]
+    foreachTransformConcurrently(urlList, cdashQuerySession.getJsonData, 4)
+    self.assertEqual(urlList,
+      [ {'path':'/api/v1/queryTests.php?i='+str(i)} for i in range(12) ] )
+    self.assertEqual(cdashQuerySession.numRequests, 12)
+    # No more than 2 connections are used at the same time
+    self.assertTrue(cdashQuerySession.numConnectionsCreated <= 2)
+    self.assertTrue(self.server.numConnections <= 2)
+    self.assertTrue(
+      len(cdashQuerySession.idleConnectionsDict[('http', self.baseUrl[7:])]) <= 2)
+    cdashQuerySession.close()
+    self.assertEqual(cdashQuerySession.idleConnectionsDict, {})
+
+  def test_timeout_on_reused_connection_not_retried(self):
+    cdashQuerySession = CDashQuerySession(timeout=0.2)
+    cdashQuerySession.getJsonData(self.baseUrl+"/api/v1/first")
+    self.assertRaises(socket.timeout, cdashQuerySession.getJsonData,
+      self.baseUrl+"/slow/second")
+    cdashQuerySession.close()
+    self.assertEqual(self.server.requestPaths, ['/api/v1/first', '/slow/second'])
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 1)
+
+  def test_max_connections_per_host_zero(self):
+    self.assertRaises(Exception, CDashQuerySession, maxConnectionsPerHost=0)
+
+  def test_isStaleHttpConnectionError(self):
+    self.assertEqual(isStaleHttpConnectionError(
+      socket.error(errno.ECONNRESET, "Connection reset by peer")), True)
+    self.assertEqual(isStaleHttpConnectionError(
+      socket.error(errno.EPIPE, "Broken pipe")), True)
+    self.assertEqual(isStaleHttpConnectionError(httplib.BadStatusLine("")),
+      True)
+    if getattr(httplib, 'RemoteDisconnected', None):
+      self.assertEqual(isStaleHttpConnectionError(httplib.RemoteDisconnected(
+        "Remote end closed connection without response")), True)
+    self.assertEqual(isStaleHttpConnectionError(socket.timeout("timed out")),
+      False)
+    self.assertEqual(isStaleHttpConnectionError(
+      socket.error(errno.ECONNREFUSED, "Connection refused")), False)
+    self.assertEqual(isStaleHttpConnectionError(
+      httplib.BadStatusLine("garbage")), False)
+    self.assertEqual(isStaleHttpConnectionError(httplib.IncompleteRead(b"")),
+      False)
+
+  def test_iterateJsonArrayElements_gzip_keep_alive(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    for i in range(2):
+      otherData = {}
+      arrayElements = list(cdashQuerySession.iterateJsonArrayElements(
+        self.baseUrl+"/api/v1/queryTests.php?i="+str(i), 'path', otherData))
+      self.assertEqual(arrayElements, [])
+      self.assertEqual(otherData, {'path':'/api/v1/queryTests.php?i='+str(i)})
+    cdashQuerySession.close()
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 1)
+
+  def test_GzipDecompressingStream(self):
+    dataBytes = json.dumps(g_jsonStreamData).encode('utf-8')
+    gzipStream = GzipDecompressingStream(io.BytesIO(gzipCompressBytes(dataBytes)))
+    self.assertEqual(
+      list(iterateJsonObjectArrayElements(gzipStream.read, 'builds', chunkSize=10)),
+      g_jsonStreamData['builds'] )
+    self.assertEqual(gzipStream.read(), b'')
+
+  def test_extractCDashApiQueryData_default_session(self):
+    cdashQuerySession = CDashQuerySession(timeout=10)
+    setDefaultCDashQuerySession(cdashQuerySession)
+    try:
+      self.assertEqual(getDefaultCDashQuerySession(), cdashQuerySession)
+      for i in range(2):
+        data = extractCDashApiQueryData(self.baseUrl+"/api/v1/index.php")
+        self.assertEqual(data, {'path':'/api/v1/index.php'})
+    finally:
+      setDefaultCDashQuerySession(None)
+    self.assertEqual(cdashQuerySession.numConnectionsCreated, 1)
+    self.assertEqual(cdashQuerySession.idleConnectionsDict, {})
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.readCsvFileIntoListOfDicts()
@@ -692,6 +1228,94 @@ class test_readCsvFileIntoListOfDicts(unittest.TestCase):
       self.assertFalse("ERROR: Did not thown an excpetion")
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.iterateCsvFileRowsAsDicts()
+#
+#############################################################################
+
+class test_iterateCsvFileRowsAsDicts(unittest.TestCase):
+
+  def test_col_3_row_2_w_blanks_required_cols_pass(self):
+    csvFileStr=\
+        "col_0, col_1, col_2\n"+\
+        "\n"+\
+        "val_00, val_01, val_02\n"+\
+        "val_10, val_11, val_12\n\n"
+    csvFileName = "iterateCsvFileRowsAsDicts_col_3_row_2_w_blanks_required_cols_pass.csv"
+    with open(csvFileName, 'w') as csvFileToWrite:
+      csvFileToWrite.write(csvFileStr)
+    rowsIter = iterateCsvFileRowsAsDicts(csvFileName, ['col_0', 'col_1', 'col_2'])
+    self.assertEqual(next(rowsIter),
+      { 'col_0' : 'val_00', 'col_1' : 'val_01', 'col_2' : 'val_02' })
+    self.assertEqual(next(rowsIter),
+      { 'col_0' : 'val_10', 'col_1' : 'val_11', 'col_2' : 'val_12' })
+    self.assertRaises(StopIteration, next, rowsIter)
+
+  def test_col_3_row_2_bad_header_fail_on_first_row(self):
+    csvFileStr=\
+        "col_0, col_1, col_3\n"+\
+        "val_00, val_01, val_02\n"
+    csvFileName = "iterateCsvFileRowsAsDicts_col_3_row_2_bad_header_fail.csv"
+    with open(csvFileName, 'w') as csvFileToWrite:
+      csvFileToWrite.write(csvFileStr)
+    rowsIter = iterateCsvFileRowsAsDicts(csvFileName, ['col_0', 'col_1', 'col_2'])
+    threwException = True
+    try:
+      next(rowsIter)
+      threwException = False
+    except Exception as errMsg:
+      self.assertEqual( str(errMsg),
+        "Error, for CSV file '"+csvFileName+"' the"+\
+        " column header 'col_3' is not in the set of required column headers"+\
+        " '['col_0', 'col_1', 'col_2']' or optional column headers '[]'!" )
+    if not threwException:
+      self.assertFalse("ERROR: Did not thown an excpetion")
+
+  def test_col_3_row_2_bad_row_len_fail_on_bad_row(self):
+    csvFileStr=\
+        "col_0, col_1, col_2\n"+\
+        "val_00, val_01, val_02\n"+\
+        "val_10, val_11\n"
+    csvFileName = "iterateCsvFileRowsAsDicts_col_3_row_2_bad_row_len_fail.csv"
+    with open(csvFileName, 'w') as csvFileToWrite:
+      csvFileToWrite.write(csvFileStr)
+    rowsIter = iterateCsvFileRowsAsDicts(csvFileName)
+    self.assertEqual(next(rowsIter),
+      { 'col_0' : 'val_00', 'col_1' : 'val_01', 'col_2' : 'val_02' })
+    threwException = True
+    try:
+      next(rowsIter)
+      threwException = False
+    except Exception as errMsg:
+      self.assertEqual( str(errMsg),
+        "Error, for CSV file '"+csvFileName+"' the data row 1"+\
+        " ['val_10', 'val_11'] has 2 entries"+\
+        " which does not macth the number of column headers 3!" )
+    if not threwException:
+      self.assertFalse("ERROR: Did not thown an excpetion")
+
+  def test_load_into_searchable_list_of_tests(self):
+    csvFileStr=\
+        "site, buildName, testname, issue_tracker_url, issue_tracker\n"+\
+        "site1, build1, test1, url1, #1\n"+\
+        "site2, build2, test2, url2, #2\n"+\
+        "site1, build1, test1, url1, #1\n"
+    csvFileName = "iterateCsvFileRowsAsDicts_load_into_searchable_list_of_tests.csv"
+    with open(csvFileName, 'w') as csvFileToWrite:
+      csvFileToWrite.write(csvFileStr)
+    testsSLOD = createSearchableListOfTests(
+      iterateTestsWithIssueTrackersFromCsvFile(csvFileName),
+      removeExactDuplicateElements=True )
+    self.assertEqual(len(testsSLOD), 2)
+    self.assertEqual(testsSLOD.getListOfDicts(),
+      readCsvFileIntoListOfDicts(csvFileName)[0:2])
+    self.assertEqual(
+      testsSLOD.lookupDictGivenKeyValuesList(['site2', 'build2', 'test2'])\
+        ['issue_tracker'],
+      '#2' )
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.writeCsvFileStructureToStr()
@@ -738,6 +1362,43 @@ class test_writeCsvFileStructureToStr(unittest.TestCase):
     self.assertEqual(csvFileStr, csvFileStr_expected)
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.writeCsvFileRowsToFile()
+#
+#############################################################################
+
+class test_writeCsvFileRowsToFile(unittest.TestCase):
+
+  def test_rows_3_generator(self):
+    headersList = ('field1', 'field2', 'field3', 'field4', )
+    rowsList = [
+      ('dat11', 'dat12', '', ''),
+      ('', 'dat22', '', 'dat24'),
+      ('dat31', '', '', 'dat44'),
+      ]
+    csvFileName = "writeCsvFileRowsToFile_rows_3_generator.csv"
+    writeCsvFileRowsToFile(csvFileName, headersList,
+      (row for row in rowsList) )
+    with open(csvFileName, 'r') as csvFile:
+      self.assertEqual(csvFile.read(),
+        writeCsvFileStructureToStr(CsvFileStructure(headersList, rowsList)))
+
+  def test_write_read_tests_list_of_dicts(self):
+    testsLOD = [
+      {'site':'site1', 'buildName':'build1', 'testname':'test1', 'status':'Failed'},
+      {'site':'site2', 'buildName':'build2', 'testname':'test2', 'status':'Failed'},
+      ]
+    csvFileName = "writeCsvFileRowsToFile_write_read_tests_list_of_dicts.csv"
+    writeTestsListOfDictsToCsvFile(testsLOD, csvFileName)
+    self.assertEqual(list(iterateTestsWithIssueTrackersFromCsvFile(csvFileName)),
+      [ {'site':'site1', 'buildName':'build1', 'testname':'test1',
+         'issue_tracker_url':'', 'issue_tracker':''},
+        {'site':'site2', 'buildName':'build2', 'testname':'test2',
+         'issue_tracker_url':'', 'issue_tracker':''},
+        ] )
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.getExpectedBuildsListOfDictsfromCsvFile()
@@ -815,6 +1476,130 @@ class test_writeTestsLODToCsvFileStructure(unittest.TestCase):
     self.assertEqual(csvFileStruct.rowsList, csvFileStruct_expected.rowsList)
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.writeTestDataToFile() and
+# readTestDataFromFile()
+#
+#############################################################################
+
+g_testDataLOD = [
+  {'site':'site1', 'buildName':'build1', 'testname':'test1', 'status':'Failed',
+   'details':'Completed (Failed)\n', 'cdash_testing_day':'2018-10-28',
+   'test_history_num_days':30, 'test_history_list':[{'status':'Failed'}]},
+  {'site':'site1', 'buildName':'build1', 'testname':'test2', 'status':'Not Run',
+   'details':'Required Files Missing', 'cdash_testing_day':'2018-10-28',
+   'test_history_num_days':30, 'test_history_list':[]},
+  {'site':'site2', 'buildName':'build2', 'testname':'test1', 'status':None,
+   'cdash_testing_day':'2018-10-28'},
+  ]
+
+
+class test_testDataFiles(unittest.TestCase):
+
+  def test_getTestDataColumnsFromListOfDicts(self):
+    columnsDict = getTestDataColumnsFromListOfDicts(g_testDataLOD)
+    self.assertEqual(columnsDict['num_tests'], 3)
+    strings = columnsDict['strings']
+    self.assertEqual(sorted(strings),
+      sorted(['site1', 'site2', 'build1', 'build2', 'test1', 'test2',
+       'Completed (Failed)\n', 'Required Files Missing', '2018-10-28']) )
+    self.assertEqual(sorted(columnsDict['field_names']),
+      sorted(['site', 'buildName', 'testname', 'status', 'details',
+        'cdash_testing_day', 'test_history_num_days', 'test_history_list']) )
+    self.assertEqual(columnsDict['field_kinds'],
+      { 'site':'string', 'buildName':'string', 'testname':'string',
+        'status':'json', 'details':'string', 'cdash_testing_day':'string',
+        'test_history_num_days':'int', 'test_history_list':'json' } )
+    columns = columnsDict['columns']
+    # NOTE: The order of the strings depends on the order of the fields in
+    # the dicts so look up the strings instead of checking the indexes.
+    def getColumnStrs(fieldName):
+      return [ (strings[i] if i >= 0 else None) for i in columns[fieldName] ]
+    self.assertEqual(getColumnStrs('site'), ['site1', 'site1', 'site2'])
+    self.assertEqual(getColumnStrs('buildName'), ['build1', 'build1', 'build2'])
+    self.assertEqual(getColumnStrs('testname'), ['test1', 'test2', 'test1'])
+    self.assertEqual(getColumnStrs('details'),
+      ['Completed (Failed)\n', 'Required Files Missing', None])
+    self.assertEqual(columns['status'], ['"Failed"', '"Not Run"', 'null'])
+    self.assertEqual(columns['test_history_num_days'], [30, 30, 0])
+    self.assertEqual(columnsDict['present']['test_history_num_days'],
+      [True, True, False])
+    self.assertEqual(columns['test_history_list'], ['[{"status":"Failed"}]', '[]', ''])
+    self.assertEqual(getTestDataListOfDictsFromColumns(columnsDict),
+      g_testDataLOD)
+
+  def test_getTestDataColumnKind(self):
+    self.assertEqual(getTestDataColumnKind(['a', u('b')]), 'string')
+    self.assertEqual(getTestDataColumnKind([1, 2]), 'int')
+    self.assertEqual(getTestDataColumnKind([1, 2**63]), 'json')
+    self.assertEqual(getTestDataColumnKind([True, False]), 'json')
+    self.assertEqual(getTestDataColumnKind([1.5, 2.0]), 'float')
+    self.assertEqual(getTestDataColumnKind([1.5, 2]), 'json')
+    self.assertEqual(getTestDataColumnKind(['a', None]), 'json')
+
+  def test_pprint(self):
+    testDataFile = "test_testDataFiles_pprint.txt"
+    writeTestDataToFile(g_testDataLOD, testDataFile)
+    self.assertEqual(readTestDataFromFile(testDataFile), g_testDataLOD)
+
+  def test_jsonl(self):
+    testDataFile = "test_testDataFiles_jsonl.jsonl"
+    writeTestDataToFile(g_testDataLOD, testDataFile, 'jsonl')
+    with open(testDataFile, 'r') as fileObj:
+      self.assertEqual(len(fileObj.readlines()), 3)
+    self.assertEqual(readTestDataFromFile(testDataFile), g_testDataLOD)
+
+  def test_npz(self):
+    testDataFile = "test_testDataFiles_npz.npz"
+    if numpy == None:
+      self.assertRaises(Exception, writeTestDataToFile, g_testDataLOD,
+        testDataFile, 'npz')
+      return
+    writeTestDataToFile(g_testDataLOD, testDataFile, 'npz')
+    self.assertEqual(readTestDataFromFile(testDataFile), g_testDataLOD)
+    columnsDict = readTestDataColumnsFromNpzFile(testDataFile)
+    strings = columnsDict['strings']
+    columns = columnsDict['columns']
+    self.assertEqual(
+      list(strings[columns['testname'][columns['site'] == 0]]),
+      ['test1', 'test2'] )
+    self.assertEqual(columns['test_history_num_days'].dtype, numpy.int64)
+
+  # The test data can be TestRecord objects (with nested TestRecord objects
+  # in 'test_history_list') for --use-compact-records=on
+  def test_test_records(self):
+    testRecordsList = [ TestRecord(testDict) for testDict in g_testDataLOD ]
+    testRecordsList[0]['test_history_list'] = \
+      [ TestRecord(testDict) for testDict in g_testDataLOD[0]['test_history_list'] ]
+    self.assertEqual(type(testRecordsList[0]['test_history_list'][0]), TestRecord)
+    testDataFormatsList = [('jsonl', "jsonl")]
+    if numpy != None:
+      testDataFormatsList.append(('npz', "npz"))
+    else:
+      self.assertEqual(
+        getTestDataListOfDictsFromColumns(
+          getTestDataColumnsFromListOfDicts(testRecordsList) ),
+        g_testDataLOD )
+    for (testDataFileFormat, fileExt) in testDataFormatsList:
+      testDataFile = "test_testDataFiles_test_records."+fileExt
+      writeTestDataToFile(testRecordsList, testDataFile, testDataFileFormat)
+      self.assertEqual(readTestDataFromFile(testDataFile), g_testDataLOD)
+
+  def test_bad_format(self):
+    threwException = True
+    try:
+      writeTestDataToFile(g_testDataLOD, "test_testDataFiles_bad_format.txt",
+        'bad')
+      threwException = False
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, test data file format 'bad' is not one of the valid formats"+\
+        " ['pprint', 'jsonl', 'npz']!" )
+    if not threwException:
+      self.assertFalse("ERROR: Did not thown an excpetion")
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.getAndCacheCDashQueryDataOrReadFromCache()
@@ -830,6 +1615,12 @@ class test_getStandardTestsetTypeInfo(unittest.TestCase):
   def test_twip(self):
     self.assertEqual(getStandardTestsetTypeInfo('twip').testsetAcro, 'twip')
 
+  def test_flaky(self):
+    tsti = getStandardTestsetTypeInfo('flaky')
+    self.assertEqual(tsti.testsetAcro, 'flaky')
+    self.assertEqual(tsti.testsetTableType, 'flaky')
+    self.assertEqual(tsti.existanceTriggersGlobalFail, False)
+
   def test_testsetColor(self):
     tsti = getStandardTestsetTypeInfo('twif')
     self.assertEqual(tsti.testsetAcro, 'twif')
@@ -927,7 +1718,8 @@ class test_getAndCacheCDashQueryDataOrReadFromCache(unittest.TestCase):
       extractCDashApiQueryData_in=mockExtractCDashApiQueryDataFunctor
       )
     self.assertEqual(cdashQueryData, g_getAndCacheCDashQueryDataOrReadFromCache_data)
-    cdashQueryData_cache = eval(open(outputCacheFile, 'r').read())
+    self.assertEqual(open(outputCacheFile, 'rb').read()[:2], b'\x1f\x8b')
+    cdashQueryData_cache = readCDashQueryDataCacheFile(outputCacheFile)
     self.assertEqual(cdashQueryData_cache, g_getAndCacheCDashQueryDataOrReadFromCache_data)
 
   def test_getAndCacheCDashQueryDataOrReadFromCache_read_cache(self):
@@ -954,6 +1746,704 @@ class test_getAndCacheCDashQueryDataOrReadFromCache(unittest.TestCase):
       )
     self.assertEqual(cdashQueryData, g_getAndCacheCDashQueryDataOrReadFromCache_data)
 
+  def test_getAndCacheCDashQueryDataOrReadFromCache_migrate_legacy_cache(self):
+    outputCacheDir="test_getAndCacheCDashQueryDataOrReadFromCache_migrate_legacy_cache"
+    outputCacheFile=outputCacheDir+"/cachedCDashQueryData.json"
+    deleteThenCreateTestDir(outputCacheDir)
+    pprintPythonDataToFile(g_getAndCacheCDashQueryDataOrReadFromCache_data,
+      outputCacheFile)
+    setMigrateLegacyCDashQueryDataCacheFiles(True)
+    try:
+      cdashQueryData = getAndCacheCDashQueryDataOrReadFromCache(
+        "dummy-cdash-url", outputCacheFile,
+        useCachedCDashData=False,
+        alwaysUseCacheFileIfExists=True,
+        verbose=False,
+        )
+    finally:
+      setMigrateLegacyCDashQueryDataCacheFiles(False)
+    self.assertEqual(cdashQueryData, g_getAndCacheCDashQueryDataOrReadFromCache_data)
+    # The legacy file was rewritten in the default 'json-gz' format
+    self.assertEqual(open(outputCacheFile, 'rb').read()[:2], b'\x1f\x8b')
+    self.assertEqual(readCDashQueryDataCacheFile(outputCacheFile),
+      g_getAndCacheCDashQueryDataOrReadFromCache_data)
+    self.assertEqual(os.listdir(outputCacheDir), ["cachedCDashQueryData.json"])
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.CDashQueryDataCoalescer
+#
+#############################################################################
+
+
+# Stand-in for getting the data for a CDash query URL that counts the calls
+# and blocks until released (to test requests made while one is in flight)
+class BlockingGetCDashQueryData(object):
+  def __init__(self, cdashQueryData, exceptionToRaise=None):
+    self.cdashQueryData = cdashQueryData
+    self.exceptionToRaise = exceptionToRaise
+    self.numCalls = 0
+    self.called = threading.Event()
+    self.release = threading.Event()
+    self.release.set()
+  def __call__(self):
+    self.numCalls += 1
+    self.called.set()
+    self.release.wait()
+    if self.exceptionToRaise:
+      raise self.exceptionToRaise
+    return self.cdashQueryData
+
+
+class test_CDashQueryDataCoalescer(unittest.TestCase):
+
+  def setUp(self):
+    self.origTimingRegistry = setDefaultTimingRegistry(TimingRegistry())
+
+  def tearDown(self):
+    setDefaultTimingRegistry(self.origTimingRegistry)
+
+  def test_repeated_requests(self):
+    coalescer = CDashQueryDataCoalescer()
+    getData1 = BlockingGetCDashQueryData({'builds':[1]})
+    getData2 = BlockingGetCDashQueryData({'builds':[2]})
+    data1 = coalescer.getCDashQueryData("url1", getData1)
+    self.assertEqual(data1, {'builds':[1]})
+    self.assertTrue(coalescer.getCDashQueryData("url1", getData1) is data1)
+    self.assertTrue(coalescer.getCDashQueryData("url1", getData2) is data1)
+    self.assertEqual(coalescer.getCDashQueryData("url2", getData2),
+      {'builds':[2]})
+    self.assertEqual(getData1.numCalls, 1)
+    self.assertEqual(getData2.numCalls, 1)
+    self.assertEqual(coalescer.getStatsDict(),
+      { 'num_requests':4, 'num_queries':2, 'num_in_flight_hits':0,
+        'num_completed_hits':2 } )
+    timingRegistry = getDefaultTimingRegistry()
+    self.assertEqual(
+      timingRegistry.getCounter('cdash_query_coalescer.cache_hits'), 2)
+    self.assertEqual(
+      timingRegistry.getCounter('cdash_query_coalescer.cache_misses'), 2)
+
+  def test_concurrent_requests(self):
+    coalescer = CDashQueryDataCoalescer()
+    getData = BlockingGetCDashQueryData({'builds':[1]})
+    getData.release.clear()
+    dataList = [None] * 4
+    def getDataForThread(i):
+      dataList[i] = coalescer.getCDashQueryData("url", getData)
+    threadsList = [ threading.Thread(target=getDataForThread, args=(0,)) ]
+    threadsList[0].start()
+    getData.called.wait()
+    for i in range(1, 4):
+      threadsList.append(threading.Thread(target=getDataForThread, args=(i,)))
+      threadsList[i].start()
+    # Wait for all of the requests to be waiting on the in-flight request
+    while coalescer.getStatsDict()['num_in_flight_hits'] < 3:
+      time.sleep(0.001)
+    getData.release.set()
+    for thread in threadsList: thread.join()
+    self.assertEqual(getData.numCalls, 1)
+    for data in dataList:
+      self.assertTrue(data is dataList[0])
+    self.assertEqual(coalescer.getStatsDict(),
+      { 'num_requests':4, 'num_queries':1, 'num_in_flight_hits':3,
+        'num_completed_hits':0 } )
+
+  def test_failed_request_not_remembered(self):
+    coalescer = CDashQueryDataCoalescer()
+    getDataFail = BlockingGetCDashQueryData(None, Exception("Error, timed out!"))
+    try:
+      coalescer.getCDashQueryData("url", getDataFail)
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, timed out!")
+    getData = BlockingGetCDashQueryData({'builds':[1]})
+    self.assertEqual(coalescer.getCDashQueryData("url", getData),
+      {'builds':[1]})
+    self.assertEqual(getDataFail.numCalls, 1)
+    self.assertEqual(getData.numCalls, 1)
+    self.assertEqual(coalescer.getStatsDict()['num_queries'], 2)
+
+  def test_getAndCacheCDashQueryDataOrReadFromCache(self):
+    outputCacheDir="test_CDashQueryDataCoalescer_getAndCache"
+    outputCacheFile=outputCacheDir+"/cachedCDashQueryData.json"
+    deleteThenCreateTestDir(outputCacheDir)
+    mockExtractCDashApiQueryDataFunctor = MockExtractCDashApiQueryDataFunctor(
+       "dummy-cdash-url", g_getAndCacheCDashQueryDataOrReadFromCache_data)
+    numCallsList = [0]
+    def extractCDashApiQueryData(cdashQueryUrl):
+      numCallsList[0] += 1
+      return mockExtractCDashApiQueryDataFunctor(cdashQueryUrl)
+    coalescer = CDashQueryDataCoalescer()
+    origCoalescer = setDefaultCDashQueryDataCoalescer(coalescer)
+    try:
+      cdashQueryDataList = [
+        getAndCacheCDashQueryDataOrReadFromCache(
+          "dummy-cdash-url", outputCacheFile,
+          useCachedCDashData=False,
+          verbose=False,
+          extractCDashApiQueryData_in=extractCDashApiQueryData
+          ) \
+        for i in range(3) ]
+    finally:
+      self.assertTrue(setDefaultCDashQueryDataCoalescer(origCoalescer) is coalescer)
+    self.assertEqual(numCallsList[0], 1)
+    self.assertEqual(cdashQueryDataList[0],
+      g_getAndCacheCDashQueryDataOrReadFromCache_data)
+    self.assertTrue(cdashQueryDataList[2] is cdashQueryDataList[0])
+    self.assertEqual(readCDashQueryDataCacheFile(outputCacheFile),
+      g_getAndCacheCDashQueryDataOrReadFromCache_data)
+    self.assertEqual(coalescer.getStatsDict()['num_completed_hits'], 2)
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport cache file format functions
+#
+#############################################################################
+
+g_cacheFileFormatData = {
+  u('builds'): [
+    { u('site'):u('site_name'), u('buildName'):u('build_name'),
+      u('testname'):u('test_name'), u('status'):u('Failed'), u('time'):10.1,
+      u('nprocs'):4, u('details'):u('Completed (Failed)\n'), u('label'):None,
+      u('flag'):True },
+    ],
+  u('numTests'): 1,
+  }
+
+
+class test_CDashQueryDataCacheFileFormats(unittest.TestCase):
+
+  def cacheFileDir(self, testName):
+    cacheFileDir = "test_CDashQueryDataCacheFileFormats_"+testName
+    deleteThenCreateTestDir(cacheFileDir)
+    return cacheFileDir
+
+  def test_format_names(self):
+    self.assertEqual(getCDashQueryDataCacheFileFormatNames(),
+      ['json', 'json-gz', 'msgpack', 'pprint'])
+    self.assertEqual(getCDashQueryDataCacheFileFormat().name, 'json-gz')
+
+  def test_invalid_format_name(self):
+    try:
+      getCDashQueryDataCacheFileFormat("bad-format")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, cache file format 'bad-format' is not one of the valid"+\
+        " formats ['json', 'json-gz', 'msgpack', 'pprint']!")
+
+  def test_write_read_all_available_formats(self):
+    cacheFileDir = self.cacheFileDir("write_read_all_available_formats")
+    for cacheFileFormatName in getCDashQueryDataCacheFileFormatNames():
+      if not getCDashQueryDataCacheFileFormat(cacheFileFormatName).isAvailable():
+        continue
+      cacheFilePath = cacheFileDir+"/"+cacheFileFormatName+".json"
+      writeCDashQueryDataCacheFile(g_cacheFileFormatData, cacheFilePath,
+        cacheFileFormatName)
+      with open(cacheFilePath, 'rb') as cacheFile:
+        (cacheFileFormat, pythonData) = \
+          detectCDashQueryDataCacheFileFormat(cacheFile.read())
+      self.assertEqual(cacheFileFormat.name, cacheFileFormatName)
+      self.assertEqual(readCDashQueryDataCacheFile(cacheFilePath),
+        g_cacheFileFormatData)
+    # No temp files are left behind
+    self.assertEqual(
+      [ fileName for fileName in os.listdir(cacheFileDir) \
+        if fileName.endswith(".tmp") ],
+      [] )
+
+  def test_read_legacy_eval_format_no_migrate(self):
+    cacheFileDir = self.cacheFileDir("read_legacy_eval_format_no_migrate")
+    cacheFilePath = cacheFileDir+"/legacy.json"
+    pprintPythonDataToFile(g_cacheFileFormatData, cacheFilePath)
+    legacyFileBytes = open(cacheFilePath, 'rb').read()
+    self.assertEqual(readCDashQueryDataCacheFile(cacheFilePath),
+      g_cacheFileFormatData)
+    self.assertEqual(open(cacheFilePath, 'rb').read(), legacyFileBytes)
+
+  def test_read_legacy_does_not_execute_code(self):
+    cacheFileDir = self.cacheFileDir("read_legacy_does_not_execute_code")
+    cacheFilePath = cacheFileDir+"/legacy.json"
+    with open(cacheFilePath, 'w') as cacheFile:
+      cacheFile.write("{ 'builds': __import__('os').getcwd() }")
+    self.assertRaises(ValueError, readCDashQueryDataCacheFile, cacheFilePath)
+
+  def test_json_gz_deterministic(self):
+    cacheFileFormat = getCDashQueryDataCacheFileFormat("json-gz")
+    self.assertEqual(cacheFileFormat.dumps(g_cacheFileFormatData),
+      cacheFileFormat.dumps(g_cacheFileFormatData))
+
+  def test_set_default_format(self):
+    cacheFileDir = self.cacheFileDir("set_default_format")
+    cacheFilePath = cacheFileDir+"/cache.json"
+    setDefaultCDashQueryDataCacheFileFormat("json")
+    try:
+      writeCDashQueryDataCacheFile(g_cacheFileFormatData, cacheFilePath)
+    finally:
+      setDefaultCDashQueryDataCacheFileFormat("json-gz")
+    self.assertEqual(open(cacheFilePath, 'rb').read()[:1], b'{')
+    self.assertEqual(readCDashQueryDataCacheFile(cacheFilePath),
+      g_cacheFileFormatData)
+
+
+class test_CDashQueryDataCacheFileArrayWriter(unittest.TestCase):
+
+  def test_write_iterate_all_available_formats(self):
+    cacheFileDir = "test_CDashQueryDataCacheFileArrayWriter_write_iterate"
+    deleteThenCreateTestDir(cacheFileDir)
+    otherData = { 'numTests':12345, 'version':g_jsonStreamData['version'] }
+    for cacheFileFormatName in getCDashQueryDataCacheFileFormatNames():
+      if not getCDashQueryDataCacheFileFormat(cacheFileFormatName).isAvailable():
+        continue
+      cacheFilePath = cacheFileDir+"/"+cacheFileFormatName+".json"
+      cacheFileWriter = CDashQueryDataCacheFileArrayWriter(cacheFilePath,
+        'builds', cacheFileFormatName)
+      try:
+        for testDict in g_jsonStreamData['builds']:
+          cacheFileWriter.addArrayElement(testDict)
+        self.assertEqual(os.path.exists(cacheFilePath), False)
+        cacheFileWriter.commit(otherData)
+      finally:
+        cacheFileWriter.abort()
+      self.assertEqual(readCDashQueryDataCacheFile(cacheFilePath),
+        g_jsonStreamData)
+      otherData_out = {}
+      self.assertEqual(
+        list(iterateCDashQueryDataCacheFileArray(cacheFilePath, 'builds',
+          otherData_out)),
+        g_jsonStreamData['builds'] )
+      self.assertEqual(otherData_out, otherData)
+    self.assertEqual(sorted(os.listdir(cacheFileDir)),
+      sorted([ fileFormatName+".json" for fileFormatName \
+        in getCDashQueryDataCacheFileFormatNames() \
+        if getCDashQueryDataCacheFileFormat(fileFormatName).isAvailable() ]) )
+
+  def test_abort(self):
+    cacheFileDir = "test_CDashQueryDataCacheFileArrayWriter_abort"
+    deleteThenCreateTestDir(cacheFileDir)
+    cacheFileWriter = CDashQueryDataCacheFileArrayWriter(
+      cacheFileDir+"/cache.json", 'builds')
+    cacheFileWriter.addArrayElement(g_jsonStreamData['builds'][0])
+    cacheFileWriter.abort()
+    self.assertEqual(os.listdir(cacheFileDir), [])
+
+  def test_iterate_legacy_format(self):
+    cacheFileDir = "test_CDashQueryDataCacheFileArrayWriter_iterate_legacy_format"
+    deleteThenCreateTestDir(cacheFileDir)
+    cacheFilePath = cacheFileDir+"/cache.json"
+    pprintPythonDataToFile(g_jsonStreamData, cacheFilePath)
+    otherData_out = {}
+    self.assertEqual(
+      list(iterateCDashQueryDataCacheFileArray(cacheFilePath, 'builds',
+        otherData_out)),
+      g_jsonStreamData['builds'] )
+    self.assertEqual(otherData_out,
+      { 'numTests':12345, 'version':g_jsonStreamData['version'] } )
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.CDashQueryCacheManager
+#
+#############################################################################
+
+
+g_cacheManagerNow = 1577836800.0  # 2020-01-01 UTC
+
+
+# Create a cache dir with the cache files 'file<i>.json' last used
+# lastUsedDaysAgoList[i] days before g_cacheManagerNow
+def createCacheManagerTestDir(testName, lastUsedDaysAgoList,
+    cacheFileFormatName="json",
+  ):
+  cacheDir = "test_CDashQueryCacheManager_"+testName
+  deleteThenCreateTestDir(cacheDir)
+  for i in range(len(lastUsedDaysAgoList)):
+    cacheFilePath = cacheDir+"/file"+str(i)+".json"
+    writeCDashQueryDataCacheFile({'builds':[ {'i':i} ]}, cacheFilePath,
+      cacheFileFormatName)
+    lastUsedTime = g_cacheManagerNow - lastUsedDaysAgoList[i]*24*60*60
+    os.utime(cacheFilePath, (lastUsedTime, lastUsedTime))
+  return cacheDir
+
+
+def getCacheManager(cacheDir, maxTotalBytes=None, maxAgeDays=None):
+  return CDashQueryCacheManager(cacheDir, maxTotalBytes=maxTotalBytes,
+    maxAgeDays=maxAgeDays, getTime_in=lambda: g_cacheManagerNow)
+
+
+class test_CDashQueryCacheManager(unittest.TestCase):
+
+  def test_stats(self):
+    cacheDir = createCacheManagerTestDir("stats", [1, 5, 2])
+    numBytes = os.path.getsize(cacheDir+"/file0.json")
+    self.assertEqual(getCacheManager(cacheDir).getStats(),
+      { 'num_files':3, 'total_bytes':3*numBytes, 'num_archived_files':0,
+        'archive_bytes':0, 'oldest_file_age_days':5 } )
+
+  def test_evict_no_caps(self):
+    cacheDir = createCacheManagerTestDir("evict_no_caps", [1, 5, 2])
+    self.assertEqual(getCacheManager(cacheDir).evictCacheFiles(),
+      { 'num_evicted_files':0, 'evicted_bytes':0 } )
+    self.assertEqual(len(os.listdir(cacheDir)), 3)
+
+  def test_evict_max_age(self):
+    cacheDir = createCacheManagerTestDir("evict_max_age", [1, 5, 2, 8])
+    numBytes = os.path.getsize(cacheDir+"/file0.json")
+    self.assertEqual(getCacheManager(cacheDir, maxAgeDays=3).evictCacheFiles(),
+      { 'num_evicted_files':2, 'evicted_bytes':2*numBytes } )
+    self.assertEqual(sorted(os.listdir(cacheDir)), ['file0.json', 'file2.json'])
+
+  def test_evict_lru_max_size(self):
+    cacheDir = createCacheManagerTestDir("evict_lru_max_size", [1, 5, 2, 8])
+    numBytes = os.path.getsize(cacheDir+"/file0.json")
+    cacheManager = getCacheManager(cacheDir, maxTotalBytes=2*numBytes+1)
+    self.assertEqual(cacheManager.evictCacheFiles(),
+      { 'num_evicted_files':2, 'evicted_bytes':2*numBytes } )
+    # The least recently used files are evicted first
+    self.assertEqual(sorted(os.listdir(cacheDir)), ['file0.json', 'file2.json'])
+
+  def test_evict_skips_archive_and_temp_files(self):
+    cacheDir = createCacheManagerTestDir("evict_skips_archive_and_temp_files",
+      [1, 5])
+    getCacheManager(cacheDir).compactCacheFiles(3)
+    with open(cacheDir+"/.file2.json.abc.tmp", 'w') as tmpFile:
+      tmpFile.write("partial")
+    getCacheManager(cacheDir, maxTotalBytes=0).evictCacheFiles()
+    # The archived cache file is evicted (which removes the emptied archive)
+    # but the temp file is left alone
+    self.assertEqual(sorted(os.listdir(cacheDir)), ['.file2.json.abc.tmp'])
+
+  def test_evict_archive_larger_than_max_size(self):
+    cacheDir = createCacheManagerTestDir("evict_archive_larger_than_max_size",
+      [10, 12, 11, 0, 0, 0])
+    numBytes = os.path.getsize(cacheDir+"/file0.json")
+    getCacheManager(cacheDir).compactCacheFiles(3)
+    archiveFilePath = cacheDir+"/cdash_queries_cache_archive.zip"
+    self.assertEqual(os.path.getsize(archiveFilePath) > 3*numBytes, True)
+    # Only the least recently used archived cache file is evicted
+    cacheManager = getCacheManager(cacheDir)
+    archiveEntryNumBytesDict = dict([ (entryName, entryNumBytes) \
+      for (entryName, entryNumBytes, _) in cacheManager.getArchiveEntryInfosList() ])
+    totalBytes = os.path.getsize(archiveFilePath) + 3*numBytes
+    cacheManager = getCacheManager(cacheDir,
+      maxTotalBytes=totalBytes-archiveEntryNumBytesDict['file1.json'])
+    self.assertEqual(cacheManager.evictCacheFiles()['num_evicted_files'], 1)
+    self.assertEqual(
+      sorted([ entryInfo[0] for entryInfo in cacheManager.getArchiveEntryInfosList() ]),
+      ['file0.json', 'file2.json'] )
+    # The archive alone is larger than the cap so all of the archived cache
+    # files are evicted but the recently used cache files are kept
+    cacheManager = getCacheManager(cacheDir, maxTotalBytes=3*numBytes)
+    self.assertEqual(cacheManager.evictCacheFiles()['num_evicted_files'], 2)
+    self.assertEqual(sorted(os.listdir(cacheDir)),
+      ['file3.json', 'file4.json', 'file5.json'])
+    for i in range(3, 6):
+      self.assertEqual(
+        readCDashQueryDataCacheFile(cacheDir+"/file"+str(i)+".json"),
+        {'builds':[ {'i':i} ]} )
+
+  def test_compact_and_read(self):
+    cacheDir = createCacheManagerTestDir("compact_and_read", [1, 5, 2, 8])
+    numBytes = os.path.getsize(cacheDir+"/file0.json")
+    cacheManager = getCacheManager(cacheDir)
+    self.assertEqual(cacheManager.compactCacheFiles(2),
+      { 'num_packed_files':3, 'packed_bytes':3*numBytes,
+        'num_expired_archived_files':0, 'num_compacted_pack_files':0,
+        'dropped_pack_bytes':0 } )
+    self.assertEqual(sorted(os.listdir(cacheDir)),
+      ['cdash_queries_cache_archive.zip', 'file0.json'])
+    statsDict = cacheManager.getStats()
+    self.assertEqual(statsDict['num_files'], 1)
+    self.assertEqual(statsDict['num_archived_files'], 3)
+    # The packed cache files are still found and read
+    for i in range(4):
+      cacheFilePath = cacheDir+"/file"+str(i)+".json"
+      self.assertEqual(cdashQueryDataCacheFileExists(cacheFilePath), True)
+      self.assertEqual(readCDashQueryDataCacheFile(cacheFilePath),
+        {'builds':[ {'i':i} ]} )
+      self.assertEqual(
+        list(iterateCDashQueryDataCacheFileArray(cacheFilePath, 'builds')),
+        [ {'i':i} ] )
+    self.assertEqual(cdashQueryDataCacheFileExists(cacheDir+"/file4.json"), False)
+    self.assertRaises((IOError, OSError), readCDashQueryDataCacheFile,
+      cacheDir+"/file4.json")
+
+  def test_compact_twice_replaces_and_expires_entries(self):
+    cacheDir = createCacheManagerTestDir(
+      "compact_twice_replaces_and_expires_entries", [1, 5, 20],
+      cacheFileFormatName="json-gz")
+    getCacheManager(cacheDir).compactCacheFiles(2)
+    self.assertEqual(readCDashQueryDataCacheFile(cacheDir+"/file1.json"),
+      {'builds':[ {'i':1} ]} )
+    # Write a newer version of file1.json that then gets packed
+    writeCDashQueryDataCacheFile({'builds':[ {'i':'new'} ]},
+      cacheDir+"/file1.json")
+    lastUsedTime = g_cacheManagerNow - 3*24*60*60
+    os.utime(cacheDir+"/file1.json", (lastUsedTime, lastUsedTime))
+    newNumBytes = os.path.getsize(cacheDir+"/file1.json")
+    # file2.json was packed 20 days ago so it is dropped from the archive
+    cacheManager = getCacheManager(cacheDir, maxAgeDays=10)
+    self.assertEqual(cacheManager.compactCacheFiles(2),
+      { 'num_packed_files':1, 'packed_bytes':newNumBytes,
+        'num_expired_archived_files':1, 'num_compacted_pack_files':0,
+        'dropped_pack_bytes':0 } )
+    self.assertEqual(sorted(os.listdir(cacheDir)),
+      ['cdash_queries_cache_archive.zip', 'file0.json'])
+    self.assertEqual(cacheManager.getStats()['num_archived_files'], 1)
+    self.assertEqual(readCDashQueryDataCacheFile(cacheDir+"/file1.json"),
+      {'builds':[ {'i':'new'} ]} )
+    self.assertEqual(cdashQueryDataCacheFileExists(cacheDir+"/file2.json"), False)
+    # Nothing to do
+    self.assertEqual(getCacheManager(cacheDir).compactCacheFiles(2),
+      { 'num_packed_files':0, 'packed_bytes':0, 'num_expired_archived_files':0,
+        'num_compacted_pack_files':0, 'dropped_pack_bytes':0 } )
+
+  def test_compact_drops_superseded_pack_file_records(self):
+    cacheDir = createCacheManagerTestDir(
+      "compact_drops_superseded_pack_file_records", [0])
+    packFilePath = cacheDir+"/2001-01-01.cdashpack"
+    packFile = CDashQueryDataPackFile(packFilePath)
+    packFile.put("2001-01-01-a.json", b"old data a")
+    packFile.put("2001-01-01-b.json", b"data b")
+    packFile.put("2001-01-01-a.json", b"new data a")
+    packFile.close()
+    lastUsedTime = g_cacheManagerNow - 5*24*60*60
+    os.utime(packFilePath, (lastUsedTime, lastUsedTime))
+    droppedBytes = CDashQueryDataPackFile.recordHeaderStruct.size + \
+      len("2001-01-01-a.json") + len("old data a")
+    numBytes = os.path.getsize(packFilePath) - droppedBytes
+    cacheManager = getCacheManager(cacheDir)
+    self.assertEqual(cacheManager.compactCacheFiles(2),
+      { 'num_packed_files':0, 'packed_bytes':0, 'num_expired_archived_files':0,
+        'num_compacted_pack_files':1, 'dropped_pack_bytes':droppedBytes } )
+    # The pack file is not packed into the archive and keeps its last used time
+    self.assertEqual(sorted(os.listdir(cacheDir)),
+      ['2001-01-01.cdashpack', 'file0.json'])
+    self.assertEqual(os.path.getsize(packFilePath), numBytes)
+    self.assertEqual(int(os.path.getmtime(packFilePath)), int(lastUsedTime))
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile.getKeys(),
+      ["2001-01-01-a.json", "2001-01-01-b.json"])
+    self.assertEqual(packFile.get("2001-01-01-a.json"), b"new data a")
+    packFile.close()
+    # Nothing to do
+    self.assertEqual(cacheManager.compactCacheFiles(2)['num_compacted_pack_files'],
+      0)
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.CDashQueryDataPackFile
+#
+#############################################################################
+
+
+def createPackFileTestDir(testName):
+  packFileDir = "test_CDashQueryDataPackFile_"+testName
+  deleteThenCreateTestDir(packFileDir)
+  return packFileDir
+
+
+class test_CDashQueryDataPackFile(unittest.TestCase):
+
+  def test_put_get(self):
+    packFilePath = createPackFileTestDir("put_get")+"/2001-01-01.cdashpack"
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile.has("a.json"), False)
+    self.assertEqual(packFile.get("a.json"), None)
+    self.assertEqual(packFile.getKeys(), [])
+    packFile.put("a.json", b"data a")
+    packFile.put("b.json", b"data b")
+    self.assertEqual(packFile.has("a.json"), True)
+    self.assertEqual(packFile.get("a.json"), b"data a")
+    self.assertEqual(packFile.get("b.json"), b"data b")
+    # A later record for the same key replaces the earlier one
+    packFile.put("a.json", b"new data a")
+    self.assertEqual(packFile.get("a.json"), b"new data a")
+    self.assertEqual(packFile.getKeys(), ["a.json", "b.json"])
+    # Another object for the same file (e.g. in another process) sees the
+    # same data and sees the records added by the other object
+    packFile2 = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile2.get("a.json"), b"new data a")
+    packFile.put("c.json", b"")
+    self.assertEqual(packFile2.get("c.json"), b"")
+    packFile.close()
+    packFile2.close()
+
+  def test_partial_record_ignored_then_truncated(self):
+    packFilePath = createPackFileTestDir("partial_record")+"/2001-01-01.cdashpack"
+    packFile = CDashQueryDataPackFile(packFilePath)
+    packFile.put("a.json", b"data a")
+    goodFileSize = os.path.getsize(packFilePath)
+    packFile.put("b.json", b"data b")
+    packFile.close()
+    # Chop off the end of the last record
+    with open(packFilePath, 'rb+') as packFileObj:
+      packFileObj.truncate(os.path.getsize(packFilePath)-2)
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile.getKeys(), ["a.json"])
+    self.assertEqual(packFile.get("b.json"), None)
+    # The next put() removes the partial record
+    packFile.put("c.json", b"data c")
+    self.assertEqual(os.path.getsize(packFilePath),
+      goodFileSize + CDashQueryDataPackFile.recordHeaderStruct.size + 12)
+    self.assertEqual(CDashQueryDataPackFile(packFilePath).getKeys(),
+      ["a.json", "c.json"])
+    packFile.close()
+
+  def test_corrupt_data(self):
+    packFilePath = createPackFileTestDir("corrupt_data")+"/2001-01-01.cdashpack"
+    packFile = CDashQueryDataPackFile(packFilePath)
+    packFile.put("a.json", b"data a")
+    packFile.close()
+    with open(packFilePath, 'rb+') as packFileObj:
+      packFileObj.seek(-1, 2)
+      packFileObj.write(b"X")
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile.has("a.json"), True)
+    self.assertEqual(packFile.get("a.json"), None)
+    packFile.close()
+
+  def test_compact(self):
+    packFilePath = createPackFileTestDir("compact")+"/2001-01-01.cdashpack"
+    packFile = CDashQueryDataPackFile(packFilePath)
+    packFile.put("a.json", b"old data a")
+    packFile.put("b.json", b"data b")
+    packFile.put("a.json", b"new data a")
+    packFile.put("c.json", b"data c")
+    # Another object for the same file (e.g. in another process) that has
+    # already indexed the old pack file
+    packFile2 = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(packFile2.get("c.json"), b"data c")
+    # Make the record for c.json corrupt and add a partial record at the end
+    with open(packFilePath, 'rb+') as packFileObj:
+      packFileObj.seek(-1, 2)
+      packFileObj.write(b"X")
+    with open(packFilePath, 'ab') as packFileObj:
+      packFileObj.write(b"CDQP")
+    oldFileSize = os.path.getsize(packFilePath)
+    recordHeaderSize = CDashQueryDataPackFile.recordHeaderStruct.size
+    keptBytes = 2*(recordHeaderSize+len("a.json")) + len("new data a") + \
+      len("data b")
+    self.assertEqual(packFile.compact(), oldFileSize - keptBytes)
+    self.assertEqual(os.path.getsize(packFilePath), keptBytes)
+    self.assertEqual(packFile.getKeys(), ["a.json", "b.json"])
+    self.assertEqual(packFile.get("a.json"), b"new data a")
+    self.assertEqual(packFile.get("c.json"), None)
+    # Nothing more to drop
+    self.assertEqual(packFile.compact(), 0)
+    # The other object sees the new pack file when it writes to it and the
+    # record is not lost
+    packFile2.put("d.json", b"data d")
+    self.assertEqual(packFile2.getKeys(), ["a.json", "b.json", "d.json"])
+    self.assertEqual(packFile.get("d.json"), b"data d")
+    self.assertEqual(packFile2.get("a.json"), b"new data a")
+    packFile.close()
+    packFile2.close()
+
+  def test_concurrent_writers(self):
+    packFilePath = createPackFileTestDir("concurrent_writers")+\
+      "/2001-01-01.cdashpack"
+    # Each writer has its own pack file object (and therefore its own file
+    # lock) like writers in different processes
+    def writeRecords(writerIdx):
+      packFile = CDashQueryDataPackFile(packFilePath)
+      for i in range(50):
+        packFile.put(str(writerIdx)+"_"+str(i)+".json",
+          (str(writerIdx)+"_"+str(i)).encode('utf-8')*100)
+      packFile.close()
+    threadsList = [ threading.Thread(target=writeRecords, args=(writerIdx,)) \
+      for writerIdx in range(4) ]
+    for thread in threadsList: thread.start()
+    for thread in threadsList: thread.join()
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(len(packFile.getKeys()), 4*50)
+    for writerIdx in range(4):
+      for i in range(50):
+        self.assertEqual(packFile.get(str(writerIdx)+"_"+str(i)+".json"),
+          (str(writerIdx)+"_"+str(i)).encode('utf-8')*100)
+    packFile.close()
+
+  def test_concurrent_writers_and_compact(self):
+    packFilePath = createPackFileTestDir("concurrent_writers_and_compact")+\
+      "/2001-01-01.cdashpack"
+    # Each writer writes each key twice so there are records to drop
+    def writeRecords(writerIdx):
+      packFile = CDashQueryDataPackFile(packFilePath)
+      for i in range(50):
+        key = str(writerIdx)+"_"+str(i)+".json"
+        packFile.put(key, b"old")
+        packFile.put(key, key.encode('utf-8')*100)
+      packFile.close()
+    writerThreadsList = [ threading.Thread(target=writeRecords, args=(writerIdx,)) \
+      for writerIdx in range(4) ]
+    for thread in writerThreadsList: thread.start()
+    compactorPackFile = CDashQueryDataPackFile(packFilePath)
+    while any([ thread.is_alive() for thread in writerThreadsList ]):
+      compactorPackFile.compact()
+    for thread in writerThreadsList: thread.join()
+    compactorPackFile.compact()
+    compactorPackFile.close()
+    packFile = CDashQueryDataPackFile(packFilePath)
+    self.assertEqual(len(packFile.getKeys()), 4*50)
+    for writerIdx in range(4):
+      for i in range(50):
+        key = str(writerIdx)+"_"+str(i)+".json"
+        self.assertEqual(packFile.get(key), key.encode('utf-8')*100)
+    packFile.close()
+
+  def test_getCDashQueryDataPackFilePath(self):
+    self.assertEqual(
+      getCDashQueryDataPackFilePath(
+        "cache/test_history/2001-01-02-site-build-test-HIST-30.json"),
+      os.path.join("cache/test_history", "2001-01-02.cdashpack") )
+    self.assertEqual(getCDashQueryDataPackFilePath("cache/fullCDashIndexBuilds.json"),
+      os.path.join("cache", "other.cdashpack") )
+
+  def test_packed_cache_dir(self):
+    cacheDir = createPackFileTestDir("packed_cache_dir")
+    self.assertEqual(getCDashQueryDataPackFile(cacheDir+"/2001-01-01-a.json"), None)
+    # Cache file written before the directory is packed
+    writeCDashQueryDataCacheFile(g_cacheFileFormatData, cacheDir+"/2001-01-01-old.json")
+    setCDashQueryDataCacheDirPacked(cacheDir)
+    try:
+      writeCDashQueryDataCacheFile(g_cacheFileFormatData, cacheDir+"/2001-01-01-a.json")
+      cacheFileWriter = CDashQueryDataCacheFileArrayWriter(
+        cacheDir+"/2001-01-01-b.json", 'builds')
+      try:
+        for testDict in g_jsonStreamData['builds']:
+          cacheFileWriter.addArrayElement(testDict)
+        cacheFileWriter.commit({ 'numTests':12345 })
+      finally:
+        cacheFileWriter.abort()
+      self.assertEqual(sorted(os.listdir(cacheDir)),
+        ['2001-01-01-old.json', '2001-01-01.cdashpack'])
+      for cacheFileName in ['2001-01-01-a.json', '2001-01-01-b.json',
+          '2001-01-01-old.json'] \
+        :
+        self.assertEqual(
+          cdashQueryDataCacheFileExists(cacheDir+"/"+cacheFileName), True)
+      self.assertEqual(
+        cdashQueryDataCacheFileExists(cacheDir+"/2001-01-01-c.json"), False)
+      self.assertEqual(readCDashQueryDataCacheFile(cacheDir+"/2001-01-01-a.json"),
+        g_cacheFileFormatData)
+      self.assertEqual(readCDashQueryDataCacheFile(cacheDir+"/2001-01-01-old.json"),
+        g_cacheFileFormatData)
+      self.assertEqual(
+        list(iterateCDashQueryDataCacheFileArray(cacheDir+"/2001-01-01-b.json",
+          'builds')),
+        g_jsonStreamData['builds'] )
+      self.assertEqual(
+        getCDashQueryDataPackFile(cacheDir+"/2001-01-01-a.json").getKeys(),
+        ['2001-01-01-a.json', '2001-01-01-b.json'])
+    finally:
+      setCDashQueryDataCacheDirPacked(cacheDir, False)
+    self.assertEqual(getCDashQueryDataPackFile(cacheDir+"/2001-01-01-a.json"), None)
+
 
 #############################################################################
 #
@@ -1241,6 +2731,108 @@ class test_createLookupDictForListOfDicts(unittest.TestCase):
     self.assertEqual(buildLookupDict, g_buildLookupDictForExpectedBuilds)
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.createKeyValuesTupleIndexForListOfDicts()
+#
+#############################################################################
+
+def getExpectedBuildsKeyValuesTupleIndex(listOfDicts):
+  return dict( ((d['group'], d['site'], d['buildname']), d) for d in listOfDicts )
+
+class test_createKeyValuesTupleIndexForListOfDicts(unittest.TestCase):
+
+  def test_unique_dicts(self):
+    indexDict = createKeyValuesTupleIndexForListOfDicts(
+      g_buildsListForExpectedBuilds, ['group', 'site', 'buildname'] )
+    self.assertEqual(indexDict,
+      getExpectedBuildsKeyValuesTupleIndex(g_buildsListForExpectedBuilds))
+    self.assertTrue(indexDict[('group1','site2','build3')] is \
+      g_buildsListForExpectedBuilds[2])
+
+  def test_one_key(self):
+    indexDict = createKeyValuesTupleIndexForListOfDicts(
+      g_buildsListForExpectedBuilds, ['data'] )
+    self.assertEqual(sorted(indexDict.keys()),
+      [('val1',), ('val2',), ('val3',), ('val4',), ('val5',)])
+    self.assertEqual(indexDict[('val4',)], g_buildsListForExpectedBuilds[3])
+
+  def test_duplicate_dicts_error(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    origDictEle = g_buildsListForExpectedBuilds[0]
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[0])
+    newDictEle['data'] = 'new_data_val1'
+    listOfDicts.append(newDictEle)
+    try:
+      indexDict = createKeyValuesTupleIndexForListOfDicts(
+        listOfDicts, ['group', 'site', 'buildname'] )
+      self.assertEqual("Did not throw exception!", "no it did not!")
+    except Exception as errMsg:
+      self.assertEqual( str(errMsg),
+        "Error, The element\n\n"+\
+        "    listOfDicts[5] =\n\n"+\
+        "      "+sorted_dict_str(newDictEle)+"\n\n"+\
+        "  has duplicate values for the list of keys\n\n"+\
+        "    ['group', 'site', 'buildname']\n\n"+\
+        "  with the element already added\n\n"+\
+        "    listOfDicts[0] =\n\n"+\
+        "      "+sorted_dict_str(origDictEle)+"\n\n"+\
+        "  and differs by at least the key/value pair\n\n"+\
+        "    listOfDicts[5]['data'] = 'new_data_val1' != listOfDicts[0]['data'] = 'val1'" )
+
+  def test_exact_duplicate_dicts_no_removal_error(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    listOfDicts.append(copy.deepcopy(g_buildsListForExpectedBuilds[1]))
+    try:
+      indexDict = createKeyValuesTupleIndexForListOfDicts(
+        listOfDicts, ['group', 'site', 'buildname'] )
+      self.assertEqual("Did not throw exception!", "no it did not!")
+    except Exception as errMsg:
+      self.assertTrue(str(errMsg).startswith("Error, The element\n\n"+\
+        "    listOfDicts[5] =\n\n"))
+      self.assertTrue(str(errMsg).endswith("    listOfDicts[1] =\n\n"+\
+        "      "+sorted_dict_str(g_buildsListForExpectedBuilds[1])+"\n\n"+\
+        "  and differs by at least the key/value pair\n\n"+\
+        "    None"))
+
+  def test_exact_duplicate_dicts_with_removal(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[2])
+    listOfDicts.insert(3, newDictEle)
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[0])
+    listOfDicts.insert(1, newDictEle)
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[0])
+    listOfDicts.insert(2, newDictEle)
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[4])
+    listOfDicts.append(newDictEle)
+    indexDict = createKeyValuesTupleIndexForListOfDicts(
+      listOfDicts, ['group', 'site', 'buildname'], removeExactDuplicateElements=True )
+    self.assertEqual(listOfDicts, g_buildsListForExpectedBuilds)
+    self.assertEqual(indexDict,
+      getExpectedBuildsKeyValuesTupleIndex(g_buildsListForExpectedBuilds))
+    for dictEle in listOfDicts:
+      self.assertTrue(
+        indexDict[(dictEle['group'], dictEle['site'], dictEle['buildname'])] \
+        is dictEle )
+
+  def test_duplicate_dicts_with_removal_error_idx(self):
+    # Make sure the index of the already added element is correct after
+    # exact duplicates are removed
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    listOfDicts.insert(1, copy.deepcopy(g_buildsListForExpectedBuilds[0]))
+    newDictEle = copy.deepcopy(g_buildsListForExpectedBuilds[3])
+    newDictEle['data'] = 'new_data_val4'
+    listOfDicts.append(newDictEle)
+    try:
+      indexDict = createKeyValuesTupleIndexForListOfDicts(
+        listOfDicts, ['group', 'site', 'buildname'],
+        removeExactDuplicateElements=True )
+      self.assertEqual("Did not throw exception!", "no it did not!")
+    except Exception as errMsg:
+      self.assertTrue(str(errMsg).endswith(
+        "    listOfDicts[6]['data'] = 'new_data_val4' != listOfDicts[3]['data'] = 'val4'"))
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.lookupDictGivenLookupDict()
@@ -1444,6 +3036,146 @@ class test_SearchableListOfDicts(unittest.TestCase):
     buildDict['data'] = "new_data"
     self.assertEqual(origListOfDicts[2]['data'], "new_data")
 
+  def test_bad_list_len(self):
+    slod = SearchableListOfDicts(g_buildsListForExpectedBuilds,
+      ['group', 'site', 'buildname'])
+    try:
+      slod.lookupDictGivenKeyValuesList(['group1', 'site1'])
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertEqual( str(errMsg),
+        "Error, len(listOfKeys)=3 != len(listOfValues)=2 where"+\
+        " listOfKeys=['group', 'site', 'buildname'] and"+\
+        " listOfValues=['group1', 'site1']!" )
+
+  def test_add_index(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuildsUniqSiteBuildName)
+    slod = SearchableListOfDicts(listOfDicts, ['group', 'site', 'buildname'])
+    slodm = slod.addIndex('test', ['site', 'buildname'],
+      keyMapList=['site', 'buildName'])
+    slod.addIndex('data', ['data'])
+    self.assertEqual(slod.getIndexNames(), ['test', 'data'])
+    self.assertEqual(slod.getListOfKeys(), ['group', 'site', 'buildname'])
+    self.assertEqual(slod.getListOfKeys('test'), ['site', 'buildname'])
+    self.assertEqual(slod.getKeyMapList('test'), ['site', 'buildName'])
+    self.assertEqual(slod.getKeyMapList('data'), None)
+    # Lookups using the view
+    self.assertEqual(slodm.getIndexName(), 'test')
+    self.assertTrue(slodm.getSearchableListOfDicts() is slod)
+    self.assertTrue(slodm.getListOfDicts() is listOfDicts)
+    self.assertEqual(slodm.getListOfKeys(), ['site', 'buildname'])
+    self.assertEqual(slodm.getKeyMapList(), ['site', 'buildName'])
+    self.assertEqual(len(slodm), 4)
+    self.assertEqual(slodm[2], listOfDicts[2])
+    self.assertEqual(slodmLuData(slodm, 'site2', 'build3'), 'val3')
+    self.assertEqual(slodmLuIdxData(slodm, 'site3', 'build4'), (3,'val5'))
+    self.assertEqual(slodmLuIdxData(slodm, 'site4','build1'), (None, None))
+    self.assertEqual(
+      slodm.lookupDictGivenKeyValuesList(('site1','build2'))['data'], 'val2')
+    self.assertEqual(MatchDictKeysValuesFunctor(slodm)(tsb('site1', 'build1')),
+      True)
+    self.assertEqual(MatchDictKeysValuesFunctor(slodm)(tsb('site1', 'build3')),
+      False)
+    # Lookups using the index name
+    self.assertEqual(
+      slod.lookupDictGivenKeyValuesList(['val5'], indexName='data')['buildname'],
+      'build4')
+    self.assertEqual(
+      slod.lookupDictGivenKeyValueDict({'data':'val2'}, True, indexName='data'),
+      (listOfDicts[1], 1))
+    # The indexes all give the same underlying dicts
+    slod.lookupDictGivenKeyValuesList(('group1','site2','build3'))['data'] = 'new'
+    self.assertEqual(slodmLuData(slodm, 'site2', 'build3'), 'new')
+    self.assertEqual(listOfDicts[2]['data'], 'new')
+
+  def test_add_index_errors(self):
+    slod = SearchableListOfDicts(g_buildsListForExpectedBuilds,
+      ['group', 'site', 'buildname'])
+    slod.addIndex('data', ['data'])
+    try:
+      slod.addIndex('data', ['group', 'data'])
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, the index 'data' already exists!")
+    try:
+      slod.lookupDictGivenKeyValuesList(['val1'], indexName='missing')
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the index 'missing' does not exist!"+\
+        "  Valid index names are ['data']!")
+    try:
+      slod.addIndex('sitebuild', ['site', 'buildname'])
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertTrue(str(errMsg).startswith(
+        "Error, The element\n\n"+\
+        "    listOfDicts[3] =\n\n"))
+      self.assertTrue(str(errMsg).endswith(
+        "    listOfDicts[3]['group'] = 'group2' != listOfDicts[0]['group'] = 'group1'"))
+    self.assertEqual(slod.getIndexNames(), ['data'])
+
+  def test_append_and_remove(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    slod = SearchableListOfDicts(listOfDicts, ['group', 'site', 'buildname'])
+    slod.addIndex('data', ['data'])
+    self.assertEqual(slodLuIdxData(slod, 'group2','site3','build4'), (4,'val5'))
+    newDictEle = { 'group':'group3', 'site':'site1', 'buildname':'build1',
+      'data':'val6' }
+    slod.appendDict(newDictEle)
+    self.assertEqual(len(listOfDicts), 6)
+    self.assertTrue(listOfDicts[5] is newDictEle)
+    self.assertEqual(slodLuIdxData(slod, 'group3','site1','build1'), (5,'val6'))
+    self.assertEqual(
+      slod.lookupDictGivenKeyValuesList(['val6'], True, indexName='data'),
+      (newDictEle, 5))
+    # Remove from the end
+    self.assertTrue(
+      slod.removeDictGivenKeyValuesList(['val6'], indexName='data') \
+      is newDictEle)
+    self.assertEqual(listOfDicts, g_buildsListForExpectedBuilds)
+    self.assertEqual(slodLuIdxData(slod, 'group3','site1','build1'), (None, None))
+    self.assertEqual(slod.lookupDictGivenKeyValuesList(['val6'], indexName='data'),
+      None)
+    # Remove from the middle
+    removedDict = slod.removeDictGivenKeyValuesList(('group1','site1','build2'))
+    self.assertEqual(removedDict, g_buildsListForExpectedBuilds[1])
+    self.assertEqual(len(slod), 4)
+    self.assertEqual(slodLuIdxData(slod, 'group1','site1','build2'), (None, None))
+    self.assertEqual(slodLuIdxData(slod, 'group1','site2','build3'), (1,'val3'))
+    self.assertEqual(slodLuIdxData(slod, 'group2','site3','build4'), (3,'val5'))
+    self.assertEqual(
+      slod.lookupDictGivenKeyValuesList(['val4'], True, indexName='data')[1], 2)
+    # Remove a dict that is not there
+    self.assertEqual(
+      slod.removeDictGivenKeyValuesList(('group1','site1','build2')), None)
+    self.assertEqual(len(slod), 4)
+
+  def test_append_duplicate_error(self):
+    listOfDicts = copy.deepcopy(g_buildsListForExpectedBuilds)
+    slod = SearchableListOfDicts(listOfDicts, ['group', 'site', 'buildname'])
+    slod.addIndex('data', ['data'])
+    newDictEle = { 'group':'group3', 'site':'site1', 'buildname':'build1',
+      'data':'val2' }
+    try:
+      slod.appendDict(newDictEle)
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertEqual( str(errMsg),
+        "Error, The element\n\n"+\
+        "    listOfDicts[5] =\n\n"+\
+        "      "+sorted_dict_str(newDictEle)+"\n\n"+\
+        "  has duplicate values for the list of keys\n\n"+\
+        "    ['data']\n\n"+\
+        "  with the element already added\n\n"+\
+        "    listOfDicts[1] =\n\n"+\
+        "      "+sorted_dict_str(listOfDicts[1])+"\n\n"+\
+        "  and differs by at least the key/value pair\n\n"+\
+        "    listOfDicts[5]['group'] = 'group3' != listOfDicts[1]['group'] = 'group1'" )
+    # Nothing was changed
+    self.assertEqual(listOfDicts, g_buildsListForExpectedBuilds)
+    self.assertEqual(slodLuData(slod, 'group3','site1','build1'), None)
+
 
 #############################################################################
 #
@@ -1573,39 +3305,276 @@ class test_downloadBuildsOffCDashAndFlatten(unittest.TestCase):
       self.assertEqual(flattendedCDashIndexBuilds[i], g_flattenedCDashIndexBuilds_expected[i])
 
 
-#############################################################################
-#
-# Test CDashQueryAnalyzeReport.downloadTestsOffCDashQueryTestsAndFlatten()
-#
-#############################################################################
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.downloadTestsOffCDashQueryTestsAndFlatten()
+#
+#############################################################################
+
+class test_downloadTestsOffCDashQueryTestsAndFlatten(unittest.TestCase):
+
+  def test_all_tests(self):
+    # Define dummy CDash filter data
+    cdashUrl = "site.come/cdash"
+    projectName = "projectName"
+    date = "YYYY-MM-DD"
+    nonpassingTestsFilters = "tests&filters"
+    # cdash/api/v1/queryTests.php URL
+    nonpassingTestsQueryUrl = getCDashQueryTestsQueryUrl(
+      cdashUrl, projectName, date, nonpassingTestsFilters)
+    # Define mock object to return the data
+    mockExtractCDashApiQueryDataFunctor = MockExtractCDashApiQueryDataFunctor(
+       nonpassingTestsQueryUrl, g_fullCDashQueryTestsJson )
+    # Get the mock data off of CDash
+    testsListOfDicts = downloadTestsOffCDashQueryTestsAndFlatten(
+      nonpassingTestsQueryUrl,
+      fullCDashQueryTestsJsonCacheFile=None,
+      useCachedCDashData=False,
+      verbose=False,
+      extractCDashApiQueryData_in=mockExtractCDashApiQueryDataFunctor )
+    # Assert the data returned is correct
+    #g_pp.pprint(testsListOfDicts)
+    self.assertEqual(
+      len(testsListOfDicts), len(g_testsListOfDicts_expected))
+    for i in range(0, len(testsListOfDicts)):
+      self.assertEqual(testsListOfDicts[i], g_testsListOfDicts_expected[i])
+
+
+class MockIterateCDashApiQueryDataArrayFunctor(object):
+  def __init__(self, cdashApiQueryUrl_expected, dataToReturn):
+    self.extractFunctor = MockExtractCDashApiQueryDataFunctor(
+      cdashApiQueryUrl_expected, dataToReturn)
+    self.numCalls = 0
+  def __call__(self, cdashApiQueryUrl, arrayKey, otherData_out=None):
+    self.numCalls += 1
+    return getIterateCDashApiQueryDataArrayFunc(self.extractFunctor)(
+      cdashApiQueryUrl, arrayKey, otherData_out)
+
+
+class test_iterateTestsOffCDashQueryTests(unittest.TestCase):
+
+  def test_download_cache_and_read_cache(self):
+    cacheDir = "test_iterateTestsOffCDashQueryTests_download_cache_and_read_cache"
+    deleteThenCreateTestDir(cacheDir)
+    cacheFile = cacheDir+"/fullCDashNonpassingTests.json"
+    nonpassingTestsQueryUrl = getCDashQueryTestsQueryUrl(
+      "site.come/cdash", "projectName", "YYYY-MM-DD", "tests&filters")
+    mockIterateFunctor = MockIterateCDashApiQueryDataArrayFunctor(
+       nonpassingTestsQueryUrl, g_fullCDashQueryTestsJson )
+    testsIter = iterateTestsOffCDashQueryTests(nonpassingTestsQueryUrl,
+      cacheFile, useCachedCDashData=False, verbose=False,
+      iterateCDashApiQueryDataArray_in=mockIterateFunctor )
+    self.assertEqual(list(testsIter), g_testsListOfDicts_expected)
+    self.assertEqual(readCDashQueryDataCacheFile(cacheFile),
+      g_fullCDashQueryTestsJson)
+    # Read back from the cache file without calling CDash
+    testsIter = iterateTestsOffCDashQueryTests(nonpassingTestsQueryUrl,
+      cacheFile, useCachedCDashData=True, verbose=False,
+      iterateCDashApiQueryDataArray_in=mockIterateFunctor )
+    self.assertEqual(list(testsIter), g_testsListOfDicts_expected)
+    self.assertEqual(mockIterateFunctor.numCalls, 1)
+
+  def test_abandoned_iteration_does_not_write_cache(self):
+    cacheDir = "test_iterateTestsOffCDashQueryTests_abandoned_iteration"
+    deleteThenCreateTestDir(cacheDir)
+    cacheFile = cacheDir+"/fullCDashNonpassingTests.json"
+    testsIter = iterateTestsOffCDashQueryTests("dummy-cdash-url",
+      cacheFile, useCachedCDashData=False, verbose=False,
+      iterateCDashApiQueryDataArray_in=MockIterateCDashApiQueryDataArrayFunctor(
+        "dummy-cdash-url", g_fullCDashQueryTestsJson) )
+    self.assertEqual(next(testsIter), g_testsListOfDicts_expected[0])
+    testsIter.close()
+    self.assertEqual(os.listdir(cacheDir), [])
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport functions for downloading tests in chunks
+#
+#############################################################################
+
+
+g_chunkTestHistoryQueryUrl = "site.com/cdash/api/v1/queryTests.php?project=proj"+\
+  "&begin=2018-10-01&end=2018-10-05&filtercombine=and&filtercount=2"+\
+  "&field1=testname&compare1=61&value1=test1&field2=site&compare2=61&value2=site1"
+
+
+class test_CDashQueryUrlChunks(unittest.TestCase):
+
+  def test_addFilterToCDashQueryUrl(self):
+    self.assertEqual(
+      addFilterToCDashQueryUrl(g_chunkTestHistoryQueryUrl, "buildname", 61,
+        "build1"),
+      "site.com/cdash/api/v1/queryTests.php?project=proj"+\
+      "&begin=2018-10-01&end=2018-10-05&filtercombine=and"+\
+      "&field1=testname&compare1=61&value1=test1"+\
+      "&field2=site&compare2=61&value2=site1"+\
+      "&filtercount=3&field3=buildname&compare3=61&value3=build1" )
+    self.assertEqual(
+      addFilterToCDashQueryUrl("site.com/cdash/api/v1/queryTests.php"+\
+        "?project=proj&date=2018-10-05&", "groupname", 61, "Nightly"),
+      "site.com/cdash/api/v1/queryTests.php?project=proj&date=2018-10-05"+\
+      "&filtercount=1&field1=groupname&compare1=61&value1=Nightly" )
+
+  def test_addFilterToCDashQueryUrl_encode_value(self):
+    for (value, encodedValue) in (
+        ("Nightly Builds", "Nightly+Builds"),
+        ("A&B", "A%26B"),
+        ("gcc+openmpi", "gcc%2Bopenmpi"),
+        (u("Experimental & C++ Builds"), "Experimental+%26+C%2B%2B+Builds"),
+      ):
+      queryUrl = addFilterToCDashQueryUrl("site.com/cdash/api/v1/index.php"+\
+        "?project=proj&date=2018-10-05", "groupname", 61, value)
+      self.assertEqual(queryUrl,
+        "site.com/cdash/api/v1/index.php?project=proj&date=2018-10-05"+\
+        "&filtercount=1&field1=groupname&compare1=61&value1="+encodedValue )
+      # The value is read back unchanged (e.g. by CDash)
+      self.assertEqual(parse_qs(queryUrl.split("?", 1)[1])['value1'], [value])
+
+  def test_addFilterToCDashQueryUrl_or(self):
+    queryUrl = "site.com/cdash/api/v1/queryTests.php?project=proj"+\
+      "&filtercombine=or&field1=site&compare1=61&value1=site1"
+    try:
+      addFilterToCDashQueryUrl(queryUrl, "buildname", 61, "build1")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, can't add the filter 'buildname' to the query URL '"+queryUrl+\
+        "' since its filters are combined with 'filtercombine=or'!")
+
+  def test_getCDashQueryUrlChunksByField(self):
+    self.assertEqual(
+      getCDashQueryUrlChunksByField("cdash/api/v1/queryTests.php?date=D",
+        "site", ["site1", "site2"]),
+      [ "cdash/api/v1/queryTests.php?date=D&filtercount=1&field1=site"+\
+          "&compare1=61&value1=site1",
+        "cdash/api/v1/queryTests.php?date=D&filtercount=1&field1=site"+\
+          "&compare1=61&value1=site2" ] )
+
+  def test_getCDashQueryUrlChunksByDateRange(self):
+    chunkQueryUrlsList = \
+      getCDashQueryUrlChunksByDateRange(g_chunkTestHistoryQueryUrl, 2)
+    self.assertEqual(
+      [ chunkQueryUrl.split("&")[1:3] for chunkQueryUrl in chunkQueryUrlsList ],
+      [ ["begin=2018-10-01", "end=2018-10-02"],
+        ["begin=2018-10-03", "end=2018-10-04"],
+        ["begin=2018-10-05", "end=2018-10-05"] ] )
+    self.assertEqual(chunkQueryUrlsList[0].replace("10-02", "10-05"),
+      g_chunkTestHistoryQueryUrl)
+    self.assertEqual(
+      getCDashQueryUrlChunksByDateRange(g_chunkTestHistoryQueryUrl, 5),
+      [g_chunkTestHistoryQueryUrl] )
+
+  def test_getCDashQueryUrlChunksByDateRange_no_begin(self):
+    try:
+      getCDashQueryUrlChunksByDateRange("queryTests.php?date=2018-10-05", 2)
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the query URL 'queryTests.php?date=2018-10-05' does not have"+\
+        " both 'begin=<YYYY-MM-DD>' and 'end=<YYYY-MM-DD>'!")
+
+
+# Mock function object for extractCDashApiQueryData() that returns the data
+# for the different chunk query URLs and fails for the URLs in failUrlsList
+class MockExtractCDashApiQueryDataChunksFunctor(object):
+  def __init__(self, dataDict, failUrlsList=[]):
+    self.dataDict = dataDict
+    self.failUrlsList = failUrlsList
+    self.lock = threading.Lock()
+    self.calledUrlsList = []
+  def __call__(self, cdashApiQueryUrl):
+    with self.lock:
+      self.calledUrlsList.append(cdashApiQueryUrl)
+    if cdashApiQueryUrl in self.failUrlsList:
+      raise Exception("Error, timed out getting '"+cdashApiQueryUrl+"'!")
+    return self.dataDict[cdashApiQueryUrl]
+
 
-class test_downloadTestsOffCDashQueryTestsAndFlatten(unittest.TestCase):
+def getChunkTestsData(site, testnamesList):
+  return { 'version':'1.0',
+    'builds':[ {'site':site, 'buildName':'build1', 'testname':testname} \
+      for testname in testnamesList ] }
 
-  def test_all_tests(self):
-    # Define dummy CDash filter data
-    cdashUrl = "site.come/cdash"
-    projectName = "projectName"
-    date = "YYYY-MM-DD"
-    nonpassingTestsFilters = "tests&filters"
-    # cdash/api/v1/queryTests.php URL
-    nonpassingTestsQueryUrl = getCDashQueryTestsQueryUrl(
-      cdashUrl, projectName, date, nonpassingTestsFilters)
-    # Define mock object to return the data
-    mockExtractCDashApiQueryDataFunctor = MockExtractCDashApiQueryDataFunctor(
-       nonpassingTestsQueryUrl, g_fullCDashQueryTestsJson )
-    # Get the mock data off of CDash
-    testsListOfDicts = downloadTestsOffCDashQueryTestsAndFlatten(
-      nonpassingTestsQueryUrl,
-      fullCDashQueryTestsJsonCacheFile=None,
-      useCachedCDashData=False,
-      verbose=False,
-      extractCDashApiQueryData_in=mockExtractCDashApiQueryDataFunctor )
-    # Assert the data returned is correct
-    #g_pp.pprint(testsListOfDicts)
-    self.assertEqual(
-      len(testsListOfDicts), len(g_testsListOfDicts_expected))
-    for i in range(0, len(testsListOfDicts)):
-      self.assertEqual(testsListOfDicts[i], g_testsListOfDicts_expected[i])
+
+g_chunkQueryUrlsList = getCDashQueryUrlChunksByField(
+  "site.com/cdash/api/v1/queryTests.php?project=proj&date=2018-10-05",
+  "site", ["site1", "site2", "site3"] )
+
+g_chunkTestsDataDict = {
+  g_chunkQueryUrlsList[0] : getChunkTestsData('site1', ['t1', 't2']),
+  g_chunkQueryUrlsList[1] : getChunkTestsData('site2', []),
+  g_chunkQueryUrlsList[2] : getChunkTestsData('site3', ['t3']),
+  }
+
+g_chunkTestsLOD_expected = \
+  getChunkTestsData('site1', ['t1', 't2'])['builds'] + \
+  getChunkTestsData('site3', ['t3'])['builds']
+
+
+class test_iterateTestsOffCDashQueryTestsInChunks(unittest.TestCase):
+
+  def test_download_merge_and_read_cache(self):
+    cacheDir = "test_iterateTestsOffCDashQueryTestsInChunks_download_merge"
+    deleteThenCreateTestDir(cacheDir)
+    cacheFile = cacheDir+"/fullCDashNonpassingTests.json"
+    mockExtractFunctor = \
+      MockExtractCDashApiQueryDataChunksFunctor(g_chunkTestsDataDict)
+    testsIter = iterateTestsOffCDashQueryTestsInChunks(g_chunkQueryUrlsList,
+      cacheFile, verbose=False, maxConcurrency=2,
+      extractCDashApiQueryData_in=mockExtractFunctor )
+    self.assertEqual(list(testsIter), g_chunkTestsLOD_expected)
+    self.assertEqual(sorted(mockExtractFunctor.calledUrlsList),
+      sorted(g_chunkQueryUrlsList))
+    self.assertEqual(readCDashQueryDataCacheFile(cacheFile),
+      {'version':'1.0', 'builds':g_chunkTestsLOD_expected})
+    # The chunk cache files are removed after they are merged
+    self.assertEqual(os.listdir(cacheDir), ["fullCDashNonpassingTests.json"])
+    # Read back from the merged cache file without calling CDash
+    testsIter = iterateTestsOffCDashQueryTestsInChunks(g_chunkQueryUrlsList,
+      cacheFile, alwaysUseCacheFileIfExists=True, verbose=False,
+      extractCDashApiQueryData_in=mockExtractFunctor )
+    self.assertEqual(list(testsIter), g_chunkTestsLOD_expected)
+    self.assertEqual(len(mockExtractFunctor.calledUrlsList), 3)
+
+  def test_failed_chunk_downloaded_again(self):
+    cacheDir = "test_iterateTestsOffCDashQueryTestsInChunks_failed_chunk"
+    deleteThenCreateTestDir(cacheDir)
+    cacheFile = cacheDir+"/fullCDashNonpassingTests.json"
+    mockExtractFunctor = MockExtractCDashApiQueryDataChunksFunctor(
+      g_chunkTestsDataDict, failUrlsList=[g_chunkQueryUrlsList[1]] )
+    try:
+      list(iterateTestsOffCDashQueryTestsInChunks(g_chunkQueryUrlsList,
+        cacheFile, verbose=False, maxConcurrency=3,
+        extractCDashApiQueryData_in=mockExtractFunctor ))
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except ForeachTransformError as errMsg:
+      self.assertEqual(len(errMsg.failedElementsList), 1)
+      self.assertEqual(errMsg.failedElementsList[0][0], 1)
+    # The chunks that were downloaded are kept in their cache files
+    self.assertEqual(sorted(os.listdir(cacheDir)),
+      sorted([ os.path.basename(
+        getCDashQueryChunkCacheFilePath(cacheFile, g_chunkQueryUrlsList[i])) \
+        for i in [0, 2] ]) )
+    # Only the failed chunk is downloaded the next time
+    mockExtractFunctor = \
+      MockExtractCDashApiQueryDataChunksFunctor(g_chunkTestsDataDict)
+    testsIter = iterateTestsOffCDashQueryTestsInChunks(g_chunkQueryUrlsList,
+      cacheFile, verbose=False, maxConcurrency=3,
+      extractCDashApiQueryData_in=mockExtractFunctor )
+    self.assertEqual(list(testsIter), g_chunkTestsLOD_expected)
+    self.assertEqual(mockExtractFunctor.calledUrlsList, [g_chunkQueryUrlsList[1]])
+    self.assertEqual(os.listdir(cacheDir), ["fullCDashNonpassingTests.json"])
+
+  def test_downloadTestsOffCDashQueryTestsAndFlatten_no_cache_file(self):
+    mockExtractFunctor = \
+      MockExtractCDashApiQueryDataChunksFunctor(g_chunkTestsDataDict)
+    testsLOD = downloadTestsOffCDashQueryTestsAndFlatten(
+      "not-used-cdash-url", verbose=False,
+      extractCDashApiQueryData_in=mockExtractFunctor,
+      chunkQueryUrlsList=g_chunkQueryUrlsList, chunkMaxConcurrency=3 )
+    self.assertEqual(testsLOD, g_chunkTestsLOD_expected)
+    self.assertEqual(len(mockExtractFunctor.calledUrlsList), 3)
 
 
 #############################################################################
@@ -1733,6 +3702,15 @@ class test_doTestsWithIssueTrackersMatchExpectedBuilds(unittest.TestCase):
       (True, "")
       )
 
+  def test_all_match_test_to_build_index(self):
+    testToExpectedBuildsSLOD = \
+      addTestToBuildIndex(createSearchableListOfBuilds(g_expectedBuildsLOD))
+    self.assertEqual(
+      doTestsWithIssueTrackersMatchExpectedBuilds(
+        g_testsWtihIssueTrackersLOD, testToExpectedBuildsSLOD),
+      (True, "")
+      )
+
   def test_nomatch_1(self):
     testsWtihIssueTrackersLOD = copy.deepcopy(g_testsWtihIssueTrackersLOD)
     testToExpectedBuildsSLOD = \
@@ -2222,6 +4200,219 @@ class test_sortTestHistoryGetStatistics(unittest.TestCase):
     self.assertEqual(testStatus, 'Missing')
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.getTestHistoryStatisticsForTests()
+#
+#############################################################################
+
+
+def getTestHistoryLODListForManyTests():
+  testHistoryLODList = []
+  statusList = ['Passed', 'Failed', 'Not Run']
+  for i in range(30):
+    testHistoryLOD = getTestHistoryLOD5(
+      [ statusList[(i//(3**k))%3] for k in range(5) ],
+      time=["05:54:03", "18:44:29"][i%2], timezoneStr=["UTC", "MDT"][i%2] )
+    testHistoryLOD = testHistoryLOD[:5-(i%4)]  # Some missing days
+    if i%5 == 0:
+      testHistoryLOD.append(testHistoryLOD[0])  # Include a duplicate
+    testHistoryLODList.append(testHistoryLOD)
+    if i%7 == 0:
+      testHistoryLODList.append([])  # Test with no history
+  return testHistoryLODList
+
+
+# Sort the test history and get the test history statistics for a single test
+# one row at a time
+#
+# This is the original implementation of sortTestHistoryGetStatistics() (from
+# before it called getTestHistoryStatisticsForTests()) which is kept here as
+# an independent oracle for getTestHistoryStatisticsForTests().
+#
+def sortTestHistoryGetStatisticsOneRowAtATime(testHistoryLOD,
+    currentTestDate, testingDayStartTimeUtc, daysOfHistory,
+  ):
+  testHistoryStats = {
+    'pass_last_x_days': 0,
+    'nopass_last_x_days': 0,
+    'missing_last_x_days': daysOfHistory,
+    'consec_pass_days': 0,
+    'consec_nopass_days': 0,
+    'consec_missing_days': 0,
+    'previous_nopass_date': 'None',
+    'status_changes_last_x_days': 0,
+    'test_history_class': 'missing',
+    }
+  if len(testHistoryLOD) == 0:
+    testHistoryStats['consec_missing_days'] = daysOfHistory
+    return ([], testHistoryStats, "Missing")
+  sortedTestHistoryLOD = copy.copy(testHistoryLOD)
+  sortedTestHistoryLOD.sort(reverse=True, key=DictSortFunctor(['buildstarttime']))
+  uniqueSortedTestHistoryLOD = [ sortedTestHistoryLOD[0] ]
+  for testDict in sortedTestHistoryLOD[1:]:
+    if not checkCDashTestDictsAreSame(testDict, "a",
+        uniqueSortedTestHistoryLOD[-1], "b")[0] \
+      :
+      uniqueSortedTestHistoryLOD.append(testDict)
+  sortedTestHistoryLOD = uniqueSortedTestHistoryLOD
+  testingDayTimeObj = CBTD.CDashProjectTestingDay(currentTestDate,
+    testingDayStartTimeUtc)
+  currentTestDateDT = testingDayTimeObj.getCurrentTestingDayDateDT()
+  topTestDictTestingDayDT = testingDayTimeObj.getTestingDayDateFromBuildStartTimeDT(
+    sortedTestHistoryLOD[0]['buildstarttime'] )
+  if topTestDictTestingDayDT == currentTestDateDT:
+    testStatus = sortedTestHistoryLOD[0]['status']
+    initialTestStatusHasChanged = False
+  else:
+    testStatus = "Missing"
+    testHistoryStats['consec_missing_days'] = \
+      (currentTestDateDT - topTestDictTestingDayDT).days
+    initialTestStatusHasChanged = True
+  previousTestStatusPassed = (testStatus == 'Passed')
+  previousRowPassed = None
+  for pastTestDict_k in sortedTestHistoryLOD:
+    pastTestPassed_k = (pastTestDict_k['status'] == 'Passed')
+    pastTestDateUtc_k = testingDayTimeObj.getTestingDayDateFromBuildStartTimeStr(
+      pastTestDict_k['buildstarttime'])
+    if pastTestPassed_k == previousTestStatusPassed \
+      and not initialTestStatusHasChanged \
+      :
+      if pastTestPassed_k:
+        testHistoryStats['consec_pass_days'] += 1
+      else:
+        testHistoryStats['consec_nopass_days'] += 1
+    else:
+      initialTestStatusHasChanged = True
+    testHistoryStats['missing_last_x_days'] -= 1
+    if pastTestPassed_k:
+      testHistoryStats['pass_last_x_days'] += 1
+    else:
+      testHistoryStats['nopass_last_x_days'] += 1
+    if testHistoryStats['previous_nopass_date'] == 'None' \
+      and pastTestDateUtc_k != currentTestDate and not pastTestPassed_k \
+      :
+      testHistoryStats['previous_nopass_date'] = pastTestDateUtc_k
+    if previousRowPassed != None and pastTestPassed_k != previousRowPassed:
+      testHistoryStats['status_changes_last_x_days'] += 1
+    previousRowPassed = pastTestPassed_k
+  testHistoryStats['test_history_class'] = getTestHistoryClass(testStatus,
+    len(sortedTestHistoryLOD), testHistoryStats['pass_last_x_days'],
+    testHistoryStats['status_changes_last_x_days'])
+  return (sortedTestHistoryLOD, testHistoryStats, testStatus)
+
+
+class test_getTestHistoryStatisticsForTests(unittest.TestCase):
+
+  def assertSameAsOneRowAtATime(self, useNumpy):
+    testHistoryLODList = getTestHistoryLODListForManyTests()
+    for (currentTestDate, testingDayStartTimeUtc) in \
+      [ ("2001-01-01", "00:00"), ("2001-01-02", "04:00"), ("2001-01-01", "13:00") ]:
+      testHistoryDataList = getTestHistoryStatisticsForTests(testHistoryLODList,
+        currentTestDate, testingDayStartTimeUtc, 5, useNumpy=useNumpy)
+      self.assertEqual(len(testHistoryDataList), len(testHistoryLODList))
+      for (testHistoryLOD, testHistoryData) in \
+          zip(testHistoryLODList, testHistoryDataList) \
+        :
+        self.assertEqual(testHistoryData,
+          sortTestHistoryGetStatisticsOneRowAtATime(testHistoryLOD,
+            currentTestDate, testingDayStartTimeUtc, 5) )
+
+  def test_python(self):
+    self.assertSameAsOneRowAtATime(useNumpy=False)
+
+  def test_numpy(self):
+    if numpy == None:
+      self.assertRaises(Exception, getTestHistoryStatisticsForTests,
+        [[]], "2001-01-01", "00:00", 5, useNumpy=True)
+    else:
+      self.assertSameAsOneRowAtATime(useNumpy=True)
+
+  def test_stats(self):
+    testHistoryLODList = [
+      [],
+      getTestHistoryLOD5(['Failed','Failed','Passed','Passed','Not Run']),
+      getTestHistoryLOD5(['Passed','Failed','Passed','Passed','Not Run'])[1:],
+      ]
+    testHistoryDataList = getTestHistoryStatisticsForTests(testHistoryLODList,
+      "2001-01-01", "00:00", 5)
+    self.assertEqual(
+      [ testHistoryData[1:] for testHistoryData in testHistoryDataList ],
+      [
+        ( {'pass_last_x_days':0, 'nopass_last_x_days':0, 'missing_last_x_days':5,
+            'consec_pass_days':0, 'consec_nopass_days':0, 'consec_missing_days':5,
+            'previous_nopass_date':'None', 'status_changes_last_x_days':0,
+            'test_history_class':'missing'},
+          'Missing' ),
+        ( {'pass_last_x_days':2, 'nopass_last_x_days':3, 'missing_last_x_days':0,
+            'consec_pass_days':0, 'consec_nopass_days':2, 'consec_missing_days':0,
+            'previous_nopass_date':'2000-12-31', 'status_changes_last_x_days':2,
+            'test_history_class':'newly_failing'},
+          'Failed' ),
+        ( {'pass_last_x_days':3, 'nopass_last_x_days':1, 'missing_last_x_days':1,
+            'consec_pass_days':3, 'consec_nopass_days':0, 'consec_missing_days':0,
+            'previous_nopass_date':'2000-12-28', 'status_changes_last_x_days':1,
+            'test_history_class':'recovered'},
+          'Passed' ),
+        ] )
+
+  def test_test_history_class(self):
+    testHistoryLODList = [
+      getTestHistoryLOD5(['Failed','Passed','Failed','Passed','Passed']),
+      getTestHistoryLOD5(['Failed','Not Run','Failed','Failed','Failed']),
+      getTestHistoryLOD5(['Failed','Failed','Passed','Passed','Passed']),
+      getTestHistoryLOD5(['Passed','Failed','Passed','Passed','Passed']),
+      getTestHistoryLOD5(['Passed','Passed','Passed','Passed','Passed']),
+      getTestHistoryLOD5(['Passed','Failed','Passed','Failed','Passed'])[2:],
+      getTestHistoryLOD5(['Passed','Passed','Passed','Passed','Passed'])[2:],
+      [],
+      ]
+    expectedResults = [
+      (3, 'flaky'),
+      (0, 'consistently_failing'),
+      (1, 'newly_failing'),
+      (2, 'recovered'),
+      (0, 'passing'),
+      (2, 'missing'),
+      (0, 'missing'),
+      (0, 'missing'),
+      ]
+    for useNumpy in [False, True]:
+      if useNumpy and numpy == None: continue
+      testHistoryDataList = getTestHistoryStatisticsForTests(testHistoryLODList,
+        "2001-01-01", "00:00", 5, useNumpy=useNumpy)
+      self.assertEqual(
+        [ (testHistoryStats['status_changes_last_x_days'],
+           testHistoryStats['test_history_class'])
+          for (_, testHistoryStats, _) in testHistoryDataList ],
+        expectedResults )
+    testHistoryDataList = getTestHistoryStatisticsForTests(testHistoryLODList,
+      "2001-01-01", "00:00", 5, flakyMinStatusChanges=2)
+    self.assertEqual(testHistoryDataList[3][1]['test_history_class'], 'flaky')
+    self.assertEqual(testHistoryDataList[5][1]['test_history_class'], 'flaky')
+
+
+class test_getTestHistoryClass(unittest.TestCase):
+
+  def test_flaky_before_status(self):
+    self.assertEqual(getTestHistoryClass("Failed", 5, 2, 3), 'flaky')
+    self.assertEqual(getTestHistoryClass("Passed", 5, 3, 3), 'flaky')
+    self.assertEqual(getTestHistoryClass("Missing", 4, 2, 3), 'flaky')
+
+  def test_not_flaky(self):
+    self.assertEqual(getTestHistoryClass("Failed", 5, 0, 0), 'consistently_failing')
+    self.assertEqual(getTestHistoryClass("Not Run", 5, 0, 1), 'consistently_failing')
+    self.assertEqual(getTestHistoryClass("Failed", 5, 3, 2), 'newly_failing')
+    self.assertEqual(getTestHistoryClass("Passed", 5, 4, 2), 'recovered')
+    self.assertEqual(getTestHistoryClass("Passed", 5, 5, 0), 'passing')
+    self.assertEqual(getTestHistoryClass("Missing", 3, 3, 0), 'missing')
+    self.assertEqual(getTestHistoryClass("Missing", 0, 0, 0), 'missing')
+
+  def test_flakyMinStatusChanges(self):
+    self.assertEqual(getTestHistoryClass("Failed", 5, 2, 3, 4), 'newly_failing')
+    self.assertEqual(getTestHistoryClass("Failed", 5, 2, 1, 1), 'flaky')
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.checkCDashTestDictsAreSame()
@@ -2449,6 +4640,58 @@ class test_AddTestHistoryToTestDictFunctor(unittest.TestCase):
     # ToDo: Check the contents of the cache file!
 
 
+  # Test that the test history in testHistoryLODCache is reused for the same
+  # test by another functor without getting it from CDash again.
+  def test_nonpassingTest_testHistoryLODCache(self):
+
+    testHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name')
+
+    testCacheOutputDir = \
+      os.getcwd()+"/AddTestHistoryToTestDictFunctor/test_nonpassingTest_testHistoryLODCache"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+
+    testHistoryLODCache = {}
+
+    # Get the test history from CDash with the first functor
+    testDict1 = copy.deepcopy(g_testDictFailed)
+    addTestHistoryFunctor1 = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=False,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        testHistoryQueryUrl, {'builds':testHistoryLOD}),
+      testHistoryLODCache=testHistoryLODCache,
+      )
+    addTestHistoryFunctor1(testDict1)
+    self.assertEqual(len(testHistoryLODCache), 1)
+
+    # Remove the cache file and make any query fail to show that the second
+    # functor reuses the test history from testHistoryLODCache
+    os.remove(testCacheOutputDir+\
+      "/2001-01-01-site_name-build_name-test_name-HIST-5.json")
+    testDict2 = copy.deepcopy(g_testDictFailed)
+    addTestHistoryFunctor2 = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=False,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        "no-query-expected", None),
+      testHistoryLODCache=testHistoryLODCache,
+      )
+    addTestHistoryFunctor2(testDict2)
+
+    self.assertEqual(testDict2['test_history_list'], testDict1['test_history_list'])
+    self.assertEqual(testDict2['pass_last_x_days'], 2)
+    self.assertEqual(testDict2['nopass_last_x_days'], 3)
+    self.assertEqual(testDict2['consec_nopass_days'], 2)
+    self.assertEqual(testDict2['previous_nopass_date'], '2000-12-31')
+
+
   # Base test case for a non-passing test with test dict info already from
   # CDash but there the data is in MDT and there is a shift in the calendar
   # date when converted to UTC.
@@ -3080,6 +5323,536 @@ class test_AddTestHistoryToTestDictFunctor(unittest.TestCase):
         "   top test history dict = "+sorted_dict_str(testHistoryLOD[0])+"\n\n" )
 
 
+  # Test that useTestRecords=True gives the same test dict fields
+  def test_nonpassingTest_useTestRecords(self):
+    testCacheOutputDir = \
+      os.getcwd()+"/AddTestHistoryToTestDictFunctor/test_nonpassingTest_useTestRecords"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    testHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name')
+    testDictsList = []
+    for useTestRecords in (False, True):
+      addTestHistoryFunctor = AddTestHistoryToTestDictFunctor(
+        "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+        testCacheOutputDir, useCachedCDashData=False,
+        alwaysUseCacheFileIfExists=False,
+        extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+          testHistoryQueryUrl, {'builds':copy.deepcopy(testHistoryLOD)}),
+        useTestRecords=useTestRecords )
+      testDictsList.append(addTestHistoryFunctor(copy.deepcopy(g_testDictFailed)))
+    (testDict, testRecord) = testDictsList
+    self.assertEqual(type(testDict), dict)
+    self.assertEqual(type(testRecord), TestRecord)
+    self.assertEqual(type(testRecord['test_history_list'][0]), TestRecord)
+    self.assertEqual(testRecord, testDict)
+    self.assertEqual(testRecord._extraFields, None)
+    self.assertEqual(testRecord['consec_nopass_days'], 2)
+    self.assertEqual(testRecord['consec_nopass_days_url'],
+      testDict['test_history_browser_url'])
+
+
+  # Test that addTestHistoryToTestDicts() gives the same test dicts as
+  # calling the functor on each test dict
+  def test_addTestHistoryToTestDicts(self):
+    testCacheOutputDir = \
+      os.getcwd()+"/AddTestHistoryToTestDictFunctor/test_addTestHistoryToTestDicts"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+    testHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name')
+    addTestHistoryFunctor = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=False,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        testHistoryQueryUrl,
+        {'builds':getTestHistoryLOD5(
+          ['Failed','Failed','Passed','Passed','Not Run'])} ) )
+    testsLOD = [ copy.deepcopy(g_testDictFailed) for i in range(3) ]
+    testsLOD_expected = foreachTransform(copy.deepcopy(testsLOD),
+      addTestHistoryFunctor)
+    self.assertEqual(
+      addTestHistoryFunctor.addTestHistoryToTestDicts(testsLOD, maxConcurrency=2),
+      testsLOD_expected)
+    self.assertEqual(testsLOD, testsLOD_expected)
+    self.assertEqual(testsLOD[0]['consec_nopass_days'], 2)
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.cacheTestHistoryForBuildsOfTests()
+#
+#############################################################################
+
+
+class test_cacheTestHistoryForBuildsOfTests(unittest.TestCase):
+
+
+  # Get the test history for two tests in the same build with one query and
+  # then read the per-test cache file with AddTestHistoryToTestDictFunctor
+  def test_two_tests_one_build(self):
+
+    testCacheOutputDir = \
+      os.getcwd()+"/cacheTestHistoryForBuildsOfTests/test_two_tests_one_build"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+
+    # Test history for all of the tests in the build (including one test
+    # 'other_test' that is not asked for)
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    test2HistoryLOD = getTestHistoryLOD5(
+      [ 'Passed', 'Failed', 'Failed', 'Passed', 'Passed' ] )
+    for testHistoryDict in test2HistoryLOD:
+      testHistoryDict['testname'] = 'test_name_2'
+    otherTestHistoryLOD = copy.deepcopy(test2HistoryLOD)
+    for testHistoryDict in otherTestHistoryLOD:
+      testHistoryDict['testname'] = 'other_test'
+    buildTestHistoryLOD = testHistoryLOD + otherTestHistoryLOD + test2HistoryLOD
+
+    buildTestHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=site&compare2=61&value2=site_name')
+
+    testDict = copy.deepcopy(g_testDictFailed)
+    test2Dict = copy.deepcopy(g_testDictFailed)
+    test2Dict['testname'] = 'test_name_2'
+    testsLOD = [ testDict, test2Dict ]
+
+    numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash", "projectName",
+      "2001-01-01", 5, testCacheOutputDir, testsLOD,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        buildTestHistoryQueryUrl, {'builds':buildTestHistoryLOD}) )
+    self.assertEqual(numBuilds, 1)
+
+    # Check the per-test cache files (the build cache file is not kept)
+    self.assertEqual(os.path.exists(testCacheOutputDir+\
+      "/2001-01-01-site_name-build_name-BUILD-HIST-5.json"), False)
+    testCacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-test_name-HIST-5.json"
+    self.assertEqual(
+      readCDashQueryDataCacheFile(testCacheFile)['builds'], testHistoryLOD)
+    test2CacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-test_name_2-HIST-5.json"
+    self.assertEqual(
+      readCDashQueryDataCacheFile(test2CacheFile)['builds'], test2HistoryLOD)
+
+    # A second call does not query CDash since all of the cache files exist
+    numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash", "projectName",
+      "2001-01-01", 5, testCacheOutputDir, testsLOD,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        "Should not be called!", None) )
+    self.assertEqual(numBuilds, 0)
+
+    # The functor reads the per-test cache file and does not query CDash
+    addTestHistoryFunctor = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        "Should not be called!", None) )
+    addTestHistoryFunctor(test2Dict)
+    self.assertEqual(test2Dict['pass_last_x_days'], 3)
+    self.assertEqual(test2Dict['nopass_last_x_days'], 2)
+    self.assertEqual(test2Dict['consec_pass_days'], 1)
+    self.assertEqual(test2Dict['previous_nopass_date'], '2000-12-31')
+
+
+  # The build test history cache file is kept with
+  # keepBuildTestHistoryCacheFile=True and is then used with
+  # useCachedCDashData=True after removing the per-test cache files
+  def test_keep_build_cache_file_use_cached_data(self):
+
+    testCacheOutputDir = os.getcwd()+\
+      "/cacheTestHistoryForBuildsOfTests/test_keep_build_cache_file_use_cached_data"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    buildTestHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=site&compare2=61&value2=site_name')
+    buildCacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-BUILD-HIST-5.json"
+    testCacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-test_name-HIST-5.json"
+    testsLOD = [ copy.deepcopy(g_testDictFailed) ]
+
+    # With cached data and no cache files, CDash is not called
+    self.assertRaises((IOError, OSError), cacheTestHistoryForBuildsOfTests,
+      "site.com/cdash", "projectName", "2001-01-01", 5, testCacheOutputDir,
+      testsLOD, useCachedCDashData=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        "Should not be called!", None) )
+
+    numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash", "projectName",
+      "2001-01-01", 5, testCacheOutputDir, testsLOD,
+      keepBuildTestHistoryCacheFile=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        buildTestHistoryQueryUrl, {'builds':testHistoryLOD}) )
+    self.assertEqual(numBuilds, 1)
+    self.assertEqual(os.path.exists(buildCacheFile), True)
+
+    # Split the kept build cache file with cached data which then removes it
+    os.remove(testCacheFile)
+    numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash", "projectName",
+      "2001-01-01", 5, testCacheOutputDir, testsLOD, useCachedCDashData=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        "Should not be called!", None) )
+    self.assertEqual(numBuilds, 1)
+    self.assertEqual(
+      readCDashQueryDataCacheFile(testCacheFile)['builds'], testHistoryLOD)
+    self.assertEqual(os.path.exists(buildCacheFile), False)
+
+
+  # With a packed cache dir, the build test history cache file is written as a
+  # separate file (and not put in the pack file) so it can be removed with
+  # removeBuildTestHistoryCacheFiles()
+  def test_packed_cache_dir_remove_build_cache_file(self):
+
+    testCacheOutputDir = os.getcwd()+\
+      "/cacheTestHistoryForBuildsOfTests/test_packed_cache_dir_remove_build_cache_file"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    buildTestHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=site&compare2=61&value2=site_name')
+    buildCacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-BUILD-HIST-5.json"
+    testCacheFile = \
+      testCacheOutputDir+"/2001-01-01-site_name-build_name-test_name-HIST-5.json"
+    testsLOD = [ copy.deepcopy(g_testDictFailed) ]
+
+    setCDashQueryDataCacheDirPacked(testCacheOutputDir)
+    try:
+      numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash",
+        "projectName", "2001-01-01", 5, testCacheOutputDir, testsLOD,
+        keepBuildTestHistoryCacheFile=True,
+        extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+          buildTestHistoryQueryUrl, {'builds':testHistoryLOD}) )
+      self.assertEqual(numBuilds, 1)
+      self.assertEqual(sorted(os.listdir(testCacheOutputDir)),
+        [ '2001-01-01-site_name-build_name-BUILD-HIST-5.json',
+          '2001-01-01.cdashpack' ] )
+      self.assertEqual(getCDashQueryDataPackFile(testCacheFile).getKeys(),
+        [ '2001-01-01-site_name-build_name-test_name-HIST-5.json' ] )
+      self.assertEqual(
+        removeBuildTestHistoryCacheFiles(testCacheOutputDir, "2001-01-01", 5,
+          [ ('site_name', 'build_name') ] ),
+        1 )
+      self.assertEqual(cdashQueryDataCacheFileExists(buildCacheFile), False)
+      self.assertEqual(
+        readCDashQueryDataCacheFile(testCacheFile)['builds'], testHistoryLOD)
+      # A compressed build test history cache file name is not packed either
+      longBuildName = "b"*300
+      self.assertEqual(
+        getCDashQueryDataPackFile(getBuildTestHistoryCacheFilePath(
+          testCacheOutputDir, "2001-01-01", "site_name", longBuildName, 5)),
+        None )
+    finally:
+      setCDashQueryDataCacheDirPacked(testCacheOutputDir, False)
+
+
+  # Tests in two different builds require two queries and only tests without
+  # cache files are queried
+  def test_two_builds_one_cached(self):
+
+    testCacheOutputDir = \
+      os.getcwd()+"/cacheTestHistoryForBuildsOfTests/test_two_builds_one_cached"
+    if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+    os.makedirs(testCacheOutputDir)
+
+    testDict = copy.deepcopy(g_testDictFailed)
+    test2Dict = copy.deepcopy(g_testDictFailed)
+    test2Dict['buildName'] = 'build_name_2'
+    test3Dict = copy.deepcopy(g_testDictFailed)
+    test3Dict['buildName'] = 'build_name_3'
+
+    # Pre-existing cache file for the test in build_name_3
+    pprintPythonDataToFile({'builds':[]}, testCacheOutputDir+\
+      "/2001-01-01-site_name-build_name_3-test_name-HIST-5.json")
+
+    class MockExtractCDashApiQueryDataByBuild(object):
+      def __init__(self):
+        self.queriedBuildNames = []
+      def __call__(self, cdashApiQueryUrl):
+        buildName = cdashApiQueryUrl.split("value1=")[1].split("&")[0]
+        self.queriedBuildNames.append(buildName)
+        testHistoryLOD = getTestHistoryLOD5(
+          [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+        for testHistoryDict in testHistoryLOD:
+          testHistoryDict['buildName'] = buildName
+        return {'builds':testHistoryLOD}
+
+    mockExtractCDashApiQueryData = MockExtractCDashApiQueryDataByBuild()
+    numBuilds = cacheTestHistoryForBuildsOfTests( "site.com/cdash", "projectName",
+      "2001-01-01", 5, testCacheOutputDir, [ testDict, test2Dict, test3Dict ],
+      maxConcurrency=2,
+      extractCDashApiQueryData_in=mockExtractCDashApiQueryData )
+    self.assertEqual(numBuilds, 2)
+    self.assertEqual(sorted(mockExtractCDashApiQueryData.queriedBuildNames),
+      [ 'build_name', 'build_name_2' ] )
+    for buildName in [ 'build_name', 'build_name_2' ]:
+      testCacheFile = testCacheOutputDir+\
+        "/2001-01-01-site_name-"+buildName+"-test_name-HIST-5.json"
+      testHistoryLOD = readCDashQueryDataCacheFile(testCacheFile)['builds']
+      self.assertEqual(len(testHistoryLOD), 5)
+      self.assertEqual(testHistoryLOD[0]['buildName'], buildName)
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.TestHistoryStore
+#
+#############################################################################
+
+
+def createTestHistoryStoreTestDir(testName):
+  testCacheOutputDir = os.getcwd()+"/TestHistoryStore/"+testName
+  if os.path.exists(testCacheOutputDir): shutil.rmtree(testCacheOutputDir)
+  os.makedirs(testCacheOutputDir)
+  return testCacheOutputDir
+
+
+class test_TestHistoryStore(unittest.TestCase):
+
+  def test_getTestHistoryTestingDaysList(self):
+    self.assertEqual(getTestHistoryTestingDaysList("2001-01-02", 4),
+      ['2000-12-30', '2000-12-31', '2001-01-01', '2001-01-02'] )
+
+  def test_add_get_missing_days(self):
+    testCacheOutputDir = createTestHistoryStoreTestDir("test_add_get_missing_days")
+    testHistoryStore = TestHistoryStore(testCacheOutputDir+"/store.sqlite")
+    testKey = ('projectName', 'site_name', 'build_name', 'test_name')
+    testingDaysList = getTestHistoryTestingDaysList("2001-01-01", 5)
+    self.assertEqual(
+      testHistoryStore.getMissingTestingDays(testKey, testingDaysList),
+      testingDaysList )
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    testHistoryStore.addTestHistory(testKey, testingDaysList, testHistoryLOD,
+      "00:00", completeBeforeDate="2001-01-01")
+    # All but the current testing day are complete
+    self.assertEqual(
+      testHistoryStore.getMissingTestingDays(testKey, testingDaysList),
+      [ '2001-01-01' ] )
+    self.assertEqual(
+      testHistoryStore.getTestHistory(testKey, testingDaysList), testHistoryLOD)
+    self.assertEqual(
+      testHistoryStore.getTestHistory(testKey, testingDaysList[3:]),
+      [ testHistoryLOD[0], testHistoryLOD[1] ] )
+    # Other tests are not impacted
+    otherTestKey = ('projectName', 'site_name', 'build_name', 'other_test')
+    self.assertEqual(
+      testHistoryStore.getTestHistory(otherTestKey, testingDaysList), [])
+    self.assertEqual(
+      testHistoryStore.getMissingTestingDays(otherTestKey, testingDaysList),
+      testingDaysList )
+    testHistoryStore.close()
+    # The store persists and replaces the results for the re-added days
+    testHistoryStore = TestHistoryStore(testCacheOutputDir+"/store.sqlite")
+    newTestDict = copy.deepcopy(testHistoryLOD[1])
+    newTestDict['status'] = 'Passed'
+    testHistoryStore.addTestHistory(testKey, ['2001-01-01'], [newTestDict],
+      "00:00", completeBeforeDate="2001-01-02")
+    self.assertEqual(
+      testHistoryStore.getMissingTestingDays(testKey, testingDaysList), [] )
+    self.assertEqual(
+      testHistoryStore.getTestHistory(testKey, ['2001-01-01']), [newTestDict])
+    testHistoryStore.close()
+
+  # Get the test history for two days in a row using the store and show that
+  # only the missing days are downloaded the second day
+  def test_AddTestHistoryToTestDictFunctor_two_days(self):
+    testCacheOutputDir = createTestHistoryStoreTestDir(
+      "test_AddTestHistoryToTestDictFunctor_two_days")
+    testHistoryStore = TestHistoryStore(testCacheOutputDir+"/store.sqlite")
+
+    # Day 1: Download all 5 days of history
+    testDict = copy.deepcopy(g_testDictFailed)
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    testHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-28&end=2001-01-01&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name')
+    addTestHistoryFunctor = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        testHistoryQueryUrl, {'builds':testHistoryLOD}),
+      testHistoryStore=testHistoryStore )
+    addTestHistoryFunctor(testDict)
+    self.assertEqual(testDict['test_history_query_url'], testHistoryQueryUrl)
+    self.assertEqual(testDict['nopass_last_x_days'], 3)
+    self.assertEqual(testDict['pass_last_x_days'], 2)
+    self.assertEqual(testDict['consec_nopass_days'], 2)
+    self.assertEqual(
+      readCDashQueryDataCacheFile(testCacheOutputDir+\
+        "/2001-01-01-site_name-build_name-test_name-HIST-5.json")['builds'],
+      testHistoryLOD )
+
+    # Day 2: Only download the last two days of history
+    testDict = copy.deepcopy(g_testDictFailed)
+    testDict['buildstarttime'] = '2001-01-02T05:54:03 UTC'
+    day2TestDict = copy.deepcopy(testDict)
+    day2TestDict.pop('issue_tracker')
+    day2TestDict.pop('issue_tracker_url')
+    day1TestDict = copy.deepcopy(testHistoryLOD[1])
+    fetchTestHistoryQueryUrl = \
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2001-01-01&end=2001-01-02&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name')
+    addTestHistoryFunctor = AddTestHistoryToTestDictFunctor(
+      "site.com/cdash", "projectName", "2001-01-02", "00:00", 5,
+      testCacheOutputDir, useCachedCDashData=False,
+      alwaysUseCacheFileIfExists=True,
+      extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+        fetchTestHistoryQueryUrl, {'builds':[day1TestDict, day2TestDict]}),
+      testHistoryStore=testHistoryStore )
+    addTestHistoryFunctor(testDict)
+    self.assertEqual(testDict['test_history_query_url'],
+      u('site.com/cdash/api/v1/queryTests.php?project=projectName&begin=2000-12-29&end=2001-01-02&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=build_name&field2=testname&compare2=61&value2=test_name&field3=site&compare3=61&value3=site_name') )
+    self.assertEqual(
+      [ testHistoryDict['buildstarttime'] \
+        for testHistoryDict in testDict['test_history_list'] ],
+      [ '2001-01-02T05:54:03 UTC', '2001-01-01T05:54:03 UTC',
+        '2000-12-31T05:54:03 UTC', '2000-12-30T05:54:03 UTC',
+        '2000-12-29T05:54:03 UTC' ] )
+    self.assertEqual(testDict['nopass_last_x_days'], 3)
+    self.assertEqual(testDict['pass_last_x_days'], 2)
+    self.assertEqual(testDict['missing_last_x_days'], 0)
+    self.assertEqual(testDict['consec_nopass_days'], 3)
+    testHistoryStore.close()
+
+  # With useCachedCDashData=True, the test history comes from the store only
+  # if it has all of the testing days and CDash is never called
+  def test_AddTestHistoryToTestDictFunctor_use_cached_data(self):
+    testCacheOutputDir = createTestHistoryStoreTestDir(
+      "test_AddTestHistoryToTestDictFunctor_use_cached_data")
+    testHistoryStore = TestHistoryStore(testCacheOutputDir+"/store.sqlite")
+    testKey = ('projectName', 'site_name', 'build_name', 'test_name')
+    testHistoryLOD = getTestHistoryLOD5(
+      [ 'Failed', 'Failed', 'Passed', 'Passed', 'Not Run' ] )
+    testingDaysList = getTestHistoryTestingDaysList("2001-01-01", 5)
+    def createAddTestHistoryFunctor():
+      return AddTestHistoryToTestDictFunctor(
+        "site.com/cdash", "projectName", "2001-01-01", "00:00", 5,
+        testCacheOutputDir, useCachedCDashData=True,
+        alwaysUseCacheFileIfExists=True,
+        extractCDashApiQueryData_in=MockExtractCDashApiQueryDataFunctor(
+          "no-url-should-be-downloaded", {'builds':[]}),
+        testHistoryStore=testHistoryStore )
+    testHistoryCacheFile = testCacheOutputDir+\
+      "/2001-01-01-site_name-build_name-test_name-HIST-5.json"
+    # The store is missing the current testing day and there is no cache file
+    testHistoryStore.addTestHistory(testKey, testingDaysList, testHistoryLOD,
+      "00:00", completeBeforeDate="2001-01-01")
+    self.assertRaises((IOError, OSError), createAddTestHistoryFunctor(),
+      copy.deepcopy(g_testDictFailed))
+    # The store has all of the testing days
+    testHistoryStore.addTestHistory(testKey, testingDaysList, testHistoryLOD,
+      "00:00", completeBeforeDate="2001-01-02")
+    testDict = copy.deepcopy(g_testDictFailed)
+    createAddTestHistoryFunctor()(testDict)
+    self.assertEqual(testDict['nopass_last_x_days'], 3)
+    self.assertEqual(testDict['pass_last_x_days'], 2)
+    self.assertFalse(os.path.exists(testHistoryCacheFile))
+    testHistoryStore.close()
+
+
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.TestRecord and BuildRecord
+#
+#############################################################################
+
+class test_TestRecord(unittest.TestCase):
+
+  def test_dict_interface(self):
+    testDict = copy.deepcopy(g_testDictFailed)
+    testDict['some_other_field'] = [1, 2]
+    testRecord = TestRecord(testDict)
+    self.assertEqual(testRecord, testDict)
+    self.assertEqual(testDict, testRecord)
+    self.assertEqual(len(testRecord), len(testDict))
+    self.assertEqual(sorted(testRecord.keys()), sorted(testDict.keys()))
+    self.assertEqual(testRecord['site'], 'site_name')
+    self.assertEqual(testRecord['some_other_field'], [1, 2])
+    self.assertEqual(testRecord.get('status_color', 'none'), 'none')
+    self.assertEqual('site' in testRecord, True)
+    self.assertEqual('status_color' in testRecord, False)
+    self.assertRaises(KeyError, testRecord.__getitem__, 'status_color')
+    testRecord.update({'status_color':'red', 'another_field':1})
+    self.assertEqual(testRecord['status_color'], 'red')
+    self.assertEqual(testRecord.pop('another_field'), 1)
+    self.assertEqual(testRecord.pop('site'), 'site_name')
+    self.assertEqual('site' in testRecord, False)
+    self.assertEqual(testRecord.pop('site', None), None)
+    self.assertNotEqual(testRecord, testDict)
+    testRecordCopy = testRecord.copy()
+    self.assertEqual(type(testRecordCopy), TestRecord)
+    self.assertEqual(testRecordCopy, testRecord)
+    testRecordCopy['testname'] = 'other_name'
+    self.assertEqual(testRecord['testname'], 'test_name')
+
+  def test_computed_fields(self):
+    testRecord = TestRecord(g_testDictFailed)
+    self.assertEqual('pass_last_x_days_url' in testRecord, False)
+    testRecord['test_history_browser_url'] = 'some.url'
+    # Setting a computed field to its computed value stores nothing
+    testRecord['pass_last_x_days_url'] = 'some.url'
+    testRecord['pass_last_x_days_color'] = cdashColorPassed()
+    self.assertEqual(testRecord._extraFields, None)
+    self.assertEqual(testRecord['pass_last_x_days_url'], 'some.url')
+    self.assertEqual(testRecord['nopass_last_x_days_color'], cdashColorFailed())
+    self.assertEqual(testRecord['consec_missing_days_color'], cdashColorMissing())
+    self.assertEqual(len(testRecord), len(g_testDictFailed)+1+12)
+    # Setting a computed field to a different value overrides it
+    testRecord['consec_pass_days_url'] = 'other.url'
+    self.assertEqual(testRecord['consec_pass_days_url'], 'other.url')
+    self.assertEqual(len(testRecord), len(g_testDictFailed)+1+12)
+    del testRecord['consec_pass_days_url']
+    self.assertEqual(testRecord['consec_pass_days_url'], 'some.url')
+    self.assertRaises(Exception, testRecord.__delitem__, 'consec_pass_days_url')
+    # Computed fields go away with the field they depend on
+    del testRecord['test_history_browser_url']
+    self.assertEqual(testRecord, g_testDictFailed)
+
+  def test_copy_pickle_toDict(self):
+    testHistoryRecord = TestRecord(g_testDictFailed)
+    testRecord = TestRecord(g_testDictFailed)
+    testRecord['test_history_browser_url'] = 'some.url'
+    testRecord['test_history_list'] = [ testHistoryRecord ]
+    testRecord['other'] = 'value'
+    testRecordDeepCopy = copy.deepcopy(testRecord)
+    self.assertEqual(testRecordDeepCopy, testRecord)
+    self.assertFalse(
+      testRecordDeepCopy['test_history_list'][0] is testHistoryRecord)
+    self.assertEqual(pickle.loads(pickle.dumps(testRecord)), testRecord)
+    testDict = testRecord.toDict()
+    self.assertEqual(type(testDict), dict)
+    self.assertEqual(type(testDict['test_history_list'][0]), dict)
+    self.assertEqual(testDict, testRecord)
+    self.assertEqual(testDict['consec_nopass_days_url'], 'some.url')
+    self.assertEqual(eval(repr(testRecord)), testDict)
+
+  def test_BuildRecord(self):
+    buildDict = { 'group':'Nightly', 'site':'site_name',
+      'buildname':'build_name', 'update':{'errors':0},
+      'test':{'fail':1, 'notrun':0, 'pass':10}, 'other':1 }
+    buildsLOD = [ buildDict, BuildRecord(buildDict) ]
+    convertListOfDictsToRecords(buildsLOD, BuildRecord)
+    self.assertEqual(type(buildsLOD[0]), BuildRecord)
+    self.assertEqual(buildsLOD, [ buildDict, buildDict ])
+    # Fields with the same name as dict methods work
+    self.assertEqual(buildsLOD[0]['update'], {'errors':0})
+    buildsLOD[0].update({'update':{'errors':1}})
+    self.assertEqual(buildsLOD[0]['update'], {'errors':1})
+    self.assertEqual(buildHasConfigureFailures(buildsLOD[1]), False)
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.addCDashTestingDayFunctor
@@ -3508,6 +6281,34 @@ body bottom
     self.assertEqual(reportHtml, reportHtml_expected)
 
 
+  def test_write_to_file_appended_parts(self):
+    cdashReportData = CDashReportData()
+    cdashReportData.appendHtmlEmailBodyTop("body ")
+    cdashReportData.appendHtmlEmailBodyTop("top\n")
+    cdashReportData.appendHtmlEmailBodyBottom("body ")
+    cdashReportData.appendHtmlEmailBodyBottom("bottom\n")
+    self.assertEqual(cdashReportData.htmlEmailBodyTop, "body top\n")
+    self.assertEqual(cdashReportData.htmlEmailBodyBottom, "body bottom\n")
+    cdashReportData.appendHtmlEmailBodyBottom("more\n")
+    cdashReportData.htmlEmailBodyTop += "more\n"
+    self.assertEqual(cdashReportData.htmlEmailBodyTop, "body top\nmore\n")
+    self.assertEqual(cdashReportData.htmlEmailBodyBottom,
+      "body bottom\nmore\n")
+    reportHtmlStr = getFullCDashHtmlReportPageStr(cdashReportData,
+      pageTitle="page title", detailsBlockSummary="these are the details")
+    htmlFileName = "test_getFullCDashHtmlReportPageStr_write_to_file.html"
+    with open(htmlFileName, 'w') as outFile:
+      writeFullCDashHtmlReportPage(outFile.write, cdashReportData,
+        pageTitle="page title", detailsBlockSummary="these are the details")
+    with open(htmlFileName, 'r') as inFile:
+      self.assertEqual(inFile.read(), reportHtmlStr)
+    self.assertEqual(reportHtmlStr.split("\n")[6:11],
+      ["body top", "more", "", "<details>", ""])
+    cdashReportData.reset()
+    self.assertEqual(cdashReportData.htmlEmailBodyTop, "")
+    self.assertEqual(cdashReportData.htmlEmailBodyBottom, "")
+
+
 #############################################################################
 #
 # Test CDashQueryAnalyzeReport.createHtmlTableStr()
@@ -3575,6 +6376,47 @@ r"""<style>my_style</style>
 """
     self.assertEqual(htmlTable, htmlTable_expected)
 
+  # Check that writing the table in parts gives the same result with colors,
+  # URLs and soft word breaks
+  def test_write_table_same_as_str(self):
+    tcd = TableColumnData
+    colDataList = [
+      tcd("Data 1", 'key1'),
+      tcd("Data 2", 'key2', "right"),
+      ]
+    rowDataList = [
+      {'key1':'r1_d1', 'key1_url':'url1', 'key2':1, 'key2_color':'red'},
+      {'key1':' r2d1 ', 'key2':2, 'key2_color':'green', 'key2_url':'url2'},
+      ]
+    htmlTableParts = []
+    writeHtmlTable(htmlTableParts.append, "My great data", colDataList,
+      rowDataList, htmlStyle="")
+    self.assertEqual(len(htmlTableParts), 4)  # Header, 2 rows, end
+    self.assertEqual("".join(htmlTableParts),
+      createHtmlTableStr("My great data", colDataList, rowDataList, htmlStyle=""))
+    self.assertEqual(htmlTableParts[1],
+      "<tr>\n"+\
+      "<td align=\"left\"><a href=\"url1\">r1_&shy;d1</a></td>\n"+\
+      "<td align=\"right\"><font color=\"red\">1</font></td>\n"+\
+      "</tr>\n\n" )
+    self.assertEqual(htmlTableParts[2],
+      "<tr>\n"+\
+      "<td align=\"left\">r2d1</td>\n"+\
+      "<td align=\"right\"><a href=\"url2\"><font color=\"green\">2</font></a></td>\n"+\
+      "</tr>\n\n" )
+
+  def test_none_entry_error(self):
+    tcd = TableColumnData
+    colDataList = [ tcd("Data 1", 'key1'), tcd("Data 2", 'key2') ]
+    rowDataList = [ {'key1':'data1', 'key2':'data2'}, {'key1':'data1'} ]
+    try:
+      createHtmlTableStr("My great data", colDataList, rowDataList)
+      self.assertFalse("Error, did not throw!")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, column 1 dict key='key2' row 1 entry is 'None' which is not"+\
+        " allowed!\n\nRow dict = "+str(rowDataList[1]))
+
   # Check the correct default table style is set
   def test_1x1_table_correct_style(self):
     tcd = TableColumnData
@@ -4346,6 +7188,40 @@ class test_IssueTrackerTestsStatusReporter(unittest.TestCase):
       debugPrint=False
       )
 
+  def test_twif_8_twinr_1_flaky_2(self):
+    testsLOD = copy.deepcopy(g_twoif_10_twoinr2_twif_8_twinr_1_test_data_out)
+    setIssueTrackerFields(testsLOD, u('#1234'),
+      u('https://github.com/trilinos/Trilinos/issues/1234') )
+    for testname in ['MueLu_UnitTestsBlockedEpetra_MPI_1',
+        'Teko_ModALPreconditioner_MPI_1'] \
+      :
+      testIdx = getIdxOfTestInTestLOD(testsLOD,
+        'cee-rhel6', 'Trilinos-atdm-cee-rhel6-clang-opt-serial', testname)
+      testsLOD[testIdx]['status_changes_last_x_days'] = 4
+      testsLOD[testIdx]['test_history_class'] = 'flaky'
+    issueTrackerTestsStatusReporter = IssueTrackerTestsStatusReporter(verbose=False)
+    okayToCloseIssue = \
+      issueTrackerTestsStatusReporter.reportIssueTrackerTestsStatus(testsLOD)
+    self.assertEqual(okayToCloseIssue, False)
+    self.assertEqual(
+      issueTrackerTestsStatusReporter.cdashReportData.summaryLineDataNumbersList,
+      ['twif=8', 'twinr=1'])
+    assertListOfRegexsFoundInListOfStrs(self,
+      regexList=[
+        '<h3><font color="red">Tests with issue trackers Failed: twif=8</font></h3>',
+        '<h3><font color="orange">Tests with issue trackers Not Run: twinr=1</font></h3>',
+        '<h3><font color="orange">Flaky tests: flaky=2</font></h3>',
+        '<th>Pass/Non-pass Changes</th>',
+        '<td align="left"><a href=".*">MueLu_&shy;UnitTestsBlockedEpetra_&shy;MPI_&shy;1</a></td>',
+        '<td align="right">4</td>',
+        '<td align="left"><a href=".*">Teko_&shy;ModALPreconditioner_&shy;MPI_&shy;1</a></td>',
+        ],
+      stringsList=issueTrackerTestsStatusReporter.testsetsReporter.\
+        cdashReportData.htmlEmailBodyBottom.split('\n'),
+      stringsListName="cdashReportData.htmlEmailBodyBottom",
+      debugPrint=False
+      )
+
   # NOTE: The above tests for the class
   # CDashQueryAnalyzeReport.IssueTrackerTestsStatusReporter also tests the
   # classes CDashQueryAnalyzeReport.SingleTestsetReporter and
@@ -4353,6 +7229,150 @@ class test_IssueTrackerTestsStatusReporter(unittest.TestCase):
   # duplicate all of those large and complex tests for little added value.
 
 
+#############################################################################
+#
+# Test CDashQueryAnalyzeReport.HtmlEmailBatchSender
+#
+#############################################################################
+
+
+g_htmlEmailBody = "<html><body><p>Build&shy;Name failed</p></body></html>"
+
+
+def getEmailMessageParts(dataStr):
+  import email as pyemail
+  msg = pyemail.message_from_string(dataStr)
+  return (msg, [ part for part in msg.walk() if not part.is_multipart() ])
+
+
+class test_HtmlEmailBatchSender(unittest.TestCase):
+
+  def setUp(self):
+    self.smtpServer = startLocalSmtpStandInServer()
+
+  def tearDown(self):
+    self.smtpServer.shutdown()
+    self.smtpServer.server_close()
+
+  def createSender(self, **kwargs):
+    return HtmlEmailBatchSender(smtpServer=self.smtpServer.getSmtpServerStr(),
+      **kwargs)
+
+  def test_one_message_per_recipient(self):
+    emailSender = self.createSender()
+    self.assertEqual(
+      emailSender.sendHtmlEmail("from@x.com", ["a@x.com", "b@x.com", "c@x.com"],
+        "FAILED: Builds", g_htmlEmailBody, doRemoveSoftHyphens=True),
+      3 )
+    self.assertEqual(self.smtpServer.numConnections, 1)
+    messagesList = self.smtpServer.messagesList
+    self.assertEqual([ message[1] for message in messagesList ],
+      [ ["a@x.com"], ["b@x.com"], ["c@x.com"] ])
+    for (toAddress, message) in zip(["a@x.com", "b@x.com", "c@x.com"],
+        messagesList \
+      ):
+      (msg, partsList) = getEmailMessageParts(message[2])
+      self.assertEqual(message[0], "from@x.com")
+      self.assertEqual(msg['To'], toAddress)
+      self.assertEqual(msg['Subject'], "FAILED: Builds")
+      self.assertEqual(partsList[-1].get_content_type(), "text/html")
+      self.assertEqual(partsList[-1].get_payload(decode=True).decode('utf-8'),
+        "<html><body><p>BuildName failed</p></body></html>")
+
+  def test_one_message_for_all_recipients(self):
+    emailSender = self.createSender(oneMessageForAllRecipients=True)
+    self.assertEqual(
+      emailSender.sendHtmlEmail("from@x.com", ["a@x.com", "b@x.com"],
+        "FAILED: Builds", g_htmlEmailBody),
+      1 )
+    messagesList = self.smtpServer.messagesList
+    self.assertEqual(len(messagesList), 1)
+    self.assertEqual(messagesList[0][1], ["a@x.com", "b@x.com"])
+    (msg, partsList) = getEmailMessageParts(messagesList[0][2])
+    self.assertEqual(msg['To'], "a@x.com, b@x.com")
+
+  def test_large_body_attachment(self):
+    emailSender = self.createSender(maxHtmlBodyBytes=20)
+    emailSender.sendHtmlEmail("from@x.com", ["a@x.com"], "FAILED: Builds",
+      g_htmlEmailBody)
+    (msg, partsList) = getEmailMessageParts(self.smtpServer.messagesList[0][2])
+    self.assertEqual(msg.get_content_type(), "multipart/mixed")
+    self.assertEqual(len(partsList), 2)
+    self.assertTrue(partsList[0].get_payload(decode=True).decode('utf-8').find(
+      "attached as the file 'report.html'") != -1)
+    self.assertEqual(partsList[1].get_filename(), "report.html")
+    self.assertEqual(partsList[1].get_payload(decode=True).decode('utf-8'),
+      g_htmlEmailBody)
+
+  def test_large_body_gzip(self):
+    emailSender = self.createSender(maxHtmlBodyBytes=20,
+      largeHtmlBodyMode="gzip")
+    emailSender.sendHtmlEmail("from@x.com", ["a@x.com"], "FAILED: Builds",
+      g_htmlEmailBody)
+    (msg, partsList) = getEmailMessageParts(self.smtpServer.messagesList[0][2])
+    self.assertEqual(partsList[1].get_filename(), "report.html.gz")
+    self.assertEqual(partsList[1].get_content_type(), "application/gzip")
+    self.assertEqual(
+      gzipDecompressBytes(partsList[1].get_payload(decode=True)).decode('utf-8'),
+      g_htmlEmailBody)
+
+  def test_small_body_not_attached(self):
+    emailSender = self.createSender(maxHtmlBodyBytes=len(g_htmlEmailBody))
+    emailSender.sendHtmlEmail("from@x.com", ["a@x.com"], "FAILED: Builds",
+      g_htmlEmailBody)
+    (msg, partsList) = getEmailMessageParts(self.smtpServer.messagesList[0][2])
+    self.assertEqual(msg.get_content_type(), "multipart/alternative")
+
+  def test_refused_recipient(self):
+    emailSender = self.createSender()
+    try:
+      emailSender.sendHtmlEmail("from@x.com",
+        ["a@x.com", "refuse@x.com", "b@x.com"], "FAILED: Builds",
+        g_htmlEmailBody)
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, failed to send the email"+\
+        " 'FAILED: Builds' to the addresses: refuse@x.com")
+    self.assertEqual([ message[1] for message in self.smtpServer.messagesList ],
+      [ ["a@x.com"], ["b@x.com"] ])
+
+  def test_send_in_background(self):
+    emailSender = self.createSender()
+    emailSend = emailSender.sendHtmlEmailInBackground("from@x.com",
+      ["a@x.com", "b@x.com"], "FAILED: Builds", g_htmlEmailBody)
+    self.assertEqual(emailSend.wait(), 2)
+    self.assertEqual(len(self.smtpServer.messagesList), 2)
+    emailSend = emailSender.sendHtmlEmailInBackground("from@x.com",
+      ["refuse@x.com"], "FAILED: Builds", g_htmlEmailBody)
+    self.assertRaises(Exception, emailSend.wait)
+
+  def test_wait_for_all_sends_in_background(self):
+    emailSender = self.createSender()
+    emailSendsList = [
+      emailSender.sendHtmlEmailInBackground("from@x.com",
+        ["refuse@x.com"], "FAILED: Builds", g_htmlEmailBody),
+      emailSender.sendHtmlEmailInBackground("from@x.com",
+        ["a@x.com"], "PASSED: Builds", g_htmlEmailBody),
+      ]
+    self.assertFalse(emailSendsList[0].thread.daemon)
+    emailSendsError = waitForBackgroundFunctionCalls(emailSendsList)
+    self.assertEqual(emailSendsError.failedCallsList,
+      [ (0, "Error, failed to send the email 'FAILED: Builds' to the"+\
+          " addresses: refuse@x.com") ] )
+    self.assertEqual(str(emailSendsError).split("\n")[0],
+      "Error, 1 of 2 background function calls failed:")
+    self.assertEqual([ message[1] for message in self.smtpServer.messagesList ],
+      [ ["a@x.com"] ])
+    self.assertEqual(waitForBackgroundFunctionCalls(emailSendsList[1:]), None)
+
+  def test_bad_large_body_mode(self):
+    try:
+      HtmlEmailBatchSender(largeHtmlBodyMode="zip")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, largeHtmlBodyMode='zip' must be"+\
+        " 'attachment' or 'gzip'!")
+
 
 #
 # Run the unit tests!
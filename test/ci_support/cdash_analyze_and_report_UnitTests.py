@@ -41,6 +41,7 @@ import os
 import sys
 import re
 import copy
+import json
 import shutil
 import unittest
 import pprint
@@ -85,8 +86,7 @@ def cdash_analyze_and_report_setup_test_dir(
 # Extract test dicts list from a cdash/queryTests.php JSON cache file
 def getTestsDictListFromCDashJsonFile(testOutputDir, testJsonRelFilePath):
   testsJsonFileFullPath = testOutputDir+"/"+testJsonRelFilePath
-  with open(testsJsonFileFullPath, 'r') as testsJsonFile:
-    testsJson = eval(testsJsonFile.read())
+  testsJson = CDQAR.readCDashQueryDataCacheFile(testsJsonFileFullPath)
   return testsJson['builds']
 
 
@@ -296,6 +296,7 @@ class test_cdash_analyze_and_report(unittest.TestCase):
         # name.
 
         "Tests with issue trackers Failed: twif=9",
+        "Flaky tests: flaky=4",
         ],
       [
         # Top title
@@ -311,6 +312,7 @@ class test_cdash_analyze_and_report(unittest.TestCase):
         "<p>",
         "<font color=\"red\">Tests without issue trackers Failed: twoif=12</font><br>",
         "Tests with issue trackers Failed: twif=9<br>",
+        "<font color=\"orange\">Flaky tests: flaky=4</font><br>",
         "</p>",
          
         # twoif table
@@ -341,7 +343,12 @@ class test_cdash_analyze_and_report(unittest.TestCase):
 
         # twif table
         "<h3>Tests with issue trackers Failed: twif=9</h3>",
-        "<td align=\"left\"><a href=\"https://something[.]com/cdash/index[.]php[?]project=ProjectName&begin=2018-09-29&end=2018-10-28&filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=Trilinos-atdm-cee-rhel6-clang-opt-serial&field2=site&compare2=61&value2=cee-rhel6\">Trilinos-atdm-cee-rhel6-clang-opt-serial</a></td>"
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/index[.]php[?]project=ProjectName&begin=2018-09-29&end=2018-10-28&filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=Trilinos-atdm-cee-rhel6-clang-opt-serial&field2=site&compare2=61&value2=cee-rhel6\">Trilinos-atdm-cee-rhel6-clang-opt-serial</a></td>",
+
+        # flaky table (tests also listed in the tables above)
+        "<h3><font color=\"orange\">Flaky tests: flaky=4</font></h3>",
+        "<th>Pass/Non-pass Changes</th>",
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57859101&build=4107245\">KokkosKernels_&shy;blas_&shy;serial_&shy;MPI_&shy;1</a></td>",
         ],
       #verbose=True,
       #debugPrint=True,
@@ -354,6 +361,689 @@ class test_cdash_analyze_and_report(unittest.TestCase):
         ''] )
 
 
+  # Same as test_twoif_12_twif_9 but also listing the number of flaky tests in
+  # the summary line
+  #
+  def test_twoif_12_twif_9_flaky_tests_in_summary_line(self):
+
+    testCaseName = "twoif_12_twif_9_flaky_tests_in_summary_line"
+
+    cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--flaky-tests-in-summary-line=on",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9, flaky=4): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "  --flaky-tests-in-summary-line='on'",
+        "Flaky tests: flaky=4",
+        ],
+      [
+        "<h2>FAILED [(]twoif=12, twif=9, flaky=4[)]: ProjectName Nightly Builds on 2018-10-28</h2>",
+        "<font color=\"orange\">Flaky tests: flaky=4</font><br>",
+        "<h3><font color=\"orange\">Flaky tests: flaky=4</font></h3>",
+        ],
+      )
+
+
+  # Test getting the test history with several threads
+  #
+  # This checks that the rows in the tables are in the same order as when the
+  # test history is gotten one test at a time.
+  #
+  def test_twoif_12_twif_9_test_history_max_concurrency(self):
+
+    testCaseName = "twoif_12_twif_9_test_history_max_concurrency"
+
+    cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--test-history-max-concurrency=4",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "  --test-history-max-concurrency='4'",
+        "Num nonpassing tests without issue trackers Failed = 12",
+        "Num nonpassing tests with issue trackers Failed = 9",
+        "Tests without issue trackers Failed: twoif=12",
+        "Tests with issue trackers Failed: twif=9",
+        ],
+      [
+        "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 20[)]: twoif=12</font></h3>",
+        # First row
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860629&build=4107240\">Anasazi_&shy;Epetra_&shy;BKS_&shy;norestart_&shy;test_&shy;MPI_&shy;4</a></td>",
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860629&build=4107240\"><font color=\"red\">Failed</font></a></td>",
+        "<td align=\"left\">Completed [(]Failed[)]</td>",
+        "<td align=\"right\"><a href=\"https://something[.]com/cdash/queryTests[.]php[?]project=ProjectName&begin=2018-09-29&end=2018-10-28&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=Trilinos-atdm-mutrino-intel-opt-openmp-KNL&field2=testname&compare2=61&value2=Anasazi_Epetra_BKS_norestart_test_MPI_4&field3=site&compare3=61&value3=mutrino\"><font color=\"red\">30</font></a></td>",
+        # Second row
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860535&build=4107241\">Belos_&shy;gcrodr_&shy;hb_&shy;MPI_&shy;4</a></td>",
+        # twif table
+        "<h3>Tests with issue trackers Failed: twif=9</h3>",
+        ],
+      #verbose=True,
+      #debugPrint=True,
+      )
+
+
+  # Test writing the --timing-report JSON file and printing the summary table
+  #
+  # All of the CDash data is read from the cache files so this checks the
+  # cache hit counters and that the timers for the main parts of the analysis
+  # and reporting are there (but not the times).
+  #
+  def test_twoif_12_twif_9_timing_report(self):
+
+    testCaseName = "twoif_12_twif_9_timing_report"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--timing-report=timing.json",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "  --timing-report='timing.json'",
+        "Tests with issue trackers Failed: twif=9",
+        "Writing timing report file 'timing.json' ...",
+        "Timing report:",
+        "Timer +Count +Seconds",
+        "builds[.]download +1 +[0-9.]+",
+        "test_history[.]get +21 +[0-9.]+",
+        "Counter +Value",
+        "test_history[.]cache_hits +21",
+        "Cache +Hit Ratio",
+        "cdash_query_data +1[.]000",
+        ],
+      [
+        "<h3>Tests with issue trackers Failed: twif=9</h3>",
+        ],
+      #verbose=True,
+      #debugPrint=True,
+      )
+
+    with open(testOutputDir+"/timing.json", 'r') as timingReportFile:
+      timingData = json.load(timingReportFile)
+    self.assertEqual(sorted(timingData.keys()),
+      ['cache_hit_ratios', 'counters', 'timers'])
+    timers = timingData['timers']
+    for timerName in [ 'builds.download', 'builds.flatten', 'buildsets.report',
+      'testsets.report', 'test_history.add_to_tests', 'html.page', 'html.tables',
+      'total' ]:
+      self.assertTrue(timerName in timers, timerName)
+    self.assertEqual(timers['total']['count'], 1)
+    self.assertEqual(timers['test_history.get']['count'], 21)
+    counters = timingData['counters']
+    self.assertEqual(counters['test_history.cache_hits'], 21)
+    self.assertEqual(counters.get('test_history.cache_misses', 0), 0)
+    self.assertEqual(counters.get('cdash_query_data.cache_misses', 0), 0)
+    self.assertEqual(counters.get('cdash_query.requests', 0), 0)
+    # The builds query and the test history query for each of the 21 tests
+    # (which are all different URLs)
+    self.assertEqual(counters['cdash_query_coalescer.cache_misses'], 22)
+    self.assertEqual(counters.get('cdash_query_coalescer.cache_hits', 0), 0)
+    self.assertEqual(timingData['cache_hit_ratios']['cdash_query_data'], 1.0)
+    self.assertEqual(timingData['cache_hit_ratios']['test_history'], 1.0)
+
+
+  # Same as test_twoif_12_twif_9 but sending the emails to a local SMTP
+  # stand-in server
+  #
+  # This checks that the emails for all of the addresses are sent over one
+  # SMTP connection and that sending them is started before the CSV file is
+  # written.
+  #
+  def test_twoif_12_twif_9_send_email(self):
+
+    testCaseName = "twoif_12_twif_9_send_email"
+
+    cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    smtpServer = startLocalSmtpStandInServer()
+    try:
+      cdash_analyze_and_report_run_case(
+        self,
+        testCaseName,
+        [ "--limit-table-rows=20",
+          "--email-from-address=from@x.com",
+          "--send-email-to='a@x.com, b@x.com'",
+          "--email-smtp-server="+smtpServer.getSmtpServerStr(),
+          "--write-failing-tests-without-issue-trackers-to-file=twoif.csv",
+          ],
+        1,
+        "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+        [
+          "  --email-smtp-server='127[.]0[.]0[.]1:[0-9]+'",
+          "  --email-one-message-for-all-recipients='off'",
+          "Sending email to 'a@x.com', 'b@x.com' ...",
+          "Writing list of 'twiof' to file twoif.csv ...",
+          ],
+        [
+          "<h3>Tests with issue trackers Failed: twif=9</h3>",
+          ],
+        )
+    finally:
+      smtpServer.shutdown()
+      smtpServer.server_close()
+
+    self.assertEqual(smtpServer.numConnections, 1)
+    self.assertEqual(
+      [ message[0:2] for message in smtpServer.messagesList ],
+      [ ("from@x.com", ["a@x.com"]), ("from@x.com", ["b@x.com"]) ] )
+    for message in smtpServer.messagesList:
+      self.assertTrue(message[2].find("Subject: FAILED (twoif=12, twif=9):"+\
+        " ProjectName Nightly Builds on 2018-10-28") != -1)
+
+
+  # Same as test_twoif_12_twif_9 but after packing all of the test history
+  # cache files into the cache archive with --cache-compact=on
+  #
+  # This checks that the test history is read from the cache archive and that
+  # the same report is produced.
+  #
+  def test_twoif_12_twif_9_cache_compact(self):
+
+    testCaseName = "twoif_12_twif_9_cache_compact"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+    testHistoryDir = testOutputDir+"/test_history"
+    numTestHistoryFiles = len(os.listdir(testHistoryDir))
+
+    cmnd = ciSupportDir+"/cdash_analyze_and_report.py"+\
+      " --date=2018-10-28"+\
+      " --cdash-queries-cache-dir="+testOutputDir+\
+      " --cache-compact=on --cache-compact-min-age-days=0"
+    stdoutFile = testOutputDir+"/cache_compact.out"
+    rtnCode = CDQAR.echoRunSysCmnd(cmnd, throwExcept=False, outFile=stdoutFile)
+    self.assertEqual(rtnCode, 0)
+    with open(stdoutFile, 'r') as stdout:
+      stdoutStrList = stdout.read().split("\n")
+    assertListOfRegexsFoundInListOfStrs(self,
+      [
+        "  --cache-compact='on'",
+        "Managing the test history cache '.*/test_history' [.][.][.]",
+        "  Evicted 0 cache files [(]0 bytes[)]",
+        "  Packed "+str(numTestHistoryFiles)+" cache files [(][0-9]+ bytes[)]"+\
+          " into the cache archive",
+        "  Dropped 0 bytes of superseded records from 0 pack files",
+        "Test history cache statistics:",
+        "  num_archived_files = "+str(numTestHistoryFiles),
+        "  num_files = 0",
+        ],
+      stdoutStrList, stdoutFile)
+    self.assertEqual(os.listdir(testHistoryDir),
+      [CDQAR.g_cdashQueryCacheArchiveFileName])
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--timing-report=timing.json",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "Tests without issue trackers Failed: twoif=12",
+        "Tests with issue trackers Failed: twif=9",
+        ],
+      [
+        "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 20[)]: twoif=12</font></h3>",
+        "<h3>Tests with issue trackers Failed: twif=9</h3>",
+        ],
+      )
+
+    with open(testOutputDir+"/timing.json", 'r') as timingReportFile:
+      counters = json.load(timingReportFile)['counters']
+    self.assertEqual(counters['test_history.cache_hits'], 21)
+    self.assertEqual(counters['cache_archive.reads'], 21)
+    self.assertEqual(counters.get('cdash_query.requests', 0), 0)
+
+
+  # Same as test_twoif_12_twif_9 but using --test-history-cache-backend=packed
+  # with the test history cache files moved into the pack file for the
+  # testing day
+  #
+  # This checks that the test history is read from the pack file and that the
+  # same report is produced.
+  #
+  def test_twoif_12_twif_9_packed_test_history(self):
+
+    testCaseName = "twoif_12_twif_9_packed_test_history"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+    testHistoryDir = testOutputDir+"/test_history"
+    packFile = CDQAR.CDashQueryDataPackFile(testHistoryDir+"/2018-10-28.cdashpack")
+    for testHistoryFileName in sorted(os.listdir(testHistoryDir)):
+      testHistoryFilePath = testHistoryDir+"/"+testHistoryFileName
+      with open(testHistoryFilePath, 'rb') as testHistoryFile:
+        packFile.put(testHistoryFileName, testHistoryFile.read())
+      os.remove(testHistoryFilePath)
+    packFile.close()
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--test-history-cache-backend=packed",
+        "--timing-report=timing.json",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "  --test-history-cache-backend='packed'",
+        "Tests without issue trackers Failed: twoif=12",
+        "Tests with issue trackers Failed: twif=9",
+        ],
+      [
+        "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 20[)]: twoif=12</font></h3>",
+        "<h3>Tests with issue trackers Failed: twif=9</h3>",
+        ],
+      )
+
+    with open(testOutputDir+"/timing.json", 'r') as timingReportFile:
+      counters = json.load(timingReportFile)['counters']
+    self.assertEqual(counters['test_history.cache_hits'], 21)
+    self.assertEqual(counters['cache_pack.reads'], 21)
+    self.assertEqual(counters.get('cdash_query.requests', 0), 0)
+    self.assertEqual(os.listdir(testHistoryDir), ["2018-10-28.cdashpack"])
+
+
+  # Same as test_twoif_12_twif_9 but writing the test data with
+  # --test-data-file-format=pprint and then =jsonl
+  #
+  # This checks that the same test data is read back from both files with
+  # CDQAR.readTestDataFromFile().
+  #
+  def test_twoif_12_twif_9_test_data_jsonl(self):
+
+    testCaseName = "twoif_12_twif_9_test_data_jsonl"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    testDataLODList = []
+    for (testDataFileName, testDataFileFormat, useCompactRecords) in \
+      (("test_data.txt", "pprint", "off"), ("test_data.jsonl", "jsonl", "off"),
+       ("test_data_compact_records.jsonl", "jsonl", "on")) \
+      :
+      cdash_analyze_and_report_run_case(
+        self,
+        testCaseName,
+        [ "--limit-table-rows=20",
+          "--write-test-data-to-file="+testDataFileName,
+          "--test-data-file-format="+testDataFileFormat,
+          "--use-compact-records="+useCompactRecords,
+          ],
+        1,
+        "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+        [
+          "  --test-data-file-format='"+testDataFileFormat+"'",
+          "Writing out gathered test data to file "+testDataFileName+" ...",
+          ],
+        [
+          "<h3>Tests with issue trackers Failed: twif=9</h3>",
+          ],
+        )
+      testDataLODList.append(
+        CDQAR.readTestDataFromFile(testOutputDir+"/"+testDataFileName))
+
+    (pprintTestDataLOD, jsonlTestDataLOD, compactRecordsTestDataLOD) = \
+      testDataLODList
+    self.assertEqual(len(jsonlTestDataLOD), 9)
+    self.assertEqual(jsonlTestDataLOD, pprintTestDataLOD)
+    self.assertEqual(compactRecordsTestDataLOD, pprintTestDataLOD)
+    self.assertEqual(jsonlTestDataLOD[0]['cdash_testing_day'], '2018-10-28')
+
+
+  # Test that --test-data-file-format=npz is rejected before any CDash data
+  # is read if the Python module 'numpy' is not installed (and works if it
+  # is installed)
+  #
+  def test_twoif_12_twif_9_test_data_npz(self):
+
+    testCaseName = "twoif_12_twif_9_test_data_npz"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    extraCmndLineOptionsList = [
+      "--write-test-data-to-file=test_data.npz",
+      "--test-data-file-format=npz",
+      ]
+
+    if CDQAR.numpy == None:
+      cmnd = ciSupportDir+"/cdash_analyze_and_report.py"+\
+        " --date=2018-10-28"+\
+        " --cdash-project-name='ProjectName'"+\
+        " --build-set-name='ProjectName Nightly Builds'"+\
+        " --cdash-site-url='https://something.com/cdash'"+\
+        " --use-cached-cdash-data=on"+\
+        " --cdash-queries-cache-dir="+testOutputDir+\
+        " --write-email-to-file="+testOutputDir+"/htmlFile.html"+\
+        " "+" ".join(extraCmndLineOptionsList)
+      stdoutFile = testOutputDir+"/stdout.out"
+      rtnCode = CDQAR.echoRunSysCmnd(cmnd, throwExcept=False,
+        outFile=stdoutFile)
+      self.assertEqual(rtnCode, 1)
+      with open(stdoutFile, 'r') as stdout:
+        stdoutStr = stdout.read()
+      self.assertIn("Error, the test data file format 'npz' requires the"+\
+        " Python module 'numpy' which is not installed!", stdoutStr)
+      self.assertNotIn("Num builds = ", stdoutStr)
+      self.assertFalse(os.path.exists(testOutputDir+"/htmlFile.html"))
+      self.assertFalse(os.path.exists(testOutputDir+"/test_data.npz"))
+    else:
+      cdash_analyze_and_report_run_case(
+        self,
+        testCaseName,
+        extraCmndLineOptionsList,
+        1,
+        "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+        [
+          "  --test-data-file-format='npz'",
+          ],
+        [
+          "<h3>Tests with issue trackers Failed: twif=9</h3>",
+          ],
+        )
+      self.assertEqual(
+        len(CDQAR.readTestDataFromFile(testOutputDir+"/test_data.npz")), 9)
+
+
+  # Same as test_twoif_12_twif_9 but using --use-compact-records=on
+  #
+  # This checks that the HTML output is exactly the same as when using plain
+  # dicts for the builds and tests.
+  #
+  def test_twoif_12_twif_9_compact_records(self):
+
+    testCaseName = "twoif_12_twif_9_compact_records"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    htmlFileStrList = []
+    for useCompactRecords in ("off", "on"):
+      cdash_analyze_and_report_run_case(
+        self,
+        testCaseName,
+        [ "--limit-table-rows=20",
+          "--use-compact-records="+useCompactRecords,
+          ],
+        1,
+        "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+        [
+          "  --use-compact-records='"+useCompactRecords+"'",
+          "Num nonpassing tests direct from CDash query = 21",
+          "Tests without issue trackers Failed: twoif=12",
+          "Tests with issue trackers Failed: twif=9",
+          ],
+        [
+          "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 20[)]: twoif=12</font></h3>",
+          "<td align=\"right\"><a href=\"https://something[.]com/cdash/queryTests[.]php[?]project=ProjectName&begin=2018-09-29&end=2018-10-28&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=Trilinos-atdm-mutrino-intel-opt-openmp-KNL&field2=testname&compare2=61&value2=Anasazi_Epetra_BKS_norestart_test_MPI_4&field3=site&compare3=61&value3=mutrino\"><font color=\"red\">30</font></a></td>",
+          "<h3>Tests with issue trackers Failed: twif=9</h3>",
+          ],
+        #verbose=True,
+        #debugPrint=True,
+        )
+      with open(testOutputDir+"/htmlFile.html", 'r') as htmlFile:
+        htmlFileStrList.append(htmlFile.read())
+
+    self.assertEqual(htmlFileStrList[1], htmlFileStrList[0])
+
+
+  # Same as test_twoif_12_twif_9 but using --test-history-query-strategy=per-build
+  #
+  # The per-test history cache files for the tests in the build
+  # 'Trilinos-atdm-mutrino-intel-opt-openmp-KNL' are merged into a single
+  # per-build test history cache file and then removed.  This shows that the
+  # per-test history cache files are recreated from the per-build query data
+  # (kept for both lists of tests) and that the same results are produced.
+  #
+  def test_twoif_12_twif_9_per_build_test_history(self):
+
+    testCaseName = "twoif_12_twif_9_per_build_test_history"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    buildFilePrefix = \
+      "2018-10-28-mutrino-Trilinos-atdm-mutrino-intel-opt-openmp-KNL-"
+    buildTestHistoryLOD = []
+    testHistoryFileNames = sorted(
+      [ fileName for fileName in os.listdir(testOutputDir+"/test_history") \
+        if fileName.startswith(buildFilePrefix) ] )
+    self.assertEqual(len(testHistoryFileNames), 11)
+    for testHistoryFileName in testHistoryFileNames:
+      buildTestHistoryLOD.extend(
+        getTestHistoryDictListFromCDashJsonFile(testOutputDir, testHistoryFileName))
+      os.remove(testOutputDir+"/test_history/"+testHistoryFileName)
+    writeTestHistoryDictListFromCDashJsonFile(buildTestHistoryLOD, testOutputDir,
+      buildFilePrefix+"BUILD-HIST-30.json")
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--limit-table-rows=20",
+        "--test-history-query-strategy=per-build",
+        ],
+      1,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28",
+      [
+        "  --test-history-query-strategy='per-build'",
+        "Num nonpassing tests without issue trackers Failed = 12",
+        "Num nonpassing tests with issue trackers Failed = 9",
+        # One query for the twoif tests and one for the twif tests
+        "Getting 30 days of history for 10 tests in the build"+\
+          " Trilinos-atdm-mutrino-intel-opt-openmp-KNL on mutrino from one query",
+        "Tests with issue trackers Failed: twif=9",
+        "Getting 30 days of history for 1 tests in the build"+\
+          " Trilinos-atdm-mutrino-intel-opt-openmp-KNL on mutrino from one query",
+        ],
+      [
+        "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 20[)]: twoif=12</font></h3>",
+        # First row
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860629&build=4107240\">Anasazi_&shy;Epetra_&shy;BKS_&shy;norestart_&shy;test_&shy;MPI_&shy;4</a></td>",
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860629&build=4107240\"><font color=\"red\">Failed</font></a></td>",
+        "<td align=\"left\">Completed [(]Failed[)]</td>",
+        "<td align=\"right\"><a href=\"https://something[.]com/cdash/queryTests[.]php[?]project=ProjectName&begin=2018-09-29&end=2018-10-28&filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and&field1=buildname&compare1=61&value1=Trilinos-atdm-mutrino-intel-opt-openmp-KNL&field2=testname&compare2=61&value2=Anasazi_Epetra_BKS_norestart_test_MPI_4&field3=site&compare3=61&value3=mutrino\"><font color=\"red\">30</font></a></td>",
+        # Second row
+        "<td align=\"left\"><a href=\"https://something[.]com/cdash/testDetails[.]php[?]test=57860535&build=4107241\">Belos_&shy;gcrodr_&shy;hb_&shy;MPI_&shy;4</a></td>",
+        # twif table
+        "<h3>Tests with issue trackers Failed: twif=9</h3>",
+        ],
+      #verbose=True,
+      #debugPrint=True,
+      )
+
+    # The per-test history cache files were recreated
+    for testHistoryFileName in testHistoryFileNames:
+      self.assertEqual(
+        os.path.exists(testOutputDir+"/test_history/"+testHistoryFileName), True)
+    # The per-build test history cache file was removed at the end
+    self.assertEqual(os.path.exists(testOutputDir+"/test_history/"+\
+      buildFilePrefix+"BUILD-HIST-30.json"), False)
+
+
+  # Test --buildsets-manifest-file with three build-sets split out of the
+  # twoif_12_twif_9 data
+  #
+  # The builds and nonpassing tests for the whole project are read once and
+  # then split up for each build-set by matching its expected builds.  The
+  # last build-set has the same expected builds as the first one which shows
+  # that its test history is reused from the first build-set.
+  #
+  def test_twoif_12_twif_9_buildsets_manifest(self):
+
+    testCaseName = "twoif_12_twif_9_buildsets_manifest"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    with open(testOutputDir+"/expectedBuilds.csv", 'r') as expectedBuildsFile:
+      expectedBuildsStrList = expectedBuildsFile.read().splitlines()
+    with open(testOutputDir+"/expectedBuildsCee.csv", 'w') as csvFile:
+      csvFile.write("\n".join(
+        [ expectedBuildsStrList[0] ] +\
+        [ line for line in expectedBuildsStrList[1:] if "cee-rhel6" in line ]
+        )+"\n" )
+    with open(testOutputDir+"/expectedBuildsOther.csv", 'w') as csvFile:
+      csvFile.write("\n".join(
+        [ expectedBuildsStrList[0] ] +\
+        [ line for line in expectedBuildsStrList[1:] if not "cee-rhel6" in line ]
+        )+"\n" )
+    with open(testOutputDir+"/buildsetsManifest.csv", 'w') as csvFile:
+      csvFile.write(
+        "build_set_name, expected_builds_file, write_email_to_file\n"+\
+        "ProjectName CEE Builds, expectedBuildsCee.csv, htmlFileCee.html\n"+\
+        "ProjectName Other Builds, expectedBuildsOther.csv, htmlFile.html\n"+\
+        "ProjectName CEE Builds Again, expectedBuildsCee.csv,\n" )
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--buildsets-manifest-file=buildsetsManifest.csv",
+        ],
+      1,
+      "FAILED (twif=8): ProjectName CEE Builds Again on 2018-10-28",
+      [
+        "  --buildsets-manifest-file='buildsetsManifest.csv'",
+        "Num build-sets in manifest file = 3",
+        "Num builds for the whole project = 6",
+        "Num nonpassing tests for the whole project = 21",
+        # CEE build-set
+        "[*][*][*] Query and analyze CDash results for ProjectName CEE Builds for testing day 2018-10-28",
+        "Num expected builds = 3",
+        "Num tests with issue trackers matching expected builds = 8",
+        "Num nonpassing tests matching expected builds = 8",
+        "Getting 30 days of history for Teko_ModALPreconditioner_MPI_1 in the"+\
+          " build Trilinos-atdm-cee-rhel6-clang-opt-serial on cee-rhel6 from cache file",
+        "FAILED [(]twif=8[)]: ProjectName CEE Builds on 2018-10-28",
+        # Other build-set
+        "[*][*][*] Query and analyze CDash results for ProjectName Other Builds for testing day 2018-10-28",
+        "Num tests with issue trackers matching expected builds = 1",
+        "Num nonpassing tests matching expected builds = 13",
+        "FAILED [(]twoif=12, twif=1[)]: ProjectName Other Builds on 2018-10-28",
+        # CEE build-set again
+        "[*][*][*] Query and analyze CDash results for ProjectName CEE Builds Again for testing day 2018-10-28",
+        "Reusing 30 days of history for Teko_ModALPreconditioner_MPI_1 in the"+\
+          " build Trilinos-atdm-cee-rhel6-clang-opt-serial on cee-rhel6",
+        # Summary of all build-sets
+        "[*][*][*] Summary of all of the build-sets",
+        "FAILED [(]twif=8[)]: ProjectName CEE Builds on 2018-10-28",
+        "FAILED [(]twoif=12, twif=1[)]: ProjectName Other Builds on 2018-10-28",
+        ],
+      [
+        "<h2>Build and Test results for ProjectName Other Builds on 2018-10-28</h2>",
+        "<a href=\"https://something[.]com/cdash/index[.]php[?]project=ProjectName&date=2018-10-28&builds_filters\">Builds on CDash</a> [(]num/expected=3/3[)]<br>",
+        "<h3><font color=\"red\">Tests without issue trackers Failed [(]limited to 10[)]: twoif=12</font></h3>",
+        "<h3>Tests with issue trackers Failed: twif=1</h3>",
+        ],
+      #verbose=True,
+      #debugPrint=True,
+      )
+
+    with open(testOutputDir+"/htmlFileCee.html", 'r') as htmlFile:
+      htmlFileStrList = htmlFile.read().split("\n")
+    assertListOfRegexsFoundInListOfStrs(self,
+      [ "<h2>Build and Test results for ProjectName CEE Builds on 2018-10-28</h2>",
+        "<h3>Tests with issue trackers Failed: twif=8</h3>",
+        ],
+      htmlFileStrList, testOutputDir+"/htmlFileCee.html")
+
+
+  # Test --date-range with two testing days run in two processes
+  #
+  # The twoif_12_twif_9 data is used for the testing day 2018-10-28 (with no
+  # tests with issue trackers so all 21 nonpassing tests are twoif) and the
+  # same builds with no nonpassing tests are used for the testing day
+  # 2018-10-27.
+  #
+  def test_twoif_21_date_range(self):
+
+    testCaseName = "twoif_21_date_range"
+
+    testOutputDir = cdash_analyze_and_report_setup_test_dir(testCaseName)
+
+    baseFilePrefix = \
+      testOutputDir+"/"+CDQAR.getFileNameStrFromText("ProjectName Nightly Builds")
+    for fileName in [ "fullCDashIndexBuilds.json", "fullCDashNonpassingTests.json" ]:
+      os.rename(baseFilePrefix+"_"+fileName, baseFilePrefix+"_2018-10-28_"+fileName)
+    shutil.copyfile(baseFilePrefix+"_2018-10-28_fullCDashIndexBuilds.json",
+      baseFilePrefix+"_2018-10-27_fullCDashIndexBuilds.json")
+    writeTestsDictListToCDashJsonFile([], testOutputDir,
+      os.path.basename(baseFilePrefix)+"_2018-10-27_fullCDashNonpassingTests.json")
+
+    cdash_analyze_and_report_run_case(
+      self,
+      testCaseName,
+      [ "--date-range=2018-10-27:2018-10-28",
+        "--date-range-max-concurrency=2",
+        "--tests-with-issue-trackers-file=",
+        "--write-failing-tests-without-issue-trackers-to-file=twoif.csv",
+        "--timing-report=timing.json",
+        ],
+      1,
+      "FAILED (days passed=1, days failed=1): ProjectName Nightly Builds from 2018-10-27 to 2018-10-28",
+      [
+        "  --date-range='2018-10-27:2018-10-28'",
+        "  --date-range-max-concurrency='2'",
+        "Num testing days in date range = 2",
+        # Output for each testing day (in order)
+        "[*][*][*] Query and analyze CDash results for ProjectName Nightly Builds for testing day 2018-10-27",
+        "Num nonpassing tests direct from CDash query = 0",
+        "Writing HTML file 'htmlFile-2018-10-27.html' ...",
+        "PASSED: ProjectName Nightly Builds on 2018-10-27",
+        "[*][*][*] Query and analyze CDash results for ProjectName Nightly Builds for testing day 2018-10-28",
+        "Num nonpassing tests direct from CDash query = 21",
+        "Writing HTML file 'htmlFile-2018-10-28.html' ...",
+        "FAILED [(]twoif=21[)]: ProjectName Nightly Builds on 2018-10-28",
+        # Summary of all of the testing days
+        "[*][*][*] Summary of all of the testing days",
+        "PASSED: ProjectName Nightly Builds on 2018-10-27",
+        "FAILED [(]twoif=21[)]: ProjectName Nightly Builds on 2018-10-28",
+        "Writing HTML file 'htmlFile.html' ...",
+        ],
+      [
+        "<h2>Build and Test results for ProjectName Nightly Builds from 2018-10-27 to 2018-10-28</h2>",
+        "<h3>Results for each testing day: days passed=1, days failed=1</h3>",
+        "<th>Testing Day</th>",
+        "<th>Result</th>",
+        "<th>twoif</th>",
+        "<td align=\"left\"><a href=\"htmlFile-2018-10-27[.]html\">2018-10-27</a></td>",
+        "<td align=\"left\"><font color=\"green\">PASSED</font></td>",
+        "<td align=\"right\">0</td>",
+        "<td align=\"left\"><a href=\"htmlFile-2018-10-28[.]html\">2018-10-28</a></td>",
+        "<td align=\"left\"><font color=\"red\">FAILED</font></td>",
+        "<td align=\"right\">21</td>",
+        ],
+      #verbose=True,
+      #debugPrint=True,
+      )
+
+    for date in [ "2018-10-27", "2018-10-28" ]:
+      self.assertEqual(
+        os.path.exists(testOutputDir+"/htmlFile-"+date+".html"), True)
+      self.assertEqual(
+        os.path.exists(testOutputDir+"/twoif-"+date+".csv"), True)
+    self.assertEqual(
+      os.path.exists(testOutputDir+"/test_history_store.sqlite"), True)
+    with open(testOutputDir+"/twoif-2018-10-28.csv", 'r') as csvFile:
+      self.assertEqual(len(csvFile.read().splitlines()), 22)
+    # The timers for the testing days run in the other processes are added up
+    with open(testOutputDir+"/timing.json", 'r') as timingReportFile:
+      timingData = json.load(timingReportFile)
+    self.assertEqual(timingData['timers']['builds.download']['count'], 2)
+    self.assertEqual(timingData['timers']['buildsets.report']['count'], 6) # bm, cf, bf
+    self.assertEqual(timingData['timers']['total']['count'], 1)
+
+
   # Base case for raw CDash data but no expected builds or tests with issue
   # trackers CSV files
   #
@@ -1898,6 +2588,15 @@ cee-rhel6, Trilinos-atdm-cee-rhel6-gnu-4.9.3-opt-serial, PanzerAdaptersIOSS_tIOS
 
 if __name__ == '__main__':
 
+  # The test case directories are written under the current directory so
+  # this must not be the source directory with the input test data
+  if os.path.abspath(g_baseTestDir) == \
+    os.path.abspath(testCiSupportDir+"/"+g_baseTestDir) \
+    :
+    print("Error, must run in a scratch (build) directory and not in the"+\
+      " source directory '"+testCiSupportDir+"'!")
+    sys.exit(1)
+
   # Clean out and re-recate the base test directory
   if os.path.exists(g_baseTestDir): shutil.rmtree(g_baseTestDir)
   os.mkdir(g_baseTestDir)
@@ -0,0 +1,351 @@
+# @HEADER
+# ************************************************************************
+#
+#            TriBTS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+
+import os
+import sys
+import json
+import shutil
+import threading
+import unittest
+
+try:
+  # Python 2
+  from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+  from SocketServer import ThreadingMixIn
+  from urlparse import urlparse
+  from urllib2 import urlopen, HTTPError
+except ImportError:
+  # Python 3
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from socketserver import ThreadingMixIn
+  from urllib.parse import urlparse
+  from urllib.request import urlopen
+  from urllib.error import HTTPError
+
+from FindCISupportDir import *
+import CDashQueryAnalyzeReport as CDQAR
+import cdash_analyze_and_report_server as CAARS
+
+g_testBaseDir = CDQAR.getScriptBaseDir()
+
+# Base test directory in the build tree
+g_baseTestDir="cdash_analyze_and_report_server"
+
+
+#
+# Helper functions and classes
+#
+
+
+# Local HTTP server that stands in for CDash and returns the data in the
+# files fullCDashIndexBuilds.json and fullCDashNonpassingTests.json in a
+# test directory for cdash/api/v1/index.php and cdash/api/v1/queryTests.php
+class LocalCDashStandInServer(ThreadingMixIn, HTTPServer):
+
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self, testDir):
+    HTTPServer.__init__(self, ('127.0.0.1', 0), LocalCDashStandInRequestHandler)
+    self.responseDataDict = {
+      "/api/v1/index.php" : CDQAR.readCDashQueryDataCacheFile(
+        testDir+"/fullCDashIndexBuilds.json"),
+      "/api/v1/queryTests.php" : CDQAR.readCDashQueryDataCacheFile(
+        testDir+"/fullCDashNonpassingTests.json"),
+      }
+    self.requestPathsLock = threading.Lock()
+    self.requestPaths = []
+
+  def getBaseUrl(self):
+    return "http://127.0.0.1:"+str(self.server_address[1])
+
+
+class LocalCDashStandInRequestHandler(BaseHTTPRequestHandler):
+
+  protocol_version = "HTTP/1.1"
+
+  def do_GET(self):
+    with self.server.requestPathsLock:
+      self.server.requestPaths.append(self.path)
+    responseData = self.server.responseDataDict.get(urlparse(self.path).path, None)
+    if responseData is None:
+      self.sendBody(404, b"Not found")
+    else:
+      self.sendBody(200, json.dumps(responseData).encode('utf-8'))
+
+  def sendBody(self, status, body):
+    self.send_response(status)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    pass
+
+
+# Start serve_forever() for an HTTP server object in a daemon thread
+def startServerThread(server):
+  serverThread = threading.Thread(target=server.serve_forever,
+    kwargs={'poll_interval':0.05})
+  serverThread.daemon = True
+  serverThread.start()
+
+
+# Set up a test directory with the data from the twoif_12_twif_9 test case
+# for cdash_analyze_and_report.py
+def setupServerTestDir(testCaseName):
+  testInputDir = g_testBaseDir+"/cdash_analyze_and_report/twoif_12_twif_9"
+  testOutputDir = os.path.abspath(g_baseTestDir+"/"+testCaseName)
+  if os.path.exists(testOutputDir): shutil.rmtree(testOutputDir)
+  shutil.copytree(testInputDir, testOutputDir)
+  return testOutputDir
+
+
+# Get the command-line options for the server for a test directory and the
+# local CDash stand-in
+def getServerTestCmndLineOptions(testDir, cdashStandInServer, extraArgs=[]):
+  return CAARS.getCmndLineOptions([
+    "--cdash-project-name=ProjectName",
+    "--build-set-name=ProjectName Nightly Builds",
+    "--cdash-site-url="+cdashStandInServer.getBaseUrl(),
+    "--cdash-builds-filters=builds_filters",
+    "--cdash-nonpassed-tests-filters=nonpassing_tests_filters",
+    "--cdash-queries-cache-dir="+testDir,
+    "--expected-builds-file="+testDir+"/expectedBuilds.csv",
+    "--tests-with-issue-trackers-file="+testDir+"/testsWithIssueTrackers.csv",
+    "--cache-ttl=100",
+    ] + extraArgs )
+
+
+# Do a GET of a URL and return (status, body)
+def getUrlStatusAndBody(url):
+  try:
+    response = urlopen(url)
+    return (response.getcode(), response.read().decode('utf-8'))
+  except HTTPError as httpError:
+    return (httpError.code, httpError.read().decode('utf-8'))
+
+
+#############################################################################
+#
+# Test cdash_analyze_and_report_server.TimedCache
+#
+#############################################################################
+
+
+class test_TimedCache(unittest.TestCase):
+
+  def test_get_set_expire(self):
+    currentTime = [ 1000.0 ]
+    timedCache = CAARS.TimedCache(10, lambda: currentTime[0])
+    self.assertEqual(timedCache.get('a'), None)
+    self.assertEqual(timedCache.get('a', 'default'), 'default')
+    timedCache['a'] = 1
+    currentTime[0] += 5
+    timedCache['b'] = 2
+    self.assertEqual(timedCache.get('a'), 1)
+    self.assertEqual(timedCache.get('b'), 2)
+    self.assertEqual(len(timedCache), 2)
+    currentTime[0] += 5
+    self.assertEqual(timedCache.get('a'), None)
+    self.assertEqual(timedCache.get('b'), 2)
+    self.assertEqual(len(timedCache), 1)
+    timedCache['a'] = 3
+    self.assertEqual(timedCache.get('a'), 3)
+
+  def test_removeExpiredEntries(self):
+    currentTime = [ 1000.0 ]
+    timedCache = CAARS.TimedCache(10, lambda: currentTime[0])
+    timedCache['a'] = 1
+    currentTime[0] += 5
+    timedCache['b'] = 2
+    currentTime[0] += 5
+    timedCache.removeExpiredEntries()
+    self.assertEqual(len(timedCache), 1)
+    self.assertEqual(timedCache.get('b'), 2)
+    timedCache.clear()
+    self.assertEqual(len(timedCache), 0)
+
+
+#############################################################################
+#
+# Test cdash_analyze_and_report_server.CDashReportService and
+# CDashReportServer against a local CDash stand-in
+#
+#############################################################################
+
+
+class test_CDashReportService(unittest.TestCase):
+
+  def setUp(self):
+    self.testDir = setupServerTestDir(self.id().split('.')[-1])
+    self.cdashStandInServer = LocalCDashStandInServer(self.testDir)
+    startServerThread(self.cdashStandInServer)
+
+  def tearDown(self):
+    self.cdashStandInServer.shutdown()
+    self.cdashStandInServer.server_close()
+
+  def test_report_cached_until_ttl(self):
+    inOptions = getServerTestCmndLineOptions(self.testDir,
+      self.cdashStandInServer)
+    currentTime = [ 1000.0 ]
+    cdashReportService = CAARS.CDashReportService(inOptions,
+      getTime_in=lambda: currentTime[0])
+    self.assertEqual(cdashReportService.getBuildsetNames(),
+      ['ProjectName Nightly Builds'])
+    # Create the report getting the builds and tests from the CDash stand-in
+    # and the test history from the cache files
+    cdashReport = cdashReportService.getReport('ProjectName Nightly Builds',
+      '2018-10-28')
+    self.assertEqual(cdashReport.summaryLine,
+      "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28")
+    self.assertEqual(cdashReport.globalPass, False)
+    self.assertTrue(cdashReport.htmlPageStr.find(
+      "<h2>Build and Test results for ProjectName Nightly Builds on 2018-10-28</h2>") != -1)
+    self.assertEqual(len(self.cdashStandInServer.requestPaths), 2)
+    # Test history for the 10 twoif tests shown (--limit-table-rows=10) and 9
+    # twif tests
+    self.assertEqual(len(cdashReportService.testHistoryLODCache), 19)
+    self.assertEqual(cdashReportService.numReportsCreated, 1)
+    # Get the same report from memory before the TTL
+    currentTime[0] += 99
+    self.assertTrue(
+      cdashReportService.getReport('ProjectName Nightly Builds', '2018-10-28') \
+      is cdashReport )
+    self.assertEqual(len(self.cdashStandInServer.requestPaths), 2)
+    self.assertEqual(cdashReportService.numReportsCreated, 1)
+    # Create the report again after the TTL
+    currentTime[0] += 1
+    cdashReport2 = cdashReportService.getReport('ProjectName Nightly Builds',
+      '2018-10-28')
+    self.assertEqual(cdashReport2.summaryLine, cdashReport.summaryLine)
+    self.assertEqual(cdashReport2.htmlPageStr, cdashReport.htmlPageStr)
+    self.assertEqual(len(self.cdashStandInServer.requestPaths), 4)
+    self.assertEqual(cdashReportService.numReportsCreated, 2)
+
+  def test_unknown_buildset(self):
+    inOptions = getServerTestCmndLineOptions(self.testDir,
+      self.cdashStandInServer)
+    cdashReportService = CAARS.CDashReportService(inOptions)
+    try:
+      cdashReportService.getReport('Other Builds', '2018-10-28')
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the build-set 'Other Builds' is not one of the build-sets"+\
+        " ['ProjectName Nightly Builds']!")
+    self.assertEqual(len(self.cdashStandInServer.requestPaths), 0)
+
+  def test_http_server_buildsets_manifest(self):
+    with open(self.testDir+"/expectedBuilds.csv", 'r') as expectedBuildsFile:
+      expectedBuildsStrList = expectedBuildsFile.read().splitlines()
+    with open(self.testDir+"/expectedBuildsCee.csv", 'w') as csvFile:
+      csvFile.write("\n".join(
+        [ expectedBuildsStrList[0] ] +\
+        [ line for line in expectedBuildsStrList[1:] if "cee-rhel6" in line ]
+        )+"\n" )
+    with open(self.testDir+"/buildsetsManifest.csv", 'w') as csvFile:
+      csvFile.write(
+        "build_set_name, expected_builds_file\n"+\
+        "ProjectName CEE Builds, "+self.testDir+"/expectedBuildsCee.csv\n"+\
+        "ProjectName All Builds <C++ & Fortran>, "+self.testDir+"/expectedBuilds.csv\n" )
+    inOptions = getServerTestCmndLineOptions(self.testDir,
+      self.cdashStandInServer,
+      [ "--buildsets-manifest-file="+self.testDir+"/buildsetsManifest.csv" ] )
+    cdashReportService = CAARS.CDashReportService(inOptions)
+    cdashReportServer = CAARS.CDashReportServer(('127.0.0.1', 0),
+      cdashReportService, logRequests=False)
+    startServerThread(cdashReportServer)
+    baseUrl = cdashReportServer.getBaseUrl()
+    try:
+      # Index page
+      (status, body) = getUrlStatusAndBody(baseUrl+"/")
+      self.assertEqual(status, 200)
+      self.assertTrue(body.find(
+        "<a href=\"/report?buildset=ProjectName+CEE+Builds\">ProjectName CEE Builds</a>") != -1)
+      # The build-set name is quoted in the link and escaped in the link text
+      self.assertTrue(body.find(
+        "<a href=\"/report?buildset=ProjectName+All+Builds+%3CC%2B%2B+%26+Fortran%3E\">"+\
+        "ProjectName All Builds &lt;C++ &amp; Fortran&gt;</a>") != -1)
+      # Reports for the two build-sets share the data downloaded from CDash
+      (status, body) = getUrlStatusAndBody(
+        baseUrl+"/report?buildset=ProjectName+CEE+Builds&date=2018-10-28")
+      self.assertEqual(status, 200)
+      self.assertTrue(body.find(
+        "<h2>FAILED (twif=8): ProjectName CEE Builds on 2018-10-28</h2>") != -1)
+      (status, body) = getUrlStatusAndBody(
+        baseUrl+"/report?buildset=ProjectName+All+Builds+%3CC%2B%2B+%26+Fortran%3E"+\
+          "&date=2018-10-28")
+      self.assertEqual(status, 200)
+      self.assertTrue(body.find(
+        "<h2>FAILED (twoif=12, twif=9): ProjectName All Builds <C++ & Fortran> on 2018-10-28</h2>") != -1)
+      self.assertEqual(len(self.cdashStandInServer.requestPaths), 2)
+      self.assertEqual(cdashReportService.numReportsCreated, 2)
+      # Errors
+      (status, body) = getUrlStatusAndBody(
+        baseUrl+"/report?buildset=Other+Builds&date=2018-10-28")
+      self.assertEqual(status, 404)
+      self.assertEqual(body, "Error, unknown build-set 'Other Builds'!\n")
+      (status, body) = getUrlStatusAndBody(baseUrl+"/report?date=2018-10-28")
+      self.assertEqual(status, 404)
+      (status, body) = getUrlStatusAndBody(
+        baseUrl+"/report?buildset=ProjectName+CEE+Builds&date=10-28-2018")
+      self.assertEqual(status, 400)
+      self.assertEqual(body,
+        "Incorrect data format for '10-28-2018', should be YYYY-MM-DD\n")
+      (status, body) = getUrlStatusAndBody(baseUrl+"/other")
+      self.assertEqual(status, 404)
+    finally:
+      cdashReportServer.shutdown()
+      cdashReportServer.server_close()
+
+
+#
+# Run the unit tests!
+#
+
+if __name__ == '__main__':
+
+  # Clean out and re-recate the base test directory
+  if os.path.exists(g_baseTestDir): shutil.rmtree(g_baseTestDir)
+  os.mkdir(g_baseTestDir)
+
+  unittest.main()
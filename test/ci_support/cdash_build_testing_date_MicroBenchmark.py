@@ -0,0 +1,136 @@
+# @HEADER
+# ************************************************************************
+#
+#            TriBITS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+
+# Micro-benchmark for the testing day functions in cdash_build_testing_date
+#
+# Usage:
+#
+#   cdash_build_testing_date_MicroBenchmark.py [<num-build-start-times>]
+#
+# Converts a list of 'buildstarttime' strings (60 days of builds with 1000
+# builds each where each build start time is used by 10 tests by default) to
+# testing days with:
+#
+# * 'strptime': the unmemoized datetime.strptime() based parser
+# * 'memoized': CDashProjectTestingDay.getTestingDayDateFromBuildStartTimeStr()
+#   called for each entry (with an empty cache to start)
+# * 'list': CDashProjectTestingDay.getTestingDayDatesFromBuildStartTimeStrList()
+#   called once for the whole list (with an empty cache to start)
+#
+# and prints the time for each.
+#
+
+from FindCISupportDir import *
+from cdash_build_testing_date import *
+
+import sys
+import time
+
+
+def getBuildStartTimeStrList(numBuildStartTimes, numTestsPerBuild=10):
+  buildStartTimeStrList = []
+  startDT = datetime.datetime(2019, 1, 1)
+  timeZoneStrList = [ "UTC", "MDT", "EST" ]
+  numBuilds = max(numBuildStartTimes//numTestsPerBuild, 1)
+  for build_i in range(numBuilds):
+    buildStartTimeStr = \
+      (startDT + datetime.timedelta(minutes=37*build_i)).strftime("%Y-%m-%dT%H:%M:%S")+\
+      " "+timeZoneStrList[build_i%3]
+    buildStartTimeStrList.extend([buildStartTimeStr]*numTestsPerBuild)
+  return buildStartTimeStrList
+
+
+def clearCaches():
+  getBuildStartTimeUtcFromStr.cache_clear()
+  getTestingDayDateFromBuildStartTimeDT.cache_clear()
+  getTestingDayDateFromBuildStartTimeStr.cache_clear()
+
+
+# The original unmemoized implementation of
+# getTestingDayDateFromBuildStartTimeStr() used as the baseline
+def getTestingDayDateUsingStrptime(buildStartTimeStr, testingDayStartTimeUtcTD):
+  oneDayTD = datetime.timedelta(days=1)
+  noonTD = getProjectTestingDayStartTimeDeltaFromStr("12:00")
+  buildStartTimeUtcDT = getBuildStartTimeUtcFromStrUsingStrptime(buildStartTimeStr)
+  buildStartTimeDateDT = getDateOnlyFromDateTime(buildStartTimeUtcDT)
+  buildStartTimeTimeTD = buildStartTimeUtcDT - buildStartTimeDateDT
+  if buildStartTimeTimeTD.seconds < testingDayStartTimeUtcTD.seconds:
+    buildStartTimeDateDT -= oneDayTD
+  if testingDayStartTimeUtcTD > noonTD:
+    buildStartTimeDateDT += oneDayTD
+  return getDateStrFromDateTime(buildStartTimeDateDT)
+
+
+def timeIt(name, func):
+  t0 = time.time()
+  result = func()
+  print("  "+name+": "+("%.3f" % (time.time()-t0))+" sec")
+  return result
+
+
+if __name__ == '__main__':
+
+  if len(sys.argv) > 1:
+    numBuildStartTimes = int(sys.argv[1])
+  else:
+    numBuildStartTimes = 60*1000*10
+
+  buildStartTimeStrList = getBuildStartTimeStrList(numBuildStartTimes)
+  testingDayStartTimeUtcTD = getProjectTestingDayStartTimeDeltaFromStr("04:00")
+  cptdo = CDashProjectTestingDay("2019-03-01", "04:00")
+
+  print("\nConverting "+str(len(buildStartTimeStrList))+" 'buildstarttime'"+\
+    " strings ("+str(len(set(buildStartTimeStrList)))+" unique) to testing days:\n")
+
+  testingDaysStrptime = timeIt("strptime",
+    lambda: [ getTestingDayDateUsingStrptime(buildStartTimeStr,
+      testingDayStartTimeUtcTD) for buildStartTimeStr in buildStartTimeStrList ] )
+
+  clearCaches()
+  testingDaysMemoized = timeIt("memoized",
+    lambda: [ cptdo.getTestingDayDateFromBuildStartTimeStr(buildStartTimeStr) \
+      for buildStartTimeStr in buildStartTimeStrList ] )
+
+  clearCaches()
+  testingDaysList = timeIt("list",
+    lambda: cptdo.getTestingDayDatesFromBuildStartTimeStrList(buildStartTimeStrList) )
+
+  if testingDaysMemoized != testingDaysStrptime or testingDaysList != testingDaysStrptime:
+    raise Exception("Error, the testing days do not match!")
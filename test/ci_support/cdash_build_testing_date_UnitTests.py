@@ -105,7 +105,63 @@ class test_getBuildStartTimeUtcFromStr(unittest.TestCase):
     self.assertEqual(buildStartTime.microsecond, 0)
     self.assertEqual(buildStartTime.tzinfo, None)
 
-  # ToDo: Test invalid build start times!
+  def test_fast_parser_same_as_strptime(self):
+    for buildStartTimeStr in [
+      "2019-11-16T01:02:03 UTC", "2019-12-31T23:59:59 EDT",
+      "2019-02-28T20:00:00 EST", "2020-02-29T19:30:00 CDT",
+      "2019-01-01T00:00:00 CST", "2019-11-15T18:22:45 MDT",
+      "2019-11-15T17:22:45 MST",
+      ]:
+      self.assertEqual(getBuildStartTimeUtcFromStr(buildStartTimeStr),
+        getBuildStartTimeUtcFromStrUsingStrptime(buildStartTimeStr))
+
+  def test_not_zero_padded(self):
+    # Not the format that CDash emits but datetime.strptime() accepts it
+    buildStartTime = getBuildStartTimeUtcFromStr("2019-1-6T1:02:03 MDT")
+    self.assertEqual(buildStartTime,
+      getBuildStartTimeUtcFromStr("2019-01-06T07:02:03 UTC"))
+
+  def test_invalid(self):
+    self.assertRaises(Exception, getBuildStartTimeUtcFromStr,
+      "2019-11-16T01:02:03 PST")
+    self.assertRaises(ValueError, getBuildStartTimeUtcFromStr,
+      "2019-11-16T01:02:63 UTC")
+    self.assertRaises(ValueError, getBuildStartTimeUtcFromStr,
+      "2019-13-16T01:02:03 UTC")
+    self.assertRaises(ValueError, getBuildStartTimeUtcFromStr,
+      "2019-11-16 01:02:03 UTC")
+
+
+class test_lruMemoize(unittest.TestCase):
+
+  def assert_memoize(self, maxSize):
+    argsList = []
+    @lruMemoize(maxSize)
+    def func(a, b):
+      argsList.append((a, b))
+      return a + b
+    self.assertEqual(func(1, 2), 3)
+    self.assertEqual(func(1, 2), 3)
+    self.assertEqual(func(2, 2), 4)
+    self.assertEqual(argsList, [(1, 2), (2, 2)])
+    func.cache_clear()
+    self.assertEqual(func(1, 2), 3)
+    self.assertEqual(argsList, [(1, 2), (2, 2), (1, 2)])
+    for i in range(2*maxSize):
+      self.assertEqual(func(i, 0), i)
+    self.assertEqual(len(argsList), 3+2*maxSize)
+
+  def test_lru_cache(self):
+    self.assert_memoize(4)
+
+  def test_python2_fallback(self):
+    import cdash_build_testing_date
+    lru_cache_orig = cdash_build_testing_date.lru_cache
+    try:
+      cdash_build_testing_date.lru_cache = None
+      self.assert_memoize(4)
+    finally:
+      cdash_build_testing_date.lru_cache = lru_cache_orig
 
 
 class test_getProjectTestingDayStartTimeDeltaFromStr(unittest.TestCase):
@@ -337,6 +393,16 @@ class test_CDashProjectTestingDay(unittest.TestCase):
       cptdo.getTestingDayDateFromBuildStartTimeStr("2019-11-16T01:02:03 UTC"),
       "2019-11-16" )
 
+  def test_list(self):
+    cptdo = CDashProjectTestingDay("2019-05-22", "00:00")
+    buildStartTimeStrList = [ "2019-11-15T18:22:45 MDT", "2019-11-15T17:22:45 MDT",
+      "2019-11-16T01:02:03 UTC", "2019-11-15T18:22:45 MDT" ]
+    self.assertEqual(
+      cptdo.getTestingDayDatesFromBuildStartTimeStrList(buildStartTimeStrList),
+      [ "2019-11-16", "2019-11-15", "2019-11-16", "2019-11-16" ] )
+    self.assertEqual(
+      cptdo.getTestingDayDatesFromBuildStartTimeStrList([]), [] )
+
 
 # Utility function to make it easy to test the script itself
 def run_cdash_build_testing_date_py_test(testObj, cmndArgs, testingDay_expected):
@@ -0,0 +1,440 @@
+# @HEADER
+# ************************************************************************
+#
+#            TriBTS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+
+import os
+import sys
+import json
+import shutil
+import threading
+import unittest
+
+try:
+  # Python 2
+  from urlparse import parse_qs
+except ImportError:
+  # Python 3
+  from urllib.parse import parse_qs
+
+from FindCISupportDir import *
+import CDashQueryAnalyzeReport as CDQAR
+import cdash_replay_server as CRS
+
+g_testBaseDir = CDQAR.getScriptBaseDir()
+
+# Base test directory in the build tree
+g_baseTestDir="cdash_replay_server"
+
+# Recorded CDash data for the testing day 2018-10-28 (with 30 days of test
+# history for the nonpassing tests)
+g_fixturesDir = g_testBaseDir+"/cdash_analyze_and_report/twoif_12_twif_9"
+
+
+#
+# Helper functions and classes
+#
+
+
+def getQueryDict(query):
+  return parse_qs(query, keep_blank_values=True)
+
+
+def getNumBuilds(indexQueryData):
+  return sum([ len(buildgroup['builds']) \
+    for buildgroup in indexQueryData['buildgroups'] ])
+
+
+# Start serve_forever() for an HTTP server object in a daemon thread
+def startServerThread(server):
+  serverThread = threading.Thread(target=server.serve_forever,
+    kwargs={'poll_interval':0.05})
+  serverThread.daemon = True
+  serverThread.start()
+
+
+# Records the sleeps of a CDashReplayServer instead of sleeping
+class RecordSleeps(object):
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.sleepsList = []
+  def __call__(self, seconds):
+    with self.lock:
+      self.sleepsList.append(seconds)
+
+
+g_cdashFixtureData = None
+
+def getCDashFixtureData():
+  global g_cdashFixtureData
+  if g_cdashFixtureData is None:
+    g_cdashFixtureData = CRS.CDashFixtureData(g_fixturesDir)
+  return g_cdashFixtureData
+
+
+g_nonpassingTestsFilters = \
+  "filtercombine=and&filtercount=1&showfilters=1&field1=status&compare1=62&value1=passed"
+
+
+#############################################################################
+#
+# Test cdash_replay_server.getCmndLineOptions()
+#
+#############################################################################
+
+
+class test_getCmndLineOptions(unittest.TestCase):
+
+  def test_defaults(self):
+    inOptions = CRS.getCmndLineOptions(["--fixtures-dir="+g_fixturesDir])
+    self.assertEqual(inOptions.serverPort, 0)
+    self.assertEqual(inOptions.latency, 0.0)
+    self.assertEqual(inOptions.errorRate, 0.0)
+    self.assertEqual(inOptions.errorStatus, 503)
+
+  def test_no_fixtures_dir(self):
+    try:
+      CRS.getCmndLineOptions([])
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), "Error, --fixtures-dir=<dir> must be set!")
+
+  def test_bad_rates(self):
+    try:
+      CRS.getCmndLineOptions(["--fixtures-dir="+g_fixturesDir,
+        "--error-rate=1.5"])
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, --error-rate=1.5 must be between 0 and 1!")
+    try:
+      CRS.getCmndLineOptions(["--fixtures-dir="+g_fixturesDir,
+        "--error-rate=0.5", "--drop-rate=0.75"])
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, --error-rate=0.5 plus --drop-rate=0.75 must not be greater"+\
+        " than 1!")
+
+
+#############################################################################
+#
+# Test cdash_replay_server.CDashFixtureData
+#
+#############################################################################
+
+
+class test_CDashFixtureData(unittest.TestCase):
+
+  def test_getCDashQueryFilters(self):
+    self.assertEqual(
+      CRS.getCDashQueryFilters(getQueryDict(
+        "filtercombine=and&filtercombine=&filtercount=2&showfilters=1"+\
+        "&filtercombine=and&field2=site&compare2=61&value2=site_name"+\
+        "&field1=buildname&compare1=61&value1=build_name")),
+      ([('buildname', '61', 'build_name'), ('site', '61', 'site_name')], False) )
+    self.assertEqual(
+      CRS.getCDashQueryFilters(getQueryDict(
+        "filtercombine=or&field1=site&compare1=63&value1=")),
+      ([('site', '63', '')], True) )
+
+  def test_index_date_and_filters(self):
+    cdashFixtureData = getCDashFixtureData()
+    self.assertEqual(cdashFixtureData.getNumBuilds(), 6)
+    indexQueryData = cdashFixtureData.getIndexQueryData(getQueryDict(
+      "project=Trilinos&date=2018-10-28&builds_filters"))
+    self.assertEqual(getNumBuilds(indexQueryData), 6)
+    self.assertEqual(indexQueryData['date'], "2018-10-28")
+    self.assertEqual(indexQueryData['buildgroups'][0]['name'], "Specialized")
+    indexQueryData = cdashFixtureData.getIndexQueryData(getQueryDict(
+      "project=Trilinos&date=2018-10-28&filtercombine=and"+\
+      "&field1=groupname&compare1=61&value1=specialized"+\
+      "&field2=buildname&compare2=65&value2=Trilinos-atdm-cee-rhel6-"))
+    self.assertEqual(getNumBuilds(indexQueryData), 3)
+    indexQueryData = cdashFixtureData.getIndexQueryData(getQueryDict(
+      "project=Trilinos&date=2018-10-28&filtercombine=or"+\
+      "&field1=site&compare1=61&value1=mutrino"+\
+      "&field2=buildname&compare2=66&value2=-clang-opt-serial"))
+    self.assertEqual(
+      sorted([ build['buildname'] for build in \
+        indexQueryData['buildgroups'][0]['builds'] ]),
+      ['Trilinos-atdm-cee-rhel6-clang-opt-serial',
+       'Trilinos-atdm-mutrino-intel-opt-openmp-KNL'] )
+    # No recorded builds for this testing day
+    indexQueryData = cdashFixtureData.getIndexQueryData(getQueryDict(
+      "project=Trilinos&date=2018-10-27"))
+    self.assertEqual(indexQueryData['buildgroups'], [])
+
+  def test_queryTests_date_and_begin_end(self):
+    cdashFixtureData = getCDashFixtureData()
+    # Nonpassing tests for the testing day
+    queryTestsQueryData = cdashFixtureData.getQueryTestsQueryData(
+      getQueryDict("project=Trilinos&date=2018-10-28&"+g_nonpassingTestsFilters))
+    self.assertEqual(len(queryTestsQueryData['builds']), 21)
+    self.assertEqual(queryTestsQueryData['date'], "2018-10-28")
+    # Test history for one test over 30 days
+    queryTestsQueryData = cdashFixtureData.getQueryTestsQueryData(getQueryDict(
+      "project=Trilinos&begin=2018-09-29&end=2018-10-28&filtercombine=and"+\
+      "&filtercombine=&filtercount=3&showfilters=1&filtercombine=and"+\
+      "&field1=buildname&compare1=61&value1=Trilinos-atdm-mutrino-intel-opt-openmp-KNL"+\
+      "&field2=testname&compare2=61&value2=Anasazi_Epetra_BKS_norestart_test_MPI_4"+\
+      "&field3=site&compare3=61&value3=mutrino"))
+    testHistoryLOD = queryTestsQueryData['builds']
+    self.assertEqual(len(testHistoryLOD), 30)
+    self.assertEqual(
+      set([ testDict['testname'] for testDict in testHistoryLOD ]),
+      set(['Anasazi_Epetra_BKS_norestart_test_MPI_4']) )
+    # Same but only the last 5 days
+    queryTestsQueryData = cdashFixtureData.getQueryTestsQueryData(getQueryDict(
+      "project=Trilinos&begin=2018-10-24&end=2018-10-28"+\
+      "&field1=buildname&compare1=61&value1=Trilinos-atdm-mutrino-intel-opt-openmp-KNL"+\
+      "&field2=testname&compare2=61&value2=Anasazi_Epetra_BKS_norestart_test_MPI_4"+\
+      "&field3=groupname&compare3=61&value3=Specialized"))
+    self.assertEqual(len(queryTestsQueryData['builds']), 5)
+
+  def test_unsupported_filters(self):
+    cdashFixtureData = getCDashFixtureData()
+    try:
+      cdashFixtureData.getIndexQueryData(getQueryDict(
+        "date=2018-10-28&field1=testname&compare1=61&value1=test"))
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except CRS.CDashQueryFilterError as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the filter field 'testname' is not supported for index.php!")
+    try:
+      cdashFixtureData.getQueryTestsQueryData(getQueryDict(
+        "date=2018-10-28&field1=time&compare1=43&value1=10"))
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except CRS.CDashQueryFilterError as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the filter field 'time' is not supported for queryTests.php!")
+    try:
+      cdashFixtureData.getQueryTestsQueryData(getQueryDict(
+        "date=2018-10-28&field1=testname&compare1=43&value1=10"))
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except CRS.CDashQueryFilterError as errMsg:
+      self.assertEqual(str(errMsg),
+        "Error, the filter compare '43' for the field 'testname' is not"+\
+        " supported for queryTests.php!")
+
+
+#############################################################################
+#
+# Test cdash_replay_server.CDashReplayServer
+#
+#############################################################################
+
+
+class test_CDashReplayServer(unittest.TestCase):
+
+  def startServer(self, **kwargs):
+    self.recordSleeps = RecordSleeps()
+    kwargs.setdefault('sleep_in', self.recordSleeps)
+    self.server = CRS.CDashReplayServer(('127.0.0.1', 0), getCDashFixtureData(),
+      logRequests=False, **kwargs)
+    startServerThread(self.server)
+    self.baseUrl = self.server.getBaseUrl()
+    self.cdashQuerySession = CDQAR.CDashQuerySession(timeout=10)
+
+  def tearDown(self):
+    self.cdashQuerySession.close()
+    self.server.shutdown()
+    self.server.server_close()
+
+  def getJsonData(self, relUrl):
+    return self.cdashQuerySession.getJsonData(self.baseUrl+relUrl)
+
+  def assertGetJsonDataRaises(self, relUrl, expectedErrMsg):
+    try:
+      self.getJsonData(relUrl)
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception as errMsg:
+      self.assertEqual(str(errMsg), expectedErrMsg)
+
+  def test_replay(self):
+    self.startServer()
+    indexQueryData = self.getJsonData(
+      "/api/v1/index.php?project=Trilinos&date=2018-10-28&builds_filters")
+    self.assertEqual(getNumBuilds(indexQueryData), 6)
+    queryTestsQueryData = self.getJsonData(
+      "/api/v1/queryTests.php?project=Trilinos&date=2018-10-28&"+\
+      g_nonpassingTestsFilters)
+    self.assertEqual(len(queryTestsQueryData['builds']), 21)
+    self.assertEqual(self.cdashQuerySession.numConnectionsCreated, 1)
+    statsDict = self.server.getStatsDict()
+    self.assertEqual(statsDict['num_requests'], 2)
+    self.assertEqual(statsDict['num_errors_injected'], 0)
+    self.assertTrue(statsDict['num_bytes_sent'] > 0)
+    self.assertEqual(self.getJsonData("/stats"), statsDict)
+    self.assertEqual(self.recordSleeps.sleepsList, [])
+
+  def test_bad_requests(self):
+    self.startServer()
+    self.assertGetJsonDataRaises(
+      "/api/v1/index.php?date=2018-10-28&field1=testname&compare1=61&value1=t",
+      "Error, the query URL '"+self.baseUrl+"/api/v1/index.php?date=2018-10-28"+\
+      "&field1=testname&compare1=61&value1=t' returned HTTP status 400 Bad"+\
+      " Request!" )
+    self.assertGetJsonDataRaises("/api/v1/other.php",
+      "Error, the query URL '"+self.baseUrl+"/api/v1/other.php' returned HTTP"+\
+      " status 404 Not Found!" )
+
+  def test_error_rate(self):
+    self.startServer(errorRate=1.0, errorStatus=502)
+    self.assertGetJsonDataRaises("/api/v1/index.php?date=2018-10-28",
+      "Error, the query URL '"+self.baseUrl+"/api/v1/index.php?date=2018-10-28'"+\
+      " returned HTTP status 502 Bad Gateway!" )
+    self.assertEqual(self.server.getStatsDict()['num_errors_injected'], 1)
+
+  def test_error_rate_seed(self):
+    self.startServer(errorRate=0.5, seed=5)
+    numErrors = 0
+    for i in range(20):
+      try:
+        self.getJsonData("/api/v1/index.php?date=2018-10-28")
+      except Exception:
+        numErrors += 1
+    self.assertEqual(self.server.getStatsDict()['num_errors_injected'], numErrors)
+    self.assertTrue(0 < numErrors and numErrors < 20)
+
+  def test_drop_rate(self):
+    self.startServer(dropRate=1.0)
+    try:
+      self.getJsonData("/api/v1/index.php?date=2018-10-28")
+      self.assertEqual("Excpetion should have been thrown!", "")
+    except Exception:
+      pass
+    self.assertEqual(self.server.getStatsDict()['num_drops_injected'], 1)
+
+  def test_latency_and_bytes_per_sec(self):
+    self.startServer(latency=0.5, latencyJitter=0.25, bytesPerSec=10000, seed=1)
+    self.getJsonData("/api/v1/queryTests.php?date=2018-10-28&"+\
+      g_nonpassingTestsFilters)
+    sleepsList = self.recordSleeps.sleepsList
+    self.assertTrue(0.5 <= sleepsList[0] and sleepsList[0] <= 0.75)
+    numBytesSent = self.server.getStatsDict()['num_bytes_sent']
+    self.assertEqual(len(sleepsList) - 1, (numBytesSent + 999) // 1000)
+    self.assertAlmostEqual(sum(sleepsList[1:]), numBytesSent / 10000.0)
+
+  def test_max_concurrent_requests(self):
+    self.startServer(latency=0.05, maxConcurrentRequests=2,
+      sleep_in=CRS.time.sleep)
+    def getIndexQueryData():
+      cdashQuerySession = CDQAR.CDashQuerySession(timeout=10)
+      cdashQuerySession.getJsonData(
+        self.baseUrl+"/api/v1/index.php?date=2018-10-28")
+      cdashQuerySession.close()
+    threadsList = [ threading.Thread(target=getIndexQueryData) for i in range(6) ]
+    for thread in threadsList: thread.start()
+    for thread in threadsList: thread.join()
+    statsDict = self.server.getStatsDict()
+    self.assertEqual(statsDict['num_requests'], 6)
+    self.assertTrue(statsDict['max_concurrent_requests'] <= 2)
+
+
+#############################################################################
+#
+# Test running cdash_analyze_and_report.py against a CDashReplayServer
+#
+#############################################################################
+
+
+class test_cdash_analyze_and_report_replay(unittest.TestCase):
+
+  # Run cdash_analyze_and_report.py against a replay server for the
+  # twoif_12_twif_9 fixture data and return the server stats
+  def runCaseGetServerStats(self, testCaseName, extraCmndLineArgsList=[]):
+    testOutputDir = os.path.abspath(g_baseTestDir+"/"+testCaseName)
+    os.mkdir(testOutputDir)
+    for fileName in [ "expectedBuilds.csv", "testsWithIssueTrackers.csv" ]:
+      shutil.copyfile(g_fixturesDir+"/"+fileName, testOutputDir+"/"+fileName)
+    server = CRS.CDashReplayServer(('127.0.0.1', 0), getCDashFixtureData(),
+      logRequests=False)
+    startServerThread(server)
+    try:
+      cmnd = ciSupportDir+"/cdash_analyze_and_report.py"+\
+        " --date=2018-10-28"+\
+        " --cdash-project-name='Trilinos'"+\
+        " --build-set-name='ProjectName Nightly Builds'"+\
+        " --cdash-site-url='"+server.getBaseUrl()+"'"+\
+        " --cdash-builds-filters='filtercombine=and&field1=groupname&compare1=61&value1=Specialized'"+\
+        " --cdash-nonpassed-tests-filters='"+g_nonpassingTestsFilters+"'"+\
+        " --cdash-queries-cache-dir="+testOutputDir+\
+        " --expected-builds-file="+testOutputDir+"/expectedBuilds.csv"+\
+        " --tests-with-issue-trackers-file="+testOutputDir+"/testsWithIssueTrackers.csv"+\
+        " --limit-table-rows=20"+\
+        "".join([ " "+arg for arg in extraCmndLineArgsList ])
+      stdoutFile = testOutputDir+"/stdout.out"
+      rtnCode = CDQAR.echoRunSysCmnd(cmnd, throwExcept=False,
+        outFile=stdoutFile, verbose=False)
+      with open(stdoutFile, 'r') as stdoutFileObj:
+        stdout = stdoutFileObj.read()
+      self.assertEqual(rtnCode, 1, stdout)
+      self.assertTrue(stdout.find(
+        "FAILED (twoif=12, twif=9): ProjectName Nightly Builds on 2018-10-28") != -1,
+        stdout)
+      return server.getStatsDict()
+    finally:
+      server.shutdown()
+      server.server_close()
+
+  def test_twoif_12_twif_9(self):
+    statsDict = self.runCaseGetServerStats("twoif_12_twif_9")
+    # One query for the builds, one for the nonpassing tests and one for the
+    # history of each of the 21 nonpassing tests
+    self.assertEqual(statsDict['num_requests'], 23)
+
+  def test_twoif_12_twif_9_chunk_by_site(self):
+    statsDict = self.runCaseGetServerStats("twoif_12_twif_9_chunk_by_site",
+      ["--cdash-nonpassed-tests-chunk-by=site"])
+    # One nonpassing tests query for each of the sites 'cee-rhel6', 'mutrino'
+    # and 'waterman'
+    self.assertEqual(statsDict['num_requests'], 25)
+
+
+#
+# Run the unit tests!
+#
+
+if __name__ == '__main__':
+
+  # Clean out and re-recate the base test directory
+  if os.path.exists(g_baseTestDir): shutil.rmtree(g_baseTestDir)
+  os.mkdir(g_baseTestDir)
+
+  unittest.main()
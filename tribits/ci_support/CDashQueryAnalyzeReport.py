@@ -39,18 +39,65 @@
 
 try:
   # Python 2
-  from urllib2 import urlopen
+  from urllib2 import urlopen, Request
+  from urllib import getproxies, proxy_bypass, quote_plus
+  from urlparse import urlsplit, urljoin
+  import httplib
 except ImportError:
   # Python 3
-  from urllib.request import urlopen
+  from urllib.request import urlopen, Request, getproxies, proxy_bypass
+  from urllib.parse import urlsplit, urljoin, quote_plus
+  import http.client as httplib
+
+try:
+  # Python 3
+  from collections.abc import MutableMapping
+except ImportError:
+  # Python 2
+  from collections import MutableMapping
 
 import sys
 import hashlib
 import json
 import datetime
 import copy
+import operator
 import pprint
 import csv
+import threading
+import time
+import socket
+import errno
+import sqlite3
+import codecs
+import zlib
+import ast
+import gzip
+import io
+import tempfile
+import stat
+import zipfile
+import struct
+import mmap
+
+try:
+  # Optional faster and more compact binary cache file format
+  import msgpack
+except ImportError:
+  msgpack = None
+
+try:
+  # Optional faster computation of test history statistics for many tests
+  # (and the 'npz' test data file format)
+  import numpy
+except ImportError:
+  numpy = None
+
+try:
+  # Used to lock CDash query data pack files shared by processes
+  import fcntl
+except ImportError:
+  fcntl = None  # E.g. on Windows
 
 from FindGeneralScriptSupport import *
 from GeneralScriptSupport import *
@@ -228,6 +275,219 @@ def foreachTransform(list_inout, transformFunctor):
   return list_inout
 
 
+# Apply a functor to transform every element in a list using a bounded pool
+# of threads
+#
+# This does the same thing as foreachTransform() except that up to
+# maxConcurrency calls to transformFunctor() are run at the same time in
+# separate threads.  This is useful when transformFunctor() spends most of its
+# time waiting on I/O (e.g. downloading data from CDash).  The result for
+# list_inout[i] is always put back into list_inout[i] so the order of the
+# elements in the list is deterministic and does not depend on the order that
+# the threads finish.
+#
+# If maxConcurrency == 1 or len(list_inout) <= 1, then this just calls
+# foreachTransform() and no threads are created.  If maxConcurrency < 1, then
+# an exception is raised.
+#
+# While the threads are running, sys.stdout is replaced with a
+# ThreadBufferedOutputStream so that everything printed while transforming
+# list_inout[i] is buffered and then written out all at once when
+# transformFunctor(list_inout[i]) returns.  That way, the output for the
+# different elements (e.g. verbose output about downloading data from CDash)
+# is not interleaved.
+#
+# If transformFunctor() raises an exception for one or more elements, then
+# the rest of the elements are still transformed and then a
+# ForeachTransformError is raised that reports the error for each element
+# that failed.  The string used to identify each failed element in the error
+# message is given by getElementDescr(list_inout[i]).
+#
+def foreachTransformConcurrently(list_inout, transformFunctor, maxConcurrency,
+    getElementDescr=str,
+  ):
+  if maxConcurrency < 1:
+    raise Exception("Error, maxConcurrency="+str(maxConcurrency)+\
+      " must be >= 1!")
+  numElements = len(list_inout)
+  if maxConcurrency == 1 or numElements <= 1:
+    return foreachTransform(list_inout, transformFunctor)
+  nextIdxList = [0]
+  failedElementsList = []
+  lock = threading.Lock()
+  origStdout = sys.stdout
+  if isinstance(origStdout, ThreadBufferedOutputStream):
+    # Nested call from a thread of an outer foreachTransformConcurrently()
+    bufferedStdout = origStdout
+  else:
+    bufferedStdout = ThreadBufferedOutputStream(origStdout)
+  def transformElements():
+    while True:
+      with lock:
+        i = nextIdxList[0]
+        if i >= numElements: return
+        nextIdxList[0] += 1
+      bufferedStdout.startBuffering()
+      try:
+        list_inout[i] = transformFunctor(list_inout[i])
+      except Exception as e:
+        with lock:
+          failedElementsList.append((i, getElementDescr(list_inout[i]), str(e)))
+      finally:
+        bufferedStdout.writeBuffered()
+  threadsList = []
+  sys.stdout = bufferedStdout
+  try:
+    for _ in range(min(maxConcurrency, numElements)):
+      thread = threading.Thread(target=transformElements)
+      thread.daemon = True
+      thread.start()
+      threadsList.append(thread)
+    for thread in threadsList:
+      thread.join()
+  finally:
+    sys.stdout = origStdout
+  if failedElementsList:
+    failedElementsList.sort()
+    raise ForeachTransformError(failedElementsList, numElements)
+  return list_inout
+
+
+# Output stream that buffers the output written by each thread
+#
+# This wraps the stream outStream (e.g. the original sys.stdout).  After a
+# thread calls startBuffering(), everything that the thread writes to this
+# stream is put into a buffer for that thread until it calls writeBuffered()
+# which writes the whole buffer to outStream at once (under a lock).  Writes
+# from threads that are not buffering go directly to outStream (also under
+# the lock).
+#
+# This is used by foreachTransformConcurrently() so that the output for each
+# element is not interleaved with the output for the other elements.
+#
+class ThreadBufferedOutputStream(object):
+
+  def __init__(self, outStream):
+    self.outStream = outStream
+    self.__lock = threading.Lock()
+    self.__threadLocal = threading.local()
+
+  def startBuffering(self):
+    self.__threadLocal.strPartsList = []
+
+  def writeBuffered(self):
+    strPartsList = getattr(self.__threadLocal, 'strPartsList', None)
+    self.__threadLocal.strPartsList = None
+    if strPartsList:
+      with self.__lock:
+        self.outStream.write("".join(strPartsList))
+        self.outStream.flush()
+
+  def write(self, s):
+    strPartsList = getattr(self.__threadLocal, 'strPartsList', None)
+    if strPartsList is not None:
+      strPartsList.append(s)
+    else:
+      with self.__lock:
+        self.outStream.write(s)
+
+  def flush(self):
+    if getattr(self.__threadLocal, 'strPartsList', None) is None:
+      with self.__lock:
+        self.outStream.flush()
+
+  def __getattr__(self, name):
+    return getattr(self.outStream, name)
+
+
+# Exception raised by foreachTransformConcurrently() that reports the errors
+# for all of the elements that failed to be transformed.
+#
+# The member failedElementsList gives the list of tuples (idx, eleDescr,
+# errMsg) for each element list_inout[idx] that failed, sorted by idx.
+#
+class ForeachTransformError(Exception):
+
+  def __init__(self, failedElementsList, numElements):
+    self.failedElementsList = failedElementsList
+    errMsg = "Error, failed to transform "+str(len(failedElementsList))+\
+      " of "+str(numElements)+" elements:\n"
+    for (idx, eleDescr, eleErrMsg) in failedElementsList:
+      errMsg += "\n  ["+str(idx)+"] "+eleDescr+":\n    "+eleErrMsg+"\n"
+    Exception.__init__(self, errMsg)
+
+
+# Call a function in a separate thread so that other work can be done at the
+# same time
+#
+# Usage:
+#
+#   backgroundCall = BackgroundFunctionCall(func, arg1, arg2, ...)
+#   ... Do other work ...
+#   result = backgroundCall.wait()
+#
+# wait() returns the value returned from func(arg1, arg2, ...) or raises the
+# exception that it raised.
+#
+# The thread is not a daemon thread so the Python process will not exit until
+# func() has returned (e.g. so that an email being sent is not cut off).
+# Use waitForBackgroundFunctionCalls() to wait on a list of these objects.
+#
+class BackgroundFunctionCall(object):
+
+  def __init__(self, func, *args, **kwargs):
+    self.result = None
+    self.exception = None
+    def callFunc():
+      try:
+        self.result = func(*args, **kwargs)
+      except Exception as e:
+        self.exception = e
+    self.thread = threading.Thread(target=callFunc)
+    self.thread.start()
+
+  def wait(self):
+    self.thread.join()
+    if self.exception is not None:
+      raise self.exception
+    return self.result
+
+
+# Exception thrown by waitForBackgroundFunctionCalls()
+#
+# The data member failedCallsList is the list of tuples (idx, errMsg) for each
+# call backgroundCallsList[idx] that raised an exception, sorted by idx.
+#
+class BackgroundFunctionCallsError(Exception):
+
+  def __init__(self, failedCallsList, numCalls):
+    self.failedCallsList = failedCallsList
+    errMsg = "Error, "+str(len(failedCallsList))+" of "+str(numCalls)+\
+      " background function calls failed:\n"
+    for (idx, callErrMsg) in failedCallsList:
+      errMsg += "\n  ["+str(idx)+"]: "+callErrMsg+"\n"
+    Exception.__init__(self, errMsg)
+
+
+# Wait for all of the BackgroundFunctionCall objects in backgroundCallsList
+#
+# This waits on every call, even after one of them raises an exception.
+# Returns None if all of the calls succeeded or a
+# BackgroundFunctionCallsError object for all of the calls that failed (which
+# the caller should raise after any other cleanup).
+#
+def waitForBackgroundFunctionCalls(backgroundCallsList):
+  failedCallsList = []
+  for (idx, backgroundCall) in enumerate(backgroundCallsList):
+    try:
+      backgroundCall.wait()
+    except Exception as errMsg:
+      failedCallsList.append((idx, str(errMsg)))
+  if failedCallsList:
+    return BackgroundFunctionCallsError(failedCallsList, len(backgroundCallsList))
+  return None
+
+
 # Remove elements from a list given a list of indexes
 #
 # This modifies the orginal list inplace but also returns it.  Therefore, if
@@ -262,6 +522,18 @@ def writeCsvFileStructureToStr(csvFileStruct):
   return csvFileStr
 
 
+# Write the rows of a CSV file out to a file as they are produced
+#
+# This writes the same format as writeCsvFileStructureToStr() but the rows
+# from rowsIter (which can be a generator) are written to the file one at a
+# time instead of first building up the whole CSV file string in memory.
+#
+def writeCsvFileRowsToFile(csvFileName, headersList, rowsIter):
+  with open(csvFileName, 'w') as csvFile:
+    csvFile.write(", ".join(headersList)+"\n")
+    csvFile.writelines(", ".join(rowFieldsList)+"\n" for rowFieldsList in rowsIter)
+
+
 ########################################
 # CDash Specific stuff
 ########################################
@@ -278,22 +550,264 @@ def writeCsvFileStructureToStr(csvFileStruct):
 # NOTE: This is put into a class object so that these vars can be updated in
 # place when passed to a function.
 #
+# NOTE: The HTML body top and bottom are stored as lists of string parts that
+# are appended to with appendHtmlEmailBodyTop() and
+# appendHtmlEmailBodyBottom() in O(1) time and can be written out part by
+# part with writeHtmlEmailBodyTop() and writeHtmlEmailBodyBottom() (see
+# writeFullCDashHtmlReportPage()) without ever joining them.  The properties
+# htmlEmailBodyTop and htmlEmailBodyBottom can still be read and set as
+# strings (but 'htmlEmailBodyBottom += htmlStr' copies the full string each
+# time so use appendHtmlEmailBodyBottom(htmlStr) instead).
+#
 class CDashReportData(object):
   def __init__(self):
     # Gives the final result (assume passing by defualt)
     self.globalPass = True
     # This is the top of the HTML body
-    self.htmlEmailBodyTop = ""
+    self.__htmlEmailBodyTopParts = []
     # This is the bottom of the email body
-    self.htmlEmailBodyBottom = ""
+    self.__htmlEmailBodyBottomParts = []
     # This var will store the list of data numbers for the summary line
     self.summaryLineDataNumbersList = []
   def reset(self):
     self.globalPass = True
-    self.htmlEmailBodyTop = ""
-    self.htmlEmailBodyBottom = ""
+    self.__htmlEmailBodyTopParts = []
+    self.__htmlEmailBodyBottomParts = []
     self.summaryLineDataNumbersList = []
 
+  def appendHtmlEmailBodyTop(self, htmlStr):
+    self.__htmlEmailBodyTopParts.append(htmlStr)
+  def appendHtmlEmailBodyBottom(self, htmlStr):
+    self.__htmlEmailBodyBottomParts.append(htmlStr)
+
+  def writeHtmlEmailBodyTop(self, writeFunc):
+    for htmlStr in self.__htmlEmailBodyTopParts: writeFunc(htmlStr)
+  def writeHtmlEmailBodyBottom(self, writeFunc):
+    for htmlStr in self.__htmlEmailBodyBottomParts: writeFunc(htmlStr)
+
+  def getHtmlEmailBodyTop(self):
+    return joinStrPartsList(self.__htmlEmailBodyTopParts)
+  def setHtmlEmailBodyTop(self, htmlStr):
+    self.__htmlEmailBodyTopParts = [htmlStr]
+  htmlEmailBodyTop = property(getHtmlEmailBodyTop, setHtmlEmailBodyTop)
+
+  def getHtmlEmailBodyBottom(self):
+    return joinStrPartsList(self.__htmlEmailBodyBottomParts)
+  def setHtmlEmailBodyBottom(self, htmlStr):
+    self.__htmlEmailBodyBottomParts = [htmlStr]
+  htmlEmailBodyBottom = property(getHtmlEmailBodyBottom, setHtmlEmailBodyBottom)
+
+
+# Join a list of string parts in place and return the joined string
+#
+# The list is replaced by the single joined string so that joining it again
+# is cheap.
+#
+def joinStrPartsList(strPartsList_inout):
+  if len(strPartsList_inout) == 0:
+    return ""
+  if len(strPartsList_inout) > 1:
+    strPartsList_inout[:] = ["".join(strPartsList_inout)]
+  return strPartsList_inout[0]
+
+
+# Registry of named timers and counters used to find out where the time is
+# spent in the analysis and reporting
+#
+# Usage:
+#
+#   timingRegistry = getDefaultTimingRegistry()
+#   with timingRegistry.timer('builds.download'):
+#     ... Download the builds ...
+#   timingRegistry.incrementCounter('cdash_query.bytes_downloaded', len(body))
+#   print(timingRegistry.getSummaryTableStr())
+#
+# Each timer records the number of times it was run and the total wall time.
+# Timers can be nested (e.g. 'html.tables' inside of 'html.page') so the times
+# of different timers don't add up to the total time.  Counters with names
+# '<name>.cache_hits' and '<name>.cache_misses' are also reported as the
+# cache hit ratio for '<name>'.
+#
+# The registry can be used by multiple threads at the same time.
+#
+class TimingRegistry(object):
+
+  def __init__(self, getTime_in=time.time):
+    self.getTime = getTime_in
+    self.lock = threading.Lock()
+    self.timersDict = {}  # Values are [count, seconds]
+    self.countersDict = {}
+
+  # Return a context manager that adds the wall time for its 'with' block to
+  # the timer timerName
+  def timer(self, timerName):
+    return TimingRegistryTimer(self, timerName)
+
+  def addTime(self, timerName, seconds, count=1):
+    with self.lock:
+      timerData = self.timersDict.setdefault(timerName, [0, 0.0])
+      timerData[0] += count
+      timerData[1] += seconds
+
+  def incrementCounter(self, counterName, incr=1):
+    with self.lock:
+      self.countersDict[counterName] = self.countersDict.get(counterName, 0) + incr
+
+  # Return (count, seconds) for a timer
+  def getTimer(self, timerName):
+    with self.lock:
+      return tuple(self.timersDict.get(timerName, (0, 0.0)))
+
+  def getCounter(self, counterName):
+    with self.lock:
+      return self.countersDict.get(counterName, 0)
+
+  # Return the cache hit ratios {<name>:<ratio>, ...} for the counters
+  # '<name>.cache_hits' and '<name>.cache_misses'
+  def getCacheHitRatios(self):
+    with self.lock:
+      countersDict = dict(self.countersDict)
+    cacheHitRatiosDict = {}
+    for counterName in countersDict.keys():
+      if counterName.endswith(".cache_hits") or \
+        counterName.endswith(".cache_misses") \
+        :
+        name = counterName.rsplit(".", 1)[0]
+        hits = countersDict.get(name+".cache_hits", 0)
+        misses = countersDict.get(name+".cache_misses", 0)
+        if hits + misses > 0:
+          cacheHitRatiosDict[name] = float(hits) / (hits + misses)
+    return cacheHitRatiosDict
+
+  # Return all of the data as simple Python data (e.g. to write to a JSON
+  # file)
+  def getDataDict(self):
+    with self.lock:
+      timersDict = dict( (timerName, {'count':count, 'seconds':seconds}) \
+        for (timerName, (count, seconds)) in self.timersDict.items() )
+      countersDict = dict(self.countersDict)
+    return { 'timers' : timersDict, 'counters' : countersDict,
+      'cache_hit_ratios' : self.getCacheHitRatios() }
+
+  # Add the timers and counters from a data dict returned from getDataDict()
+  # (e.g. from another process)
+  def addDataDict(self, dataDict):
+    for (timerName, timerData) in dataDict.get('timers', {}).items():
+      self.addTime(timerName, timerData['seconds'], timerData['count'])
+    for (counterName, value) in dataDict.get('counters', {}).items():
+      self.incrementCounter(counterName, value)
+
+  def reset(self):
+    with self.lock:
+      self.timersDict = {}
+      self.countersDict = {}
+
+  # Return a text table of the timers, counters and cache hit ratios (sorted
+  # by name)
+  def getSummaryTableStr(self):
+    dataDict = self.getDataDict()
+    nameColWidth = max([ len(name) for name in \
+      list(dataDict['timers'].keys()) + list(dataDict['counters'].keys()) ] + [20] )
+    lines = []
+    lines.append("Timer".ljust(nameColWidth)+"  "+"Count".rjust(10)+"  "+\
+      "Seconds".rjust(12))
+    lines.append("-"*(nameColWidth+26))
+    for timerName in sorted(dataDict['timers'].keys()):
+      timerData = dataDict['timers'][timerName]
+      lines.append(timerName.ljust(nameColWidth)+"  "+\
+        str(timerData['count']).rjust(10)+"  "+\
+        ("%.3f" % timerData['seconds']).rjust(12))
+    lines.append("")
+    lines.append("Counter".ljust(nameColWidth)+"  "+"Value".rjust(10))
+    lines.append("-"*(nameColWidth+12))
+    for counterName in sorted(dataDict['counters'].keys()):
+      lines.append(counterName.ljust(nameColWidth)+"  "+\
+        str(dataDict['counters'][counterName]).rjust(10))
+    if dataDict['cache_hit_ratios']:
+      lines.append("")
+      lines.append("Cache".ljust(nameColWidth)+"  "+"Hit Ratio".rjust(10))
+      lines.append("-"*(nameColWidth+12))
+      for name in sorted(dataDict['cache_hit_ratios'].keys()):
+        lines.append(name.ljust(nameColWidth)+"  "+\
+          ("%.3f" % dataDict['cache_hit_ratios'][name]).rjust(10))
+    return "\n".join(lines)+"\n"
+
+
+# Context manager returned from TimingRegistry.timer()
+class TimingRegistryTimer(object):
+
+  def __init__(self, timingRegistry, timerName):
+    self.timingRegistry = timingRegistry
+    self.timerName = timerName
+    self.startTime = None
+
+  def __enter__(self):
+    self.startTime = self.timingRegistry.getTime()
+    return self
+
+  def __exit__(self, excType, excValue, excTraceback):
+    self.timingRegistry.addTime(self.timerName,
+      self.timingRegistry.getTime() - self.startTime)
+    return False
+
+
+# Default timing registry used for the timers and counters in this module
+g_defaultTimingRegistry = TimingRegistry()
+
+
+# Get the default timing registry (see TimingRegistry)
+def getDefaultTimingRegistry():
+  return g_defaultTimingRegistry
+
+
+# Set the default timing registry and return the previous one
+#
+# This is used to collect the timers and counters for one part of the
+# program separately (e.g. one testing day with --date-range).
+#
+def setDefaultTimingRegistry(timingRegistry):
+  global g_defaultTimingRegistry
+  oldTimingRegistry = g_defaultTimingRegistry
+  g_defaultTimingRegistry = timingRegistry
+  return oldTimingRegistry
+
+
+# Function decorator that adds the wall time for each call of the function to
+# the timer timerName in the default timing registry
+#
+# NOTE: Don't use this for generator functions since that would only time the
+# creation of the generator.
+#
+def timeFunctionCalls(timerName):
+  def timeFunctionCallsDecorator(func):
+    def timedFunc(*args, **kwargs):
+      with getDefaultTimingRegistry().timer(timerName):
+        return func(*args, **kwargs)
+    timedFunc.__name__ = func.__name__
+    timedFunc.__doc__ = func.__doc__
+    return timedFunc
+  return timeFunctionCallsDecorator
+
+
+# Stream with a read() function that reads from another stream and adds the
+# number of bytes read and the time spent reading to the timer and counter
+# 'cdash_query.download' and 'cdash_query.bytes_downloaded' in the default
+# timing registry
+class DownloadTimingStream(object):
+
+  def __init__(self, stream):
+    self.stream = stream
+
+  def read(self, *args):
+    timingRegistry = getDefaultTimingRegistry()
+    startTime = timingRegistry.getTime()
+    dataBytes = self.stream.read(*args)
+    timingRegistry.addTime('cdash_query.download',
+      timingRegistry.getTime() - startTime, count=0)
+    timingRegistry.incrementCounter('cdash_query.bytes_downloaded',
+      len(dataBytes))
+    return dataBytes
+
 
 # Define standard CDash colors
 def cdashColorPassed(): return 'green'
@@ -314,21 +828,24 @@ def getStandardTestsetAcroList():
 #
 # * testsetAcro: e.g. 'twoif'
 # * testsetDescr: e.g. "Tests without issue trackers Failed"
-# * testsetTableType: Values: 'nopass', 'pass', 'missing'
+# * testsetTableType: Values: 'nopass', 'pass', 'missing', 'flaky'
 # * testsetColor: e.g.  'red', 'green' (whatever is accepted by function
 #   colorHtmlText())
 # * existanceTriggersGlobalFail: If 'True' and any of tests fall into this
 #   test-set category, then it shoulid trigger a global 'False'
+# * inSummaryLine: If 'True' and any tests fall into this test-set category,
+#   then '<testsetAcro>=<num>' is added to the summary line
 class TestsetTypeInfo(object):
 
   def __init__(self, testsetAcro, testsetDescr, testsetTableType, testsetColor,
-      existanceTriggersGlobalFail=True,
+      existanceTriggersGlobalFail=True, inSummaryLine=True,
     ):
     self.testsetAcro = testsetAcro
     self.testsetDescr = testsetDescr
     self.testsetTableType = testsetTableType
     self.testsetColor = testsetColor
     self.existanceTriggersGlobalFail = existanceTriggersGlobalFail
+    self.inSummaryLine = inSummaryLine
 
 
 # Return the TestsetTypeInfo object for the standard types of test sets that get
@@ -359,6 +876,10 @@ def getStandardTestsetTypeInfo(testsetAcro, testsetColor=None):
   elif testsetAcro == "twinr":
     tsti = TestsetTypeInfo(testsetAcro, "Tests with issue trackers Not Run", 'nopass',
       cdashColorNotRun())
+  elif testsetAcro == "flaky":
+    tsti = TestsetTypeInfo(testsetAcro, "Flaky tests", 'flaky',
+      cdashColorNotRun(), existanceTriggersGlobalFail=False,
+      inSummaryLine=False)
   else:
     raise Exception("Error, testsetAcro = '"+str(testsetAcro)+"' is not supported!")
 
@@ -391,6 +912,12 @@ def getTestsetAcroFromTestDict(testDict):
     " is not a supported test-set type!")
 
 
+# Returns True if the test history of a test was classified as 'flaky' (see
+# getTestHistoryClass())
+def isTestFlaky(testDict):
+  return (testDict.get('test_history_class', None) == 'flaky')
+
+
 # Returns True if a test has 'status' 'Passed'
 def isTestPassed(testDict):
   return (testDict.get('status', None) == 'Passed')
@@ -423,22 +950,512 @@ def getDefaultTestDictsSortKeyList() : return ['testname', 'buildName', 'site']
 #
 
 
+# Number of bytes read at a time when parsing streamed JSON data
+g_jsonStreamReadChunkSize = 65536
+
+
+# Iterate over the elements of an array in a JSON object read from a stream
+#
+# readFunc [in]: Function readFunc(size) that returns the next bytes (UTF-8
+# encoded JSON text) of the stream or b'' at the end of the stream (e.g. the
+# read() function of a file object or HTTP response).
+#
+# arrayKey [in]: The key in the top-level JSON object for the array to
+# iterate over (e.g. 'builds').
+#
+# otherData_out [out]: If not None, then the other top-level key/value pairs
+# are set in this dict (which will be complete after the generator is
+# exhausted).
+#
+# This is a generator that yields each element of the array as soon as it has
+# been read and parsed so that only one element (and one chunk of the stream)
+# needs to be in memory at the same time.  For example, for the JSON data:
+#
+#   { "numTests": 2, "builds": [ {"testname":"t1"}, {"testname":"t2"} ] }
+#
+# this yields {'testname':'t1'} and then {'testname':'t2'} and sets
+# otherData_out['numTests']=2.  If the key arrayKey does not exist, then
+# nothing is yielded.
+#
+def iterateJsonObjectArrayElements(readFunc, arrayKey, otherData_out=None,
+    chunkSize=g_jsonStreamReadChunkSize,
+  ):
+  jsonDecoder = json.JSONDecoder()
+  textDecoder = codecs.getincrementaldecoder('utf-8')()
+  # NOTE: The state is stored in a dict so that the nested functions can
+  # modify it with Python 2.
+  state = { 'buf':u(""), 'pos':0, 'eof':False }
+  def readMore():
+    if state['eof']: return False
+    dataBytes = readFunc(chunkSize)
+    if dataBytes:
+      newText = textDecoder.decode(dataBytes)
+    else:
+      newText = textDecoder.decode(b'', True)
+      state['eof'] = True
+    # Drop the already parsed text from the buffer
+    state['buf'] = state['buf'][state['pos']:] + newText
+    state['pos'] = 0
+    return True
+  def peekChar():
+    # Skip whitespace and return the next char (or "" at the end)
+    while True:
+      buf = state['buf']
+      pos = state['pos']
+      while pos < len(buf) and buf[pos] in " \t\n\r":
+        pos += 1
+      state['pos'] = pos
+      if pos < len(buf): return buf[pos]
+      if not readMore(): return ""
+  def readChar(expectedChars):
+    char = peekChar()
+    if not char or not char in expectedChars:
+      raise ValueError("Error, expected one of "+str(list(expectedChars))+\
+        " but got '"+char+"' in JSON stream!")
+    state['pos'] += 1
+    return char
+  def readValue():
+    peekChar()
+    while True:
+      try:
+        (value, endPos) = jsonDecoder.raw_decode(state['buf'], state['pos'])
+        # A top-level number (e.g. '12' or '1.') may be continued in the next
+        # chunk
+        if state['eof'] or not isinstance(value, (int, float)) or \
+          (endPos < len(state['buf']) and not state['buf'][endPos] in ".eE+-0123456789") \
+          :
+          state['pos'] = endPos
+          return value
+      except ValueError:
+        if state['eof']: raise
+      readMore()
+  readChar("{")
+  if peekChar() == "}":
+    return
+  while True:
+    key = readValue()
+    readChar(":")
+    if key == arrayKey and peekChar() == "[":
+      readChar("[")
+      if peekChar() == "]":
+        readChar("]")
+      else:
+        while True:
+          yield readValue()
+          if readChar(",]") == "]":
+            break
+    else:
+      value = readValue()
+      if otherData_out != None:
+        otherData_out[key] = value
+    if readChar(",}") == "}":
+      break
+
+
+# Session for getting JSON data from CDash using persistent HTTP connections
+#
+# Usage:
+#
+#   cdashQuerySession = CDashQuerySession(timeout=60, maxConnectionsPerHost=4)
+#   cdashQueryData = cdashQuerySession.getJsonData(cdashApiQueryUrl)
+#
+# This keeps a pool of open (keep-alive) HTTP/HTTPS connections for each host
+# so that many queries to the same CDash site only pay for the TCP (and TLS)
+# connection setup once.  At most maxConnectionsPerHost connections to each
+# host are used at the same time (when the session is used by more threads,
+# the other threads wait for a connection to be released) and they are kept
+# open (idle) to be reused.
+#
+# The request asks for 'Accept-Encoding: gzip' and gzip-compressed responses
+# are decompressed before the JSON data is parsed.  (The JSON data returned by
+# CDash typically compresses 10x or more.)
+#
+# If the request on a reused connection fails because the server closed it
+# (e.g. after its keep-alive timeout, see isStaleHttpConnectionError()), then
+# the request is tried again once with a new connection.  (Other errors like
+# timeouts are not retried.)  HTTP redirects are followed.
+#
+# If a proxy is set in the environment for the host (e.g. with 'https_proxy'
+# and 'no_proxy'), then urlopen() is used instead so that the proxy is used
+# (but without persistent connections).
+#
+# The session can be used by multiple threads at the same time (see
+# foreachTransformConcurrently()).
+#
+# timeout [in]: Timeout in seconds for connecting and for each read from the
+# server.  If None, then the default socket timeout is used.
+#
+# httpConnectionFactory_in [in]: Function called as
+# httpConnectionFactory_in(scheme, netloc, timeout) to create a new
+# httplib.HTTPConnection or httplib.HTTPSConnection object (for unit
+# testing).
+#
+class CDashQuerySession(object):
+
+  maxRedirects = 5
+
+  def __init__(self, timeout=None, maxConnectionsPerHost=4,
+      httpConnectionFactory_in=None,
+    ):
+    if maxConnectionsPerHost < 1:
+      raise Exception("Error, maxConnectionsPerHost="+\
+        str(maxConnectionsPerHost)+" must be >= 1!")
+    self.timeout = timeout
+    self.maxConnectionsPerHost = maxConnectionsPerHost
+    if httpConnectionFactory_in:
+      self.httpConnectionFactory = httpConnectionFactory_in
+    else:
+      self.httpConnectionFactory = createHttpConnection
+    self.idleConnectionsDict = {}
+    self.hostSemaphoresDict = {}
+    self.lock = threading.Lock()
+    self.numRequests = 0
+    self.numConnectionsCreated = 0
+
+  # Get the JSON data from the URL converted to a Python data-structure
+  def getJsonData(self, url):
+    responseBytes = self.getResponseBytes(url)
+    return json.loads(responseBytes.decode('utf-8'))
+
+  # Get the elements of a top-level JSON array in the JSON data from the URL
+  # one at a time without reading all of the data into memory
+  #
+  # This is a generator that yields the elements of the array with the key
+  # arrayKey in the top-level JSON object returned from the URL (e.g. the
+  # 'builds' array returned from cdash/api/v1/queryTests.php) as they are
+  # read from the connection (see iterateJsonObjectArrayElements()).  The
+  # other top-level key/value pairs are put in otherData_out (if not None).
+  #
+  def iterateJsonArrayElements(self, url, arrayKey, otherData_out=None):
+    (response, contentEncoding, releaseResponse) = self.openResponse(url)
+    responseCompletelyRead = False
+    try:
+      responseStream = getDecodedHttpResponseStream(
+        DownloadTimingStream(response), contentEncoding)
+      for arrayElement in iterateJsonObjectArrayElements(responseStream.read,
+          arrayKey, otherData_out \
+        ):
+        yield arrayElement
+      # Read any trailing whitespace so the connection can be reused
+      while response.read(g_jsonStreamReadChunkSize): pass
+      responseCompletelyRead = True
+    finally:
+      releaseResponse(responseCompletelyRead)
+
+  # Get the (decompressed) bytes of the response to a GET of the URL
+  def getResponseBytes(self, url):
+    (response, contentEncoding, releaseResponse) = self.openResponse(url)
+    responseCompletelyRead = False
+    try:
+      body = DownloadTimingStream(response).read()
+      responseCompletelyRead = True
+    finally:
+      releaseResponse(responseCompletelyRead)
+    return decodeHttpResponseBody(body, contentEncoding)
+
+  # Do the GET of the URL (following redirects) and return (response,
+  # contentEncoding, releaseResponse) for the HTTP 200 response
+  #
+  # The caller must read the response and then call
+  # releaseResponse(responseCompletelyRead).  If responseCompletelyRead==True,
+  # then the connection is put back in the pool to be reused.
+  #
+  def openResponse(self, url):
+    for redirectIdx in range(self.maxRedirects+1):
+      urlParts = urlsplit(url)
+      scheme = urlParts.scheme.lower()
+      if not scheme in ("http", "https"):
+        raise Exception("Error, the URL '"+url+"' is not an http or https URL!")
+      if getproxies().get(scheme, None) and not proxy_bypass(urlParts.hostname):
+        return self.openResponseUsingUrlopen(url)
+      selector = urlParts.path or "/"
+      if urlParts.query: selector += "?"+urlParts.query
+      hostKey = (scheme, urlParts.netloc)
+      hostSemaphore = self.getHostSemaphore(hostKey)
+      hostSemaphore.acquire()
+      try:
+        (connection, response) = self.sendRequest(hostKey, selector)
+      except:
+        hostSemaphore.release()
+        raise
+      releaseResponse = self.getReleaseResponseFunc(hostKey, connection,
+        response, hostSemaphore)
+      headersDict = {}
+      for (headerName, headerValue) in response.getheaders():
+        headersDict[headerName.lower()] = headerValue
+      if response.status == 200:
+        return (response, headersDict.get('content-encoding'), releaseResponse)
+      # Read the rest of the response so the connection can be reused
+      try:
+        response.read()
+      finally:
+        releaseResponse(True)
+      if response.status in (301, 302, 303, 307, 308) and \
+        headersDict.get('location') \
+        :
+        url = urljoin(url, headersDict['location'])
+        continue
+      raise Exception("Error, the query URL '"+url+"' returned HTTP status "+\
+        str(response.status)+" "+str(response.reason)+"!")
+    raise Exception("Error, too many HTTP redirects for the query URL '"+url+"'!")
+
+  # Send the GET request on a pooled connection and return (connection,
+  # response) after the response headers are read
+  def sendRequest(self, hostKey, selector):
+    timingRegistry = getDefaultTimingRegistry()
+    startTime = timingRegistry.getTime()
+    headers = { 'Accept-Encoding': 'gzip', 'Accept': 'application/json' }
+    (connection, isReusedConnection) = self.getConnection(hostKey)
+    try:
+      try:
+        connection.request("GET", selector, headers=headers)
+        response = connection.getresponse()
+      except (httplib.HTTPException, socket.error) as errMsg:
+        # The server may have closed an idle keep-alive connection so try once
+        # again with a new connection
+        connection.close()
+        if not (isReusedConnection and isStaleHttpConnectionError(errMsg)):
+          raise
+        connection = self.createConnection(hostKey)
+        connection.request("GET", selector, headers=headers)
+        response = connection.getresponse()
+    except:
+      connection.close()
+      raise
+    with self.lock:
+      self.numRequests += 1
+    timingRegistry.addTime('cdash_query.download',
+      timingRegistry.getTime() - startTime)
+    timingRegistry.incrementCounter('cdash_query.requests')
+    return (connection, response)
+
+  def getReleaseResponseFunc(self, hostKey, connection, response,
+      hostSemaphore,
+    ):
+    def releaseResponse(responseCompletelyRead):
+      try:
+        if responseCompletelyRead and not response.will_close:
+          self.releaseConnection(hostKey, connection)
+        else:
+          connection.close()
+      finally:
+        hostSemaphore.release()
+    return releaseResponse
+
+  # Get the semaphore that limits the number of connections to the host used
+  # at the same time
+  def getHostSemaphore(self, hostKey):
+    with self.lock:
+      hostSemaphore = self.hostSemaphoresDict.get(hostKey, None)
+      if hostSemaphore == None:
+        hostSemaphore = threading.BoundedSemaphore(self.maxConnectionsPerHost)
+        self.hostSemaphoresDict[hostKey] = hostSemaphore
+      return hostSemaphore
+
+  # Get an idle connection for the host or create a new one.  Returns
+  # (connection, isReusedConnection).
+  def getConnection(self, hostKey):
+    with self.lock:
+      idleConnections = self.idleConnectionsDict.get(hostKey, None)
+      if idleConnections:
+        return (idleConnections.pop(), True)
+    return (self.createConnection(hostKey), False)
+
+  def createConnection(self, hostKey):
+    with self.lock:
+      self.numConnectionsCreated += 1
+    (scheme, netloc) = hostKey
+    return self.httpConnectionFactory(scheme, netloc, self.timeout)
+
+  def releaseConnection(self, hostKey, connection):
+    with self.lock:
+      idleConnections = self.idleConnectionsDict.setdefault(hostKey, [])
+      if len(idleConnections) < self.maxConnectionsPerHost:
+        idleConnections.append(connection)
+        return
+    connection.close()
+
+  # Close all of the idle connections
+  def close(self):
+    with self.lock:
+      idleConnectionsDict = self.idleConnectionsDict
+      self.idleConnectionsDict = {}
+    for idleConnections in idleConnectionsDict.values():
+      for connection in idleConnections:
+        connection.close()
+
+  def openResponseUsingUrlopen(self, url):
+    timingRegistry = getDefaultTimingRegistry()
+    startTime = timingRegistry.getTime()
+    request = Request(url, headers={ 'Accept-Encoding': 'gzip' })
+    if self.timeout != None:
+      response = urlopen(request, timeout=self.timeout)
+    else:
+      response = urlopen(request)
+    with self.lock:
+      self.numRequests += 1
+    timingRegistry.addTime('cdash_query.download',
+      timingRegistry.getTime() - startTime)
+    timingRegistry.incrementCounter('cdash_query.requests')
+    def releaseResponse(responseCompletelyRead):
+      response.close()
+    return (response, response.info().get('Content-Encoding'), releaseResponse)
+
+
+# Create a new HTTP or HTTPS connection object (see CDashQuerySession)
+def createHttpConnection(scheme, netloc, timeout):
+  kwargs = {}
+  if timeout != None: kwargs['timeout'] = timeout
+  if scheme == "https":
+    return httplib.HTTPSConnection(netloc, **kwargs)
+  return httplib.HTTPConnection(netloc, **kwargs)
+
+
+# Error numbers for a socket.error raised when the server has closed the
+# connection
+g_staleHttpConnectionErrnos = (errno.ECONNRESET, errno.EPIPE, errno.ECONNABORTED)
+
+
+# Return True if the exception raised from a request on a reused keep-alive
+# connection means that the server had closed the connection (and therefore
+# the request can be tried again with a new connection)
+#
+# These are a connection reset, a broken pipe or the server closing the
+# connection without sending a response.  Timeouts and the other errors are
+# not stale connection errors.
+#
+def isStaleHttpConnectionError(exception):
+  remoteDisconnectedType = getattr(httplib, 'RemoteDisconnected', None)
+  if remoteDisconnectedType and isinstance(exception, remoteDisconnectedType):
+    return True  # Python 3
+  if isinstance(exception, httplib.BadStatusLine) and \
+    (exception.line in ("", "''") or \
+     exception.line.startswith("No status line received")) \
+    :
+    return True  # Python 2 (no status line)
+  if isinstance(exception, socket.error) and \
+    not isinstance(exception, socket.timeout) \
+    :
+    return getattr(exception, 'errno', None) in g_staleHttpConnectionErrnos
+  return False
+
+
+# Return if an HTTP 'Content-Encoding' is gzip
+def isGzipContentEncoding(contentEncoding):
+  return bool(contentEncoding) and \
+    contentEncoding.lower().strip() in ("gzip", "x-gzip")
+
+
+# Decompress the body of an HTTP response given its 'Content-Encoding'
+def decodeHttpResponseBody(body, contentEncoding):
+  if isGzipContentEncoding(contentEncoding):
+    return gzipDecompressBytes(body)
+  return body
+
+
+# Return a stream with a read(size) function that returns the decompressed
+# bytes of an HTTP response given its 'Content-Encoding'
+def getDecodedHttpResponseStream(response, contentEncoding):
+  if isGzipContentEncoding(contentEncoding):
+    return GzipDecompressingStream(response)
+  return response
+
+
+# Stream that decompresses gzip data as it is read from another stream
+#
+# This works with streams that can't seek (like an HTTP response) which
+# gzip.GzipFile requires with Python 2.
+#
+class GzipDecompressingStream(object):
+
+  def __init__(self, fileObj):
+    self.fileObj = fileObj
+    self.decompressObj = zlib.decompressobj(16+zlib.MAX_WBITS)
+    self.eof = False
+
+  # Return up to 'size' (or more) decompressed bytes or b'' at the end
+  def read(self, size=65536):
+    while not self.eof:
+      compressedBytes = self.fileObj.read(size)
+      if compressedBytes:
+        dataBytes = self.decompressObj.decompress(compressedBytes)
+      else:
+        dataBytes = self.decompressObj.flush()
+        self.eof = True
+      if dataBytes:
+        return dataBytes
+    return b''
+
+
+g_defaultCDashQuerySession = None
+
+g_defaultCDashQuerySessionLock = threading.Lock()
+
+
+# Get the CDash query session used by extractCDashApiQueryData()
+#
+# This is created the first time it is used if it was not set with
+# setDefaultCDashQuerySession().
+#
+def getDefaultCDashQuerySession():
+  global g_defaultCDashQuerySession
+  with g_defaultCDashQuerySessionLock:
+    if not g_defaultCDashQuerySession:
+      g_defaultCDashQuerySession = CDashQuerySession()
+    return g_defaultCDashQuerySession
+
+
+# Set the CDash query session used by extractCDashApiQueryData()
+#
+# This is used to set the timeout and the number of connections per host (see
+# CDashQuerySession).  Any idle connections for the current default session
+# are closed.
+#
+def setDefaultCDashQuerySession(cdashQuerySession):
+  global g_defaultCDashQuerySession
+  with g_defaultCDashQuerySessionLock:
+    oldCDashQuerySession = g_defaultCDashQuerySession
+    g_defaultCDashQuerySession = cdashQuerySession
+  if oldCDashQuerySession and oldCDashQuerySession != cdashQuerySession:
+    oldCDashQuerySession.close()
+
+
+# Given a CDash query URL PHP page that returns a JSON object, iterate over the
+# elements of the array with the key arrayKey in that object.
+#
+# This is a generator that yields the elements as they are read (see
+# CDashQuerySession.iterateJsonArrayElements()) using the default CDash query
+# session.  The other top-level key/value pairs are put in otherData_out (if
+# not None).
+#
+# NOTE: Like extractCDashApiQueryData(), this can't be unit tested with CDash
+# so the functions that call this take an argument for unit testing.
+#
+def iterateCDashApiQueryDataArray(cdashApiQueryUrl, arrayKey, otherData_out=None):
+  return getDefaultCDashQuerySession().iterateJsonArrayElements(
+    cdashApiQueryUrl, arrayKey, otherData_out)
+
+
 # Given a CDash query URL PHP page that returns JSON data, return the JSON
 # data converged to a Python data-structure.
 #
 # The returned Python object will be a simple nested set of Python dicts and
 # lists.
 #
+# This uses the default CDash query session (see
+# getDefaultCDashQuerySession()) so that all of the queries to the same CDash
+# site reuse the same connections.
+#
 # NOTE: This function can't really be unit tested becuase it actually gets
 # data from CDash.  Therefore, the code below will be structured such that it
-# we can avoid getting call it in any automated tests.
+# we can avoid getting call it in any automated tests.  (The CDashQuerySession
+# class is unit tested using a local HTTP server.)
 #
 def extractCDashApiQueryData(cdashApiQueryUrl):
   if sys.version_info < (2,7,5):
     raise Exception("Error: Must be using Python 2.7.5 or newer")
   # NOTE: If we use Python 2.6.6. then the urllib2 function crashes!
-  response = urlopen(cdashApiQueryUrl)
-  return json.load(response)
+  return getDefaultCDashQuerySession().getJsonData(cdashApiQueryUrl)
 
 
 # Read a CSV file into a list of dictionaries for each row where the rows of
@@ -475,31 +1492,49 @@ def extractCDashApiQueryData(cdashApiQueryUrl):
 # the required headers and don't contain any headers not in the list of
 # expected headers.
 #
+# See iterateCsvFileRowsAsDicts() to read the rows one at a time instead.
+#
 def readCsvFileIntoListOfDicts(csvFileName, requiredColumnHeadersList=[],
     optionalColumnHeadersList=[],
   ):
-  listOfDicts = []
+  return list(iterateCsvFileRowsAsDicts(csvFileName, requiredColumnHeadersList,
+    optionalColumnHeadersList))
+
+
+# Generator that reads the rows of a CSV file one at a time as dicts
+#
+# This yields the same dicts in the same order as the list returned from
+# readCsvFileIntoListOfDicts() (and takes the same arguments) but it only
+# holds one row of the CSV file in memory at a time.  The column headers are
+# read and checked against requiredColumnHeadersList and
+# optionalColumnHeadersList once when the first row is asked for.  An
+# exception for a data row with the wrong number of entries is thrown when
+# that row is reached.
+#
+# The yielded dicts can be loaded directly into a SearchableListOfDicts
+# object (see the SearchableListOfDicts Constructor) without first creating a
+# list of dicts for the whole file.
+#
+def iterateCsvFileRowsAsDicts(csvFileName, requiredColumnHeadersList=[],
+    optionalColumnHeadersList=[],
+  ):
   with open(csvFileName, 'r') as csvFile:
     csvReader = csv.reader(csvFile)
     columnHeadersList = getColumnHeadersFromCsvFileReader(csvFileName, csvReader)
     assertExpectedColumnHeadersFromCsvFile(csvFileName, requiredColumnHeadersList,
       optionalColumnHeadersList, columnHeadersList)
+    numCols = len(columnHeadersList)
     # Read the rows of the CSV file into dicts
     dataRow = 0
     for lineList in csvReader:
       if not lineList: continue # Ingore blank line
       stripWhiltespaceFromStrList(lineList)
-      assertExpectedNumColsFromCsvFile(csvFileName, dataRow, lineList,
-        columnHeadersList)
-      # Read the row entries into a new dict
-      rowDict = {}
-      for j in range(len(columnHeadersList)):
-        rowDict.update( { columnHeadersList[j] : lineList[j] } )
-      listOfDicts.append(rowDict)
+      if len(lineList) != numCols:
+        assertExpectedNumColsFromCsvFile(csvFileName, dataRow, lineList,
+          columnHeadersList)
+      yield dict(zip(columnHeadersList, lineList))
       # Update for next row
       dataRow += 1
-  # Return the constructed object
-  return listOfDicts
 
 
 def getColumnHeadersFromCsvFileReader(csvFileName, csvReader):
@@ -580,29 +1615,35 @@ def getExpectedBuildsListOfDictsFromCsvFileArg(expectedBuildsFileArg):
   return expectedBuildsLOD
 
 
-# Write list of builds from a builds LOD to a CSV file structure meant to
-# match the expected builds CSV file.
+# Generator that yields the CSV file rows for the builds in a builds LOD
+# meant to match the expected builds CSV file.
 #
-def expectedBuildsListOfDictsToCsvFileStructure(buildsLOD):
-  csvFileHeadersList = copy.deepcopy(g_expectedBuildsCsvFileHeadersRequired)
-  csvFileRowsList = []
+def iterateExpectedBuildsCsvFileRows(buildsLOD):
   for buildDict in buildsLOD:
-    csvFileRow = (
+    yield (
       buildDict['group'],
       buildDict['site'],
       buildDict['buildname'],
       )
-    csvFileRowsList.append(csvFileRow)
-  return CsvFileStructure(csvFileHeadersList, csvFileRowsList)
+
+
+# Write list of builds from a builds LOD to a CSV file structure meant to
+# match the expected builds CSV file.
+#
+def expectedBuildsListOfDictsToCsvFileStructure(buildsLOD):
+  csvFileHeadersList = copy.deepcopy(g_expectedBuildsCsvFileHeadersRequired)
+  return CsvFileStructure(csvFileHeadersList,
+    list(iterateExpectedBuildsCsvFileRows(buildsLOD)))
 
 
 # Write list of builds from a builds LOD to a CSV file meant to match the
 # expected builds CSV file.
 #
+# The rows are written out one at a time (see writeCsvFileRowsToFile()).
+#
 def writeExpectedBuildsListOfDictsToCsvFile(buildsLOD, csvFileName):
-  csvFileStruct = expectedBuildsListOfDictsToCsvFileStructure(buildsLOD)
-  with open(csvFileName, 'w') as csvFile:
-    csvFile.write(writeCsvFileStructureToStr(csvFileStruct))
+  writeCsvFileRowsToFile(csvFileName, g_expectedBuildsCsvFileHeadersRequired,
+    iterateExpectedBuildsCsvFileRows(buildsLOD))
 
 
 g_testsWithIssueTrackersCsvFileHeadersRequired = \
@@ -614,33 +1655,48 @@ def getTestsWtihIssueTrackersListFromCsvFile(testsWithIssueTrackersFile):
     g_testsWithIssueTrackersCsvFileHeadersRequired)
 
 
-# Write list of tests from a Tests LOD to a CSV file structure meant to match
-# tests with issue trackers CSV file.
+# Generator that yields the test dicts from a tests with issue trackers CSV
+# file one at a time (see iterateCsvFileRowsAsDicts()).
 #
-def writeTestsListOfDictsToCsvFileStructure(testsLOD,
-    issueTrackerUrl="", issueTracker="",
-  ):
-  csvFileHeadersList = copy.deepcopy(g_testsWithIssueTrackersCsvFileHeadersRequired)
-  csvFileRowsList = []
+def iterateTestsWithIssueTrackersFromCsvFile(testsWithIssueTrackersFile):
+  return iterateCsvFileRowsAsDicts(testsWithIssueTrackersFile,
+    g_testsWithIssueTrackersCsvFileHeadersRequired)
+
+
+# Generator that yields the CSV file rows for the tests in a Tests LOD meant
+# to match tests with issue trackers CSV file.
+#
+def iterateTestsCsvFileRows(testsLOD, issueTrackerUrl="", issueTracker=""):
   for testDict in testsLOD:
-    csvFileRow = (
+    yield (
       testDict['site'],
       testDict['buildName'],
       testDict['testname'],
       issueTrackerUrl,  # issue_tracker_url
       issueTracker,  # issue_tracker
       )
-    csvFileRowsList.append(csvFileRow)
-  return CsvFileStructure(csvFileHeadersList, csvFileRowsList)
+
+
+# Write list of tests from a Tests LOD to a CSV file structure meant to match
+# tests with issue trackers CSV file.
+#
+def writeTestsListOfDictsToCsvFileStructure(testsLOD,
+    issueTrackerUrl="", issueTracker="",
+  ):
+  csvFileHeadersList = copy.deepcopy(g_testsWithIssueTrackersCsvFileHeadersRequired)
+  return CsvFileStructure(csvFileHeadersList,
+    list(iterateTestsCsvFileRows(testsLOD, issueTrackerUrl, issueTracker)))
 
 
 # Write list of tests from a Tests LOD to a CSV file meant to match tests with
 # issue trackers CSV file.
 #
+# The rows are written out one at a time (see writeCsvFileRowsToFile()).
+#
 def writeTestsListOfDictsToCsvFile(testsLOD, csvFileName):
-  csvFileStruct = writeTestsListOfDictsToCsvFileStructure(testsLOD)
-  with open(csvFileName, 'w') as csvFile:
-    csvFile.write(writeCsvFileStructureToStr(csvFileStruct))
+  writeCsvFileRowsToFile(csvFileName,
+    g_testsWithIssueTrackersCsvFileHeadersRequired,
+    iterateTestsCsvFileRows(testsLOD))
 
 
 # Pretty print a nested Python data-structure to a file
@@ -654,6 +1710,1677 @@ def pprintPythonDataToFile(pythonData, filePath):
     pp.pprint(pythonData)
 
 
+#
+# Test data files (e.g. written by cdash_analyze_and_report.py
+# --write-test-data-to-file)
+#
+# The list of test dicts can be written in one of the formats:
+#
+# * 'pprint': Pretty-printed Python list of dicts (see pprintPythonDataToFile())
+# * 'jsonl': JSON Lines with one compact JSON dict per test
+# * 'npz': NumPy .npz file with the columnar layout created by
+#   getTestDataColumnsFromListOfDicts() (requires the module 'numpy')
+#
+# All of them can be read back into a list of test dicts with
+# readTestDataFromFile().  Tools that only need a few fields for many tests
+# can instead read the columns of a 'npz' file with
+# readTestDataColumnsFromNpzFile() without creating any dicts.
+#
+# The test dicts can also be SlottedDictRecord objects (e.g. TestRecord
+# objects for --use-compact-records=on) which are written as plain dicts.
+#
+
+
+g_testDataFileFormatNames = ('pprint', 'jsonl', 'npz')
+
+g_testDataColumnarFormatVersion = 2
+
+
+# Get the test data file format from the file name extension ('.jsonl' =>
+# 'jsonl', '.npz' => 'npz' and anything else => 'pprint')
+def getTestDataFileFormatFromFileName(filePath):
+  fileExt = os.path.splitext(filePath)[1]
+  if fileExt == ".jsonl":
+    return 'jsonl'
+  elif fileExt == ".npz":
+    return 'npz'
+  return 'pprint'
+
+
+def assertTestDataFileFormat(fileFormat):
+  if not fileFormat in g_testDataFileFormatNames:
+    raise Exception("Error, test data file format '"+str(fileFormat)+"' is not"+\
+      " one of the valid formats "+str(list(g_testDataFileFormatNames))+"!")
+  if fileFormat == 'npz' and numpy == None:
+    raise Exception("Error, the test data file format 'npz' requires the"+\
+      " Python module 'numpy' which is not installed!")
+
+
+# Write a list of test dicts to a test data file
+#
+# testDataLOD [in]: List of test dicts.  All of the values must be JSON
+# serializable for the formats 'jsonl' and 'npz'.
+#
+# filePath [in]: The file to write.  The file is written atomically for the
+# formats 'jsonl' and 'npz' (see writeBytesToFileAtomically()).
+#
+# fileFormat [in]: One of the names in g_testDataFileFormatNames.
+#
+@timeFunctionCalls('test_data_files.write')
+def writeTestDataToFile(testDataLOD, filePath, fileFormat='pprint'):
+  assertTestDataFileFormat(fileFormat)
+  if fileFormat == 'pprint':
+    pprintPythonDataToFile(testDataLOD, filePath)
+  elif fileFormat == 'jsonl':
+    writeTestDataToJsonLinesFile(testDataLOD, filePath)
+  else:
+    writeTestDataToNpzFile(testDataLOD, filePath)
+
+
+# Read a list of test dicts from a test data file written by
+# writeTestDataToFile()
+#
+# If fileFormat==None, then the format is determined from the file name (see
+# getTestDataFileFormatFromFileName()).  The 'pprint' format is read with
+# ast.literal_eval() and not eval() so that reading it can never execute
+# code.
+#
+@timeFunctionCalls('test_data_files.read')
+def readTestDataFromFile(filePath, fileFormat=None):
+  if fileFormat == None:
+    fileFormat = getTestDataFileFormatFromFileName(filePath)
+  assertTestDataFileFormat(fileFormat)
+  if fileFormat == 'pprint':
+    with open(filePath, 'r') as fileObj:
+      return ast.literal_eval(fileObj.read())
+  elif fileFormat == 'jsonl':
+    return list(iterateTestDataFromJsonLinesFile(filePath))
+  return getTestDataListOfDictsFromColumns(
+    readTestDataColumnsFromNpzFile(filePath))
+
+
+# Get the compact JSON string for a test dict (or a value of one of its
+# fields) which may be (or contain) SlottedDictRecord objects
+def getTestDataCompactJsonStr(pythonData):
+  return json.dumps(pythonData, separators=(',', ':'),
+    default=convertRecordToDictForJson)
+
+
+# Convert a SlottedDictRecord object to a dict for json.dumps(default=...)
+def convertRecordToDictForJson(pythonObj):
+  if isinstance(pythonObj, SlottedDictRecord):
+    return pythonObj.toDict()
+  raise TypeError("Error, object of type "+pythonObj.__class__.__name__+\
+    " is not JSON serializable!")
+
+
+# Write a list of test dicts to a JSON Lines file (one compact JSON dict per
+# line)
+def writeTestDataToJsonLinesFile(testDataLOD, filePath):
+  (tmpFile, tmpFilePath) = openTempFileForAtomicWrite(filePath)
+  try:
+    with tmpFile:
+      for testDict in testDataLOD:
+        tmpFile.write(
+          (getTestDataCompactJsonStr(testDict)+"\n").encode('utf-8'))
+    replaceFileWithTempFile(tmpFilePath, filePath)
+  except:
+    if os.path.exists(tmpFilePath): os.remove(tmpFilePath)
+    raise
+
+
+# Generator that yields the test dicts from a JSON Lines file one at a time
+def iterateTestDataFromJsonLinesFile(filePath):
+  with open(filePath, 'r') as fileObj:
+    for line in fileObj:
+      if not line.strip(): continue  # Ignore blank line
+      yield json.loads(line)
+
+
+# Get the columnar layout for a list of test dicts
+#
+# Returns a dict with the entries:
+#
+# * 'num_tests': Number of tests.
+# * 'strings': List of the unique values of all of the 'string' fields (in
+#   order first seen).
+# * 'field_names': List of the names of all of the fields of all of the tests
+#   (in order first seen).
+# * 'field_kinds': Dict of the kind of column (see below) for each field.
+# * 'columns': Dict of the column (with one value for each test) for each
+#   field.
+# * 'present': Dict of the list of bools (True if the test has the field) for
+#   each field that is not of kind 'string'.
+#
+# The kind of column for a field is:
+#
+# * 'string': All of the values are strings.  The column has the index into
+#   'strings' for each test (or -1 if the test does not have the field).
+# * 'int': All of the values are ints.  The column has the value (or 0).
+# * 'float': All of the values are floats.  The column has the value (or 0.0).
+# * 'json': Any other values (e.g. 'test_history_list' or None).  The column
+#   has the compact JSON string for the value (or "").
+#
+# Repeated site, build and test names are therefore only stored once and only
+# the values of the 'json' fields need to be parsed when reading them back.
+#
+def getTestDataColumnsFromListOfDicts(testDataLOD):
+  numTests = len(testDataLOD)
+  fieldNamesList = []
+  fieldValuesDict = {}  # fieldName -> [ (testIdx, fieldValue), ... ]
+  for (testIdx, testDict) in enumerate(testDataLOD):
+    for (fieldName, fieldValue) in testDict.items():
+      fieldValuesList = fieldValuesDict.get(fieldName, None)
+      if fieldValuesList is None:
+        fieldValuesList = fieldValuesDict[fieldName] = []
+        fieldNamesList.append(fieldName)
+      fieldValuesList.append((testIdx, fieldValue))
+  stringsList = []
+  stringToIdxDict = {}
+  fieldKindsDict = {}
+  columnsDict = {}
+  presentDict = {}
+  for fieldName in fieldNamesList:
+    fieldValuesList = fieldValuesDict[fieldName]
+    fieldKind = getTestDataColumnKind(
+      [ fieldValue for (_, fieldValue) in fieldValuesList ] )
+    fieldKindsDict[fieldName] = fieldKind
+    if fieldKind == 'string':
+      column = [-1]*numTests
+      for (testIdx, fieldValue) in fieldValuesList:
+        stringIdx = stringToIdxDict.get(fieldValue, None)
+        if stringIdx is None:
+          stringIdx = len(stringsList)
+          stringToIdxDict[fieldValue] = stringIdx
+          stringsList.append(fieldValue)
+        column[testIdx] = stringIdx
+    else:
+      column = [g_testDataColumnMissingValues[fieldKind]]*numTests
+      present = [False]*numTests
+      for (testIdx, fieldValue) in fieldValuesList:
+        if fieldKind == 'json':
+          fieldValue = getTestDataCompactJsonStr(fieldValue)
+        column[testIdx] = fieldValue
+        present[testIdx] = True
+      presentDict[fieldName] = present
+    columnsDict[fieldName] = column
+  return {
+    'num_tests' : numTests,
+    'strings' : stringsList,
+    'field_names' : fieldNamesList,
+    'field_kinds' : fieldKindsDict,
+    'columns' : columnsDict,
+    'present' : presentDict,
+    }
+
+
+# The value in a column of the given kind for a test that does not have the
+# field (see getTestDataColumnsFromListOfDicts())
+g_testDataColumnMissingValues = { 'int':0, 'float':0.0, 'json':"" }
+
+
+# Get the kind of column ('string', 'int', 'float' or 'json') for the list of
+# values of a field (see getTestDataColumnsFromListOfDicts())
+def getTestDataColumnKind(fieldValuesList):
+  stringTypes = (str, type(u("")))
+  intTypes = (int, type(2**64))  # 'int' and 'long' in Python 2
+  if all([ isinstance(fieldValue, stringTypes) for fieldValue in fieldValuesList ]):
+    return 'string'
+  if all([ isinstance(fieldValue, intTypes) and not isinstance(fieldValue, bool) \
+      and -2**63 <= fieldValue < 2**63 \
+      for fieldValue in fieldValuesList \
+    ]):
+    return 'int'
+  if all([ isinstance(fieldValue, float) for fieldValue in fieldValuesList ]):
+    return 'float'
+  return 'json'
+
+
+# Get the list of test dicts back from the columnar layout returned from
+# getTestDataColumnsFromListOfDicts() (or readTestDataColumnsFromNpzFile())
+def getTestDataListOfDictsFromColumns(columnsDict):
+  stringsList = toPythonList(columnsDict['strings'])
+  testDataLOD = [ {} for _ in range(columnsDict['num_tests']) ]
+  for fieldName in columnsDict['field_names']:
+    fieldKind = columnsDict['field_kinds'][fieldName]
+    column = toPythonList(columnsDict['columns'][fieldName])
+    if fieldKind == 'string':
+      for (testDict, stringIdx) in zip(testDataLOD, column):
+        if stringIdx >= 0:
+          testDict[fieldName] = stringsList[stringIdx]
+      continue
+    present = toPythonList(columnsDict['present'][fieldName])
+    for (testDict, isPresent, fieldValue) in zip(testDataLOD, present, column):
+      if isPresent:
+        if fieldKind == 'json':
+          fieldValue = json.loads(fieldValue)
+        testDict[fieldName] = fieldValue
+  return testDataLOD
+
+
+# Return a list for a list or a NumPy array
+def toPythonList(listOrArray):
+  if hasattr(listOrArray, 'tolist'):
+    return listOrArray.tolist()
+  return listOrArray
+
+
+# The NumPy dtype for the columns of each kind in a test data .npz file (the
+# 'json' columns are stored as the UTF-8 bytes of all of the strings and an
+# array of the offsets of the strings in those bytes)
+def getTestDataNpzColumnDType(fieldKind):
+  return { 'string':numpy.int32, 'int':numpy.int64, 'float':numpy.float64,
+    'json':numpy.uint8 }[fieldKind]
+
+
+# Write a list of test dicts to a NumPy .npz file with the columnar layout
+# of getTestDataColumnsFromListOfDicts()
+#
+# The column for the i-th field is stored in the array 'column_<i>' (and
+# 'present_<i>' and 'offsets_<i>' where needed).
+#
+def writeTestDataToNpzFile(testDataLOD, filePath):
+  assertTestDataFileFormat('npz')
+  columnsDict = getTestDataColumnsFromListOfDicts(testDataLOD)
+  fieldNamesList = columnsDict['field_names']
+  npzArraysDict = {
+    'format_version' : numpy.array(g_testDataColumnarFormatVersion),
+    'num_tests' : numpy.array(columnsDict['num_tests']),
+    'strings' : numpy.array(columnsDict['strings'], dtype=numpy.str_),
+    'field_names' : numpy.array(fieldNamesList, dtype=numpy.str_),
+    'field_kinds' : numpy.array(
+      [ columnsDict['field_kinds'][fieldName] for fieldName in fieldNamesList ],
+      dtype=numpy.str_),
+    }
+  for (fieldIdx, fieldName) in enumerate(fieldNamesList):
+    fieldKind = columnsDict['field_kinds'][fieldName]
+    column = columnsDict['columns'][fieldName]
+    fieldIdxStr = str(fieldIdx)
+    if fieldKind == 'json':
+      valueBytesList = [ fieldValue.encode('utf-8') for fieldValue in column ]
+      offsetsList = [0]
+      for valueBytes in valueBytesList:
+        offsetsList.append(offsetsList[-1] + len(valueBytes))
+      column = numpy.frombuffer(b"".join(valueBytesList),
+        dtype=getTestDataNpzColumnDType(fieldKind))
+      npzArraysDict['offsets_'+fieldIdxStr] = \
+        numpy.array(offsetsList, dtype=numpy.int64)
+    npzArraysDict['column_'+fieldIdxStr] = \
+      numpy.array(column, dtype=getTestDataNpzColumnDType(fieldKind))
+    if fieldKind != 'string':
+      npzArraysDict['present_'+fieldIdxStr] = \
+        numpy.array(columnsDict['present'][fieldName], dtype=numpy.bool_)
+  (tmpFile, tmpFilePath) = openTempFileForAtomicWrite(filePath)
+  try:
+    with tmpFile:
+      numpy.savez_compressed(tmpFile, **npzArraysDict)
+    replaceFileWithTempFile(tmpFilePath, filePath)
+  except:
+    if os.path.exists(tmpFilePath): os.remove(tmpFilePath)
+    raise
+
+
+# Read the columns of a test data .npz file written by writeTestDataToFile()
+#
+# Returns a dict with the same entries as returned from
+# getTestDataColumnsFromListOfDicts() but with 'strings' and the columns
+# (other than the 'json' columns) and 'present' lists as NumPy arrays.  For
+# example, the names of the tests with status 'Failed' are given by:
+#
+#   columnsDict = readTestDataColumnsFromNpzFile(filePath)
+#   strings = columnsDict['strings']
+#   columns = columnsDict['columns']
+#   failedIdx = list(strings).index('Failed')
+#   strings[columns['testname'][columns['status'] == failedIdx]]
+#
+def readTestDataColumnsFromNpzFile(filePath):
+  assertTestDataFileFormat('npz')
+  with numpy.load(filePath, allow_pickle=False) as npzFile:
+    formatVersion = int(npzFile['format_version'])
+    if formatVersion != g_testDataColumnarFormatVersion:
+      raise Exception("Error, test data file '"+filePath+"' has format"+\
+        " version "+str(formatVersion)+" but only version"+\
+        " "+str(g_testDataColumnarFormatVersion)+" is supported!")
+    numTests = int(npzFile['num_tests'])
+    fieldNamesList = npzFile['field_names'].tolist()
+    columnsDict = {
+      'num_tests' : numTests,
+      'strings' : npzFile['strings'],
+      'field_names' : fieldNamesList,
+      'field_kinds' : dict(zip(fieldNamesList, npzFile['field_kinds'].tolist())),
+      'columns' : {},
+      'present' : {},
+      }
+    for (fieldIdx, fieldName) in enumerate(fieldNamesList):
+      fieldKind = columnsDict['field_kinds'][fieldName]
+      fieldIdxStr = str(fieldIdx)
+      column = npzFile['column_'+fieldIdxStr]
+      if fieldKind == 'json':
+        valuesBytes = column.tobytes()
+        offsetsList = npzFile['offsets_'+fieldIdxStr].tolist()
+        column = [ valuesBytes[offsetsList[i]:offsetsList[i+1]].decode('utf-8') \
+          for i in range(numTests) ]
+      columnsDict['columns'][fieldName] = column
+      if fieldKind != 'string':
+        columnsDict['present'][fieldName] = npzFile['present_'+fieldIdxStr]
+  return columnsDict
+
+
+# Write the bytes data to a file atomically
+#
+# The data is first written to a temp file in the same directory and then
+# that file is renamed to filePath.  Therefore, a reader (or another process
+# using the same cache directory) will never see a partially written file even
+# if this process is killed in the middle of writing.
+#
+def writeBytesToFileAtomically(dataBytes, filePath):
+  (tmpFile, tmpFilePath) = openTempFileForAtomicWrite(filePath)
+  try:
+    with tmpFile:
+      tmpFile.write(dataBytes)
+    replaceFileWithTempFile(tmpFilePath, filePath)
+  except:
+    if os.path.exists(tmpFilePath): os.remove(tmpFilePath)
+    raise
+
+
+# Open a new temp file (in binary write mode) in the same directory as
+# filePath to be renamed to filePath with replaceFileWithTempFile() after it
+# is written.  Returns (tmpFile, tmpFilePath).
+def openTempFileForAtomicWrite(filePath):
+  fileDir = os.path.dirname(os.path.abspath(filePath))
+  (tmpFileHandle, tmpFilePath) = tempfile.mkstemp(
+    prefix="."+os.path.basename(filePath)+".", suffix=".tmp", dir=fileDir)
+  return (os.fdopen(tmpFileHandle, 'wb'), tmpFilePath)
+
+
+# Rename the temp file tmpFilePath to filePath (replacing filePath if it
+# exists)
+def replaceFileWithTempFile(tmpFilePath, filePath):
+  if hasattr(os, 'replace'):
+    os.replace(tmpFilePath, filePath)
+  else:
+    # Python 2 (os.rename() does not replace an existing file on Windows)
+    if os.name == 'nt' and os.path.exists(filePath): os.remove(filePath)
+    os.rename(tmpFilePath, filePath)
+
+
+# Compress bytes data in gzip format
+#
+# NOTE: The gzip header timestamp is set to 0 so that the same data always
+# gives the same bytes.
+#
+def gzipCompressBytes(dataBytes, compresslevel=6):
+  bytesIO = io.BytesIO()
+  with gzip.GzipFile(fileobj=bytesIO, mode='wb', compresslevel=compresslevel,
+      mtime=0 \
+    ) as gzipFile:
+    gzipFile.write(dataBytes)
+  return bytesIO.getvalue()
+
+
+# Decompress bytes data in gzip format
+def gzipDecompressBytes(dataBytes):
+  with gzip.GzipFile(fileobj=io.BytesIO(dataBytes), mode='rb') as gzipFile:
+    return gzipFile.read()
+
+
+# The magic bytes at the beginning of every gzip file
+g_gzipMagicBytes = b'\x1f\x8b'
+
+
+# CDash query data cache file format: Plain JSON
+#
+# This is the same data that CDash returns from its cdash/api/v1/XXX.php
+# pages (minus the whitespace) and can be read by any tool.
+#
+class JsonCacheFileFormat(object):
+
+  name = "json"
+
+  def isAvailable(self):
+    return True
+
+  def dumps(self, pythonData):
+    return json.dumps(pythonData, separators=(',',':')).encode('utf-8')
+
+  def loads(self, dataBytes):
+    return json.loads(dataBytes.decode('utf-8'))
+
+
+# CDash query data cache file format: gzip compressed JSON (the default)
+#
+# The CDash JSON data compresses 10x or more and reading and decompressing
+# the smaller file is faster than reading the larger plain text file.
+#
+class GzipJsonCacheFileFormat(object):
+
+  name = "json-gz"
+
+  def isAvailable(self):
+    return True
+
+  def dumps(self, pythonData):
+    return gzipCompressBytes(JsonCacheFileFormat().dumps(pythonData))
+
+  def loads(self, dataBytes):
+    return JsonCacheFileFormat().loads(gzipDecompressBytes(dataBytes))
+
+
+# CDash query data cache file format: msgpack binary format
+#
+# This requires the optional Python 'msgpack' module to be installed.
+#
+class MsgpackCacheFileFormat(object):
+
+  name = "msgpack"
+
+  def isAvailable(self):
+    return msgpack != None
+
+  def dumps(self, pythonData):
+    self.assertAvailable()
+    return msgpack.packb(pythonData, use_bin_type=True)
+
+  def loads(self, dataBytes):
+    self.assertAvailable()
+    return msgpack.unpackb(dataBytes, raw=False)
+
+  def assertAvailable(self):
+    if not self.isAvailable():
+      raise Exception("Error, the cache file format '"+self.name+"' requires"+\
+        " the Python module 'msgpack' which is not installed!")
+
+
+# CDash query data cache file format: Legacy pretty-printed Python data
+#
+# This is the format of the cache files written by older versions of this
+# module (see pprintPythonDataToFile()).  It is still supported so that older
+# cache directories can be read (and migrated to the default format).  These
+# files are read with ast.literal_eval() and not eval() so that reading a
+# cache file can never execute code.
+#
+class PprintCacheFileFormat(object):
+
+  name = "pprint"
+
+  def isAvailable(self):
+    return True
+
+  def dumps(self, pythonData):
+    return (pprint.pformat(pythonData, indent=2)+"\n").encode('utf-8')
+
+  def loads(self, dataBytes):
+    return ast.literal_eval(dataBytes.decode('utf-8'))
+
+
+# Registry of the CDash query data cache file formats by name
+g_cdashQueryDataCacheFileFormats = {}
+
+g_defaultCDashQueryDataCacheFileFormatName = "json-gz"
+
+g_migrateLegacyCDashQueryDataCacheFiles = False
+
+
+# Register a CDash query data cache file format object
+#
+# The object must have a 'name' data member and the functions 'isAvailable()',
+# 'dumps(pythonData)' (returns bytes) and 'loads(dataBytes)' (returns the
+# Python data).
+#
+def registerCDashQueryDataCacheFileFormat(cacheFileFormat):
+  g_cdashQueryDataCacheFileFormats[cacheFileFormat.name] = cacheFileFormat
+
+
+registerCDashQueryDataCacheFileFormat(GzipJsonCacheFileFormat())
+registerCDashQueryDataCacheFileFormat(JsonCacheFileFormat())
+registerCDashQueryDataCacheFileFormat(MsgpackCacheFileFormat())
+registerCDashQueryDataCacheFileFormat(PprintCacheFileFormat())
+
+
+# Get the sorted list of all of the registered cache file format names
+def getCDashQueryDataCacheFileFormatNames():
+  return sorted(g_cdashQueryDataCacheFileFormats.keys())
+
+
+# Get a registered cache file format object given its name
+#
+# If cacheFileFormatName==None, then the default cache file format is returned
+# (see setDefaultCDashQueryDataCacheFileFormat()).
+#
+def getCDashQueryDataCacheFileFormat(cacheFileFormatName=None):
+  if cacheFileFormatName == None:
+    cacheFileFormatName = g_defaultCDashQueryDataCacheFileFormatName
+  cacheFileFormat = g_cdashQueryDataCacheFileFormats.get(cacheFileFormatName, None)
+  if not cacheFileFormat:
+    raise Exception("Error, cache file format '"+str(cacheFileFormatName)+"'"+\
+      " is not one of the valid formats "+\
+      str(getCDashQueryDataCacheFileFormatNames())+"!")
+  return cacheFileFormat
+
+
+# Set the cache file format used to write CDash query data cache files
+#
+# This impacts all of the cache files written by
+# getAndCacheCDashQueryDataOrReadFromCache() and the functions that call it.
+# (The format of an existing cache file is always determined from its
+# contents when it is read.)
+#
+def setDefaultCDashQueryDataCacheFileFormat(cacheFileFormatName):
+  global g_defaultCDashQueryDataCacheFileFormatName
+  cacheFileFormat = getCDashQueryDataCacheFileFormat(cacheFileFormatName)
+  if not cacheFileFormat.isAvailable():
+    raise Exception("Error, the cache file format '"+cacheFileFormatName+"'"+\
+      " is not available (it requires an optional Python module that is not"+\
+      " installed)!")
+  g_defaultCDashQueryDataCacheFileFormatName = cacheFileFormatName
+
+
+# Set if legacy 'pprint' cache files read by
+# getAndCacheCDashQueryDataOrReadFromCache() are rewritten in the default
+# cache file format
+#
+# This is off by default since the cache file may not be owned by this
+# process (e.g. it may be a file provided by the user or a test).
+#
+def setMigrateLegacyCDashQueryDataCacheFiles(migrateLegacyCacheFiles):
+  global g_migrateLegacyCDashQueryDataCacheFiles
+  g_migrateLegacyCDashQueryDataCacheFiles = migrateLegacyCacheFiles
+
+
+# Determine the format of CDash query data cache file data from its contents
+#
+# Returns the registered cache file format object for:
+#
+# * 'json-gz': Starts with the gzip magic bytes
+# * 'json': Starts with '{' or '[' and is valid JSON
+# * 'pprint': Starts with '{' or '[' and is not valid JSON (legacy format)
+# * 'msgpack': Anything else (msgpack maps and arrays never start with '{' or
+#   '[')
+#
+# The 'json' and 'pprint' formats are distinguished by trying to load the data
+# as JSON so the loaded data is returned as well (or None if it was not
+# loaded) to avoid loading it twice.
+#
+def detectCDashQueryDataCacheFileFormat(dataBytes):
+  if dataBytes[:2] == g_gzipMagicBytes:
+    return (getCDashQueryDataCacheFileFormat("json-gz"), None)
+  firstChar = dataBytes.lstrip()[:1]
+  if firstChar in (b'{', b'['):
+    try:
+      pythonData = getCDashQueryDataCacheFileFormat("json").loads(dataBytes)
+      return (getCDashQueryDataCacheFileFormat("json"), pythonData)
+    except ValueError:
+      return (getCDashQueryDataCacheFileFormat("pprint"), None)
+  return (getCDashQueryDataCacheFileFormat("msgpack"), None)
+
+
+# Write Python data to a CDash query data cache file
+#
+# The file is written atomically (see writeBytesToFileAtomically()) in the
+# format cacheFileFormatName (or the default format if None).
+#
+@timeFunctionCalls('cache_files.write')
+def writeCDashQueryDataCacheFile(pythonData, cacheFilePath,
+    cacheFileFormatName=None,
+  ):
+  cacheFileFormat = getCDashQueryDataCacheFileFormat(cacheFileFormatName)
+  writeCDashQueryDataCacheFileBytes(cacheFileFormat.dumps(pythonData),
+    cacheFilePath)
+
+
+# Write the bytes for a CDash query data cache file
+#
+# If the directory of cacheFilePath uses packed cache files (see
+# setCDashQueryDataCacheDirPacked()), then the bytes are appended to the pack
+# file for the cache file.  Otherwise, the file is written atomically (see
+# writeBytesToFileAtomically()).
+#
+def writeCDashQueryDataCacheFileBytes(dataBytes, cacheFilePath):
+  packFile = getCDashQueryDataPackFile(cacheFilePath)
+  if packFile:
+    packFile.put(os.path.basename(cacheFilePath), dataBytes)
+  else:
+    writeBytesToFileAtomically(dataBytes, cacheFilePath)
+
+
+# Name of the indexed archive file that the old cache files in a cache
+# directory are packed into (see CDashQueryCacheManager.compactCacheFiles())
+g_cdashQueryCacheArchiveFileName = "cdash_queries_cache_archive.zip"
+
+
+# Get the path to the cache archive file that a cache file may be packed into
+def getCDashQueryCacheArchiveFilePath(cacheFilePath):
+  return os.path.join(os.path.dirname(cacheFilePath),
+    g_cdashQueryCacheArchiveFileName)
+
+
+# Read access to the cache files packed into a cache archive file
+#
+# The index of the archive (i.e. the zip central directory) is only read when
+# the archive is first opened or after the archive file was replaced (e.g. by
+# CDashQueryCacheManager.compactCacheFiles() in another process).  Therefore,
+# looking up a cache file in the archive does not touch the file system other
+# than to stat the archive file.
+#
+# An object of this type can be used by multiple threads at the same time.
+#
+class CDashQueryCacheArchiveReader(object):
+
+  def __init__(self, archiveFilePath):
+    self.archiveFilePath = archiveFilePath
+    self.lock = threading.Lock()
+    self.archiveFileSignature = None
+    self.zipFile = None
+    self.entryNamesSet = set()
+
+  # Return True if the cache file with the name entryName is in the archive
+  def hasEntry(self, entryName):
+    with self.lock:
+      return self.refresh() and (entryName in self.entryNamesSet)
+
+  # Return the bytes for the cache file entryName or None if it is not in the
+  # archive (or the archive file does not exist)
+  def readEntry(self, entryName):
+    with self.lock:
+      if not self.refresh() or not entryName in self.entryNamesSet:
+        return None
+      getDefaultTimingRegistry().incrementCounter('cache_archive.reads')
+      return self.zipFile.read(entryName)
+
+  # (Re)open the archive file if it changed since it was last opened.  Returns
+  # False if the archive file does not exist.
+  def refresh(self):
+    try:
+      archiveFileStat = os.stat(self.archiveFilePath)
+    except OSError:
+      self.close()
+      return False
+    archiveFileSignature = (archiveFileStat.st_mtime, archiveFileStat.st_size,
+      archiveFileStat.st_ino)
+    if archiveFileSignature != self.archiveFileSignature:
+      self.close()
+      self.zipFile = zipfile.ZipFile(self.archiveFilePath, 'r')
+      self.entryNamesSet = set(self.zipFile.namelist())
+      self.archiveFileSignature = archiveFileSignature
+    return True
+
+  def close(self):
+    if self.zipFile:
+      self.zipFile.close()
+    self.zipFile = None
+    self.entryNamesSet = set()
+    self.archiveFileSignature = None
+
+
+g_cdashQueryCacheArchiveReaders = {}
+g_cdashQueryCacheArchiveReadersLock = threading.Lock()
+
+
+# Get the (shared) CDashQueryCacheArchiveReader object for the cache archive
+# file that the cache file cacheFilePath may be packed into
+def getCDashQueryCacheArchiveReader(cacheFilePath):
+  archiveFilePath = getCDashQueryCacheArchiveFilePath(cacheFilePath)
+  with g_cdashQueryCacheArchiveReadersLock:
+    archiveReader = g_cdashQueryCacheArchiveReaders.get(archiveFilePath, None)
+    if archiveReader == None:
+      archiveReader = CDashQueryCacheArchiveReader(archiveFilePath)
+      g_cdashQueryCacheArchiveReaders[archiveFilePath] = archiveReader
+  return archiveReader
+
+
+# CDash query data pack file: All of the CDash query data cache files for a
+# testing day in one append-only indexed file
+#
+# Each cache file is stored as one record:
+#
+#   <magic 'CDQP'><key size><data size><data crc32><key><data>
+#
+# where the sizes and the CRC are 4-byte big-endian unsigned ints, the key is
+# the UTF-8 name of the cache file and the data is the bytes of the cache file
+# (see writeCDashQueryDataCacheFile()).  A later record for the same key
+# replaces the earlier one.
+#
+# The pack file is memory mapped and the index (key -> data offset and size)
+# is built by scanning just the record headers so opening a pack file with
+# thousands of cache files takes one open() and one mmap() (instead of one
+# open(), stat() and read() for each cache file).  The data of a record is
+# checked against its CRC when it is read.
+#
+# Records are appended by put() while holding an exclusive lock on the pack
+# file (using fcntl.flock() where available) so the same pack file can be
+# written by several processes at the same time.  A partially written record
+# at the end of the file (e.g. from a process that was killed) is ignored by
+# readers and is truncated off by the next writer.  Records appended by other
+# processes are seen the next time a key is not found (or after the next
+# put()).
+#
+# Since the pack file is append-only, the superseded records are only removed
+# by compact() (see CDashQueryCacheManager.compactCacheFiles()) which
+# atomically replaces the pack file with one that has just the latest valid
+# record for each key.
+#
+# An object of this type can be used by multiple threads at the same time.
+#
+class CDashQueryDataPackFile(object):
+
+  recordMagic = b'CDQP'
+  recordHeaderStruct = struct.Struct('>4sIII')
+
+  def __init__(self, packFilePath):
+    self.packFilePath = packFilePath
+    self.lock = threading.Lock()
+    self.indexDict = {}
+    self.mmapObj = None
+    self.mmapSize = 0
+    self.validEndOffset = 0
+    self.fileId = None
+
+  # Return True if the pack file has a record for key
+  def has(self, key):
+    with self.lock:
+      return self.lookup(key) != None
+
+  # Return the data bytes for key (or None if there is no valid record for
+  # key)
+  def get(self, key):
+    with self.lock:
+      indexEntry = self.lookup(key)
+      if indexEntry == None:
+        return None
+      (dataOffset, dataSize, dataCrc) = indexEntry
+      dataBytes = self.mmapObj[dataOffset:dataOffset+dataSize]
+    if (zlib.crc32(dataBytes) & 0xffffffff) != dataCrc:
+      getDefaultTimingRegistry().incrementCounter('cache_pack.corrupt_records')
+      return None
+    getDefaultTimingRegistry().incrementCounter('cache_pack.reads')
+    return dataBytes
+
+  # Get the sorted list of keys in the pack file
+  def getKeys(self):
+    with self.lock:
+      self.refresh()
+      return sorted(self.indexDict.keys())
+
+  # Append a record for key with the data bytes dataBytes
+  def put(self, key, dataBytes):
+    recordBytes = self.getRecordBytes(key, dataBytes)
+    with self.lock:
+      with self.openAndLockPackFile() as packFileObj:
+        try:
+          # Truncate any partially written record at the end of the file
+          self.refresh()
+          if os.fstat(packFileObj.fileno()).st_size > self.validEndOffset:
+            packFileObj.truncate(self.validEndOffset)
+          packFileObj.write(recordBytes)
+          packFileObj.flush()
+        finally:
+          if fcntl: fcntl.flock(packFileObj.fileno(), fcntl.LOCK_UN)
+      self.refresh()
+    getDefaultTimingRegistry().incrementCounter('cache_pack.writes')
+
+  # Rewrite the pack file with just the latest valid record for each key
+  #
+  # The superseded records, the records with corrupt data and any partially
+  # written record at the end are dropped.  The new pack file is written to a
+  # temp file that replaces the pack file while the lock on the pack file is
+  # held so no records appended by other processes are lost.  The access and
+  # modification times of the pack file are kept (so it is still evicted by
+  # age, see CDashQueryCacheManager.evictCacheFiles()).
+  #
+  # Returns the number of bytes dropped (0 if the pack file did not need to
+  # be rewritten).
+  #
+  def compact(self):
+    if not os.path.exists(self.packFilePath):
+      return 0
+    with self.lock:
+      with self.openAndLockPackFile() as packFileObj:
+        try:
+          self.refresh()
+          packFileStat = os.fstat(packFileObj.fileno())
+          validIndexEntriesList = []
+          keptBytes = 0
+          for key in sorted(self.indexDict.keys()):
+            (dataOffset, dataSize, dataCrc) = self.indexDict[key]
+            dataBytes = self.mmapObj[dataOffset:dataOffset+dataSize]
+            if (zlib.crc32(dataBytes) & 0xffffffff) != dataCrc:
+              continue
+            validIndexEntriesList.append((key, dataOffset, dataSize))
+            keptBytes += self.recordHeaderStruct.size + \
+              len(key.encode('utf-8')) + dataSize
+          droppedBytes = packFileStat.st_size - keptBytes
+          if droppedBytes <= 0:
+            return 0
+          (tmpFile, tmpFilePath) = openTempFileForAtomicWrite(self.packFilePath)
+          try:
+            with tmpFile:
+              for (key, dataOffset, dataSize) in validIndexEntriesList:
+                tmpFile.write(self.getRecordBytes(key,
+                  self.mmapObj[dataOffset:dataOffset+dataSize]))
+            os.utime(tmpFilePath, (packFileStat.st_atime, packFileStat.st_mtime))
+            replaceFileWithTempFile(tmpFilePath, self.packFilePath)
+          except:
+            if os.path.exists(tmpFilePath): os.remove(tmpFilePath)
+            raise
+          self.refresh()
+        finally:
+          if fcntl: fcntl.flock(packFileObj.fileno(), fcntl.LOCK_UN)
+    getDefaultTimingRegistry().incrementCounter('cache_pack.compactions')
+    return droppedBytes
+
+  # Get the bytes of the record for key with the data bytes dataBytes
+  def getRecordBytes(self, key, dataBytes):
+    if isinstance(key, bytes):
+      keyBytes = key
+    else:
+      keyBytes = key.encode('utf-8')
+    return self.recordHeaderStruct.pack(self.recordMagic, len(keyBytes),
+      len(dataBytes), zlib.crc32(dataBytes) & 0xffffffff) + keyBytes + dataBytes
+
+  # Open the pack file for appending and lock it (opening it again if it was
+  # replaced by compact() in another process while waiting for the lock)
+  def openAndLockPackFile(self):
+    while True:
+      packFileObj = open(self.packFilePath, 'ab')
+      if not fcntl:
+        return packFileObj
+      fcntl.flock(packFileObj.fileno(), fcntl.LOCK_EX)
+      try:
+        isSamePackFile = os.path.samestat(os.fstat(packFileObj.fileno()),
+          os.stat(self.packFilePath))
+      except OSError:
+        isSamePackFile = False  # Replaced and not there yet
+      if isSamePackFile:
+        return packFileObj
+      packFileObj.close()  # Also releases the lock
+
+  # Look up the index entry for key (refreshing the index if it is not found)
+  def lookup(self, key):
+    indexEntry = self.indexDict.get(key, None)
+    if indexEntry == None:
+      self.refresh()
+      indexEntry = self.indexDict.get(key, None)
+    return indexEntry
+
+  # Re-map the pack file and index the new records if the file changed size
+  # (or was replaced by compact())
+  def refresh(self):
+    try:
+      packFileStat = os.stat(self.packFilePath)
+      packFileSize = packFileStat.st_size
+      fileId = (packFileStat.st_dev, packFileStat.st_ino)
+    except OSError:
+      packFileSize = 0
+      fileId = None
+    if packFileSize == self.mmapSize and fileId == self.fileId:
+      return
+    if packFileSize < self.mmapSize or packFileSize < self.validEndOffset or \
+      fileId != self.fileId \
+      :
+      # The file was truncated or replaced so index all of it again
+      self.indexDict = {}
+      self.validEndOffset = 0
+    self.fileId = fileId
+    if self.mmapObj:
+      self.mmapObj.close()
+      self.mmapObj = None
+    self.mmapSize = 0
+    if packFileSize == 0:
+      return
+    with open(self.packFilePath, 'rb') as packFileObj:
+      self.mmapObj = mmap.mmap(packFileObj.fileno(), 0, access=mmap.ACCESS_READ)
+    self.mmapSize = len(self.mmapObj)
+    self.indexRecords()
+
+  # Index the records after self.validEndOffset up to the first record that
+  # is not complete
+  def indexRecords(self):
+    headerSize = self.recordHeaderStruct.size
+    offset = self.validEndOffset
+    while offset + headerSize <= self.mmapSize:
+      (magic, keySize, dataSize, dataCrc) = \
+        self.recordHeaderStruct.unpack(self.mmapObj[offset:offset+headerSize])
+      keyOffset = offset + headerSize
+      recordEndOffset = keyOffset + keySize + dataSize
+      if magic != self.recordMagic or recordEndOffset > self.mmapSize:
+        break
+      key = self.mmapObj[keyOffset:keyOffset+keySize].decode('utf-8')
+      self.indexDict[key] = (keyOffset+keySize, dataSize, dataCrc)
+      offset = recordEndOffset
+    self.validEndOffset = offset
+
+  def close(self):
+    with self.lock:
+      if self.mmapObj:
+        self.mmapObj.close()
+      self.mmapObj = None
+      self.mmapSize = 0
+      self.indexDict = {}
+      self.validEndOffset = 0
+      self.fileId = None
+
+
+# File name extension for the CDash query data pack files
+g_cdashQueryDataPackFileExt = ".cdashpack"
+
+
+# The cache files with names that contain one of these strings are always
+# written as separate files (and not put in pack files)
+#
+# These are the build test history cache files (see
+# getBuildTestHistoryCacheFileName()) which are only kept until they are split
+# up into the per-test test history cache files and are then removed (see
+# removeBuildTestHistoryCacheFiles()).  (A record can't be removed from a pack
+# file.)
+g_cdashQueryDataUnpackedCacheFileNameTags = ("-BUILD-HIST-",)
+
+
+g_cdashQueryDataPackedCacheDirs = set()
+g_cdashQueryDataPackFiles = {}
+g_cdashQueryDataPackFilesLock = threading.Lock()
+
+
+# Set if the CDash query data cache files in the directory cacheDir are
+# stored in pack files
+#
+# If packed==True, then the cache files written to cacheDir (see
+# writeCDashQueryDataCacheFile()) are appended to the pack file for their
+# testing day (see getCDashQueryDataPackFilePath()) instead of being written
+# as separate files (except for the cache files named by
+# g_cdashQueryDataUnpackedCacheFileNameTags).  The cache files are first looked for in the pack files
+# and then as separate files (or in the cache archive, see
+# CDashQueryCacheManager) so existing cache files are still used.
+#
+def setCDashQueryDataCacheDirPacked(cacheDir, packed=True):
+  cacheDirAbsPath = os.path.abspath(cacheDir)
+  if packed:
+    g_cdashQueryDataPackedCacheDirs.add(cacheDirAbsPath)
+  else:
+    g_cdashQueryDataPackedCacheDirs.discard(cacheDirAbsPath)
+
+
+# Get the path of the pack file for a cache file
+#
+# The cache files with names starting with a testing day 'YYYY-MM-DD' (like
+# the test history cache files, see getTestHistoryCacheFilePath()) are put in
+# the pack file 'YYYY-MM-DD.cdashpack' and the other cache files are put in
+# the pack file 'other.cdashpack' in the same directory.
+#
+def getCDashQueryDataPackFilePath(cacheFilePath):
+  cacheFileName = os.path.basename(cacheFilePath)
+  packFileBaseName = "other"
+  if len(cacheFileName) >= 10 and cacheFileName[4] == '-' and \
+    cacheFileName[7] == '-' and \
+    (cacheFileName[0:4]+cacheFileName[5:7]+cacheFileName[8:10]).isdigit() \
+    :
+    packFileBaseName = cacheFileName[0:10]
+  return os.path.join(os.path.dirname(cacheFilePath),
+    packFileBaseName+g_cdashQueryDataPackFileExt)
+
+
+# Get the (shared) CDashQueryDataPackFile object for a cache file or None if
+# the directory of the cache file does not use pack files (see
+# setCDashQueryDataCacheDirPacked()) or the cache file is never packed
+def getCDashQueryDataPackFile(cacheFilePath):
+  if not g_cdashQueryDataPackedCacheDirs:
+    return None
+  if not os.path.abspath(os.path.dirname(cacheFilePath)) in \
+    g_cdashQueryDataPackedCacheDirs \
+    :
+    return None
+  cacheFileName = os.path.basename(cacheFilePath)
+  for unpackedCacheFileNameTag in g_cdashQueryDataUnpackedCacheFileNameTags:
+    if unpackedCacheFileNameTag in cacheFileName:
+      return None
+  packFilePath = os.path.abspath(getCDashQueryDataPackFilePath(cacheFilePath))
+  with g_cdashQueryDataPackFilesLock:
+    packFile = g_cdashQueryDataPackFiles.get(packFilePath, None)
+    if packFile == None:
+      packFile = CDashQueryDataPackFile(packFilePath)
+      g_cdashQueryDataPackFiles[packFilePath] = packFile
+  return packFile
+
+
+# Return True if the CDash query data cache file exists (either in its pack
+# file, as a file or packed into the cache archive file in the same
+# directory)
+def cdashQueryDataCacheFileExists(cacheFilePath):
+  packFile = getCDashQueryDataPackFile(cacheFilePath)
+  if packFile and packFile.has(os.path.basename(cacheFilePath)):
+    return True
+  if os.path.exists(cacheFilePath):
+    return True
+  return getCDashQueryCacheArchiveReader(cacheFilePath).hasEntry(
+    os.path.basename(cacheFilePath))
+
+
+# Read the bytes of a CDash query data cache file (from its pack file, the
+# file itself or from the cache archive file in the same directory if the
+# cache file was packed into it)
+def readCDashQueryDataCacheFileBytes(cacheFilePath):
+  packFile = getCDashQueryDataPackFile(cacheFilePath)
+  if packFile:
+    dataBytes = packFile.get(os.path.basename(cacheFilePath))
+    if dataBytes != None:
+      return dataBytes
+  try:
+    with open(cacheFilePath, 'rb') as cacheFile:
+      return cacheFile.read()
+  except (IOError, OSError) as errMsg:
+    dataBytes = getCDashQueryCacheArchiveReader(cacheFilePath).readEntry(
+      os.path.basename(cacheFilePath))
+    if dataBytes == None:
+      raise errMsg
+    return dataBytes
+
+
+# Read Python data from a CDash query data cache file
+#
+# The format of the file is automatically detected (see
+# detectCDashQueryDataCacheFileFormat()).  If the cache file does not exist
+# but it was packed into the cache archive file in the same directory (see
+# CDashQueryCacheManager), then it is read from there.
+#
+# If migrateLegacyFormat==True and the file is in the legacy 'pprint' format,
+# then the file is rewritten in the default format so that it is faster to
+# read the next time.  (If the file can't be rewritten, e.g. because it is in
+# a read-only directory, then the file is just left as is.)
+#
+@timeFunctionCalls('cache_files.read')
+def readCDashQueryDataCacheFile(cacheFilePath, migrateLegacyFormat=False,
+    verbose=False,
+  ):
+  dataBytes = readCDashQueryDataCacheFileBytes(cacheFilePath)
+  (cacheFileFormat, pythonData) = detectCDashQueryDataCacheFileFormat(dataBytes)
+  if pythonData == None:
+    pythonData = cacheFileFormat.loads(dataBytes)
+  if migrateLegacyFormat and cacheFileFormat.name == "pprint" \
+    and g_defaultCDashQueryDataCacheFileFormatName != "pprint" \
+    :
+    try:
+      writeCDashQueryDataCacheFile(pythonData, cacheFilePath)
+      if verbose:
+        print("  Migrated legacy cache file to format '"+\
+          g_defaultCDashQueryDataCacheFileFormatName+"':\n    "+cacheFilePath)
+    except (IOError, OSError) as errMsg:
+      if verbose:
+        print("  WARNING: Could not migrate legacy cache file:\n    "+\
+          cacheFilePath+"\n  "+str(errMsg))
+  return pythonData
+
+
+# Write a CDash query data cache file one element of a top-level array at a
+# time
+#
+# Usage:
+#
+#   cacheFileWriter = CDashQueryDataCacheFileArrayWriter(cacheFilePath, 'builds')
+#   try:
+#     for testDict in ...:
+#       cacheFileWriter.addArrayElement(testDict)
+#     cacheFileWriter.commit(otherData)
+#   finally:
+#     cacheFileWriter.abort()  # Does nothing if commit() was called
+#
+# This writes the same data as:
+#
+#   data = dict(otherData); data['builds'] = [ testDict1, testDict2, ... ]
+#   writeCDashQueryDataCacheFile(data, cacheFilePath)
+#
+# but for the 'json' and 'json-gz' cache file formats the elements are written
+# to the file as they are added so that they don't need to be kept in memory.
+# (For the other cache file formats, the elements are kept in memory until
+# commit() is called.)  The file is written atomically (i.e. the file
+# cacheFilePath is only created or replaced when commit() is called).
+#
+class CDashQueryDataCacheFileArrayWriter(object):
+
+  def __init__(self, cacheFilePath, arrayKey, cacheFileFormatName=None):
+    self.cacheFilePath = cacheFilePath
+    self.arrayKey = arrayKey
+    self.cacheFileFormat = getCDashQueryDataCacheFileFormat(cacheFileFormatName)
+    self.arrayElements = None
+    self.tmpFile = None
+    self.tmpFilePath = None
+    if self.cacheFileFormat.name in ("json", "json-gz"):
+      (self.tmpFile, self.tmpFilePath) = openTempFileForAtomicWrite(cacheFilePath)
+      if self.cacheFileFormat.name == "json-gz":
+        self.outStream = gzip.GzipFile(fileobj=self.tmpFile, mode='wb',
+          compresslevel=6, mtime=0)
+      else:
+        self.outStream = self.tmpFile
+      self.outStream.write(
+        (u("{")+json.dumps(arrayKey)+u(":[")).encode('utf-8'))
+      self.numArrayElements = 0
+    else:
+      self.arrayElements = []
+
+  def addArrayElement(self, arrayElement):
+    if self.arrayElements != None:
+      self.arrayElements.append(arrayElement)
+      return
+    elementStr = json.dumps(arrayElement, separators=(',',':'))
+    if self.numArrayElements > 0:
+      elementStr = u(",")+elementStr
+    self.outStream.write(elementStr.encode('utf-8'))
+    self.numArrayElements += 1
+
+  # Write the other top-level key/value pairs and create the cache file
+  def commit(self, otherData={}):
+    if self.arrayElements != None:
+      cacheData = dict(otherData)
+      cacheData[self.arrayKey] = self.arrayElements
+      writeCDashQueryDataCacheFile(cacheData, self.cacheFilePath,
+        self.cacheFileFormat.name)
+      self.arrayElements = None
+      return
+    self.outStream.write(u("]").encode('utf-8'))
+    for key in sorted(otherData.keys()):
+      self.outStream.write(
+        (u(",")+json.dumps(key)+u(":")+\
+         json.dumps(otherData[key], separators=(',',':'))).encode('utf-8') )
+    self.outStream.write(u("}").encode('utf-8'))
+    self.closeStreams()
+    packFile = getCDashQueryDataPackFile(self.cacheFilePath)
+    if packFile:
+      with open(self.tmpFilePath, 'rb') as tmpFile:
+        packFile.put(os.path.basename(self.cacheFilePath), tmpFile.read())
+      os.remove(self.tmpFilePath)
+    else:
+      replaceFileWithTempFile(self.tmpFilePath, self.cacheFilePath)
+    self.tmpFilePath = None
+
+  # Remove the temp file if commit() was not called
+  def abort(self):
+    self.arrayElements = None
+    if self.tmpFilePath:
+      self.closeStreams()
+      if os.path.exists(self.tmpFilePath): os.remove(self.tmpFilePath)
+      self.tmpFilePath = None
+
+  def closeStreams(self):
+    if self.outStream != self.tmpFile:
+      self.outStream.close()
+    self.tmpFile.close()
+
+
+# Iterate over the elements of a top-level array in a CDash query data cache
+# file without reading all of the data into memory
+#
+# This is a generator that yields the elements of the array cacheData[arrayKey]
+# (e.g. the 'builds' array of a cdash/queryTests.php cache file) where
+# cacheData is the data in the cache file (see readCDashQueryDataCacheFile()).
+# The other top-level key/value pairs are put in otherData_out (if not None).
+#
+# For the 'json' and 'json-gz' cache file formats, the file is parsed as it is
+# read (see iterateJsonObjectArrayElements()).  For the other cache file
+# formats (and for cache files in pack files or the cache archive file), the
+# whole file is read (and possibly migrated, see readCDashQueryDataCacheFile()) and
+# then its elements are yielded.
+#
+def iterateCDashQueryDataCacheFileArray(cacheFilePath, arrayKey,
+    otherData_out=None, migrateLegacyFormat=False, verbose=False,
+  ):
+  if os.path.exists(cacheFilePath) and not getCDashQueryDataPackFile(cacheFilePath):
+    with open(cacheFilePath, 'rb') as cacheFile:
+      headBytes = cacheFile.read(g_jsonStreamReadChunkSize)
+  else:
+    headBytes = b""  # May be in a pack file or cache archive so read it all below
+  if headBytes[:2] == g_gzipMagicBytes:
+    cacheFileStream = gzip.GzipFile(cacheFilePath, mode='rb')
+  elif headBytes.lstrip()[:1] == b'{' and \
+    headBytes.lstrip()[1:].lstrip()[:1] in (b'"', b'}') \
+    :
+    # This is a JSON object and not a legacy 'pprint' Python dict
+    cacheFileStream = open(cacheFilePath, 'rb')
+  else:
+    cacheData = readCDashQueryDataCacheFile(cacheFilePath,
+      migrateLegacyFormat=migrateLegacyFormat, verbose=verbose)
+    if otherData_out != None:
+      for (key, value) in cacheData.items():
+        if key != arrayKey: otherData_out[key] = value
+    for arrayElement in cacheData.get(arrayKey, []):
+      yield arrayElement
+    return
+  with cacheFileStream:
+    for arrayElement in iterateJsonObjectArrayElements(cacheFileStream.read,
+        arrayKey, otherData_out \
+      ):
+      yield arrayElement
+
+
+# Keeps a directory of CDash query data cache files (e.g.
+# <cdashQueriesCacheDir>/test_history/) from growing without bound
+#
+# Usage:
+#
+#   cacheManager = CDashQueryCacheManager(cacheDir,
+#     maxTotalBytes=<bytes>, maxAgeDays=<days>)
+#   cacheManager.evictCacheFiles()     # Apply the size and age caps
+#   cacheManager.compactCacheFiles(1)  # Pack files not used today
+#   print(cacheManager.getStats())
+#
+# The cache files are the regular files directly in cacheDir (other than the
+# cache archive file and hidden temp files).  The time a cache file was last
+# used is its access time (or its modification time if that is later, e.g. on
+# file systems mounted with 'noatime').
+#
+# evictCacheFiles() removes the cache files (and the cache files packed into
+# the cache archive) not used in the last maxAgeDays days and then removes the
+# least recently used of them until the total size of the cache (including
+# the cache archive file) is at most maxTotalBytes.  (If maxAgeDays or
+# maxTotalBytes is None, then that cap is not applied.)  The time a cache file
+# packed into the archive was last used is the time it was last used before it
+# was packed (since reading it from the archive is not recorded).
+#
+# compactCacheFiles() packs the cache files (other than the pack files, see
+# CDashQueryDataPackFile) that were not used in the last minAgeDays days into
+# the one cache archive file (a zip file which has an index so any file can be
+# read from it without reading the others) in cacheDir and removes them.  The
+# cache files packed into the archive are still found by
+# cdashQueryDataCacheFileExists() and readCDashQueryDataCacheFile() so this
+# does not change the behavior of the code using the cache.  Packed files that
+# are older than maxAgeDays are dropped from the archive.  The archive file is
+# replaced atomically so the cache can be used by other processes while it is
+# being compacted or cache files are evicted from it.  compactCacheFiles() also rewrites the pack files that have superseded
+# records (see CDashQueryDataPackFile.compact()), since nothing else removes
+# them.  (The pack files are not packed into the archive.  They are removed
+# whole by evictCacheFiles().)
+#
+class CDashQueryCacheManager(object):
+
+  def __init__(self, cacheDir, maxTotalBytes=None, maxAgeDays=None,
+      verbose=False,
+      getTime_in=time.time, # For unit testing
+    ):
+    self.cacheDir = cacheDir
+    self.maxTotalBytes = maxTotalBytes
+    self.maxAgeDays = maxAgeDays
+    self.verbose = verbose
+    self.getTime = getTime_in
+
+  # Get the path to the cache archive file in cacheDir
+  def getArchiveFilePath(self):
+    return os.path.join(self.cacheDir, g_cdashQueryCacheArchiveFileName)
+
+  # Get the list of (cacheFilePath, numBytes, lastUsedTime) for all of the
+  # cache files in cacheDir sorted by cacheFilePath
+  def getCacheFileInfosList(self):
+    cacheFileInfosList = []
+    for fileName in sorted(os.listdir(self.cacheDir)):
+      if fileName == g_cdashQueryCacheArchiveFileName or fileName.startswith("."):
+        continue
+      cacheFilePath = os.path.join(self.cacheDir, fileName)
+      try:
+        fileStat = os.stat(cacheFilePath)
+      except OSError:
+        continue  # Removed by another process
+      if not stat.S_ISREG(fileStat.st_mode):
+        continue
+      cacheFileInfosList.append( (cacheFilePath, fileStat.st_size,
+        max(fileStat.st_atime, fileStat.st_mtime)) )
+    return cacheFileInfosList
+
+  # Get the list of (entryName, numBytes, lastUsedTime) for all of the cache
+  # files packed into the cache archive file where numBytes is the size they
+  # take up in the archive file
+  def getArchiveEntryInfosList(self):
+    archiveFilePath = self.getArchiveFilePath()
+    if not os.path.exists(archiveFilePath):
+      return []
+    archiveFile = zipfile.ZipFile(archiveFilePath, 'r')
+    try:
+      return [ (zipInfo.filename,
+          zipInfo.compress_size + g_zipEntryHeadersBytes + 2*len(zipInfo.filename),
+          getArchiveEntryLastUsedTime(zipInfo)) \
+        for zipInfo in archiveFile.infolist() ]
+    finally:
+      archiveFile.close()
+
+  # Get the size of the cache archive file (0 if it does not exist)
+  def getArchiveFileBytes(self):
+    archiveFilePath = self.getArchiveFilePath()
+    if os.path.exists(archiveFilePath):
+      return os.path.getsize(archiveFilePath)
+    return 0
+
+  # Return True if the cache file last used at lastUsedTime is older than
+  # maxAgeDays
+  def isExpired(self, lastUsedTime, now):
+    return (self.maxAgeDays != None) and \
+      ((now - lastUsedTime) > self.maxAgeDays*24*60*60)
+
+  # Get the statistics for the cache
+  #
+  # Returns a dict with the fields:
+  #
+  #   'num_files': Number of cache files (not packed into the archive)
+  #   'total_bytes': Total size of the cache files
+  #   'num_archived_files': Number of cache files packed into the archive
+  #   'archive_bytes': Size of the cache archive file
+  #   'oldest_file_age_days': Days since the least recently used cache file
+  #     was last used (0 if there are no cache files)
+  #
+  def getStats(self):
+    cacheFileInfosList = self.getCacheFileInfosList()
+    statsDict = {
+      'num_files': len(cacheFileInfosList),
+      'total_bytes': sum([ numBytes for (_, numBytes, _) in cacheFileInfosList ]),
+      'num_archived_files': 0,
+      'archive_bytes': self.getArchiveFileBytes(),
+      'oldest_file_age_days': 0,
+      }
+    if cacheFileInfosList:
+      oldestLastUsedTime = min([ lastUsedTime for (_, _, lastUsedTime) \
+        in cacheFileInfosList ])
+      statsDict['oldest_file_age_days'] = \
+        int((self.getTime() - oldestLastUsedTime) // (24*60*60))
+    if statsDict['archive_bytes']:
+      archiveFile = zipfile.ZipFile(self.getArchiveFilePath(), 'r')
+      try:
+        statsDict['num_archived_files'] = len(archiveFile.infolist())
+      finally:
+        archiveFile.close()
+    return statsDict
+
+  # Apply the size and age caps by removing cache files (and the cache files
+  # packed into the cache archive)
+  #
+  # Returns a dict with the fields 'num_evicted_files' and 'evicted_bytes'.
+  #
+  def evictCacheFiles(self):
+    now = self.getTime()
+    cacheFileInfosList = self.getCacheFileInfosList()
+    archiveEntryInfosList = self.getArchiveEntryInfosList()
+    # (lastUsedTime, isArchived, cacheFilePathOrEntryName, numBytes) for the
+    # cache files and the archived cache files from least to most recently
+    # used
+    evictCandidatesList = \
+      [ (lastUsedTime, False, cacheFilePath, numBytes) \
+        for (cacheFilePath, numBytes, lastUsedTime) in cacheFileInfosList ] + \
+      [ (lastUsedTime, True, entryName, numBytes) \
+        for (entryName, numBytes, lastUsedTime) in archiveEntryInfosList ]
+    evictCandidatesList.sort(key=lambda evictCandidate: evictCandidate[0])
+    totalBytes = self.getArchiveFileBytes() + \
+      sum([ numBytes for (_, numBytes, _) in cacheFileInfosList ])
+    # Bytes of the archive file not in any of its entries (which go away when
+    # the last entry is evicted and the archive file is removed)
+    archiveOverheadBytes = self.getArchiveFileBytes() - \
+      sum([ numBytes for (_, numBytes, _) in archiveEntryInfosList ])
+    numEvictedFiles = 0
+    evictedBytes = 0
+    evictedArchiveEntryNamesSet = set()
+    for (lastUsedTime, isArchived, cacheFilePath, numBytes) in evictCandidatesList:
+      isOverSize = (self.maxTotalBytes != None) and \
+        (totalBytes > self.maxTotalBytes)
+      if not (isOverSize or self.isExpired(lastUsedTime, now)):
+        break  # All of the remaining files were used more recently
+      if isArchived:
+        evictedArchiveEntryNamesSet.add(cacheFilePath)  # Removed below
+        if len(evictedArchiveEntryNamesSet) == len(archiveEntryInfosList):
+          totalBytes -= archiveOverheadBytes
+      else:
+        try:
+          os.remove(cacheFilePath)
+        except OSError:
+          continue  # Removed by another process
+        if self.verbose:
+          print("  Evicted cache file: "+cacheFilePath)
+        evictedBytes += numBytes
+      totalBytes -= numBytes
+      numEvictedFiles += 1
+    if evictedArchiveEntryNamesSet:
+      oldArchiveFileBytes = self.getArchiveFileBytes()
+      self.rewriteArchiveFile(
+        lambda zipInfo: not zipInfo.filename in evictedArchiveEntryNamesSet)
+      if self.verbose:
+        print("  Evicted "+str(len(evictedArchiveEntryNamesSet))+" cache files"+\
+          " from the cache archive file: "+self.getArchiveFilePath())
+      evictedBytes += oldArchiveFileBytes - self.getArchiveFileBytes()
+    timingRegistry = getDefaultTimingRegistry()
+    timingRegistry.incrementCounter('cache_manager.evicted_files', numEvictedFiles)
+    timingRegistry.incrementCounter('cache_manager.evicted_bytes', evictedBytes)
+    return { 'num_evicted_files':numEvictedFiles, 'evicted_bytes':evictedBytes }
+
+  # Pack the cache files not used in the last minAgeDays days into the cache
+  # archive file and drop the superseded records from the pack files
+  #
+  # Returns a dict with the fields 'num_packed_files', 'packed_bytes',
+  # 'num_expired_archived_files', 'num_compacted_pack_files' and
+  # 'dropped_pack_bytes'.
+  #
+  @timeFunctionCalls('cache_manager.compact')
+  def compactCacheFiles(self, minAgeDays=1):
+    now = self.getTime()
+    archiveFilePath = self.getArchiveFilePath()
+    cacheFileInfosList = self.getCacheFileInfosList()
+    cacheFileInfosToPackList = [ cacheFileInfo \
+      for cacheFileInfo in cacheFileInfosList \
+      if (now - cacheFileInfo[2]) >= minAgeDays*24*60*60 \
+        and not cacheFileInfo[0].endswith(g_cdashQueryDataPackFileExt) ]
+    compactStatsDict = { 'num_packed_files':0, 'packed_bytes':0,
+      'num_expired_archived_files':0, 'num_compacted_pack_files':0,
+      'dropped_pack_bytes':0 }
+    for (cacheFilePath, _, _) in cacheFileInfosList:
+      if not cacheFilePath.endswith(g_cdashQueryDataPackFileExt):
+        continue
+      packFile = CDashQueryDataPackFile(cacheFilePath)
+      try:
+        droppedBytes = packFile.compact()
+      finally:
+        packFile.close()
+      if droppedBytes:
+        if self.verbose:
+          print("  Compacted pack file: "+cacheFilePath)
+        compactStatsDict['num_compacted_pack_files'] += 1
+        compactStatsDict['dropped_pack_bytes'] += droppedBytes
+    getDefaultTimingRegistry().incrementCounter(
+      'cache_manager.dropped_pack_bytes', compactStatsDict['dropped_pack_bytes'])
+    if not cacheFileInfosToPackList and \
+      (self.maxAgeDays == None or not os.path.exists(archiveFilePath)) \
+      :
+      return compactStatsDict
+    # Write the new archive with the still current entries of the old archive
+    # and the packed cache files
+    def keepArchiveEntry(zipInfo):
+      if self.isExpired(getArchiveEntryLastUsedTime(zipInfo), now):
+        compactStatsDict['num_expired_archived_files'] += 1
+        return False
+      return True
+    self.rewriteArchiveFile(keepArchiveEntry, cacheFileInfosToPackList)
+    compactStatsDict['num_packed_files'] = len(cacheFileInfosToPackList)
+    compactStatsDict['packed_bytes'] = \
+      sum([ numBytes for (_, numBytes, _) in cacheFileInfosToPackList ])
+    # Only remove the packed cache files after the new archive is in place
+    for (cacheFilePath, _, _) in cacheFileInfosToPackList:
+      if self.verbose:
+        print("  Packed cache file: "+cacheFilePath)
+      try:
+        os.remove(cacheFilePath)
+      except OSError:
+        pass  # Removed by another process
+    getDefaultTimingRegistry().incrementCounter('cache_manager.packed_files',
+      compactStatsDict['num_packed_files'])
+    return compactStatsDict
+
+  # Atomically replace the cache archive file with one that has the entries of
+  # the old archive for which keepArchiveEntry(zipInfo) returns True and the
+  # cache files in cacheFileInfosToPackList (which replace the old entries
+  # with the same names)
+  #
+  # If this leaves no entries, then the archive file is removed.
+  #
+  def rewriteArchiveFile(self, keepArchiveEntry, cacheFileInfosToPackList=[]):
+    archiveFilePath = self.getArchiveFilePath()
+    packedFileNamesSet = set([ os.path.basename(cacheFileInfo[0]) \
+      for cacheFileInfo in cacheFileInfosToPackList ])
+    numArchiveEntries = 0
+    (tmpFile, tmpFilePath) = openTempFileForAtomicWrite(archiveFilePath)
+    try:
+      with tmpFile:
+        newArchiveFile = zipfile.ZipFile(tmpFile, 'w', allowZip64=True)
+        if os.path.exists(archiveFilePath):
+          oldArchiveFile = zipfile.ZipFile(archiveFilePath, 'r')
+          try:
+            for zipInfo in oldArchiveFile.infolist():
+              if zipInfo.filename in packedFileNamesSet:
+                continue  # Replaced by the newer cache file
+              if not keepArchiveEntry(zipInfo):
+                continue
+              newArchiveFile.writestr(zipInfo,
+                oldArchiveFile.read(zipInfo.filename))
+              numArchiveEntries += 1
+          finally:
+            oldArchiveFile.close()
+        for (cacheFilePath, numBytes, lastUsedTime) in cacheFileInfosToPackList:
+          with open(cacheFilePath, 'rb') as cacheFile:
+            dataBytes = cacheFile.read()
+          zipInfo = zipfile.ZipInfo(os.path.basename(cacheFilePath),
+            max(tuple(time.localtime(lastUsedTime)[:6]), (1980,1,1,0,0,0)))
+          if dataBytes[:2] == g_gzipMagicBytes:
+            zipInfo.compress_type = zipfile.ZIP_STORED  # Already compressed
+          else:
+            zipInfo.compress_type = zipfile.ZIP_DEFLATED
+          newArchiveFile.writestr(zipInfo, dataBytes)
+          numArchiveEntries += 1
+        newArchiveFile.close()
+      if numArchiveEntries:
+        replaceFileWithTempFile(tmpFilePath, archiveFilePath)
+      else:
+        os.remove(tmpFilePath)
+        if os.path.exists(archiveFilePath): os.remove(archiveFilePath)
+    except:
+      if os.path.exists(tmpFilePath): os.remove(tmpFilePath)
+      raise
+
+
+# Get the time that the cache file packed into a cache archive file (see
+# CDashQueryCacheManager) was last used before it was packed
+def getArchiveEntryLastUsedTime(zipInfo):
+  return time.mktime(zipInfo.date_time+(0,0,-1))
+
+
+# Approximate number of bytes for the local and central directory headers of
+# an entry in a zip file (not counting the two copies of the file name)
+g_zipEntryHeadersBytes = 76
+
+
+# Coalesces repeated and concurrent requests for the same CDash query URL
+#
+# Usage:
+#
+#   cdashQueryDataCoalescer = CDashQueryDataCoalescer()
+#   cdashQueryData = cdashQueryDataCoalescer.getCDashQueryData(
+#     cdashQueryUrl, lambda: <get the data for cdashQueryUrl>)
+#
+# The first request for a URL calls the passed-in function to get the data.
+# Requests for the same URL made by other threads while that call is in
+# flight wait for it and get the same data object back and later requests
+# for that URL get that data object back without calling the function again.
+# Therefore, the returned data must be treated as read-only by the callers.
+# If the call throws, then the exception is thrown to all of the requests
+# that were waiting for it and the URL is not remembered (so the next request
+# for that URL calls the function again).
+#
+# The number of requests and how they were satisfied are returned from
+# getStatsDict() and the counters 'cdash_query_coalescer.cache_hits' and
+# 'cdash_query_coalescer.cache_misses' are incremented in the default timing
+# registry (see getDefaultTimingRegistry()).
+#
+# NOTE: All of the data is kept for the lifetime of the object so it should
+# only be used for one report (or one testing day).  See
+# setDefaultCDashQueryDataCoalescer().
+#
+# The coalescer can be used by multiple threads at the same time (see
+# foreachTransformConcurrently()).
+#
+class CDashQueryDataCoalescer(object):
+
+  def __init__(self):
+    self.lock = threading.Lock()
+    self.queriesDict = {}  # Values are CDashQueryDataCoalescerQuery objects
+    self.numRequests = 0
+    self.numQueries = 0
+    self.numInFlightHits = 0
+    self.numCompletedHits = 0
+
+  def getCDashQueryData(self, cdashQueryUrl, getCDashQueryData):
+    with self.lock:
+      self.numRequests += 1
+      query = self.queriesDict.get(cdashQueryUrl, None)
+      if query is None:
+        query = CDashQueryDataCoalescerQuery()
+        self.queriesDict[cdashQueryUrl] = query
+        self.numQueries += 1
+        isQueryOwner = True
+      else:
+        if query.done.is_set(): self.numCompletedHits += 1
+        else: self.numInFlightHits += 1
+        isQueryOwner = False
+    timingRegistry = getDefaultTimingRegistry()
+    if not isQueryOwner:
+      timingRegistry.incrementCounter('cdash_query_coalescer.cache_hits')
+      query.done.wait()
+      if query.exception is not None:
+        raise query.exception
+      return query.cdashQueryData
+    timingRegistry.incrementCounter('cdash_query_coalescer.cache_misses')
+    try:
+      query.cdashQueryData = getCDashQueryData()
+    except Exception as e:
+      with self.lock:
+        del self.queriesDict[cdashQueryUrl]
+      query.exception = e
+      raise
+    finally:
+      query.done.set()
+    return query.cdashQueryData
+
+  # Return the dict with the number of requests 'num_requests', the number of
+  # requests that got the data 'num_queries', and the number of requests that
+  # shared the data of an in-flight request 'num_in_flight_hits' or of a
+  # completed request 'num_completed_hits'
+  def getStatsDict(self):
+    with self.lock:
+      return {
+        'num_requests' : self.numRequests,
+        'num_queries' : self.numQueries,
+        'num_in_flight_hits' : self.numInFlightHits,
+        'num_completed_hits' : self.numCompletedHits,
+        }
+
+
+# The data for one URL in a CDashQueryDataCoalescer
+class CDashQueryDataCoalescerQuery(object):
+  def __init__(self):
+    self.done = threading.Event()
+    self.cdashQueryData = None
+    self.exception = None
+
+
+g_defaultCDashQueryDataCoalescer = None
+
+
+# Get the CDashQueryDataCoalescer object used by
+# getAndCacheCDashQueryDataOrReadFromCache() (or None if requests are not
+# coalesced)
+def getDefaultCDashQueryDataCoalescer():
+  return g_defaultCDashQueryDataCoalescer
+
+
+# Set the CDashQueryDataCoalescer object used by
+# getAndCacheCDashQueryDataOrReadFromCache() and return the previous one
+#
+# Pass in None to stop coalescing the requests (the default).
+#
+def setDefaultCDashQueryDataCoalescer(cdashQueryDataCoalescer):
+  global g_defaultCDashQueryDataCoalescer
+  oldCDashQueryDataCoalescer = g_defaultCDashQueryDataCoalescer
+  g_defaultCDashQueryDataCoalescer = cdashQueryDataCoalescer
+  return oldCDashQueryDataCoalescer
+
+
 # Get data off CDash and cache it or read from previously cached data
 #
 # If useCachedCDashData == True, then the file cdashQueryDataCacheFile must
@@ -667,11 +3394,24 @@ def pprintPythonDataToFile(pythonData, filePath):
 # the data will be written to the the file cdashQueryDataCacheFile if
 # cdashQueryDataCacheFile != None.
 #
+# The cache file is written in the default cache file format (see
+# setDefaultCDashQueryDataCacheFileFormat()) and the format of an existing
+# cache file is determined from its contents.  Existing cache files in the
+# legacy 'pprint' format are read and then rewritten in the default format if
+# this is turned on (see setMigrateLegacyCDashQueryDataCacheFiles() and
+# readCDashQueryDataCacheFile()).
+#
 # This function can be used to get data off of CDash using any page on CDash
 # including cdash/api/v1/index.php, cdash/api/v1/queryTests.php and anything
 # other PHP page that returns a JSON data structure (which is all of the
 # cdash/api/v1/XXX.php pages).
 #
+# If a default CDashQueryDataCoalescer object is set (see
+# setDefaultCDashQueryDataCoalescer()), then the requests for the same
+# cdashQueryUrl share one download (or cache file read) and the same returned
+# data object.  (The data is only written to the cache file for the first
+# request for that URL.)
+#
 def getAndCacheCDashQueryDataOrReadFromCache(
   cdashQueryUrl,
   cdashQueryDataCacheFile,  # File name
@@ -680,30 +3420,56 @@ def getAndCacheCDashQueryDataOrReadFromCache(
   verbose = False,
   extractCDashApiQueryData_in=extractCDashApiQueryData,
   ):
+  cdashQueryDataCoalescer = getDefaultCDashQueryDataCoalescer()
+  if cdashQueryDataCoalescer:
+    return cdashQueryDataCoalescer.getCDashQueryData(cdashQueryUrl,
+      lambda: getAndCacheCDashQueryDataOrReadFromCacheNoCoalesce(
+        cdashQueryUrl, cdashQueryDataCacheFile, useCachedCDashData,
+        alwaysUseCacheFileIfExists, verbose, extractCDashApiQueryData_in) )
+  return getAndCacheCDashQueryDataOrReadFromCacheNoCoalesce(
+    cdashQueryUrl, cdashQueryDataCacheFile, useCachedCDashData,
+    alwaysUseCacheFileIfExists, verbose, extractCDashApiQueryData_in)
+
+
+# Same as getAndCacheCDashQueryDataOrReadFromCache() but without coalescing
+# the requests for the same URL
+def getAndCacheCDashQueryDataOrReadFromCacheNoCoalesce(
+  cdashQueryUrl,
+  cdashQueryDataCacheFile,
+  useCachedCDashData,
+  alwaysUseCacheFileIfExists = False,
+  verbose = False,
+  extractCDashApiQueryData_in=extractCDashApiQueryData,
+  ):
   if (
       alwaysUseCacheFileIfExists \
       and cdashQueryDataCacheFile \
-      and os.path.exists(cdashQueryDataCacheFile) \
+      and cdashQueryDataCacheFileExists(cdashQueryDataCacheFile) \
     ):
     if verbose:
       print("  Since the file exists, using cached data from file:\n"+\
         "    "+cdashQueryDataCacheFile )
-    with open(cdashQueryDataCacheFile, 'r') as cacheFile:
-      cdashQueryData=eval(cacheFile.read())
+    getDefaultTimingRegistry().incrementCounter('cdash_query_data.cache_hits')
+    cdashQueryData = readCDashQueryDataCacheFile(cdashQueryDataCacheFile,
+      migrateLegacyFormat=g_migrateLegacyCDashQueryDataCacheFiles,
+      verbose=verbose)
   elif useCachedCDashData:
     if verbose:
       print("  Using cached data from file:\n    "+cdashQueryUrl )
-    with open(cdashQueryDataCacheFile, 'r') as cacheFile:
-      cdashQueryData=eval(cacheFile.read())
+    getDefaultTimingRegistry().incrementCounter('cdash_query_data.cache_hits')
+    cdashQueryData = readCDashQueryDataCacheFile(cdashQueryDataCacheFile,
+      migrateLegacyFormat=g_migrateLegacyCDashQueryDataCacheFiles,
+      verbose=verbose)
   else:
     if verbose:
       print("  Downloading CDash data from:\n    "+cdashQueryUrl )
+    getDefaultTimingRegistry().incrementCounter('cdash_query_data.cache_misses')
     cdashQueryData = extractCDashApiQueryData_in(cdashQueryUrl)
     if cdashQueryDataCacheFile:
       if verbose:
         print("  Caching data downloaded from CDash to file:\n    "+\
           cdashQueryDataCacheFile)
-      pprintPythonDataToFile(cdashQueryData, cdashQueryDataCacheFile)
+      writeCDashQueryDataCacheFile(cdashQueryData, cdashQueryDataCacheFile)
   return cdashQueryData
 
 
@@ -738,6 +3504,95 @@ def getCDashQueryTestsBrowserUrl(cdashUrl, projectName, date, filterFields):
   return cdashUrl+"/queryTests.php?project="+projectName+dateArg+"&"+filterFields
 
 
+# Return a CDash query URL with one more filter added to the filters already
+# in the URL
+#
+# The new filter 'field<N>=<field>&compare<N>=<compare>&value<N>=<value>' is
+# given the next field number <N> and 'filtercount' is updated (or added).
+# The value is URL encoded (e.g. 'Nightly Builds' => 'Nightly+Builds') since
+# it may be a group, site or build name from the CDash data.  Since the new
+# filter must be ANDed with the existing filters, an exception
+# is raised if the existing filters are combined with 'filtercombine=or'.
+#
+def addFilterToCDashQueryUrl(cdashQueryUrl, field, compare, value):
+  if "?" in cdashQueryUrl:
+    (baseUrl, queryStr) = cdashQueryUrl.split("?", 1)
+  else:
+    (baseUrl, queryStr) = (cdashQueryUrl, "")
+  queryFieldsList = [ queryField for queryField in queryStr.split("&") \
+    if queryField ]
+  maxFieldNum = 0
+  for queryField in queryFieldsList:
+    (name, fieldValue) = (queryField.split("=", 1) + [""])[0:2]
+    if name == "filtercombine" and fieldValue.lower() == "or":
+      raise Exception("Error, can't add the filter '"+field+"' to the query"+\
+        " URL '"+cdashQueryUrl+"' since its filters are combined with"+\
+        " 'filtercombine=or'!")
+    if name.startswith("field") and name[len("field"):].isdigit():
+      maxFieldNum = max(maxFieldNum, int(name[len("field"):]))
+  fieldNumStr = str(maxFieldNum+1)
+  if not isinstance(value, str):
+    value = value.encode('utf-8')  # Python 2 'unicode' (for quote_plus())
+  newQueryFieldsList = [ queryField for queryField in queryFieldsList \
+    if not queryField.startswith("filtercount=") ]
+  newQueryFieldsList.extend([
+    "filtercount="+fieldNumStr,
+    "field"+fieldNumStr+"="+field,
+    "compare"+fieldNumStr+"="+str(compare),
+    "value"+fieldNumStr+"="+quote_plus(value),
+    ])
+  return baseUrl+"?"+"&".join(newQueryFieldsList)
+
+
+# Split a CDash query URL into the query URLs for the chunks of the data where
+# the field chunkField is equal to each of the values in chunkValuesList
+#
+# For example, chunkField='groupname' and chunkValuesList=['Nightly',
+# 'Experimental'] returns the URLs for the results for the 'Nightly' and the
+# 'Experimental' build groups.  (See addFilterToCDashQueryUrl().)
+#
+def getCDashQueryUrlChunksByField(cdashQueryUrl, chunkField, chunkValuesList):
+  return [ addFilterToCDashQueryUrl(cdashQueryUrl, chunkField, 61, chunkValue) \
+    for chunkValue in chunkValuesList ]
+
+
+# Split a CDash query URL with 'begin=<YYYY-MM-DD>&end=<YYYY-MM-DD>' into the
+# query URLs for consecutive sub-ranges of at most daysPerChunk testing days
+#
+# For example, 'begin=2018-10-01&end=2018-10-05' with daysPerChunk=2 gives the
+# URLs with 'begin=2018-10-01&end=2018-10-02', 'begin=2018-10-03&end=2018-10-04'
+# and 'begin=2018-10-05&end=2018-10-05'.
+#
+def getCDashQueryUrlChunksByDateRange(cdashQueryUrl, daysPerChunk):
+  if daysPerChunk < 1:
+    raise Exception("Error, daysPerChunk="+str(daysPerChunk)+" must be"+\
+      " greater than 0!")
+  queryFieldsList = cdashQueryUrl.split("&")
+  beginIdx = None
+  endIdx = None
+  for (i, queryField) in enumerate(queryFieldsList):
+    name = queryField.split("=", 1)[0].split("?")[-1]
+    if name == "begin": beginIdx = i
+    elif name == "end": endIdx = i
+  if beginIdx == None or endIdx == None:
+    raise Exception("Error, the query URL '"+cdashQueryUrl+"' does not have"+\
+      " both 'begin=<YYYY-MM-DD>' and 'end=<YYYY-MM-DD>'!")
+  beginDT = validateAndConvertYYYYMMDD(queryFieldsList[beginIdx].split("=", 1)[1])
+  endDT = validateAndConvertYYYYMMDD(queryFieldsList[endIdx].split("=", 1)[1])
+  chunkQueryUrlsList = []
+  chunkBeginDT = beginDT
+  while chunkBeginDT <= endDT:
+    chunkEndDT = min(chunkBeginDT + datetime.timedelta(days=daysPerChunk-1),
+      endDT)
+    chunkQueryFieldsList = list(queryFieldsList)
+    for (idx, dateTime) in [(beginIdx, chunkBeginDT), (endIdx, chunkEndDT)]:
+      chunkQueryFieldsList[idx] = queryFieldsList[idx].split("=", 1)[0]+"="+\
+        CBTD.getDateStrFromDateTime(dateTime)
+    chunkQueryUrlsList.append("&".join(chunkQueryFieldsList))
+    chunkBeginDT = chunkEndDT + datetime.timedelta(days=1)
+  return chunkQueryUrlsList
+
+
 # Copy a key/value pair from one dict to another if it eixsts
 def copyKeyDictIfExists(sourceDict_in, keyName_in, dict_inout):
   value = sourceDict_in.get(keyName_in, None)
@@ -936,8 +3791,9 @@ def flattenCDashQueryTestsToListOfDicts(fullCDashQueryTestsJson):
 # but one or more of the other key/value pairs is different, then then an
 # excpetion is thrown.
 #
-# NOTE: This is an implementation function that is used in the class
-# SearchableListOfDicts.  Please use that class instead of this raw function.
+# NOTE: The class SearchableListOfDicts now uses the flat index created by
+# createKeyValuesTupleIndexForListOfDicts() instead.  Please use that class
+# instead of this raw function.
 #
 def createLookupDictForListOfDicts(listOfDicts, listOfKeys,
     removeExactDuplicateElements=False, checkDictsAreSame_in=checkDictsAreSame,
@@ -1025,8 +3881,9 @@ def raiseDuplicateDictEleException(idx, dictEle, listOfKeys,
 # If the matching dict is not found, then None will be returned or the tuple
 # (None, None) if alsoReturnIdx==True.
 #
-# NOTE: This is an implementation function that is used in the class
-# SearchableListOfDicts.  Please use that class instead of this raw function.
+# NOTE: The class SearchableListOfDicts now uses the flat index created by
+# createKeyValuesTupleIndexForListOfDicts() instead.  Please use that class
+# instead of this raw function.
 #
 def lookupDictGivenLookupDict(lookupDict, listOfKeys, listOfValues,
     alsoReturnIdx=False,
@@ -1060,6 +3917,100 @@ def lookupDictGivenLookupDict(lookupDict, listOfKeys, listOfValues,
   return None
 
 
+# Get a function that returns the tuple of values for a list of keys in a dict
+#
+# The returned function getKeyValuesTuple(dictEle) returns the tuple
+# (dictEle[listOfKeys[0]], dictEle[listOfKeys[1]], ...) and throws KeyError
+# if one of the keys is missing.  (A tuple is always returned, even for a
+# single key.)
+#
+def getKeyValuesTupleFunc(listOfKeys):
+  if len(listOfKeys) == 1:
+    key = listOfKeys[0]
+    return lambda dictEle: (dictEle[key],)
+  return operator.itemgetter(*listOfKeys)
+
+
+# Create a flat index for a list of dicts keyed on the tuple of values for a
+# list of keys
+#
+# listOfDicts [in/out]: List of dict objects that have keys that one will want
+# to lookup the dict based on their values.  May have 100% duplicate elements
+# removed from the list.
+#
+# listOfKeys [in]: List of the names of keys in these dicts that are used to
+# build the index.
+#
+# removeExactDuplicateElements [in]: If True, then dict elements that are 100%
+# duplicates will be removed from listOfDicts. (default False)
+#
+# checkDictsAreSame_in [in]: Allows specialization of the check for exact dict
+# matches and reporting the differences (see
+# createLookupDictForListOfDicts()).
+#
+# listOfDictsOut [out]: If not None, then the (kept) dicts are appended to
+# this list as they are indexed and listOfDicts is not modified.  In this
+# case, listOfDicts can be any iterable of dicts (e.g. a generator like
+# iterateCsvFileRowsAsDicts()). (default None)
+#
+# Returns the dict 'indexDict' where indexDict[(keyVal0, keyVal1, ...)] gives
+# the dict in listOfDicts with those values for the keys in listOfKeys.
+#
+# This has the same behavior as createLookupDictForListOfDicts() (including
+# the exception thrown for duplicate keys with different dicts) but it creates
+# one hash entry per element instead of one nested dict per key.  Elements
+# with duplicate keys are found by a hash lookup of the key tuple and the
+# whole rows are then compared with a single (C-level) dict compare.
+# checkDictsAreSame_in() is only called for rows that are not exactly equal.
+# Any exact duplicates are removed from listOfDicts in a single pass at the
+# end.
+#
+def createKeyValuesTupleIndexForListOfDicts(listOfDicts, listOfKeys,
+    removeExactDuplicateElements=False, checkDictsAreSame_in=checkDictsAreSame,
+    listOfDictsOut=None,
+  ):
+  getKeyValuesTuple = getKeyValuesTupleFunc(listOfKeys)
+  indexDict = {}
+  # Only created once the first element is removed (if not listOfDictsOut)
+  keptListOfDicts = listOfDictsOut
+  dictIdToKeptIdxDict = None  # Only created once there is a duplicate key
+  for idx, dictEle in enumerate(listOfDicts):
+    keyValuesTuple = getKeyValuesTuple(dictEle)
+    lookedUpDict = indexDict.get(keyValuesTuple, None)
+    if lookedUpDict is None:
+      indexDict[keyValuesTuple] = dictEle
+      if keptListOfDicts is not None:
+        keptListOfDicts.append(dictEle)
+      if dictIdToKeptIdxDict is not None:
+        dictIdToKeptIdxDict[id(dictEle)] = len(dictIdToKeptIdxDict)
+      continue
+    # This element has the same keys as one already added
+    if removeExactDuplicateElements and (dictEle == lookedUpDict):
+      hasSameKeyValuePairs = True
+    else:
+      if dictIdToKeptIdxDict is None:
+        if keptListOfDicts is None:
+          keptListOfDicts_i = listOfDicts[0:idx]
+        else:
+          keptListOfDicts_i = keptListOfDicts
+        dictIdToKeptIdxDict = dict( (id(keptDict), keptIdx)
+          for (keptIdx, keptDict) in enumerate(keptListOfDicts_i) )
+      lookedUpIdx = dictIdToKeptIdxDict[id(lookedUpDict)]
+      (hasSameKeyValuePairs, dictDiffErrorMsg) = checkDictsAreSame_in(
+        dictEle, "listOfDicts["+str(idx)+"]",
+        lookedUpDict, "listOfDicts["+str(lookedUpIdx)+"]" )
+    if hasSameKeyValuePairs and removeExactDuplicateElements:
+      if keptListOfDicts is None:
+        keptListOfDicts = listOfDicts[0:idx]
+    else:
+      raiseDuplicateDictEleException(idx, dictEle, listOfKeys, lookedUpIdx,
+        lookedUpDict, dictDiffErrorMsg)
+  # Remove 100% duplicate elements skipped above
+  if (keptListOfDicts is not None) and (listOfDictsOut is None):
+    listOfDicts[:] = keptListOfDicts
+  return indexDict
+
+
 # Class that encapsulates a list of dicts and an efficient lookup of a dict
 # given a list key/value pairs to match
 #
@@ -1074,15 +4025,29 @@ def lookupDictGivenLookupDict(lookupDict, listOfKeys, listOfValues,
 # handy way to access and edit the underlying dicts that require
 # multi-key/value pairs to find them.
 #
-# NOTE: The key values for the list of keys given in listOfKeys must be
-# unique!  If it is not, then an excpetion will be thrown.
+# The dicts are indexed with a flat dict keyed on the tuple of key values (see
+# createKeyValuesTupleIndexForListOfDicts()).  More named indexes on
+# different lists of keys can be added to the same underlying list of dicts
+# with addIndex() (instead of creating another SearchableListOfDicts object
+# for the same list).  All of the lookup functions take an optional argument
+# 'indexName' to select the index (default is the primary index given by
+# listOfKeys).  Dicts can be added with appendDict() and removed with
+# removeDictGivenKeyValuesList() which update all of the indexes with O(1)
+# hash inserts and deletes.
+#
+# NOTE: The key values for the list of keys given in listOfKeys (and for each
+# added index) must be unique!  If it is not, then an excpetion will be
+# thrown.
 #
 class SearchableListOfDicts(object):
 
   # Constructor
   #
   # listOfDicts [stored, may be modifed]: List of dicts that a search
-  # data-structure will be created for.
+  # data-structure will be created for.  This can also be any other iterable
+  # of dicts (e.g. the generator returned from iterateCsvFileRowsAsDicts()) in
+  # which case the dicts are indexed as they are produced and are stored in a
+  # new list returned from getListOfDicts().
   #
   # listOfKeys [stored, will not be modified]: List of the names of keys in
   # the dicts of listOfDicts that a search data-structure will be created for
@@ -1104,62 +4069,157 @@ class SearchableListOfDicts(object):
   # operator function defined that takes those same arguments and returns the
   # same outputs as the function checkDictsAreSame() can be passed in.
   #
+  @timeFunctionCalls('searchable_lists.create')
   def __init__(self, listOfDicts, listOfKeys,
       removeExactDuplicateElements=False, keyMapList=None,
       checkDictsAreSame_in=checkDictsAreSame,
     ):
-    if keyMapList:
-      if len(listOfKeys) != len(keyMapList):
-        raise Exception("Error, listOfKeys="+str(listOfKeys)+\
-          " keyMapList="+str(listOfKeys)+" have different lenghts!" )
-    self.__listOfDicts = listOfDicts
-    self.__listOfKeys = listOfKeys
-    self.__keyMapList = keyMapList
+    if isinstance(listOfDicts, list):
+      self.__listOfDicts = listOfDicts
+      listOfDictsOut = None
+    else:
+      self.__listOfDicts = []
+      listOfDictsOut = self.__listOfDicts
     self.__checkDictsAreSame = checkDictsAreSame_in
-    self.__lookupDict = createLookupDictForListOfDicts(
-      self.__listOfDicts, self.__listOfKeys,
+    self.__indexNames = []
+    self.__indexes = {}
+    self.__dictIdToIdxDict = None  # Created the first time an idx is asked for
+    indexDict = createKeyValuesTupleIndexForListOfDicts(
+      listOfDicts, listOfKeys,
       removeExactDuplicateElements=removeExactDuplicateElements,
-      checkDictsAreSame_in=checkDictsAreSame_in)
+      checkDictsAreSame_in=checkDictsAreSame_in,
+      listOfDictsOut=listOfDictsOut)
+    self.__addIndex(None, listOfKeys, keyMapList, indexDict)
 
   # Convert to string rep
   def __str__(self):
     myStr = "SearchableListOfDicts{listOfDicts="+str(self.__listOfDicts)+\
-      ", listOfKeys="+str(self.__listOfKeys)+", lookupDict="+str(self.__lookupDict)+"}"
+      ", listOfKeys="+str(self.getListOfKeys())+\
+      ", indexDict="+str(self.__indexes[None].indexDict)
+    for indexName in self.__indexNames[1:]:
+      myStr += ", "+indexName+"="+str(self.__indexes[indexName])
+    myStr += "}"
     return myStr
 
   # Return listOfDicts passed into Constructor
   def getListOfDicts(self):
     return self.__listOfDicts
 
-  # Return listOfKeys passed to Constructor
-  def getListOfKeys(self):
-    return self.__listOfKeys
+  # Return listOfKeys passed to Constructor (or addIndex())
+  def getListOfKeys(self, indexName=None):
+    return self.__getIndex(indexName).listOfKeys
 
-  # Return keyMapList passed to Constructor
-  def getKeyMapList(self):
-    return self.__keyMapList
+  # Return keyMapList passed to Constructor (or addIndex())
+  def getKeyMapList(self, indexName=None):
+    return self.__getIndex(indexName).keyMapList
+
+  # Return the names of the indexes added with addIndex() (in order added)
+  def getIndexNames(self):
+    return self.__indexNames[1:]
+
+  # Add a named index for a different list of keys to the same list of dicts
+  #
+  # indexName [in]: Name of the new index (must not already exist).
+  #
+  # listOfKeys, keyMapList [in]: Same as for the Constructor.
+  #
+  # The key values for listOfKeys must be unique in the list of dicts or an
+  # exception is thrown (and the index is not added).
+  #
+  # Returns a SearchableListOfDictsIndexView object for the new index.
+  #
+  @timeFunctionCalls('searchable_lists.add_index')
+  def addIndex(self, indexName, listOfKeys, keyMapList=None):
+    if indexName in self.__indexes:
+      raise Exception("Error, the index '"+str(indexName)+"' already exists!")
+    indexDict = createKeyValuesTupleIndexForListOfDicts(
+      self.__listOfDicts, listOfKeys)
+    self.__addIndex(indexName, listOfKeys, keyMapList, indexDict)
+    return self.getIndexView(indexName)
+
+  # Return a SearchableListOfDictsIndexView object for an added index
+  def getIndexView(self, indexName):
+    self.__getIndex(indexName)
+    return SearchableListOfDictsIndexView(self, indexName)
 
   # Lookup a dict given a dict with same key/value pairs for keys listed in
   # listOfKeys.
-  def lookupDictGivenKeyValueDict(self, keyValueDictToFind, alsoReturnIdx=False):
-    if self.__keyMapList:
-      keyListToUse = self.__keyMapList
+  def lookupDictGivenKeyValueDict(self, keyValueDictToFind, alsoReturnIdx=False,
+      indexName=None,
+    ):
+    index = self.__getIndex(indexName)
+    if index.keyMapList:
+      keyListToUse = index.keyMapList
     else:
-      keyListToUse = self.__listOfKeys
-    keyValuesListToFind = []
-    for idx in range(len(keyListToUse)):
-      keyValuesListToFind.append(keyValueDictToFind.get(keyListToUse[idx]))
-    lookupRtn = self.lookupDictGivenKeyValuesList(keyValuesListToFind, alsoReturnIdx)
-    return lookupRtn
+      keyListToUse = index.listOfKeys
+    keyValuesTupleToFind = \
+      tuple([keyValueDictToFind.get(key) for key in keyListToUse])
+    return self.__lookupDictGivenKeyValuesTuple(index, keyValuesTupleToFind,
+      alsoReturnIdx)
 
   # Lookup a dict given a flat list of values for the keys
   #
   # Must be in same order self.getListOfKeys().
   #
-  def lookupDictGivenKeyValuesList(self, keyValuesListToFind, alsoReturnIdx=False):
-    lookupRtn = lookupDictGivenLookupDict(self.__lookupDict, self.__listOfKeys,
-      keyValuesListToFind, alsoReturnIdx)
-    return lookupRtn
+  def lookupDictGivenKeyValuesList(self, keyValuesListToFind, alsoReturnIdx=False,
+      indexName=None,
+    ):
+    index = self.__getIndex(indexName)
+    if len(index.listOfKeys) != len(keyValuesListToFind):
+      raise Exception("Error, len(listOfKeys)="+str(len(index.listOfKeys))+\
+      " != len(listOfValues)="+str(len(keyValuesListToFind))+" where"+\
+      " listOfKeys="+str(index.listOfKeys)+\
+      " and listOfValues="+str(keyValuesListToFind)+"!")
+    return self.__lookupDictGivenKeyValuesTuple(index,
+      tuple(keyValuesListToFind), alsoReturnIdx)
+
+  # Append a dict to the end of the list of dicts and add it to all of the
+  # indexes
+  #
+  # If the key values of dictEle are already in any of the indexes, then an
+  # exception is thrown and nothing is changed.
+  #
+  def appendDict(self, dictEle):
+    newIdx = len(self.__listOfDicts)
+    indexesAndKeyValuesTuples = []
+    for indexName in self.__indexNames:
+      index = self.__indexes[indexName]
+      keyValuesTuple = index.getKeyValuesTuple(dictEle)
+      lookedUpDict = index.indexDict.get(keyValuesTuple, None)
+      if lookedUpDict is not None:
+        (hasSameKeyValuePairs, dictDiffErrorMsg) = self.__checkDictsAreSame(
+          dictEle, "listOfDicts["+str(newIdx)+"]",
+          lookedUpDict, "listOfDicts["+str(self.__getDictIdx(lookedUpDict))+"]" )
+        raiseDuplicateDictEleException(newIdx, dictEle, index.listOfKeys,
+          self.__getDictIdx(lookedUpDict), lookedUpDict, dictDiffErrorMsg)
+      indexesAndKeyValuesTuples.append((index, keyValuesTuple))
+    for (index, keyValuesTuple) in indexesAndKeyValuesTuples:
+      index.indexDict[keyValuesTuple] = dictEle
+    self.__listOfDicts.append(dictEle)
+    if self.__dictIdToIdxDict is not None:
+      self.__dictIdToIdxDict[id(dictEle)] = newIdx
+
+  # Remove a dict given a flat list of values for the keys of an index
+  #
+  # The dict is removed from all of the indexes and from the list of dicts.
+  # Returns the removed dict or None if there is no matching dict.
+  #
+  # NOTE: The dict is removed from the indexes in O(1) time but deleting it
+  # from the middle of the list of dicts still shifts the later elements.
+  #
+  def removeDictGivenKeyValuesList(self, keyValuesListToFind, indexName=None):
+    (dictEle, idx) = self.lookupDictGivenKeyValuesList(keyValuesListToFind,
+      alsoReturnIdx=True, indexName=indexName)
+    if dictEle is None:
+      return None
+    for index in self.__indexes.values():
+      del index.indexDict[index.getKeyValuesTuple(dictEle)]
+    del self.__listOfDicts[idx]
+    if idx == len(self.__listOfDicts):
+      del self.__dictIdToIdxDict[id(dictEle)]
+    else:
+      self.__dictIdToIdxDict = None
+    return dictEle
 
   # Functions to allow this to act like a list
   def __len__(self):
@@ -1167,6 +4227,101 @@ class SearchableListOfDicts(object):
   def __getitem__(self, index_in):
     return self.__listOfDicts[index_in]
 
+  def __addIndex(self, indexName, listOfKeys, keyMapList, indexDict):
+    if keyMapList:
+      if len(listOfKeys) != len(keyMapList):
+        raise Exception("Error, listOfKeys="+str(listOfKeys)+\
+          " keyMapList="+str(listOfKeys)+" have different lenghts!" )
+    self.__indexNames.append(indexName)
+    self.__indexes[indexName] = KeyValuesTupleIndex(listOfKeys, keyMapList,
+      indexDict)
+
+  def __getIndex(self, indexName):
+    index = self.__indexes.get(indexName, None)
+    if index is None:
+      raise Exception("Error, the index '"+str(indexName)+"' does not exist!"+\
+        "  Valid index names are "+str(self.getIndexNames())+"!")
+    return index
+
+  def __lookupDictGivenKeyValuesTuple(self, index, keyValuesTuple, alsoReturnIdx):
+    dictEle = index.indexDict.get(keyValuesTuple, None)
+    if alsoReturnIdx:
+      if dictEle is None:
+        return (None, None)
+      return (dictEle, self.__getDictIdx(dictEle))
+    return dictEle
+
+  def __getDictIdx(self, dictEle):
+    if self.__dictIdToIdxDict is None:
+      self.__dictIdToIdxDict = dict( (id(dictEle_i), idx) for (idx, dictEle_i)
+        in enumerate(self.__listOfDicts) )
+    return self.__dictIdToIdxDict[id(dictEle)]
+
+
+# Simple struct for one index in a SearchableListOfDicts object
+#
+# NOTE: This is an implementation class for SearchableListOfDicts.
+#
+class KeyValuesTupleIndex(object):
+
+  def __init__(self, listOfKeys, keyMapList, indexDict):
+    self.listOfKeys = listOfKeys
+    self.keyMapList = keyMapList
+    self.indexDict = indexDict
+    self.getKeyValuesTuple = getKeyValuesTupleFunc(listOfKeys)
+
+  def __str__(self):
+    return "KeyValuesTupleIndex{listOfKeys="+str(self.listOfKeys)+\
+      ", keyMapList="+str(self.keyMapList)+\
+      ", indexDict="+str(self.indexDict)+"}"
+
+
+# View of a SearchableListOfDicts object that uses one of its named indexes
+#
+# This has the same lookup and list functions as SearchableListOfDicts but
+# uses the index 'indexName' by default.  Therefore, this can be passed in
+# anywhere a SearchableListOfDicts object is accepted (e.g. to
+# MatchDictKeysValuesFunctor) to look up dicts with a different set of keys
+# without creating another full SearchableListOfDicts object.
+#
+class SearchableListOfDictsIndexView(object):
+
+  def __init__(self, searchableListOfDicts, indexName):
+    self.__slod = searchableListOfDicts
+    self.__indexName = indexName
+
+  def __str__(self):
+    return "SearchableListOfDictsIndexView{indexName="+str(self.__indexName)+\
+      ", "+str(self.__slod)+"}"
+
+  def getSearchableListOfDicts(self):
+    return self.__slod
+
+  def getIndexName(self):
+    return self.__indexName
+
+  def getListOfDicts(self):
+    return self.__slod.getListOfDicts()
+
+  def getListOfKeys(self):
+    return self.__slod.getListOfKeys(self.__indexName)
+
+  def getKeyMapList(self):
+    return self.__slod.getKeyMapList(self.__indexName)
+
+  def lookupDictGivenKeyValueDict(self, keyValueDictToFind, alsoReturnIdx=False):
+    return self.__slod.lookupDictGivenKeyValueDict(keyValueDictToFind,
+      alsoReturnIdx, indexName=self.__indexName)
+
+  def lookupDictGivenKeyValuesList(self, keyValuesListToFind, alsoReturnIdx=False):
+    return self.__slod.lookupDictGivenKeyValuesList(keyValuesListToFind,
+      alsoReturnIdx, indexName=self.__indexName)
+
+  def __len__(self):
+    return len(self.__slod)
+  def __getitem__(self, index_in):
+    return self.__slod[index_in]
+
 
 # Create a SearchableListOfDicts object for a list of builds dicts that allows
 # lookups of builds given the keys "group" => "site" => "buildname" :
@@ -1187,6 +4342,21 @@ def createSearchableListOfTests( testsListOfDicts,
     checkDictsAreSame_in=checkDictsAreSame_in )
 
 
+# Add an index to a SearchableListOfDicts object for a list of builds (see
+# createSearchableListOfBuilds()) that allows lookups that match the 'site'
+# and 'buildname' fields but uses input for the search that are test dicts
+# that have the fields 'site' and 'buildName'.
+#
+# Returns the SearchableListOfDictsIndexView object for the added index 'test'
+# which can be used in place of the SearchableListOfDicts object returned
+# from createTestToBuildSearchableListOfDicts() (but shares the list of builds
+# and the primary index with buildsSLOD).
+#
+def addTestToBuildIndex(buildsSLOD):
+  return buildsSLOD.addIndex('test', ('site', 'buildname'),
+    keyMapList=('site', 'buildName') )
+
+
 # Create a SearchableListOfDicts object for a list of build dicts allows
 # lookups that match the 'site' and 'buildname' fields but uses input for the
 # search that are test dicts that have the fiels 'site' and 'buildName'.
@@ -1333,6 +4503,55 @@ def dateFromBuildStartTime(buildStartTime):
   return buildStartTime.split('T')[0]
 
 
+# Default minimum number of pass/nopass status changes in the test history for
+# a test to be classified as 'flaky'
+#
+def getDefaultFlakyMinStatusChanges():
+  return 3
+
+
+# Classify a test from the pass/nopass pattern of its test history
+#
+# Arguments:
+#
+#   testStatus [in]: Status of the test for the current testing day as
+#   returned from sortTestHistoryGetStatistics().
+#
+#   numRows [in]: Number of (unique) test results in the test history.
+#
+#   numPassed [in]: Number of those test results that 'Passed'.
+#
+#   numStatusChanges [in]: Number of times the test changed between pass and
+#   nopass from one test result to the next in the test history.
+#
+#   flakyMinStatusChanges [in]: Minimum numStatusChanges to be 'flaky'.
+#
+# Returns one of:
+#
+#   - 'flaky': The test changed between pass and nopass at least
+#     flakyMinStatusChanges times
+#   - 'consistently_failing': Currently nopass and never passed in the history
+#   - 'newly_failing': Currently nopass but passed earlier in the history
+#   - 'recovered': Currently passing but did not pass earlier in the history
+#   - 'passing': Currently passing and always passed in the history
+#   - 'missing': No test result for the current testing day
+#
+def getTestHistoryClass(testStatus, numRows, numPassed, numStatusChanges,
+    flakyMinStatusChanges=getDefaultFlakyMinStatusChanges(),
+  ):
+  if numRows > 0 and numStatusChanges >= flakyMinStatusChanges:
+    return 'flaky'
+  if testStatus == "Missing":
+    return 'missing'
+  if testStatus == "Passed":
+    if numPassed < numRows:
+      return 'recovered'
+    return 'passing'
+  if numPassed == 0:
+    return 'consistently_failing'
+  return 'newly_failing'
+
+
 # Sort list of test history dicts and get statistics
 #
 # Inputs:
@@ -1380,6 +4599,10 @@ def dateFromBuildStartTime(buildStartTime):
 #     - 'consec_nopass_days': Number of times the test consecutively did not pass
 #     - 'consec_missing_days': Number of days test is missing
 #     - 'previous_nopass_date': Before current date, the previous nopass date in UTC
+#     - 'status_changes_last_x_days': Number of times the test changed between
+#       pass and nopass from one test result to the next
+#     - 'test_history_class': Classification of the test history (see
+#       getTestHistoryClass())
 #
 #   testStatus: The status of the test for the current testing day with values:
 #     - 'Passed': Most recent test 'Passed' had date matching curentTestDate
@@ -1391,113 +4614,220 @@ def sortTestHistoryGetStatistics(testHistoryLOD,
     currentTestDate, testingDayStartTimeUtc,
     daysOfHistory,
   ):
+  return getTestHistoryStatisticsForTests([testHistoryLOD],
+    currentTestDate, testingDayStartTimeUtc, daysOfHistory)[0]
 
-  # Helper functions
-  def incr(testDict, key): testDict[key] = testDict[key] + 1
-  def decr(testDict, key): testDict[key] = testDict[key] - 1
-
-  # Initialize outputs assuming no history (i.e. test is missing for
-  # alldaysOfHistory of history)
-  sortedTestHistoryLOD = []
-  testHistoryStats = {
-    'pass_last_x_days': 0,
-    'nopass_last_x_days': 0,
-    'missing_last_x_days': daysOfHistory,
-    'consec_pass_days': 0,
-    'consec_nopass_days': 0,
-    'consec_missing_days': 0,
-    'previous_nopass_date': 'None'
-    }
-  testStatus = "Missing"
-
-  # Return if there is no test history
-  if len(testHistoryLOD) == 0:
-    testHistoryStats['consec_missing_days'] = daysOfHistory
-    return (sortedTestHistoryLOD, testHistoryStats, testStatus)
 
-  # Sort the test history by the buildstarttime (most current date at top)
-  sortedTestHistoryLOD = copy.copy(testHistoryLOD)
-  sortedTestHistoryLOD.sort(reverse=True, key=DictSortFunctor(['buildstarttime']))
+# Sort the test history and get the test history statistics for a set of
+# tests all at once
+#
+# Arguments:
+#
+#   testHistoryLODList [in]: List of the test history lists of dicts for each
+#   test.  Neither this list nor its elements are modified in this call.
+#
+#   currentTestDate, testingDayStartTimeUtc, daysOfHistory [in]: Same as for
+#   sortTestHistoryGetStatistics().
+#
+#   useNumpy [in]: If True, then the statistics are computed with NumPy array
+#   operations over the test history of all of the tests together.  If False,
+#   then they are computed in plain Python loops.  If None (the default), then
+#   NumPy is used if it is installed.
+#
+#   flakyMinStatusChanges [in]: Passed to getTestHistoryClass() to classify
+#   each test history.
+#
+# Returns a list with the tuple (sortedTestHistoryLOD, testHistoryStats,
+# testStatus) for each test in testHistoryLODList in the same order with the
+# same values as returned from sortTestHistoryGetStatistics().
+#
+# This is much faster than calling sortTestHistoryGetStatistics() for each test
+# separately when there are many tests because each unique 'buildstarttime'
+# (which are shared by all of the tests in the same build) is only converted
+# to a testing day once and (if useNumpy!=False) all of the counting is done
+# in NumPy.
+#
+def getTestHistoryStatisticsForTests(testHistoryLODList,
+    currentTestDate, testingDayStartTimeUtc, daysOfHistory,
+    useNumpy=None, flakyMinStatusChanges=getDefaultFlakyMinStatusChanges(),
+  ):
 
-  # Remove duplicate tests from list of dicts
-  sortedTestHistoryLOD = getUniqueSortedTestsHistoryListOfDicts(sortedTestHistoryLOD)
+  if useNumpy == None:
+    useNumpy = (numpy != None)
+  elif useNumpy and numpy == None:
+    raise Exception(
+      "Error, useNumpy=True but the Python module 'numpy' is not installed!")
 
-  # Get testing day/time helper object
   testingDayTimeObj = CBTD.CDashProjectTestingDay(currentTestDate, testingDayStartTimeUtc)
-  currentTestDateDT = testingDayTimeObj.getCurrentTestingDayDateDT()
-  #print("currentTestDateDT = "+str(currentTestDateDT))
-
-  # Top (most recent) test history data
-  topTestDict = sortedTestHistoryLOD[0]
-  #print("topTestDict['buildstarttime'] = "+topTestDict['buildstarttime'])
-
-  # Get the CDash testing date of the most recent test
-  topTestDictTestingDayDT = testingDayTimeObj.getTestingDayDateFromBuildStartTimeDT(
-    topTestDict['buildstarttime'] )
-  #print("topTestDictTestingDayDT ="+str(topTestDictTestingDayDT))
-
-  # testStatus (for this test based on history)
-  if topTestDictTestingDayDT == currentTestDateDT:
-    testStatus = topTestDict['status']
+  currentTestingDayOrdinal = testingDayTimeObj.getCurrentTestingDayDateDT().toordinal()
+
+  # Sort and remove duplicates from each test history and encode the rows for
+  # all of the tests into flat lists where the rows for the i-th nonempty
+  # test history start at testHistoryStartsList[i].
+  sortedTestHistoryLODList = []
+  testHistoryStartsList = []
+  rowTestingDayOrdinalsList = []
+  rowIsPassedList = []
+  rowIsPreviousNopassList = []
+  testingDayDataCache = {}  # buildstarttime -> (ordinal, isCurrentDate)
+  for testHistoryLOD in testHistoryLODList:
+    if len(testHistoryLOD) == 0:
+      sortedTestHistoryLODList.append([])
+      continue
+    sortedTestHistoryLOD = copy.copy(testHistoryLOD)
+    sortedTestHistoryLOD.sort(reverse=True, key=DictSortFunctor(['buildstarttime']))
+    sortedTestHistoryLOD = getUniqueSortedTestsHistoryListOfDicts(sortedTestHistoryLOD)
+    sortedTestHistoryLODList.append(sortedTestHistoryLOD)
+    testHistoryStartsList.append(len(rowIsPassedList))
+    for testDict in sortedTestHistoryLOD:
+      buildStartTime = testDict['buildstarttime']
+      testingDayData = testingDayDataCache.get(buildStartTime, None)
+      if testingDayData == None:
+        testingDayDT = \
+          testingDayTimeObj.getTestingDayDateFromBuildStartTimeDT(buildStartTime)
+        testingDayData = (testingDayDT.toordinal(),
+          CBTD.getDateStrFromDateTime(testingDayDT) == currentTestDate)
+        testingDayDataCache[buildStartTime] = testingDayData
+      isPassed = (testDict['status'] == 'Passed')
+      rowTestingDayOrdinalsList.append(testingDayData[0])
+      rowIsPassedList.append(isPassed)
+      rowIsPreviousNopassList.append(not isPassed and not testingDayData[1])
+
+  # Get the number of rows, number of passing rows, length of the initial
+  # streak of rows with the same pass/nopass status as the top row, the
+  # position of the first previous nopass row (or the number of rows if there
+  # is none) and the number of pass/nopass status changes between adjacent
+  # rows for each nonempty test history
+  if useNumpy:
+    (numRowsList, numPassedList, initialStreakList, previousNopassPosList,
+     numStatusChangesList) = \
+      getTestHistoryRowCountsUsingNumpy(testHistoryStartsList,
+        rowIsPassedList, rowIsPreviousNopassList)
   else:
+    (numRowsList, numPassedList, initialStreakList, previousNopassPosList,
+     numStatusChangesList) = \
+      getTestHistoryRowCounts(testHistoryStartsList,
+        rowIsPassedList, rowIsPreviousNopassList)
+
+  # Assemble the returned data for each test
+  testHistoryDataList = []
+  nonemptyIdx = 0
+  for sortedTestHistoryLOD in sortedTestHistoryLODList:
+    testHistoryStats = {
+      'pass_last_x_days': 0,
+      'nopass_last_x_days': 0,
+      'missing_last_x_days': daysOfHistory,
+      'consec_pass_days': 0,
+      'consec_nopass_days': 0,
+      'consec_missing_days': 0,
+      'previous_nopass_date': 'None',
+      'status_changes_last_x_days': 0,
+      'test_history_class': 'missing',
+      }
     testStatus = "Missing"
-  #print("testStatus = "+testStatus)
-
-  # testHistoryStats
-
-  # Set up for counting num of consecutive pass, nopass, or missing
-
-  if testStatus == "Missing":
-    # The test is missing so see how many consecutive days that it is missing
-    testHistoryStats['consec_missing_days'] = \
-      (currentTestDateDT - topTestDictTestingDayDT).days
-    # There are no initial consecutive passing or nopassing days
-    initialTestStatusHasChanged = True
-  else:
-    # Count number of consecutive days that test is either passing or
-    # nopasssing
-    initialTestStatusHasChanged = False
-
-  if testStatus == 'Passed': previousTestStatusPassed = True
-  else: previousTestStatusPassed = False
-
-  previousNopassDate = None
-
-  # Loop over test history for each of the kth entries and update quantities
-  for pastTestDict_k in sortedTestHistoryLOD:
-    pastTestStatus_k = pastTestDict_k['status']
-    pastTestDateUtc_k = testingDayTimeObj.getTestingDayDateFromBuildStartTimeStr(
-      pastTestDict_k['buildstarttime'])
-    # Count the initial consecutive streaks for passing and nonpassing
-    if (
-       (pastTestStatus_k=='Passed') == previousTestStatusPassed \
-       and not initialTestStatusHasChanged \
-      ):
-      # The initial consecutive streak for passing or nonpassing continues!
-      if pastTestStatus_k == 'Passed':
-        incr(testHistoryStats, 'consec_pass_days')
+    if len(sortedTestHistoryLOD) == 0:
+      testHistoryStats['consec_missing_days'] = daysOfHistory
+      testHistoryDataList.append((sortedTestHistoryLOD, testHistoryStats, testStatus))
+      continue
+    start = testHistoryStartsList[nonemptyIdx]
+    numRows = numRowsList[nonemptyIdx]
+    numPassed = numPassedList[nonemptyIdx]
+    topTestingDayOrdinal = rowTestingDayOrdinalsList[start]
+    if topTestingDayOrdinal == currentTestingDayOrdinal:
+      testStatus = sortedTestHistoryLOD[0]['status']
+      if rowIsPassedList[start]:
+        testHistoryStats['consec_pass_days'] = initialStreakList[nonemptyIdx]
       else:
-        incr(testHistoryStats, 'consec_nopass_days')
+        testHistoryStats['consec_nopass_days'] = initialStreakList[nonemptyIdx]
     else:
-      # The initial consecutive streak has been broken
-      initialTestStatusHasChanged = True
-    # Count total pass/nopass/missing tests
-    decr(testHistoryStats, 'missing_last_x_days') # Test not missing this day!
-    if pastTestStatus_k == 'Passed':
-      incr(testHistoryStats, 'pass_last_x_days')
-    else:
-      incr(testHistoryStats, 'nopass_last_x_days')
-    # Find most recent previous nopass test date
-    if (
-        previousNopassDate == None \
-        and pastTestDateUtc_k != currentTestDate \
-        and pastTestStatus_k != 'Passed' \
-      ):
-      previousNopassDate = pastTestDateUtc_k
-      testHistoryStats['previous_nopass_date'] = previousNopassDate
-
-  # Return the computed stuff
-  return (sortedTestHistoryLOD, testHistoryStats, testStatus)
+      testHistoryStats['consec_missing_days'] = \
+        currentTestingDayOrdinal - topTestingDayOrdinal
+    testHistoryStats['pass_last_x_days'] = numPassed
+    testHistoryStats['nopass_last_x_days'] = numRows - numPassed
+    testHistoryStats['missing_last_x_days'] = daysOfHistory - numRows
+    previousNopassPos = previousNopassPosList[nonemptyIdx]
+    if previousNopassPos < numRows:
+      testHistoryStats['previous_nopass_date'] = \
+        testingDayTimeObj.getTestingDayDateFromBuildStartTimeStr(
+          sortedTestHistoryLOD[previousNopassPos]['buildstarttime'] )
+    testHistoryStats['status_changes_last_x_days'] = \
+      numStatusChangesList[nonemptyIdx]
+    testHistoryStats['test_history_class'] = getTestHistoryClass(
+      testStatus, numRows, numPassed, numStatusChangesList[nonemptyIdx],
+      flakyMinStatusChanges)
+    testHistoryDataList.append((sortedTestHistoryLOD, testHistoryStats, testStatus))
+    nonemptyIdx += 1
+
+  return testHistoryDataList
+
+
+# Get the counts for the rows of test history for
+# getTestHistoryStatisticsForTests() using plain Python loops
+#
+def getTestHistoryRowCounts(testHistoryStartsList,
+    rowIsPassedList, rowIsPreviousNopassList,
+  ):
+  numRowsList = []
+  numPassedList = []
+  initialStreakList = []
+  previousNopassPosList = []
+  numStatusChangesList = []
+  testHistoryEndsList = testHistoryStartsList[1:] + [len(rowIsPassedList)]
+  for (start, end) in zip(testHistoryStartsList, testHistoryEndsList):
+    numRows = end - start
+    topIsPassed = rowIsPassedList[start]
+    initialStreak = numRows
+    previousNopassPos = numRows
+    numPassed = 0
+    numStatusChanges = 0
+    for pos in range(numRows):
+      isPassed = rowIsPassedList[start+pos]
+      if isPassed:
+        numPassed += 1
+      if initialStreak == numRows and isPassed != topIsPassed:
+        initialStreak = pos
+      if previousNopassPos == numRows and rowIsPreviousNopassList[start+pos]:
+        previousNopassPos = pos
+      if pos > 0 and isPassed != rowIsPassedList[start+pos-1]:
+        numStatusChanges += 1
+    numRowsList.append(numRows)
+    numPassedList.append(numPassed)
+    initialStreakList.append(initialStreak)
+    previousNopassPosList.append(previousNopassPos)
+    numStatusChangesList.append(numStatusChanges)
+  return (numRowsList, numPassedList, initialStreakList, previousNopassPosList,
+    numStatusChangesList)
+
+
+# Get the counts for the rows of test history for
+# getTestHistoryStatisticsForTests() using NumPy array operations
+#
+def getTestHistoryRowCountsUsingNumpy(testHistoryStartsList,
+    rowIsPassedList, rowIsPreviousNopassList,
+  ):
+  if not testHistoryStartsList:
+    return ([], [], [], [], [])
+  starts = numpy.array(testHistoryStartsList, dtype=numpy.int64)
+  rowIsPassed = numpy.array(rowIsPassedList, dtype=bool)
+  rowIsPreviousNopass = numpy.array(rowIsPreviousNopassList, dtype=bool)
+  numRows = numpy.diff(numpy.append(starts, len(rowIsPassed)))
+  # Index of the test history and position in that test history for each row
+  rowTestHistoryIdx = numpy.repeat(numpy.arange(len(starts)), numRows)
+  rowPos = numpy.arange(len(rowIsPassed)) - starts[rowTestHistoryIdx]
+  rowNumRows = numRows[rowTestHistoryIdx]
+  numPassed = numpy.add.reduceat(rowIsPassed.astype(numpy.int64), starts)
+  rowStatusChanged = (rowIsPassed != rowIsPassed[starts][rowTestHistoryIdx])
+  initialStreak = numpy.minimum.reduceat(
+    numpy.where(rowStatusChanged, rowPos, rowNumRows), starts)
+  previousNopassPos = numpy.minimum.reduceat(
+    numpy.where(rowIsPreviousNopass, rowPos, rowNumRows), starts)
+  # A row changes status if it differs from the row above it in the same test
+  # history (the top row of each test history has rowPos == 0)
+  rowChangedFromPrevious = numpy.append(False, rowIsPassed[1:] != rowIsPassed[:-1])
+  numStatusChanges = numpy.add.reduceat(
+    (rowChangedFromPrevious & (rowPos > 0)).astype(numpy.int64), starts)
+  return (numRows.tolist(), numPassed.tolist(), initialStreak.tolist(),
+    previousNopassPos.tolist(), numStatusChanges.tolist())
 
 
 # Get a new list with unique entires from an input sorted list of test dicts.
@@ -1519,7 +4849,12 @@ def getUniqueSortedTestsHistoryListOfDicts(inputSortedTestHistoryLOD):
   while idx < len(inputSortedTestHistoryLOD):
     candidateTestDict = inputSortedTestHistoryLOD[idx]
 
-    if not checkCDashTestDictsAreSame(candidateTestDict, "a", lastUniqueTestDict, "b")[0]:
+    # NOTE: Test dicts with different 'buildstarttime' values can't be the
+    # same so skip the more expensive check in that common case.
+    if candidateTestDict.get('buildstarttime', None) != \
+        lastUniqueTestDict.get('buildstarttime', None) \
+      or not checkCDashTestDictsAreSame(candidateTestDict, "a", lastUniqueTestDict, "b")[0] \
+      :
       uniqueSortedTestHistoryLOD.append(candidateTestDict)
       lastUniqueTestDict = candidateTestDict
     # Else, this is dupliate test entry so skip
@@ -1547,75 +4882,670 @@ def extractTestIdAndBuildIdFromTestDetailsLink(testDetailsLink):
   return (testId, buildId)
 
 
-# Check if two test dicts returned from CDash are the same, accounting for
-# possible CDash defects allowing duplicate tests except for different test
-# IDs and small changes in 'time' (strange defects in CDash).
+# Check if two test dicts returned from CDash are the same, accounting for
+# possible CDash defects allowing duplicate tests except for different test
+# IDs and small changes in 'time' (strange defects in CDash).
+#
+# Has the same calling conventions and return value as the function
+# checkDictsAreSame().
+#
+# Returns tuple (hasSameKeyValuePairs, errMsg).  If
+# hasSameKeyValuePairs==True, then errMsg==None.  Otherwise, if
+# hasSameKeyValuePairs==False, then errMsg gives a string that explains how
+# they are different.
+#
+# This improves on a simple check dict_1 == dict_2 in that shows exactly why
+# the dicts are different for a single key/value pair.
+#
+def checkCDashTestDictsAreSame(testDict_1, testDict_1_name,
+    testDict_2, testDict_2_name,
+  ):
+  # Check the easy case where they are exactly the same
+  if testDict_1 == testDict_2:
+    return (True, None)
+  # Check to see if 'testDetailsLink' is there in both and then check contents
+  sameBuildIdDifferentTestIds = False
+  if (
+      ('testDetailsLink' in testDict_1.keys()) \
+      and \
+      ('testDetailsLink' in testDict_2.keys()) \
+    ):
+    (test1d_1, buildid_1) = \
+      extractTestIdAndBuildIdFromTestDetailsLink(testDict_1['testDetailsLink'])
+    (test1d_2, buildid_2) = \
+      extractTestIdAndBuildIdFromTestDetailsLink(testDict_2['testDetailsLink'])
+    if (buildid_1 == buildid_2) and (test1d_1 != test1d_2):
+      # This is the special case that we are writing this function for!
+      sameBuildIdDifferentTestIds = True
+  # Set up copy to allow dropping out fields for comparison (only top-level
+  # fields are dropped so a shallow copy is enough)
+  testDict_1_copy = dict(testDict_1)
+  testDict_2_copy = dict(testDict_2)
+  # If buildIds are the same but the testIds are different, then check the
+  # rest of the key/value pairs to determine if they are the same:
+  if sameBuildIdDifferentTestIds:
+    testDict_1_copy.pop('testDetailsLink', None)
+    testDict_2_copy.pop('testDetailsLink', None)
+  # Don't require the same test times
+  testDict_1_copy.pop('time', None)
+  testDict_2_copy.pop('time', None)
+  testDict_1_copy.pop('prettyTime', None)
+  testDict_2_copy.pop('prettyTime', None)
+  testDict_1_copy.pop('procTime', None)
+  testDict_2_copy.pop('procTime', None)
+  testDict_1_copy.pop('prettyProcTime', None)
+  testDict_2_copy.pop('prettyProcTime', None)
+  # Don't require identical matching output
+  testDict_1_copy.pop('matchingoutput', None)
+  testDict_2_copy.pop('matchingoutput', None)
+  # Compare what ever fields are left that may be different and just use the
+  # standard comparison that will give a good error message for differences.
+  return checkDictsAreSame(testDict_1_copy, testDict_1_name,
+    testDict_2_copy, testDict_2_name )
+
+
+# Get the test history CDash cache filename
+#
+# Note: this takes care of things like having '/' in the test name
+#
+def getTestHistoryCacheFileName(date, site, buildName, testname, daysOfHistory):
+  testHistoryFileName = \
+    date+"-"+site+"-"+buildName+"-"+testname+"-HIST-"+str(daysOfHistory)+".json"
+  return testHistoryFileName.replace('/', '_')
+
+
+# Get the cdash/queryTests.php 'begin' and 'end' URL fields for the test
+# history
+#
+# date [in]: The current testing day string "YYYY-MM-DD" (which is the 'end'
+# date).
+#
+# daysOfHistory [in]: Number of days of history that includes the day 'date'.
+#
+def getTestHistoryBeginEndUrlFields(date, daysOfHistory):
+  testDayDate = validateAndConvertYYYYMMDD(date)
+  dateRangeBeginDT = testDayDate - datetime.timedelta(days=(daysOfHistory-1))
+  dateRangeBeginDateStr = CBTD.getDateStrFromDateTime(dateRangeBeginDT)
+  return "begin="+dateRangeBeginDateStr+"&end="+date
+
+
+# Get the query filters for all of the test results for a single build
+#
+# beginEndUrlFields [in]: Fields as returned from
+# getTestHistoryBeginEndUrlFields().
+#
+# This can be used for both cdash/queryTests.php (to get the history of all of
+# the tests in the build) and cdash/index.php (to get the history of the
+# build).
+#
+def getBuildHistoryQueryFilters(beginEndUrlFields, site, buildName):
+  return \
+    beginEndUrlFields+"&"+\
+    "filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and"+\
+    "&field1=buildname&compare1=61&value1="+buildName+\
+    "&field2=site&compare2=61&value2="+site
+
+
+# Get the build test history CDash cache filename
+#
+# This is the cache file for the cdash/queryTests.php query for all of the
+# tests in a single build over the days of history (see
+# cacheTestHistoryForBuildsOfTests()).
+#
+def getBuildTestHistoryCacheFileName(date, site, buildName, daysOfHistory):
+  buildTestHistoryFileName = \
+    date+"-"+site+"-"+buildName+"-BUILD-HIST-"+str(daysOfHistory)+".json"
+  return buildTestHistoryFileName.replace('/', '_')
+
+
+# Get the full path to the test history cache file for all of the tests in a
+# build (see getBuildTestHistoryCacheFileName())
+#
+# NOTE: A compressed file name keeps the '-BUILD-HIST-' tag so that the file
+# is still never put in a pack file (see
+# g_cdashQueryDataUnpackedCacheFileNameTags).
+#
+def getBuildTestHistoryCacheFilePath(testCacheDir, date, site, buildName,
+    daysOfHistory,
+  ):
+  return testCacheDir+"/"+getCompressedFileNameIfTooLong(
+    getBuildTestHistoryCacheFileName(date, site, buildName, daysOfHistory),
+    date+"-BUILD-HIST-", "json")
+
+
+# Get the full path to the test history cache file for a test
+#
+# This is the file read and written by AddTestHistoryToTestDictFunctor.
+#
+def getTestHistoryCacheFilePath(testCacheDir, date, site, buildName, testname,
+    daysOfHistory,
+  ):
+  testHistoryCacheFileFullName = \
+    getTestHistoryCacheFileName(date, site, buildName, testname, daysOfHistory)
+  # Possibly compress the file name if it is too long
+  return testCacheDir+"/"+\
+    getCompressedFileNameIfTooLong(testHistoryCacheFileFullName, date+"-", "json")
+
+
+# Get the test history for a list of tests using one cdash/queryTests.php
+# query per build and write the per-test test history cache files.
+#
+# testsLOD [in]: List of test dicts with at least the fields 'site',
+# 'buildName', and 'testname'.  These dicts are not modified.
+#
+# For each unique ('site', 'buildName') pair of the tests in testsLOD that has
+# one or more tests that don't already have a test history cache file (see
+# getTestHistoryCacheFilePath()), a single cdash/queryTests.php query is done
+# for all of the tests in that build over the date range.  (CDash filters are
+# all combined with either 'and' or 'or' so there is no way to ask for a
+# subset of the tests in a build with one query.)  The results are then split
+# up by 'testname' and are written to the per-test test history cache files
+# for the tests in testsLOD.  (Test results in the build for tests not in
+# testsLOD are ignored.)
+#
+# If keepBuildTestHistoryCacheFile==True, then the raw data for each build
+# query (which has the test history for all of the tests in the build) is
+# also cached in the file given by getBuildTestHistoryCacheFileName() in the
+# directory testCacheDir.  Otherwise, that file is not written and an
+# existing one is read and then removed after it is split up so that the
+# cache does not hold an extra copy of the test history of each build.  (When
+# this is called more than once for different tests in the same builds, pass
+# in keepBuildTestHistoryCacheFile=True and remove the files at the end with
+# removeBuildTestHistoryCacheFiles().)
+#
+# If useCachedCDashData==True, then CDash is never called and the test
+# history for the builds must come from existing build test history cache
+# files (or an exception is thrown).
+#
+# After this is called, AddTestHistoryToTestDictFunctor (with
+# alwaysUseCacheFileIfExists=True) will read the test history for these tests
+# from the cache files instead of doing one CDash query per test.  This
+# reduces the number of CDash queries from O(num tests) to O(num builds).
+#
+# The queries for the different builds are done at the same time in up to
+# maxConcurrency threads (see foreachTransformConcurrently()).
+#
+# Returns the number of builds for which the test history was gotten.
+#
+def cacheTestHistoryForBuildsOfTests(cdashUrl, projectName, date, daysOfHistory,
+    testCacheDir, testsLOD, verbose=False, printDetails=False, maxConcurrency=1,
+    useCachedCDashData=False, keepBuildTestHistoryCacheFile=False,
+    extractCDashApiQueryData_in=extractCDashApiQueryData, # For unit testing
+  ):
+  # Group the tests that don't have test history cache files by build
+  testsByBuildDict = {}
+  buildKeysList = []
+  for testDict in testsLOD:
+    site = testDict['site']
+    buildName = testDict['buildName']
+    testname = testDict['testname']
+    testHistoryCacheFilePath = getTestHistoryCacheFilePath(testCacheDir, date,
+      site, buildName, testname, daysOfHistory)
+    if cdashQueryDataCacheFileExists(testHistoryCacheFilePath):
+      continue
+    buildKey = (site, buildName)
+    if not buildKey in testsByBuildDict:
+      testsByBuildDict[buildKey] = {}
+      buildKeysList.append(buildKey)
+    testsByBuildDict[buildKey][testname] = testHistoryCacheFilePath
+  # Get the test history for each build and split it up by test
+  beginEndUrlFields = getTestHistoryBeginEndUrlFields(date, daysOfHistory)
+  def cacheBuildTestHistory(buildKey):
+    (site, buildName) = buildKey
+    testHistoryCacheFilesDict = testsByBuildDict[buildKey]
+    if verbose:
+      print("Getting "+str(daysOfHistory)+" days of history for "+\
+        str(len(testHistoryCacheFilesDict))+" tests in the build "+buildName+\
+        " on "+site+" from one query")
+    buildTestHistoryQueryUrl = getCDashQueryTestsQueryUrl(cdashUrl, projectName,
+      None, getBuildHistoryQueryFilters(beginEndUrlFields, site, buildName))
+    buildTestHistoryCacheFilePath = getBuildTestHistoryCacheFilePath(
+      testCacheDir, date, site, buildName, daysOfHistory)
+    buildTestHistoryCacheFileExists = \
+      cdashQueryDataCacheFileExists(buildTestHistoryCacheFilePath)
+    if keepBuildTestHistoryCacheFile or buildTestHistoryCacheFileExists \
+      or useCachedCDashData \
+      :
+      buildTestHistoryCacheFilePath_i = buildTestHistoryCacheFilePath
+    else:
+      buildTestHistoryCacheFilePath_i = None  # Don't write it
+    # NOTE: The test history for all of the tests in the build can be large so
+    # only the test dicts for the tests in testsLOD are kept in memory
+    buildTestHistoryIter = iterateTestsOffCDashQueryTests(
+      buildTestHistoryQueryUrl, buildTestHistoryCacheFilePath_i,
+      useCachedCDashData=useCachedCDashData, alwaysUseCacheFileIfExists=True,
+      verbose=printDetails,
+      iterateCDashApiQueryDataArray_in=\
+        getIterateCDashApiQueryDataArrayFunc(extractCDashApiQueryData_in) )
+    testHistoryByTestnameDict = {}
+    for testname in testHistoryCacheFilesDict.keys():
+      testHistoryByTestnameDict[testname] = []
+    for testHistoryDict in buildTestHistoryIter:
+      if testHistoryDict.get('site') != site: continue
+      if testHistoryDict.get('buildName') != buildName: continue
+      testHistoryLOD = testHistoryByTestnameDict.get(testHistoryDict.get('testname'))
+      if testHistoryLOD != None:
+        testHistoryLOD.append(testHistoryDict)
+    for (testname, testHistoryCacheFilePath) in testHistoryCacheFilesDict.items():
+      writeCDashQueryDataCacheFile({'builds':testHistoryByTestnameDict[testname]},
+        testHistoryCacheFilePath)
+    if not keepBuildTestHistoryCacheFile and \
+      os.path.exists(buildTestHistoryCacheFilePath) \
+      :
+      os.remove(buildTestHistoryCacheFilePath)
+    return buildKey
+  foreachTransformConcurrently(buildKeysList, cacheBuildTestHistory,
+    maxConcurrency,
+    getElementDescr=lambda buildKey: "site='"+buildKey[0]+"', buildName='"+buildKey[1]+"'")
+  return len(buildKeysList)
+
+
+# Remove the build test history cache files (see
+# cacheTestHistoryForBuildsOfTests()) for the list of (site, buildName) pairs
+# buildKeysList
+#
+# Returns the number of files removed.
+#
+def removeBuildTestHistoryCacheFiles(testCacheDir, date, daysOfHistory,
+    buildKeysList,
+  ):
+  numRemovedFiles = 0
+  for (site, buildName) in buildKeysList:
+    buildTestHistoryCacheFilePath = getBuildTestHistoryCacheFilePath(
+      testCacheDir, date, site, buildName, daysOfHistory)
+    if os.path.exists(buildTestHistoryCacheFilePath):
+      os.remove(buildTestHistoryCacheFilePath)
+      numRemovedFiles += 1
+  return numRemovedFiles
+
+
+# Get the list of testing days "YYYY-MM-DD" for the test history
+#
+# Returns the daysOfHistory testing days ending with the testing day 'date'
+# (oldest day first).
+#
+def getTestHistoryTestingDaysList(date, daysOfHistory):
+  testDayDate = validateAndConvertYYYYMMDD(date)
+  testingDaysList = []
+  for dayIdx in range(daysOfHistory-1, -1, -1):
+    testingDaysList.append(CBTD.getDateStrFromDateTime(
+      testDayDate - datetime.timedelta(days=dayIdx)))
+  return testingDaysList
+
+
+# Persistent store of the test history results for each test for each testing
+# day
+#
+# Usage:
+#
+#   testHistoryStore = TestHistoryStore(<cacheDir>+"/test_history_store.sqlite")
+#   testKey = (projectName, site, buildName, testname)
+#   missingDays = testHistoryStore.getMissingTestingDays(testKey, testingDaysList)
+#   ... Get test history for missingDays[0] to testingDaysList[-1] from CDash ...
+#   testHistoryStore.addTestHistory(testKey, fetchedTestingDaysList,
+#     fetchedTestHistoryLOD, testingDayStartTimeUtc, completeBeforeDate=date)
+#   testHistoryLOD = testHistoryStore.getTestHistory(testKey, testingDaysList)
+#
+# This stores the test history dicts returned from cdash/queryTests.php in a
+# SQLite database file for each (projectName, site, buildName, testname)
+# along with the testing day (see CBTD.CDashProjectTestingDay) for each
+# result.  It also records which testing days are complete (i.e. the days
+# before the current testing day) so that they never need to be downloaded
+# again.  Therefore, getting 30 days of test history for a test that was
+# also in yesterday's report only requires downloading the last 2 days of
+# test history from CDash (see AddTestHistoryToTestDictFunctor).
+#
+# The store can be used by multiple threads at the same time (see
+# foreachTransformConcurrently()).
+#
+class TestHistoryStore(object):
+
+  def __init__(self, dbFilePath):
+    self.dbFilePath = dbFilePath
+    self.lock = threading.Lock()
+    self.connection = sqlite3.connect(dbFilePath, timeout=60,
+      check_same_thread=False)
+    with self.lock:
+      self.connection.execute(
+        "CREATE TABLE IF NOT EXISTS test_results ("+\
+        " project TEXT, site TEXT, build_name TEXT, testname TEXT,"+\
+        " testing_day TEXT, test_dict TEXT )" )
+      self.connection.execute(
+        "CREATE INDEX IF NOT EXISTS test_results_idx ON test_results"+\
+        " (project, site, build_name, testname, testing_day)" )
+      self.connection.execute(
+        "CREATE TABLE IF NOT EXISTS complete_testing_days ("+\
+        " project TEXT, site TEXT, build_name TEXT, testname TEXT,"+\
+        " testing_day TEXT,"+\
+        " PRIMARY KEY (project, site, build_name, testname, testing_day) )" )
+      self.connection.commit()
+
+  # Return the testing days in testingDaysList that are not complete in the
+  # store (in the same order)
+  def getMissingTestingDays(self, testKey, testingDaysList):
+    with self.lock:
+      cursor = self.connection.execute(
+        "SELECT testing_day FROM complete_testing_days WHERE project=? AND"+\
+        " site=? AND build_name=? AND testname=?",
+        tuple(testKey) )
+      completeTestingDaysSet = set([ row[0] for row in cursor.fetchall() ])
+    return [ testingDay for testingDay in testingDaysList \
+      if not testingDay in completeTestingDaysSet ]
+
+  # Replace the stored test history for the testing days testingDaysList with
+  # the test dicts in testHistoryLOD
+  #
+  # Test dicts with a testing day not in testingDaysList are ignored.  The
+  # testing days in testingDaysList before completeBeforeDate are marked as
+  # complete (i.e. no more test results will be added to CDash for those
+  # days).
+  #
+  def addTestHistory(self, testKey, testingDaysList, testHistoryLOD,
+      testingDayStartTimeUtc, completeBeforeDate,
+    ):
+    testingDaysSet = set(testingDaysList)
+    testingDayTimeObj = CBTD.CDashProjectTestingDay(completeBeforeDate,
+      testingDayStartTimeUtc)
+    testResultsRows = []
+    for testDict in testHistoryLOD:
+      testingDay = testingDayTimeObj.getTestingDayDateFromBuildStartTimeStr(
+        testDict['buildstarttime'])
+      if testingDay in testingDaysSet:
+        testResultsRows.append(
+          tuple(testKey) + (testingDay, json.dumps(testDict, sort_keys=True)) )
+    completeTestingDaysRows = [ tuple(testKey) + (testingDay,) \
+      for testingDay in testingDaysList if testingDay < completeBeforeDate ]
+    with self.lock:
+      for testingDay in testingDaysList:
+        self.connection.execute(
+          "DELETE FROM test_results WHERE project=? AND site=? AND"+\
+          " build_name=? AND testname=? AND testing_day=?",
+          tuple(testKey) + (testingDay,) )
+      self.connection.executemany(
+        "INSERT INTO test_results VALUES (?, ?, ?, ?, ?, ?)", testResultsRows)
+      self.connection.executemany(
+        "INSERT OR REPLACE INTO complete_testing_days VALUES (?, ?, ?, ?, ?)",
+        completeTestingDaysRows)
+      self.connection.commit()
+
+  # Return the stored list of test history dicts for the testing days in
+  # testingDaysList (in the order they were added)
+  def getTestHistory(self, testKey, testingDaysList):
+    testingDaysSet = set(testingDaysList)
+    with self.lock:
+      cursor = self.connection.execute(
+        "SELECT testing_day, test_dict FROM test_results WHERE project=? AND"+\
+        " site=? AND build_name=? AND testname=? ORDER BY rowid",
+        tuple(testKey) )
+      rows = cursor.fetchall()
+    return [ json.loads(testDictStr) for (testingDay, testDictStr) in rows \
+      if testingDay in testingDaysSet ]
+
+  def close(self):
+    with self.lock:
+      self.connection.close()
+
+
+# Base class for a compact dict-compatible record with a fixed set of fields
+#
+# Tables of builds and tests can have many thousands of rows (and each test
+# row holds its own test history list) so storing each of them as a plain
+# dict with a hash table per row uses a lot of memory.  A SlottedDictRecord
+# object stores the expected fields (listed in the class attribute
+# 'fieldKeys' of the derived class) in __slots__ and only creates a dict
+# (self._extraFields) for any other fields that get added.
+#
+# The derived class can also define the class attribute 'computedKeys' which
+# is a dict { <key> : (<dependsOnKey>, <getValueFunc>) } for fields that are
+# computed on demand with getValueFunc(record) and exist in the record if and
+# only if the field <dependsOnKey> exists.  Setting a computed field to the
+# value that it would compute anyway does not store anything.  (Setting it to
+# a different value stores that value which then overrides the computed
+# value.)
+#
+# Otherwise, these objects act like a dict (i.e. support record[key],
+# record.get(key), 'key in record', record.keys(), record.items(),
+# record.update(), record.pop(), len(record), etc.) and compare equal to a
+# dict with the same key/value pairs so they can be passed to all of the
+# functions that take a test or build dict (e.g. createHtmlTableStr()).  Use
+# toDict() to get a plain dict (e.g. to write out as JSON).
+#
+class SlottedDictRecord(MutableMapping):
+
+  __slots__ = ('_extraFields',)
+
+  fieldKeys = ()
+  fieldKeyToSlotNameDict = {}
+  computedKeys = {}
+
+  def __init__(self, dict_in=None):
+    self._extraFields = None
+    if dict_in:
+      self.update(dict_in)
+
+  def __getitem__(self, key):
+    slotName = self.fieldKeyToSlotNameDict.get(key, None)
+    if slotName:
+      try:
+        return getattr(self, slotName)
+      except AttributeError:
+        raise KeyError(key)
+    extraFields = self._extraFields
+    if extraFields and key in extraFields:
+      return extraFields[key]
+    computedKeyData = self.computedKeys.get(key, None)
+    if computedKeyData and computedKeyData[0] in self:
+      return computedKeyData[1](self)
+    raise KeyError(key)
+
+  def __setitem__(self, key, value):
+    slotName = self.fieldKeyToSlotNameDict.get(key, None)
+    if slotName:
+      setattr(self, slotName, value)
+      return
+    extraFields = self._extraFields
+    computedKeyData = self.computedKeys.get(key, None)
+    if computedKeyData and computedKeyData[0] in self \
+      and (not extraFields or key not in extraFields) \
+      and computedKeyData[1](self) == value \
+      :
+      return
+    if extraFields is None:
+      extraFields = self._extraFields = {}
+    extraFields[key] = value
+
+  def __delitem__(self, key):
+    slotName = self.fieldKeyToSlotNameDict.get(key, None)
+    if slotName:
+      try:
+        delattr(self, slotName)
+      except AttributeError:
+        raise KeyError(key)
+      return
+    extraFields = self._extraFields
+    if extraFields and key in extraFields:
+      del extraFields[key]
+      return
+    if key in self.computedKeys and self.computedKeys[key][0] in self:
+      raise Exception(
+        "Error, the computed field '"+str(key)+"' can't be removed from a "+\
+        self.__class__.__name__+" object!")
+    raise KeyError(key)
+
+  def __contains__(self, key):
+    slotName = self.fieldKeyToSlotNameDict.get(key, None)
+    if slotName:
+      return hasattr(self, slotName)
+    extraFields = self._extraFields
+    if extraFields and key in extraFields:
+      return True
+    computedKeyData = self.computedKeys.get(key, None)
+    if computedKeyData:
+      return computedKeyData[0] in self
+    return False
+
+  def __iter__(self):
+    for key in self.fieldKeys:
+      if hasattr(self, self.fieldKeyToSlotNameDict[key]):
+        yield key
+    extraFields = self._extraFields
+    for (key, computedKeyData) in self.computedKeys.items():
+      if computedKeyData[0] in self and (not extraFields or key not in extraFields):
+        yield key
+    if extraFields:
+      for key in list(extraFields.keys()):
+        yield key
+
+  def __len__(self):
+    numFields = 0
+    for key in self:
+      numFields += 1
+    return numFields
+
+  def __repr__(self):
+    return repr(dict(self.items()))
+
+  def clear(self):
+    for key in self.fieldKeys:
+      self.pop(key, None)
+    self._extraFields = None
+
+  def copy(self):
+    return self.__class__(self)
+
+  # Return a plain dict (recursively converting any nested records and lists
+  # of records)
+  def toDict(self):
+    return dict( (key, convertRecordsToDicts(value)) for (key, value) in self.items() )
+
+
+# Helper to define the fields of a class derived from SlottedDictRecord
+#
+# Usage:
+#
+#   class SomeRecord(SlottedDictRecord):
+#     fieldKeys = ( ... )
+#     __slots__ = getSlottedDictRecordSlotNames(fieldKeys)
+#     fieldKeyToSlotNameDict = getSlottedDictRecordFieldKeyToSlotNameDict(fieldKeys)
+#
+# NOTE: The slot names are not the same as the field names since some of the
+# field names (e.g. 'update') would otherwise hide the dict-like methods.
+#
+def getSlottedDictRecordSlotNames(fieldKeys):
+  return tuple( "_f_"+key for key in fieldKeys )
+
+def getSlottedDictRecordFieldKeyToSlotNameDict(fieldKeys):
+  return dict( (key, "_f_"+key) for key in fieldKeys )
+
+
+# Recursively convert SlottedDictRecord objects (and lists of them) into plain
+# dicts
 #
-# Has the same calling conventions and return value as the function
-# checkDictsAreSame().
+def convertRecordsToDicts(value):
+  if isinstance(value, SlottedDictRecord):
+    return value.toDict()
+  if isinstance(value, list):
+    return [ convertRecordsToDicts(ele) for ele in value ]
+  return value
+
+
+def getTestRecordTestHistoryBrowserUrl(testRecord):
+  return testRecord['test_history_browser_url']
+
+
+# Compact record for a test dict
 #
-# Returns tuple (hasSameKeyValuePairs, errMsg).  If
-# hasSameKeyValuePairs==True, then errMsg==None.  Otherwise, if
-# hasSameKeyValuePairs==False, then errMsg gives a string that explains how
-# they are different.
+# This stores the fields returned from cdash/api/v1/queryTests.php and the
+# fields added by AddIssueTrackerInfoToTestDictFunctor and
+# AddTestHistoryToTestDictFunctor in slots.  The '<stat>_color' and
+# '<stat>_url' fields for the test history statistics (which are the same
+# for every test) are computed on demand from the 'test_history_browser_url'
+# field.
 #
-# This improves on a simple check dict_1 == dict_2 in that shows exactly why
-# the dicts are different for a single key/value pair.
+class TestRecord(SlottedDictRecord):
+
+  fieldKeys = (
+    # Fields from cdash/api/v1/queryTests.php
+    'buildName', 'buildSummaryLink', 'buildstarttime', 'details', 'matchingoutput',
+    'nprocs', 'prettyProcTime', 'prettyTime', 'procTime', 'site', 'siteLink',
+    'status', 'statusclass', 'testDetailsLink', 'testname', 'time',
+    # Fields added for the issue trackers and testing day
+    'issue_tracker', 'issue_tracker_url', 'cdash_testing_day',
+    # Fields added by AddTestHistoryToTestDictFunctor
+    'status_color', 'site_url', 'buildName_url', 'testname_url', 'status_url',
+    'test_history_num_days', 'test_history_query_url', 'test_history_browser_url',
+    'test_history_list', 'pass_last_x_days', 'nopass_last_x_days',
+    'missing_last_x_days', 'consec_pass_days', 'consec_nopass_days',
+    'consec_missing_days', 'previous_nopass_date', 'status_changes_last_x_days',
+    'test_history_class',
+    )
+
+  __slots__ = getSlottedDictRecordSlotNames(fieldKeys)
+
+  fieldKeyToSlotNameDict = getSlottedDictRecordFieldKeyToSlotNameDict(fieldKeys)
+
+  computedKeys = {
+    'pass_last_x_days_color': ('test_history_browser_url',
+      lambda record: cdashColorPassed()),
+    'pass_last_x_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    'nopass_last_x_days_color': ('test_history_browser_url',
+      lambda record: cdashColorFailed()),
+    'nopass_last_x_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    'missing_last_x_days_color': ('test_history_browser_url',
+      lambda record: cdashColorMissing()),
+    'missing_last_x_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    'consec_pass_days_color': ('test_history_browser_url',
+      lambda record: cdashColorPassed()),
+    'consec_pass_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    'consec_nopass_days_color': ('test_history_browser_url',
+      lambda record: cdashColorFailed()),
+    'consec_nopass_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    'consec_missing_days_color': ('test_history_browser_url',
+      lambda record: cdashColorMissing()),
+    'consec_missing_days_url': ('test_history_browser_url',
+      getTestRecordTestHistoryBrowserUrl),
+    }
+
+
+# Compact record for a build dict
 #
-def checkCDashTestDictsAreSame(testDict_1, testDict_1_name,
-    testDict_2, testDict_2_name,
-  ):
-  # Check the easy case where they are exactly the same
-  if testDict_1 == testDict_2:
-    return (True, None)
-  # Check to see if 'testDetailsLink' is there in both and then check contents
-  sameBuildIdDifferentTestIds = False
-  if (
-      ('testDetailsLink' in testDict_1.keys()) \
-      and \
-      ('testDetailsLink' in testDict_2.keys()) \
-    ):
-    (test1d_1, buildid_1) = \
-      extractTestIdAndBuildIdFromTestDetailsLink(testDict_1['testDetailsLink'])
-    (test1d_2, buildid_2) = \
-      extractTestIdAndBuildIdFromTestDetailsLink(testDict_2['testDetailsLink'])
-    if (buildid_1 == buildid_2) and (test1d_1 != test1d_2):
-      # This is the special case that we are writing this function for!
-      sameBuildIdDifferentTestIds = True
-  # Set up copy to allow dropping out fields for comparison
-  testDict_1_copy = copy.deepcopy(testDict_1)
-  testDict_2_copy = copy.deepcopy(testDict_2)
-  # If buildIds are the same but the testIds are different, then check the
-  # rest of the key/value pairs to determine if they are the same:
-  if sameBuildIdDifferentTestIds:
-    testDict_1_copy.pop('testDetailsLink', None)
-    testDict_2_copy.pop('testDetailsLink', None)
-  # Don't require the same test times
-  testDict_1_copy.pop('time', None)
-  testDict_2_copy.pop('time', None)
-  testDict_1_copy.pop('prettyTime', None)
-  testDict_2_copy.pop('prettyTime', None)
-  testDict_1_copy.pop('procTime', None)
-  testDict_2_copy.pop('procTime', None)
-  testDict_1_copy.pop('prettyProcTime', None)
-  testDict_2_copy.pop('prettyProcTime', None)
-  # Don't require identical matching output
-  testDict_1_copy.pop('matchingoutput', None)
-  testDict_2_copy.pop('matchingoutput', None)
-  # Compare what ever fields are left that may be different and just use the
-  # standard comparison that will give a good error message for differences.
-  return checkDictsAreSame(testDict_1_copy, testDict_1_name,
-    testDict_2_copy, testDict_2_name )
+# This stores the fields returned for each build from cdash/api/v1/index.php
+# (and the 'group' field added by extendCDashIndexBuildDict()) in slots.
+#
+class BuildRecord(SlottedDictRecord):
 
+  fieldKeys = (
+    'group', 'site', 'siteid', 'buildname', 'buildplatform', 'buildstarttime',
+    'builddate', 'builddateelapsed', 'builddatefull', 'submitdate', 'id',
+    'label', 'numchildren', 'siteoutoforder', 'uploadfilecount', 'update',
+    'configure', 'compilation', 'test', 'buildnotes', 'done', 'hascompilation',
+    'hasconfigure', 'hastest', 'hasupdate', 'multiplebuildshyperlink', 'notes',
+    'position', 'time', 'timefull', 'timesummary', 'nerrorlog', 'status',
+    )
 
-# Get the test history CDash cache filename
+  __slots__ = getSlottedDictRecordSlotNames(fieldKeys)
+
+  fieldKeyToSlotNameDict = getSlottedDictRecordFieldKeyToSlotNameDict(fieldKeys)
+
+
+# Convert a list of dicts to a list of records in place
 #
-# Note: this takes care of things like having '/' in the test name
+# recordType [in]: The SlottedDictRecord class (e.g. TestRecord or
+# BuildRecord).
 #
-def getTestHistoryCacheFileName(date, site, buildName, testname, daysOfHistory):
-  testHistoryFileName = \
-    date+"-"+site+"-"+buildName+"-"+testname+"-HIST-"+str(daysOfHistory)+".json"
-  return testHistoryFileName.replace('/', '_')
+# Elements that are already of type recordType are left as is.  Returns the
+# modified list listOfDicts_inout.
+#
+def convertListOfDictsToRecords(listOfDicts_inout, recordType):
+  for i in range(len(listOfDicts_inout)):
+    if not isinstance(listOfDicts_inout[i], recordType):
+      listOfDicts_inout[i] = recordType(listOfDicts_inout[i])
+  return listOfDicts_inout
 
 
 # Transform functor that computes and add detailed test history to an existing
@@ -1632,10 +5562,31 @@ class AddTestHistoryToTestDictFunctor(object):
   # By default, this wil always read the data from the cache file if that file
   # already exists.
   #
+  # If testHistoryStore!=None (a TestHistoryStore object) and the test history
+  # is not read from the cache file, then only the testing days not already
+  # in testHistoryStore are downloaded from CDash and the rest of the test
+  # history comes from the store.  (The test history is still written to the
+  # cache file.)  If useCachedCDashData==True, then the store is only used if
+  # it has all of the testing days and CDash is never called (i.e. an
+  # exception is thrown if neither the store nor the cache file has the test
+  # history).
+  #
+  # If useTestRecords==True, then the returned test dict and the dicts in its
+  # 'test_history_list' field are compact TestRecord objects instead of plain
+  # dicts.
+  #
+  # If testHistoryLODCache!=None (a dict), then the test history gotten for
+  # each test is stored in this dict (keyed by the test history cache file
+  # path) and is reused for that test without reading the cache file again.
+  # This allows the same dict to be shared by multiple functor objects for
+  # the same testing day (e.g. for the reports for multiple build-sets with
+  # overlapping tests).
+  #
   def __init__(self, cdashUrl, projectName, date, testingDayStartTimeUtc, daysOfHistory,
     testCacheDir, useCachedCDashData=True, alwaysUseCacheFileIfExists=True,
     verbose=False, printDetails=False, requireMatchTestTopTestHistory=True,
     extractCDashApiQueryData_in=extractCDashApiQueryData, # For unit testing
+    testHistoryStore=None, useTestRecords=False, testHistoryLODCache=None,
     ):
     self.__cdashUrl = cdashUrl
     self.__projectName = projectName
@@ -1649,21 +5600,51 @@ class AddTestHistoryToTestDictFunctor(object):
     self.__printDetails = printDetails
     self.__requireMatchTestTopTestHistory = requireMatchTestTopTestHistory
     self.__extractCDashApiQueryData_in = extractCDashApiQueryData_in
+    self.__testHistoryStore = testHistoryStore
+    self.__useTestRecords = useTestRecords
+    self.__testHistoryLODCache = testHistoryLODCache
 
   # Get test history off CDash and add test history info and URL to info we
   # find out from that test history
   #
   def __call__(self, testDict):
+    testHistoryLOD = self.getTestHistoryLOD(testDict)
+    (testHistoryLOD, testHistoryStats, testStatus) = sortTestHistoryGetStatistics(
+      testHistoryLOD, self.__date, self.__testingDayStartTimeUtc,
+      self.__daysOfHistory)
+    return self.addTestHistoryStatisticsToTestDict(testDict, testHistoryLOD,
+      testHistoryStats, testStatus)
 
-    #pp = pprint.PrettyPrinter(indent=2)
-
-    #print("\ntestDict:\n")
-    #pp.pprint(testDict)
+  # Add the test history to all of the test dicts in testsLOD_inout
+  #
+  # This gives the same result as foreachTransformConcurrently(testsLOD_inout,
+  # self, maxConcurrency, getElementDescr) except that the test history
+  # statistics for all of the tests are computed together at the end with
+  # getTestHistoryStatisticsForTests() (which is much faster when there are
+  # many tests).
+  #
+  @timeFunctionCalls('test_history.add_to_tests')
+  def addTestHistoryToTestDicts(self, testsLOD_inout, maxConcurrency=1,
+      getElementDescr=str,
+    ):
+    testHistoryLODList = list(testsLOD_inout)
+    foreachTransformConcurrently(testHistoryLODList, self.getTestHistoryLOD,
+      maxConcurrency, getElementDescr=getElementDescr)
+    testHistoryDataList = getTestHistoryStatisticsForTests(testHistoryLODList,
+      self.__date, self.__testingDayStartTimeUtc, self.__daysOfHistory)
+    for i in range(len(testsLOD_inout)):
+      (testHistoryLOD, testHistoryStats, testStatus) = testHistoryDataList[i]
+      testsLOD_inout[i] = self.addTestHistoryStatisticsToTestDict(
+        testsLOD_inout[i], testHistoryLOD, testHistoryStats, testStatus)
+    return testsLOD_inout
+
+  # Get the (unsorted) test history for the test from the cache file, the
+  # test history store, or CDash
+  #
+  @timeFunctionCalls('test_history.get')
+  def getTestHistoryLOD(self, testDict):
 
     # Get short names for data inside of this functor
-    cdashUrl = self.__cdashUrl
-    projectName = self.__projectName
-    testDayDate = validateAndConvertYYYYMMDD(self.__date)
     daysOfHistory = self.__daysOfHistory
 
     # Get basic info about the test from the from the testDict
@@ -1671,25 +5652,104 @@ class AddTestHistoryToTestDictFunctor(object):
     buildName = testDict["buildName"]
     testname = testDict["testname"]
 
-    # Determine if this test has data from CDash or if it does not
-    if testDict.get('buildstarttime', None):
-      testAlreadyHasCDashData = True
+    # Get the URL used to get the history of the test in JSON form
+    (beginEndUrlFields, testFilters) = \
+      self.getTestHistoryQueryFilters(site, buildName, testname)
+    testHistoryQueryUrl = getCDashQueryTestsQueryUrl(self.__cdashUrl,
+      self.__projectName, None, beginEndUrlFields+"&"+testFilters)
+
+    # Set the names of the cached files so we can check if they exists and
+    # write them out otherwise
+    testHistoryCacheFilePath = getTestHistoryCacheFilePath(self.__testCacheDir,
+      self.__date, site, buildName, testname, daysOfHistory)
+
+    # Reuse the test history already gotten for this test
+    if self.__testHistoryLODCache is not None:
+      testHistoryLOD = self.__testHistoryLODCache.get(testHistoryCacheFilePath, None)
+      if testHistoryLOD is not None:
+        if self.__verbose:
+          print("Reusing "+str(daysOfHistory)+" days of history for "+testname+\
+            " in the build "+buildName+" on "+site)
+        getDefaultTimingRegistry().incrementCounter('test_history.cache_hits')
+        return testHistoryLOD
+
+    useTestHistoryCacheFile = \
+      cdashQueryDataCacheFileExists(testHistoryCacheFilePath) and \
+      (self.__alwaysUseCacheFileIfExists or self.__useCachedCDashData)
+    if useTestHistoryCacheFile:
+      getDefaultTimingRegistry().incrementCounter('test_history.cache_hits')
     else:
-      testAlreadyHasCDashData = False
+      getDefaultTimingRegistry().incrementCounter('test_history.cache_misses')
+
+    useTestHistoryStore = \
+      self.__testHistoryStore and not useTestHistoryCacheFile
+    if useTestHistoryStore and self.__useCachedCDashData:
+      # Never go out to CDash with cached data so only use the store if it
+      # has all of the testing days (otherwise reading the missing cache file
+      # below throws)
+      useTestHistoryStore = not self.getTestHistoryStoreMissingTestingDays(
+        site, buildName, testname)
+
+    if useTestHistoryStore:
+      # Get the test history from the store and just the missing days from
+      # CDash
+      testHistoryLOD = self.getTestHistoryUsingStore(site, buildName, testname,
+        testFilters)
+      if not self.__useCachedCDashData:
+        writeCDashQueryDataCacheFile({'builds':testHistoryLOD},
+          testHistoryCacheFilePath)
+    else:
+      if self.__verbose:
+        gettingTestHistoryMsg = \
+          "Getting "+str(daysOfHistory)+" days of history for "+testname+\
+          " in the build "+buildName+" on "+site
+        if cdashQueryDataCacheFileExists(testHistoryCacheFilePath):
+          gettingTestHistoryMsg += " from cache file"
+        else:
+          gettingTestHistoryMsg += " from CDash"
+        print(gettingTestHistoryMsg)
+      # Get the test history off of CDash (or from reading the cache file)
+      testHistoryLOD = downloadTestsOffCDashQueryTestsAndFlatten(
+        testHistoryQueryUrl, testHistoryCacheFilePath,
+        useCachedCDashData=self.__useCachedCDashData,
+        alwaysUseCacheFileIfExists=self.__alwaysUseCacheFileIfExists,
+        verbose=self.__printDetails,
+        extractCDashApiQueryData_in=self.__extractCDashApiQueryData_in
+        )
+
+    if self.__useTestRecords:
+      convertListOfDictsToRecords(testHistoryLOD, TestRecord)
+
+    if self.__testHistoryLODCache is not None:
+      self.__testHistoryLODCache[testHistoryCacheFilePath] = testHistoryLOD
+
+    return testHistoryLOD
+
+  # Update the status of the test and add the sorted test history and test
+  # history statistics (see sortTestHistoryGetStatistics()) and the test
+  # history URLs to the test dict
+  #
+  def addTestHistoryStatisticsToTestDict(self, testDict, testHistoryLOD,
+      testHistoryStats, testStatus,
+    ):
+
+    # Get short names for data inside of this functor
+    cdashUrl = self.__cdashUrl
+    projectName = self.__projectName
+    daysOfHistory = self.__daysOfHistory
+
+    if self.__useTestRecords and not isinstance(testDict, TestRecord):
+      testDict = TestRecord(testDict)
 
-    # Get the date range for CDash queries
-    dateRangeBeginDT = testDayDate - datetime.timedelta(days=(daysOfHistory-1))
-    dateRangeBeginDateStr = CBTD.getDateStrFromDateTime(dateRangeBeginDT)
-    dateRangeEndDateStr = self.__date
-    beginEndUrlFields = "begin="+dateRangeBeginDateStr+"&end="+dateRangeEndDateStr
+    # Get basic info about the test from the from the testDict
+    site = testDict["site"]
+    buildName = testDict["buildName"]
+    testname = testDict["testname"]
 
     # Define queryTests.php query filters for test history
-    testHistoryQueryFilters = \
-      beginEndUrlFields+"&"+\
-      "filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and"+\
-      "&field1=buildname&compare1=61&value1="+buildName+\
-      "&field2=testname&compare2=61&value2="+testname+\
-      "&field3=site&compare3=61&value3="+site
+    (beginEndUrlFields, testFilters) = \
+      self.getTestHistoryQueryFilters(site, buildName, testname)
+    testHistoryQueryFilters = beginEndUrlFields+"&"+testFilters
 
     # URL used to get the history of the test in JSON form
     testHistoryQueryUrl = \
@@ -1702,50 +5762,13 @@ class AddTestHistoryToTestDictFunctor(object):
     # URL for to the build summary on index.php page
     buildHistoryEmailUrl = getCDashIndexBrowserUrl(
       cdashUrl, projectName, None,
-      beginEndUrlFields+"&"+\
-      "filtercombine=and&filtercombine=&filtercount=2&showfilters=1&filtercombine=and"+\
-      "&field1=buildname&compare1=61&value1="+buildName+\
-      "&field2=site&compare2=61&value2="+site
-      )
+      getBuildHistoryQueryFilters(beginEndUrlFields, site, buildName) )
     # ToDo: Replace this with the the URL to just this one build the index.php
     # page.  To do that, get the build stamp from the list of builds on CDash
     # and then create a URL link for this one build given 'site', 'buildName',
     # and 'buildStamp'.  (NOTE: We can't use 'buildstarttime' without
     # replacing ':' with '%' or the URL will not work with CDash.)
 
-    # Set the names of the cached files so we can check if they exists and
-    # write them out otherwise
-    testHistoryCacheFileFullName = \
-      getTestHistoryCacheFileName(self.__date,site,buildName,testname,daysOfHistory)
-    # Possibly compress the file name if it is too long
-    testHistoryCacheFilePath = \
-     self.__testCacheDir+"/"+\
-      getCompressedFileNameIfTooLong(testHistoryCacheFileFullName,self.__date+"-","json")
-
-    if self.__verbose:
-      gettingTestHistoryMsg = \
-        "Getting "+str(daysOfHistory)+" days of history for "+testname+\
-        " in the build "+buildName+" on "+site
-      if os.path.exists(testHistoryCacheFilePath):
-        gettingTestHistoryMsg += " from cache file"
-      else:
-        gettingTestHistoryMsg += " from CDash"
-      print(gettingTestHistoryMsg)
-
-    # Get the test history off of CDash (or from reading the cache file)
-    testHistoryLOD = downloadTestsOffCDashQueryTestsAndFlatten(
-      testHistoryQueryUrl, testHistoryCacheFilePath,
-      useCachedCDashData=self.__useCachedCDashData,
-      alwaysUseCacheFileIfExists=self.__alwaysUseCacheFileIfExists,
-      verbose=self.__printDetails,
-      extractCDashApiQueryData_in=self.__extractCDashApiQueryData_in
-      )
-
-    # Sort and get test history stats and update core testDict fields
-
-    (testHistoryLOD, testHistoryStats, testStatus) = sortTestHistoryGetStatistics(
-      testHistoryLOD, self.__date, self.__testingDayStartTimeUtc, daysOfHistory)
-
     # Assert and update the status
 
     #print("\ntestStatus = "+str(testStatus))
@@ -1839,6 +5862,63 @@ class AddTestHistoryToTestDictFunctor(object):
     # Return the updated test dict with the new fields
     return testDict
 
+  # Get the date range URL fields and the queryTests.php query filters for
+  # the test history of a test
+  def getTestHistoryQueryFilters(self, site, buildName, testname):
+    beginEndUrlFields = \
+      getTestHistoryBeginEndUrlFields(self.__date, self.__daysOfHistory)
+    testFilters = \
+      "filtercombine=and&filtercombine=&filtercount=3&showfilters=1&filtercombine=and"+\
+      "&field1=buildname&compare1=61&value1="+buildName+\
+      "&field2=testname&compare2=61&value2="+testname+\
+      "&field3=site&compare3=61&value3="+site
+    return (beginEndUrlFields, testFilters)
+
+  # Get the list of testing days for the test history of the test that are
+  # missing from the test history store
+  def getTestHistoryStoreMissingTestingDays(self, site, buildName, testname):
+    return self.__testHistoryStore.getMissingTestingDays(
+      (self.__projectName, site, buildName, testname),
+      getTestHistoryTestingDaysList(self.__date, self.__daysOfHistory) )
+
+  # Get the test history from the test history store after downloading just
+  # the testing days missing from the store from CDash
+  def getTestHistoryUsingStore(self, site, buildName, testname, testFilters):
+    testHistoryStore = self.__testHistoryStore
+    daysOfHistory = self.__daysOfHistory
+    testKey = (self.__projectName, site, buildName, testname)
+    testingDaysList = getTestHistoryTestingDaysList(self.__date, daysOfHistory)
+    missingTestingDaysList = \
+      self.getTestHistoryStoreMissingTestingDays(site, buildName, testname)
+    if self.__verbose:
+      print("Getting "+str(daysOfHistory)+" days of history for "+testname+\
+        " in the build "+buildName+" on "+site+" from the test history store"+\
+        " ("+str(len(missingTestingDaysList))+" days from CDash)")
+    if missingTestingDaysList:
+      # Download all of the days from the first missing day to the current
+      # testing day
+      fetchTestingDaysList = \
+        testingDaysList[testingDaysList.index(missingTestingDaysList[0]):]
+      fetchTestHistoryQueryFilters = \
+        getTestHistoryBeginEndUrlFields(self.__date, len(fetchTestingDaysList))+\
+        "&"+testFilters
+      fetchTestHistoryQueryUrl = getCDashQueryTestsQueryUrl(self.__cdashUrl,
+        self.__projectName, None, fetchTestHistoryQueryFilters)
+      fetchedTestHistoryLOD = downloadTestsOffCDashQueryTestsAndFlatten(
+        fetchTestHistoryQueryUrl, verbose=self.__printDetails,
+        extractCDashApiQueryData_in=self.__extractCDashApiQueryData_in )
+      testHistoryStore.addTestHistory(testKey, fetchTestingDaysList,
+        fetchedTestHistoryLOD, self.__testingDayStartTimeUtc,
+        completeBeforeDate=self.__date)
+    return testHistoryStore.getTestHistory(testKey, testingDaysList)
+
+
+# Get a short string that identifies a test dict for error messages
+def getTestDictSiteBuildTestNameStr(testDict):
+  return "site='"+str(testDict.get('site',None))+"'"+\
+    ", buildName='"+str(testDict.get('buildName',None))+"'"+\
+    ", testname='"+str(testDict.get('testname',None))+"'"
+
 
 def setTestDictAsMissing(testDict):
   testDict['status'] = "Missing"
@@ -1985,14 +6065,17 @@ def downloadBuildsOffCDashAndFlatten(
     verbose=True,
     extractCDashApiQueryData_in=extractCDashApiQueryData,
   ):
+  timingRegistry = getDefaultTimingRegistry()
   # Get the query data
-  fullCDashIndexBuildsJson = getAndCacheCDashQueryDataOrReadFromCache(
-    cdashIndexBuildsQueryUrl, fullCDashIndexBuildsJsonCacheFile, useCachedCDashData,
-    alwaysUseCacheFileIfExists, verbose=verbose,
-    extractCDashApiQueryData_in=extractCDashApiQueryData_in )
+  with timingRegistry.timer('builds.download'):
+    fullCDashIndexBuildsJson = getAndCacheCDashQueryDataOrReadFromCache(
+      cdashIndexBuildsQueryUrl, fullCDashIndexBuildsJsonCacheFile, useCachedCDashData,
+      alwaysUseCacheFileIfExists, verbose=verbose,
+      extractCDashApiQueryData_in=extractCDashApiQueryData_in )
   # Get trimmed down set of builds
-  buildsListOfDicts = \
-    flattenCDashIndexBuildsToListOfDicts(fullCDashIndexBuildsJson)
+  with timingRegistry.timer('builds.flatten'):
+    buildsListOfDicts = \
+      flattenCDashIndexBuildsToListOfDicts(fullCDashIndexBuildsJson)
   return buildsListOfDicts
 
 
@@ -2020,6 +6103,11 @@ def downloadBuildsOffCDashAndFlatten(
 # The list of tests pulled off CDash is flattended and returned by the
 # function flattenCDashQueryTestsToListOfDicts().
 #
+# If chunkQueryUrlsList!=None, then the tests are downloaded from CDash in
+# the chunks given by these query URLs (instead of using cdashQueryTestsUrl)
+# with up to chunkMaxConcurrency chunks downloaded at the same time (see
+# iterateTestsOffCDashQueryTestsInChunks()).
+#
 # NOTE: The optional argument extractCDashApiQueryData_in is used in unit
 # testing to avoid calling CDash.
 #
@@ -2030,7 +6118,14 @@ def downloadTestsOffCDashQueryTestsAndFlatten(
     alwaysUseCacheFileIfExists = False,
     verbose=True,
     extractCDashApiQueryData_in=extractCDashApiQueryData,
+    chunkQueryUrlsList=None,
+    chunkMaxConcurrency=1,
   ):
+  if chunkQueryUrlsList:
+    return list(iterateTestsOffCDashQueryTestsInChunks(chunkQueryUrlsList,
+      fullCDashQueryTestsJsonCacheFile, useCachedCDashData,
+      alwaysUseCacheFileIfExists, verbose, chunkMaxConcurrency,
+      extractCDashApiQueryData_in))
   # Get the query data
   fullCDashQueryTestsJson = getAndCacheCDashQueryDataOrReadFromCache(
     cdashQueryTestsUrl, fullCDashQueryTestsJsonCacheFile, useCachedCDashData,
@@ -2042,6 +6137,232 @@ def downloadTestsOffCDashQueryTestsAndFlatten(
   return testsListOfDicts
 
 
+# Iterate over the tests from cdash/api/v1/ctest/queryTests.php without
+# reading all of them into memory
+#
+# This is a generator that yields the same test dicts (in the same order) as
+# the list returned from downloadTestsOffCDashQueryTestsAndFlatten() (with the
+# same arguments) and reads and writes the cache file
+# fullCDashQueryTestsJsonCacheFile in the same way.  But the test dicts are
+# parsed and yielded one at a time as they are read from CDash or from the
+# cache file (and are written to the new cache file as they are read).
+# Therefore, if the caller only keeps the test dicts it needs (e.g. using
+# getFilteredList()), then the memory usage stays small no matter how many
+# tests are returned from CDash.
+#
+# iterateCDashApiQueryDataArray_in [in]: Function with the same signature as
+# iterateCDashApiQueryDataArray() (for unit testing).
+#
+def iterateTestsOffCDashQueryTests(
+    cdashQueryTestsUrl,
+    fullCDashQueryTestsJsonCacheFile=None,
+    useCachedCDashData=False,
+    alwaysUseCacheFileIfExists = False,
+    verbose=True,
+    iterateCDashApiQueryDataArray_in=iterateCDashApiQueryDataArray,
+  ):
+  if (
+      fullCDashQueryTestsJsonCacheFile \
+      and (
+        useCachedCDashData \
+        or (alwaysUseCacheFileIfExists and \
+          cdashQueryDataCacheFileExists(fullCDashQueryTestsJsonCacheFile))
+        ) \
+    ):
+    if verbose:
+      print("  Using cached data from file:\n    "+\
+        fullCDashQueryTestsJsonCacheFile )
+    getDefaultTimingRegistry().incrementCounter('cdash_query_data.cache_hits')
+    for testDict in iterateCDashQueryDataCacheFileArray(
+        fullCDashQueryTestsJsonCacheFile, 'builds',
+        migrateLegacyFormat=g_migrateLegacyCDashQueryDataCacheFiles,
+        verbose=verbose \
+      ):
+      yield testDict
+    return
+  if verbose:
+    print("  Downloading CDash data from:\n    "+cdashQueryTestsUrl )
+  getDefaultTimingRegistry().incrementCounter('cdash_query_data.cache_misses')
+  otherData = {}
+  if fullCDashQueryTestsJsonCacheFile:
+    if verbose:
+      print("  Caching data downloaded from CDash to file:\n    "+\
+        fullCDashQueryTestsJsonCacheFile)
+    cacheFileWriter = CDashQueryDataCacheFileArrayWriter(
+      fullCDashQueryTestsJsonCacheFile, 'builds')
+  else:
+    cacheFileWriter = None
+  try:
+    for testDict in iterateCDashApiQueryDataArray_in(cdashQueryTestsUrl,
+        'builds', otherData \
+      ):
+      if cacheFileWriter: cacheFileWriter.addArrayElement(testDict)
+      yield testDict
+    if cacheFileWriter: cacheFileWriter.commit(otherData)
+  finally:
+    if cacheFileWriter: cacheFileWriter.abort()
+
+
+# Get a function like iterateCDashApiQueryDataArray() that gets the data
+# using a function like extractCDashApiQueryData()
+#
+# If extractCDashApiQueryData_in is extractCDashApiQueryData(), then
+# iterateCDashApiQueryDataArray() is returned (which streams the data).
+# Otherwise (e.g. for a mock used in unit testing), the returned function gets
+# all of the data with extractCDashApiQueryData_in() and then iterates over
+# the array.
+#
+def getIterateCDashApiQueryDataArrayFunc(extractCDashApiQueryData_in):
+  if extractCDashApiQueryData_in == extractCDashApiQueryData:
+    return iterateCDashApiQueryDataArray
+  def iterateExtractedCDashApiQueryDataArray(cdashApiQueryUrl, arrayKey,
+      otherData_out=None,
+    ):
+    cdashQueryData = extractCDashApiQueryData_in(cdashApiQueryUrl)
+    if otherData_out != None:
+      for (key, value) in cdashQueryData.items():
+        if key != arrayKey: otherData_out[key] = value
+    return iter(cdashQueryData.get(arrayKey, []))
+  return iterateExtractedCDashApiQueryDataArray
+
+
+# Get the cache file path for one chunk of the data for a cache file
+#
+# The chunk cache file is put in the same directory as cacheFilePath and its
+# name is made unique for the chunk query URL (so that the cache file for a
+# chunk is never used for a different query).
+#
+def getCDashQueryChunkCacheFilePath(cacheFilePath, chunkQueryUrl):
+  (cacheFileBase, cacheFileExt) = os.path.splitext(cacheFilePath)
+  chunkHashStr = hashlib.sha1(chunkQueryUrl.encode('utf-8')).hexdigest()[0:16]
+  return cacheFileBase+"_chunk_"+chunkHashStr+cacheFileExt
+
+
+# Iterate over the tests from cdash/api/v1/ctest/queryTests.php downloaded in
+# chunks
+#
+# chunkQueryUrlsList [in]: The cdash/api/v1/queryTests.php query URLs for
+# the chunks of the tests (e.g. from getCDashQueryUrlChunksByField() or
+# getCDashQueryUrlChunksByDateRange()).  The chunks must not overlap.
+#
+# This is a generator that yields the test dicts for all of the chunks (in the
+# order of chunkQueryUrlsList) and reads and writes the cache file
+# fullCDashQueryTestsJsonCacheFile in the same way as
+# iterateTestsOffCDashQueryTests().  But if the data is not read from that
+# cache file, then the chunks are downloaded from CDash (up to maxConcurrency
+# chunks at the same time) where each chunk is streamed into its own chunk
+# cache file (see getCDashQueryChunkCacheFilePath()).  Then the test dicts
+# are streamed out of the chunk cache files into the full cache file and
+# yielded, and the chunk cache files are removed.  Therefore, only one chunk
+# per download at a time needs to fit in memory and each query only returns
+# part of the tests (which avoids timeouts on CDash for very large queries).
+#
+# If any of the chunks fail to download, then an exception is raised (see
+# foreachTransformConcurrently()).  The chunk cache files for the chunks that
+# were downloaded are kept and are used the next time this is called for the same
+# chunk query URLs so that only the failed chunks are downloaded again.
+#
+# If fullCDashQueryTestsJsonCacheFile==None, then no cache files are written
+# and all of the chunks are kept in memory.
+#
+# NOTE: The optional argument extractCDashApiQueryData_in is used in unit
+# testing to avoid calling CDash.
+#
+def iterateTestsOffCDashQueryTestsInChunks(
+    chunkQueryUrlsList,
+    fullCDashQueryTestsJsonCacheFile=None,
+    useCachedCDashData=False,
+    alwaysUseCacheFileIfExists = False,
+    verbose=True,
+    maxConcurrency=1,
+    extractCDashApiQueryData_in=extractCDashApiQueryData,
+  ):
+  if (
+      fullCDashQueryTestsJsonCacheFile \
+      and (
+        useCachedCDashData \
+        or (alwaysUseCacheFileIfExists and \
+          cdashQueryDataCacheFileExists(fullCDashQueryTestsJsonCacheFile))
+        ) \
+    ):
+    for testDict in iterateTestsOffCDashQueryTests(None,
+        fullCDashQueryTestsJsonCacheFile, useCachedCDashData=True,
+        verbose=verbose \
+      ):
+      yield testDict
+    return
+  iterateCDashApiQueryDataArray_in = \
+    getIterateCDashApiQueryDataArrayFunc(extractCDashApiQueryData_in)
+  # Download the chunks
+  def downloadChunk(chunkQueryUrl):
+    if not fullCDashQueryTestsJsonCacheFile:
+      return list(iterateCDashApiQueryDataArray_in(chunkQueryUrl, 'builds'))
+    chunkCacheFile = getCDashQueryChunkCacheFilePath(
+      fullCDashQueryTestsJsonCacheFile, chunkQueryUrl)
+    for testDict in iterateTestsOffCDashQueryTests(chunkQueryUrl,
+        chunkCacheFile, alwaysUseCacheFileIfExists=True, verbose=verbose,
+        iterateCDashApiQueryDataArray_in=iterateCDashApiQueryDataArray_in \
+      ):
+      pass
+    return chunkCacheFile
+  timingRegistry = getDefaultTimingRegistry()
+  with timingRegistry.timer('tests.download_chunks'):
+    chunksList = list(chunkQueryUrlsList)
+    foreachTransformConcurrently(chunksList, downloadChunk, maxConcurrency)
+  timingRegistry.incrementCounter('tests.chunks', len(chunksList))
+  # Merge the chunks
+  if not fullCDashQueryTestsJsonCacheFile:
+    for chunkTestsLOD in chunksList:
+      for testDict in chunkTestsLOD:
+        yield testDict
+    return
+  if verbose:
+    print("  Merging "+str(len(chunksList))+" chunks into the cache file:\n"+\
+      "    "+fullCDashQueryTestsJsonCacheFile)
+  otherData = None
+  cacheFileWriter = CDashQueryDataCacheFileArrayWriter(
+    fullCDashQueryTestsJsonCacheFile, 'builds')
+  try:
+    for chunkCacheFile in chunksList:
+      chunkOtherData = {}
+      for testDict in iterateCDashQueryDataCacheFileArray(chunkCacheFile,
+          'builds', chunkOtherData \
+        ):
+        cacheFileWriter.addArrayElement(testDict)
+        yield testDict
+      if otherData == None: otherData = chunkOtherData
+    cacheFileWriter.commit(otherData or {})
+  finally:
+    cacheFileWriter.abort()
+  for chunkCacheFile in chunksList:
+    os.remove(chunkCacheFile)
+
+
+# Iterator that counts the elements it yields from another iterable
+#
+# Usage:
+#
+#   countingIter = CountingIterator(iterateTestsOffCDashQueryTests(...))
+#   testsLOD = getFilteredList(countingIter, matchFunctor)
+#   print("Num tests = "+str(countingIter.count))
+#
+class CountingIterator(object):
+
+  def __init__(self, iterable):
+    self.iterator = iter(iterable)
+    self.count = 0
+
+  def __iter__(self):
+    return self
+
+  def __next__(self):
+    nextElement = next(self.iterator)
+    self.count += 1
+    return nextElement
+
+  next = __next__  # Python 2
+
+
 # Returns True if a build has configure failures
 def buildHasConfigureFailures(buildDict):
   configureDict = buildDict.get('configure', None)
@@ -2131,47 +6452,65 @@ def getOverallCDashReportSummaryLine(cdashReportData, buildsetName, date):
 ################################################################################
 
 
+# Get the full HTML page string for the CDash report (see
+# writeFullCDashHtmlReportPage())
 def getFullCDashHtmlReportPageStr(cdashReportData, pageTitle="", pageStyle="",
     detailsBlockSummary=None,
   ):
+  htmlPageParts = []
+  writeFullCDashHtmlReportPage(htmlPageParts.append, cdashReportData,
+    pageTitle=pageTitle, pageStyle=pageStyle,
+    detailsBlockSummary=detailsBlockSummary)
+  return "".join(htmlPageParts)
 
-  htmlPage = \
-    "<html>\n\n"
+
+# Write the full HTML page for the CDash report one part at a time
+#
+# writeFunc [in]: Function called as writeFunc(htmlStr) for each part of the
+# page in order (e.g. outFile.write or htmlPageParts.append).
+#
+# The HTML body top and bottom parts in cdashReportData are written directly
+# without joining them first.
+#
+@timeFunctionCalls('html.page')
+def writeFullCDashHtmlReportPage(writeFunc, cdashReportData, pageTitle="",
+    pageStyle="", detailsBlockSummary=None,
+  ):
+
+  writeFunc(
+    "<html>\n\n")
 
   if pageStyle:
-    htmlPage += \
+    writeFunc(
       "<head>\n"+\
       pageStyle+\
-      "</head>\n\n"
+      "</head>\n\n")
 
-  htmlPage += \
-    "<body>\n\n"
+  writeFunc(
+    "<body>\n\n")
 
   if pageTitle:
-    htmlPage += \
-      "<h2>"+pageTitle+"</h2>\n\n"
+    writeFunc(
+      "<h2>"+pageTitle+"</h2>\n\n")
 
-  htmlPage += \
-    cdashReportData.htmlEmailBodyTop+\
-    "\n"
+  cdashReportData.writeHtmlEmailBodyTop(writeFunc)
+  writeFunc("\n")
 
   if detailsBlockSummary:
-    htmlPage += \
+    writeFunc(
       "<details>\n\n"+\
-      "<summary><b>"+detailsBlockSummary+":</b> (click to expand)</b></summary>\n\n"
-  htmlPage += \
-    cdashReportData.htmlEmailBodyBottom+\
-    "\n"
+      "<summary><b>"+detailsBlockSummary+":</b> (click to expand)</b></summary>\n\n")
+
+  cdashReportData.writeHtmlEmailBodyBottom(writeFunc)
+  writeFunc("\n")
 
   if detailsBlockSummary:
-    htmlPage += \
-      "</details>\n\n"
+    writeFunc(
+      "</details>\n\n")
 
-  htmlPage += \
+  writeFunc(
     "</body>\n\n"+\
-    "</html>\n"
-
-  return htmlPage
+    "</html>\n")
 
 
 def getDefaultHtmlPageStyleStr():
@@ -2269,8 +6608,22 @@ def addHtmlSoftWordBreaks(text_in):
 def createHtmlTableStr(tableTitle, colDataList, rowDataList,
     htmlStyle=None, htmlTableStyle=None \
   ):
+  htmlStrParts = []
+  writeHtmlTable(htmlStrParts.append, tableTitle, colDataList, rowDataList,
+    htmlStyle, htmlTableStyle)
+  return "".join(htmlStrParts)
 
-  htmlStr = ""
+
+# Write an HTML table from a list of dicts and column headers
+#
+# Same as createHtmlTableStr() except the table is passed to
+# writeFunc(htmlStr) one row at a time instead of being returned as a string
+# (e.g. writeFunc=outFile.write or cdashReportData.appendHtmlEmailBodyBottom).
+#
+@timeFunctionCalls('html.tables')
+def writeHtmlTable(writeFunc, tableTitle, colDataList, rowDataList,
+    htmlStyle=None, htmlTableStyle=None \
+  ):
 
   # style options for the table
   defaultHtmlStyle=\
@@ -2285,6 +6638,7 @@ def createHtmlTableStr(tableTitle, colDataList, rowDataList,
   if htmlStyle == "": htmlStyleUsed = ""
   elif htmlStyle != None: htmlStyleUsed = htmlStyle
   else: htmlStyleUsed = defaultHtmlStyle
+  htmlStr = ""
   if htmlStyleUsed:
     htmlStr+=htmlStyleUsed+"\n"
 
@@ -2299,44 +6653,53 @@ def createHtmlTableStr(tableTitle, colDataList, rowDataList,
   for colData in colDataList:
     htmlStr+="<th>"+colData.colHeader+"</th>\n"
   htmlStr+="</tr>\n\n"
+  writeFunc(htmlStr)
+
+  # Formatting data for each column that is the same for every row
+  colFormatList = [ getHtmlTableColumnFormat(colData) for colData in colDataList ]
 
   # Rows for the table
   row_i = 0
   for rowData in rowDataList:
-    htmlStr+="<tr>\n"
+    rowStrParts = ["<tr>\n"]
     col_j = 0
-    for colData in colDataList:
-      dictKey = colData.dictKey
+    for (dictKey, colorKey, urlKey, cellBeginStr) in colFormatList:
       # Get the raw entry for this column
       entry = rowData.get(dictKey, None)
       if entry == None:
         raise Exception(
-          "Error, column "+str(col_j)+" dict key='"+colData.dictKey+"'"+\
+          "Error, column "+str(col_j)+" dict key='"+dictKey+"'"+\
           " row "+str(row_i)+" entry is 'None' which is not allowed!\n\n"+\
           "Row dict = "+str(rowData))
       # Add soft word breaks to allow line breaks for table compression
       entry = addHtmlSoftWordBreaks(str(entry).strip())
       # Add color if defined for this field
-      entryColor = rowData.get(dictKey+"_color", None)
+      entryColor = rowData.get(colorKey, None)
       if entryColor:
         entry = colorHtmlText(entry, entryColor)
       # See if the _url key also exists
-      entry_url = rowData.get(dictKey+"_url", None)
-      # Set the text for this row/column entry with or without the hyperlink
+      entry_url = rowData.get(urlKey, None)
+      # Set the row entry in the HTML table with or without the hyperlink
       if entry_url:
-        entryStr = "<a href=\""+entry_url+"\">"+str(entry)+"</a>"
+        rowStrParts.append(
+          cellBeginStr+"<a href=\""+entry_url+"\">"+entry+"</a></td>\n")
       else:
-        entryStr = entry
-      # Set the row entry in the HTML table
-      htmlStr+=\
-        "<td align=\""+colData.colAlign+"\">"+entryStr+"</td>\n"
+        rowStrParts.append(cellBeginStr+entry+"</td>\n")
       col_j += 1
-    htmlStr+="</tr>\n\n"
+    rowStrParts.append("</tr>\n\n")
+    writeFunc("".join(rowStrParts))
     row_i += 1
 
   # End of table
-  htmlStr+="</table>\n\n"  # Use two newlines makes for good formatting!
-  return(htmlStr)
+  writeFunc("</table>\n\n")  # Use two newlines makes for good formatting!
+
+
+# Get the tuple (dictKey, colorKey, urlKey, cellBeginStr) for writing the
+# cells of a table column given its TableColumnData object
+def getHtmlTableColumnFormat(colData):
+  dictKey = colData.dictKey
+  return (dictKey, dictKey+"_color", dictKey+"_url",
+    "<td align=\""+colData.colAlign+"\">")
 
 
 # Get string for table title for CDash data to display
@@ -2403,9 +6766,26 @@ def createCDashDataSummaryHtmlTableStr( dataTitle, dataCountAcronym,
     colDataList, rowDataList, sortKeyList=None, limitRowsToDisplay=None,
     htmlStyle=None, htmlTableStyle=None, titleColor=None,
   ):
+  htmlStrParts = []
+  writeCDashDataSummaryHtmlTable(htmlStrParts.append, dataTitle,
+    dataCountAcronym, colDataList, rowDataList, sortKeyList, limitRowsToDisplay,
+    htmlStyle, htmlTableStyle, titleColor)
+  return "".join(htmlStrParts)
+
+
+# Write an html table for CDash summary data.
+#
+# Same as createCDashDataSummaryHtmlTableStr() except the table is passed to
+# writeFunc(htmlStr) in parts (see writeHtmlTable()).  If len(rowDataList) ==
+# 0, then nothing is written.
+#
+def writeCDashDataSummaryHtmlTable(writeFunc, dataTitle, dataCountAcronym,
+    colDataList, rowDataList, sortKeyList=None, limitRowsToDisplay=None,
+    htmlStyle=None, htmlTableStyle=None, titleColor=None,
+  ):
   # If no rows, don't create a table
   if len(rowDataList) == 0:
-    return ""
+    return
   # Sort the list and limit the list
   rowDataListDisplayed = sortAndLimitListOfDicts(
     rowDataList, sortKeyList, limitRowsToDisplay)
@@ -2414,8 +6794,8 @@ def createCDashDataSummaryHtmlTableStr( dataTitle, dataCountAcronym,
     getCDashDataSummaryHtmlTableTitleStr(
       dataTitle, dataCountAcronym, len(rowDataList), limitRowsToDisplay ),
     titleColor )
-  # Create and return the table
-  return createHtmlTableStr( tableTitle,
+  # Write the table
+  writeHtmlTable( writeFunc, tableTitle,
     colDataList, rowDataListDisplayed, htmlStyle, htmlTableStyle )
 
 
@@ -2450,9 +6830,24 @@ def createCDashDataSummaryHtmlTableStr( dataTitle, dataCountAcronym,
 def createCDashTestHtmlTableStr(testsetTypeInfo, testTypeCountNum, testsLOD,
     limitRowsToDisplay=None, htmlStyle=None, htmlTableStyle=None,
   ):
-  # Return empty string if no tests
+  htmlStrParts = []
+  writeCDashTestHtmlTable(htmlStrParts.append, testsetTypeInfo,
+    testTypeCountNum, testsLOD, limitRowsToDisplay, htmlStyle, htmlTableStyle)
+  return "".join(htmlStrParts)
+
+
+# Write a tests HTML table
+#
+# Same as createCDashTestHtmlTableStr() except the table is passed to
+# writeFunc(htmlStr) in parts (see writeHtmlTable()).  If len(testsLOD) == 0,
+# then nothing is written.
+#
+def writeCDashTestHtmlTable(writeFunc, testsetTypeInfo, testTypeCountNum,
+    testsLOD, limitRowsToDisplay=None, htmlStyle=None, htmlTableStyle=None,
+  ):
+  # Write nothing if no tests
   if len(testsLOD) == 0:
-    return ""
+    return
   # Table title
   tableTitle = colorHtmlText(
     getCDashDataSummaryHtmlTableTitleStr(
@@ -2476,8 +6871,8 @@ def createCDashTestHtmlTableStr(testsetTypeInfo, testTypeCountNum, testsLOD,
     tcd("Pass Last "+str(daysOfHistory)+" Days", 'pass_last_x_days', "right"),
     tcd("Issue Tracker", "issue_tracker", "right"),
     ]
-  # Return the HTML table
-  return createHtmlTableStr( tableTitle,
+  # Write the HTML table
+  writeHtmlTable( writeFunc, tableTitle,
     testsColDataList, testsLOD,
     htmlStyle=htmlStyle, htmlTableStyle=htmlTableStyle )
 
@@ -2490,6 +6885,8 @@ def getCDashTestHtmlTableConsecColData(testsetTableType):
     consecCol = tcd("Consec&shy;utive Pass Days", 'consec_pass_days', 'right')
   elif testsetTableType == 'missing':
     consecCol = tcd("Consec&shy;utive Missing Days", 'consec_missing_days', 'right')
+  elif testsetTableType == 'flaky':
+    consecCol = tcd("Pass/Non-pass Changes", 'status_changes_last_x_days', 'right')
   else:
     raise Exception("Error, invalid testsetTableType="+str(testsetTableType))
   return consecCol
@@ -2693,6 +7090,7 @@ class SingleBuildsetReporter(object):
   #   cdashReportData.globalPass: Set to False if buildsetGlobalPass==True and
   #   len(buildsetLOD) > 0.
   #
+  @timeFunctionCalls('buildsets.report')
   def reportSingleBuildset(self, buildsetDescr, buildsetAcro, buildsetLOD,
       buildsetGlobalPass, buildsetColor, buildsetColDataList=None, verbose=True,
     ):
@@ -2714,8 +7112,8 @@ class SingleBuildsetReporter(object):
       self.cdashReportData.summaryLineDataNumbersList.append(
         buildsetAcro+"="+str(buildsetNum))
 
-      self.cdashReportData.htmlEmailBodyTop += \
-        colorHtmlText(buildsetSummaryStr,buildsetColor)+"<br>\n"
+      self.cdashReportData.appendHtmlEmailBodyTop(
+        colorHtmlText(buildsetSummaryStr,buildsetColor)+"<br>\n")
 
       if not buildsetColDataList:
         tcd = TableColumnData
@@ -2725,11 +7123,11 @@ class SingleBuildsetReporter(object):
           tcd("Build Name", 'buildname'),
           ]
 
-      self.cdashReportData.htmlEmailBodyBottom += \
-        createCDashDataSummaryHtmlTableStr(
-          buildsetDescr,  buildsetAcro, buildsetColDataList, buildsetLOD,
-          sortKeyList=self.groupSiteBuildNameSortOrder,
-          titleColor=buildsetColor)
+      writeCDashDataSummaryHtmlTable(
+        self.cdashReportData.appendHtmlEmailBodyBottom,
+        buildsetDescr,  buildsetAcro, buildsetColDataList, buildsetLOD,
+        sortKeyList=self.groupSiteBuildNameSortOrder,
+        titleColor=buildsetColor)
 
 
 # Class to optionally get test history and then analyze and report a single
@@ -2773,7 +7171,8 @@ class SingleTestsetReporter(object):
   # cdashReportData fields will be written to:
   #
   #   cdashReportData.summaryLineDataNumbersList: List will be appended with
-  #   the entry ``testsetTypeInfo.testsetAcro+"="+testsetTotalSize``.
+  #   the entry ``testsetTypeInfo.testsetAcro+"="+testsetTotalSize`` (if
+  #   testsetTypeInfo.inSummaryLine==True).
   #
   #   cdashReportData.htmlEmailBodyTop: The name of the table from
   #   testsetTypeInfo.testsetDescr, the acronym testsetTypeInfo.testsetAcro and the
@@ -2782,6 +7181,11 @@ class SingleTestsetReporter(object):
   #   cdashReportData.htmlEmailBodyBottom: Summary HTML table (with title)
   #   will be written, along with formatting.
   #
+  # Returns the sorted and limited list of test dicts written to the table
+  # (which have the test history if getTestHistory==True) or [] if
+  # testsetTotalSize==0.
+  #
+  @timeFunctionCalls('testsets.report')
   def reportSingleTestset(self, testsetTypeInfo, testsetTotalSize, testsetLOD,
       sortTests=True,
       limitTableRows=None,   # Change to 'int' > 0 to limit table rows
@@ -2796,16 +7200,19 @@ class SingleTestsetReporter(object):
       print("")
       print(testsetSummaryStr)
 
+    testsetSortedLimitedLOD = []
+
     if testsetTotalSize > 0:
 
       if testsetTypeInfo.existanceTriggersGlobalFail:
         self.cdashReportData.globalPass = False
 
-      self.cdashReportData.summaryLineDataNumbersList.append(
-        testsetTypeInfo.testsetAcro+"="+str(testsetTotalSize))
+      if testsetTypeInfo.inSummaryLine:
+        self.cdashReportData.summaryLineDataNumbersList.append(
+          testsetTypeInfo.testsetAcro+"="+str(testsetTotalSize))
 
-      self.cdashReportData.htmlEmailBodyTop += \
-        colorHtmlText(testsetSummaryStr, testsetTypeInfo.testsetColor)+"<br>\n"
+      self.cdashReportData.appendHtmlEmailBodyTop(
+        colorHtmlText(testsetSummaryStr, testsetTypeInfo.testsetColor)+"<br>\n")
 
       if sortTests or limitTableRows:
         testsetSortedLimitedLOD = sortAndLimitListOfDicts(
@@ -2816,11 +7223,13 @@ class SingleTestsetReporter(object):
       if getTestHistory and self.addTestHistoryStrategy:
         self.addTestHistoryStrategy.getTestHistory(testsetSortedLimitedLOD)
 
-      self.cdashReportData.htmlEmailBodyBottom += createCDashTestHtmlTableStr(
+      writeCDashTestHtmlTable(self.cdashReportData.appendHtmlEmailBodyBottom,
         testsetTypeInfo, testsetTotalSize, testsetSortedLimitedLOD,
         limitRowsToDisplay=limitTableRows,
         htmlStyle=self.htmlStyle, htmlTableStyle=self.htmlTableStyle )
 
+    return testsetSortedLimitedLOD
+
 
 # Class to generate the data for an HTML report for all test-sets represented
 # in a list of test dicts.
@@ -2832,7 +7241,13 @@ class TestsetsReporter(object):
   # cdashReportData [persisting]: Data used to create the final report (of type
   # CDashReportData).
   #
-  def __init__(self, cdashReportData, testsetAcroList=getStandardTestsetAcroList(),
+  # testsetAcroList [persisting]: The test sets to report in order.  The
+  # 'flaky' test set is made up of the tests with 'test_history_class' equal
+  # to 'flaky' (see isTestFlaky()) and these tests are also reported in the
+  # test set for their status.
+  #
+  def __init__(self, cdashReportData,
+      testsetAcroList=getStandardTestsetAcroList()+['flaky'],
       htmlStyle=None, htmlTableStyle=None, verbose=True,
     ):
     self.cdashReportData = cdashReportData
@@ -2846,6 +7261,8 @@ class TestsetsReporter(object):
   #
   def reportTestsets(self, testsLOD):
     testDictsByTestsetAcro = binTestDictsByTestsetAcro(testsLOD)
+    testDictsByTestsetAcro['flaky'] = \
+      [ testDict for testDict in testsLOD if isTestFlaky(testDict) ]
     for testsetAcro in self.testsetAcroList:
       testsetLOD = testDictsByTestsetAcro.get(testsetAcro, None)
       if testsetLOD:
@@ -2998,8 +7415,10 @@ import smtplib
 
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
+from email.mime.application import MIMEApplication
 from email.utils import formatdate
 from email.charset import Charset, QP
+from email.header import Header
 import email.message
 
 
@@ -3042,6 +7461,45 @@ def createHtmlMimeEmail(fromAddress, toAddress, subject, textBody, htmlBody,
   return msg
 
 
+# Create MINE formatted email object with the HTML body attached as a file
+# (but don't send it)
+#
+# This is used for HTML bodies that are too large to put in the email itself.
+# The body of the email just says that the report is attached.  If
+# gzipAttachment==True, then the attached file is gzip compressed.
+#
+def createHtmlMimeEmailWithHtmlAttachment(fromAddress, toAddress, subject,
+    htmlBody, attachmentFileName="report.html", gzipAttachment=False,
+    doRemoveSoftHyphens=False \
+  ):
+
+  if doRemoveSoftHyphens:
+    htmlBody = htmlBody.replace('&shy;', '')
+
+  if gzipAttachment:
+    attachmentFileName += ".gz"
+    attachment = MIMEApplication(gzipCompressBytes(htmlBody.encode('utf-8')),
+      'gzip')
+  else:
+    attachment = MIMEText(htmlBody.encode('utf-8'), 'html', 'utf-8')
+  attachment.add_header('Content-Disposition', 'attachment',
+    filename=attachmentFileName)
+
+  msg = MIMEMultipart('mixed')
+  msg['From'] = fromAddress
+  msg['To'] = toAddress
+  msg['Date'] = formatdate(localtime=True)
+  msg['Subject'] = subject
+  msg.attach(MIMEText(
+    ("<html><body><p>The report is too large to include in this email and is"+\
+     " attached as the file '"+attachmentFileName+"'.</p></body></html>"\
+     ).encode('utf-8'),
+    'html', 'utf-8'))
+  msg.attach(attachment)
+
+  return msg
+
+
 # Send a MIME formatted email
 #
 def sendMineEmail(mimeEmail):
@@ -3051,3 +7509,114 @@ def sendMineEmail(mimeEmail):
   # and message to send - here it is sent as one string.
   s.sendmail(mimeEmail['From'], mimeEmail['To'], mimeEmail.as_string())
   s.quit()
+
+
+# Sends the same HTML email to a list of addresses using one SMTP connection
+#
+# Usage:
+#
+#   emailSender = HtmlEmailBatchSender(smtpServer="localhost")
+#   emailSender.sendHtmlEmail(fromAddress, toAddressesList, subject, htmlBody)
+#
+# The MIME email is only created and converted to a string once (see
+# createHtmlMimeEmail()) and then it is sent to each of the addresses in turn
+# (with a 'To' header for that address put in front) over one SMTP session.  If oneMessageForAllRecipients==True, then
+# one message with all of the addresses in its 'To' header is sent instead.
+#
+# If maxHtmlBodyBytes > 0 and the HTML body is larger than that, then the HTML
+# body is attached as the file 'report.html' instead (or as the file
+# 'report.html.gz' if largeHtmlBodyMode=='gzip', see
+# createHtmlMimeEmailWithHtmlAttachment()).
+#
+# If sending to some of the addresses fails, the email is still sent to the
+# rest of the addresses and then an exception is raised listing the failed
+# addresses.
+#
+# smtpServer [in]: The SMTP server '<host>' or '<host>:<port>'.
+#
+# smtpFactory_in [in]: Function with the same signature as smtplib.SMTP()
+# (for unit testing).
+#
+class HtmlEmailBatchSender(object):
+
+  def __init__(self, smtpServer="localhost", oneMessageForAllRecipients=False,
+      maxHtmlBodyBytes=0, largeHtmlBodyMode="attachment",
+      smtpFactory_in=smtplib.SMTP,
+    ):
+    if not largeHtmlBodyMode in ("attachment", "gzip"):
+      raise Exception("Error, largeHtmlBodyMode='"+largeHtmlBodyMode+"' must"+\
+        " be 'attachment' or 'gzip'!")
+    self.smtpServer = smtpServer
+    self.oneMessageForAllRecipients = oneMessageForAllRecipients
+    self.maxHtmlBodyBytes = maxHtmlBodyBytes
+    self.largeHtmlBodyMode = largeHtmlBodyMode
+    self.smtpFactory = smtpFactory_in
+
+  # Create the MIME email to send to toAddress
+  def createMimeEmail(self, fromAddress, toAddress, subject, htmlBody,
+      doRemoveSoftHyphens=False,
+    ):
+    if self.maxHtmlBodyBytes > 0 and \
+      len(htmlBody.encode('utf-8')) > self.maxHtmlBodyBytes \
+      :
+      return createHtmlMimeEmailWithHtmlAttachment(fromAddress, toAddress,
+        subject, htmlBody, gzipAttachment=(self.largeHtmlBodyMode=="gzip"),
+        doRemoveSoftHyphens=doRemoveSoftHyphens)
+    return createHtmlMimeEmail(fromAddress, toAddress, subject, "", htmlBody,
+      doRemoveSoftHyphens)
+
+  # Send the HTML email to all of the addresses in toAddressesList and return
+  # the number of messages sent
+  @timeFunctionCalls('email.send')
+  def sendHtmlEmail(self, fromAddress, toAddressesList, subject, htmlBody,
+      doRemoveSoftHyphens=False,
+    ):
+    if not toAddressesList:
+      return 0
+    if self.oneMessageForAllRecipients:
+      messagesList = [ (", ".join(toAddressesList), toAddressesList) ]
+    else:
+      messagesList = [ (toAddress, [toAddress]) \
+        for toAddress in toAddressesList ]
+    mimeEmail = self.createMimeEmail(fromAddress, messagesList[0][0], subject,
+      htmlBody, doRemoveSoftHyphens)
+    del mimeEmail['To']
+    mimeEmailWithoutToStr = mimeEmail.as_string()
+    failedAddressesList = []
+    numMessagesSent = 0
+    smtp = self.smtpFactory(self.smtpServer)
+    try:
+      for (toHeader, envelopeRecipientsList) in messagesList:
+        try:
+          refusedRecipientsDict = smtp.sendmail(fromAddress,
+            envelopeRecipientsList,
+            "To: "+Header(toHeader, header_name='To').encode()+"\n"+\
+              mimeEmailWithoutToStr )
+        except smtplib.SMTPRecipientsRefused as e:
+          refusedRecipientsDict = e.recipients
+        except smtplib.SMTPResponseException as e:
+          refusedRecipientsDict = dict([ (toAddress, (e.smtp_code, e.smtp_error)) \
+            for toAddress in envelopeRecipientsList ])
+        failedAddressesList.extend(sorted(refusedRecipientsDict.keys()))
+        if len(refusedRecipientsDict) < len(envelopeRecipientsList):
+          numMessagesSent += 1
+    finally:
+      try:
+        smtp.quit()
+      except smtplib.SMTPException:
+        pass
+    getDefaultTimingRegistry().incrementCounter('email.messages_sent',
+      numMessagesSent)
+    if failedAddressesList:
+      raise Exception("Error, failed to send the email '"+subject+"' to the"+\
+        " addresses: "+", ".join(failedAddressesList))
+    return numMessagesSent
+
+  # Send the HTML email in a separate thread and return the
+  # BackgroundFunctionCall object (call wait() on it to wait for the email to
+  # be sent)
+  def sendHtmlEmailInBackground(self, fromAddress, toAddressesList, subject,
+      htmlBody, doRemoveSoftHyphens=False,
+    ):
+    return BackgroundFunctionCall(self.sendHtmlEmail, fromAddress,
+      toAddressesList, subject, htmlBody, doRemoveSoftHyphens)
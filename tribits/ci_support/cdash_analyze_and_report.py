@@ -40,7 +40,8 @@
 # @HEADER
 
 import sys
-import pprint
+import copy
+import json
 import datetime
 
 from FindGeneralScriptSupport import *
@@ -82,6 +83,38 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     help="Date for the testing day <YYYY-MM-DD> or special values 'today'"+\
       " or 'yesterday'. [default 'yesterday']" )
 
+  clp.add_option(
+    "--date-range", dest="dateRange", type="string", default="",
+    help="Range of testing days <begin>:<end> (inclusive, where <begin> and"+\
+      " <end> take the same values as --date) to analyze and report one"+\
+      " testing day at a time (e.g. to create the reports for the past"+\
+      " testing days for a new build-set).  If set, then --date is ignored."+\
+      "  The testing days are run in --date-range-max-concurrency=<n>"+\
+      " processes at the same time and share the test history in the file"+\
+      " <cacheDir>/test_history_store.sqlite (i.e. as if"+\
+      " --use-test-history-store=on) so the overlapping test history for the"+\
+      " testing days is only downloaded once.  The base cache files for each"+\
+      " testing day are given the prefix"+\
+      " <cdash-base-cache-files-prefix><YYYY-MM-DD>_ and the output files"+\
+      " <base><ext> for --write-email-to-file,"+\
+      " --write-unexpected-builds-to-file,"+\
+      " --write-failing-tests-without-issue-trackers-to-file and"+\
+      " --write-test-data-to-file are written for each testing day to"+\
+      " <base>-<YYYY-MM-DD><ext>.  A summary table with the result and counts"+\
+      " for each testing day is written to --write-email-to-file=<file>."+\
+      "  No emails are sent (i.e. --send-email-to is ignored).  The script"+\
+      " returns 0 only if all of the testing days pass.  [default = '']" )
+
+  dateRangeMaxConcurrencyDefault = 4
+
+  clp.add_option(
+    "--date-range-max-concurrency", dest="dateRangeMaxConcurrency",
+    default=dateRangeMaxConcurrencyDefault, type="int",
+    help="Max number of processes used to run the testing days in"+\
+      " --date-range at the same time.  If set to '1', then the testing days"+\
+      " are run one at a time in this process.  Must be >= 1."+\
+      "  [default = '"+str(dateRangeMaxConcurrencyDefault)+"']" )
+
   clp.add_option(
     "--cdash-project-testing-day-start-time", dest="cdashProjectTestingDayStartTime",
     type="string", default="00:00",
@@ -122,6 +155,21 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
       " case, one should also set --require-test-history-match-nonpassing-tests=off."+\
       " [REQUIRED]" )
 
+  addOptionParserChoiceOption(
+    "--cdash-nonpassed-tests-chunk-by", "cdashNonpassedTestsChunkBy",
+    ("none", "group", "site", "build"), 0,
+    "If not 'none', then the nonpassing tests are downloaded from CDash with"+\
+      " one cdash/queryTests.php query for each build group, site or build"+\
+      " (taken from the builds matching --cdash-builds-filters) instead of one"+\
+      " query for all of the nonpassing tests.  Up to"+\
+      " --cdash-query-max-connections-per-host queries are done at the same"+\
+      " time and each is cached in its own file so that, if some of the"+\
+      " queries fail, running again only repeats the failed queries.  This"+\
+      " avoids timeouts on CDash for very large sets of nonpassing tests but"+\
+      " it only gets the nonpassing tests for the builds matching"+\
+      " --cdash-builds-filters.",
+    clp )
+
   clp.add_option(
     "--expected-builds-file", dest="expectedBuildsFile", type="string",
     default="",
@@ -137,6 +185,30 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     "  Each of these tests must have a unique 'site', 'buildName', and 'testname'"+\
     " sets or an error will be raised and the tool will abort.  [default = '']" )
 
+  clp.add_option(
+    "--buildsets-manifest-file", dest="buildsetsManifestFile", type="string",
+    default="",
+    help="Path to a CSV file that lists multiple build-sets to analyze and"+\
+      " report in one run.  The required columns are 'build_set_name' and"+\
+      " 'expected_builds_file' and the optional columns are"+\
+      " 'tests_with_issue_trackers_file', 'cdash_builds_filters',"+\
+      " 'cdash_nonpassed_tests_filters', 'write_email_to_file',"+\
+      " 'send_email_to', 'write_unexpected_builds_to_file',"+\
+      " 'write_failing_tests_without_issue_trackers_to_file' and"+\
+      " 'write_test_data_to_file'.  An empty input column takes the value"+\
+      " of the matching command-line option and an empty output column means"+\
+      " that output is not produced for that build-set.  The builds and"+\
+      " nonpassing tests for all of the build-sets are downloaded only once"+\
+      " using the command-line options --cdash-builds-filters and"+\
+      " --cdash-nonpassed-tests-filters (which must select the builds and tests"+\
+      " for all of the build-sets) and are split up for each build-set by"+\
+      " matching its expected builds (i.e. as if"+\
+      " --filter-out-builds-and-tests-not-matching-expected-builds=on)."+\
+      "  The build-set filters are only used for the links to CDash in its"+\
+      " report.  The test history for a test is only gotten once for all of"+\
+      " the build-sets.  The script returns 0 only if all of the build-sets"+\
+      " pass.  [default = '']" )
+
   addOptionParserChoiceOption(
     "--filter-out-builds-and-tests-not-matching-expected-builds",
     "filterOutBuildsAndTestsNotMatchingExpectedBuildsStr",
@@ -177,6 +249,108 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     " directory it is used unconditionally.",
     clp )
 
+  addOptionParserChoiceOption(
+    "--cdash-cache-file-format", "cdashCacheFileFormat",
+    ("json-gz", "json", "msgpack", "pprint"), 0,
+    "Format of the CDash query data cache files written under"+\
+    " --cdash-queries-cache-dir=<cacheDir> (including the test_history/ files)."+\
+    "  The format of an existing cache file is always determined from its contents"+\
+    " so cache files written in any of these formats can be read.  Cache files"+\
+    " in the legacy 'pprint' format are rewritten in this format when they are"+\
+    " read (see --migrate-legacy-cache-files).  The 'msgpack' format requires"+\
+    " the Python module 'msgpack'.",
+    clp )
+
+  addOptionParserChoiceOption(
+    "--migrate-legacy-cache-files", "migrateLegacyCacheFilesStr",
+    ("on", "off"), 1,
+    "If 'on', then cache files read from --cdash-queries-cache-dir=<cacheDir>"+\
+    " in the legacy 'pprint' format are rewritten in the format"+\
+    " --cdash-cache-file-format=<format> so that they are faster to read the"+\
+    " next time.  (This is 'off' by default since the cache files may not be"+\
+    " owned by this process.)",
+    clp )
+
+  addOptionParserChoiceOption(
+    "--test-history-cache-backend", "testHistoryCacheBackend",
+    ("files", "packed"), 0,
+    "How the test history cache files under <cacheDir>/test_history/ are"+\
+      " stored.  If 'files', then each test history query is cached in its own"+\
+      " file.  If 'packed', then all of the test history queries for a testing"+\
+      " day are cached in the one append-only indexed file"+\
+      " <cacheDir>/test_history/<YYYY-MM-DD>.cdashpack which can be written by"+\
+      " several processes at the same time (e.g. --date-range with"+\
+      " --date-range-max-concurrency > 1) and is read with one memory map."+\
+      "  (The per-build test history cache files for"+\
+      " --test-history-query-strategy=per-build are still written as separate"+\
+      " files so they can be removed.)"+\
+      "  (Existing test history cache files are still read with 'packed'.)",
+    clp )
+
+  clp.add_option(
+    "--cache-max-size-mb", dest="cacheMaxSizeMb", type="float", default=0,
+    help="Max size in MB of the test history cache <cacheDir>/test_history/"+\
+      " (including its cache archive file).  After the report is created, the"+\
+      " least recently used test history cache files (including the files"+\
+      " packed into its cache archive file, where a file's last use is its"+\
+      " last use before it was packed) are removed until the cache is under"+\
+      " this size.  If '0', then there is no size cap."+\
+      "  [default = '0']" )
+
+  clp.add_option(
+    "--cache-max-age-days", dest="cacheMaxAgeDays", type="int", default=0,
+    help="After the report is created, remove the test history cache files in"+\
+      " <cacheDir>/test_history/ (and the files packed into its cache archive"+\
+      " file) that were not used in this many days."+\
+      "  If '0', then there is no age cap.  [default = '0']" )
+
+  addOptionParserChoiceOption(
+    "--cache-compact", "cacheCompactStr",
+    ("on", "off"), 1,
+    "If 'on', then instead of creating a report, the size and age caps"+\
+      " --cache-max-size-mb and --cache-max-age-days are applied to the test"+\
+      " history cache <cacheDir>/test_history/, the test history cache files"+\
+      " not used in the last --cache-compact-min-age-days days are packed into"+\
+      " the one indexed cache archive file"+\
+      " <cacheDir>/test_history/"+CDQAR.g_cdashQueryCacheArchiveFileName+\
+      " (where they are still found as cache files), the superseded records"+\
+      " are dropped from the test history pack files, the cache statistics are"+\
+      " printed and the script exits.",
+    clp )
+
+  cacheCompactMinAgeDaysDefault = 1
+
+  clp.add_option(
+    "--cache-compact-min-age-days", dest="cacheCompactMinAgeDays", type="int",
+    default=cacheCompactMinAgeDaysDefault,
+    help="Test history cache files used in the last this many days are not"+\
+      " packed into the cache archive file by --cache-compact=on."+\
+      "  [default = '"+str(cacheCompactMinAgeDaysDefault)+"']" )
+
+  cdashQueryTimeoutDefault = 300
+
+  clp.add_option(
+    "--cdash-query-timeout", dest="cdashQueryTimeout",
+    default=cdashQueryTimeoutDefault, type="float",
+    help="Timeout in seconds for connecting to CDash and for each read of the"+\
+      " data for a CDash query (by default "+str(cdashQueryTimeoutDefault)+\
+      " seconds).  A query that times out is not tried again."+\
+      "  If set to '0', then there is no timeout."+\
+      "  [default = '"+str(cdashQueryTimeoutDefault)+"']" )
+
+  cdashQueryMaxConnectionsPerHostDefault = 4
+
+  clp.add_option(
+    "--cdash-query-max-connections-per-host",
+    dest="cdashQueryMaxConnectionsPerHost",
+    default=cdashQueryMaxConnectionsPerHostDefault, type="int",
+    help="Max number of persistent (keep-alive) connections to the CDash site"+\
+      " used at the same time (and kept open to be reused by later CDash"+\
+      " queries).  CDash queries done at the same time (e.g. with"+\
+      " --test-history-max-concurrency=<n>) wait for one of these connections."+\
+      "  Must be at least 1."+\
+      "  [default = '"+str(cdashQueryMaxConnectionsPerHostDefault)+"']" )
+
   testHistoryDaysDefault= 30
 
   clp.add_option(
@@ -185,6 +359,51 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     help="Number of days to go back in history for each test."+\
       "  [default = '"+str(testHistoryDaysDefault)+"']" )
 
+  testHistoryMaxConcurrencyDefault = 1
+
+  clp.add_option(
+    "--test-history-max-concurrency", dest="testHistoryMaxConcurrency",
+    default=testHistoryMaxConcurrencyDefault, type="int",
+    help="Max number of test histories downloaded from CDash (or read from"+\
+      " the cache) at the same time.  Setting this > 1 can greatly reduce the"+\
+      " time to get the test history for a large number of nonpassing tests."+\
+      "  The order of the tests in the tables is not impacted by this setting."+\
+      "  Must be >= 1."+\
+      "  [default = '"+str(testHistoryMaxConcurrencyDefault)+"']" )
+
+  addOptionParserChoiceOption(
+    "--test-history-query-strategy", "testHistoryQueryStrategy",
+    ("per-test", "per-build"), 0,
+    "Strategy for getting the test history from CDash.  If 'per-test', then"+\
+      " one cdash/queryTests.php query is done for each test.  If 'per-build',"+\
+      " then one cdash/queryTests.php query is done for all of the tests in each"+\
+      " build that has tests needing test history and the results are split up"+\
+      " by test and written to the same per-test cache files.  The 'per-build'"+\
+      " strategy can greatly reduce the number of CDash queries when many"+\
+      " tests fail in the same builds (but each query returns more data).",
+    clp )
+
+  addOptionParserChoiceOption(
+    "--use-test-history-store", "useTestHistoryStoreStr",
+    ("on", "off"), 1,
+    "If 'on', then the test history for each test for each testing day is"+\
+      " kept in the SQLite database file"+\
+      " <cacheDir>/test_history_store.sqlite and only the testing days not"+\
+      " already in that file are downloaded from CDash.  For example, getting"+\
+      " 30 days of test history for a test that was also in the previous day's"+\
+      " report only downloads the last 2 days of test history.  (If 'on', then"+\
+      " --test-history-query-strategy=per-build is ignored.)",
+    clp )
+
+  addOptionParserChoiceOption(
+    "--use-compact-records", "useCompactRecordsStr",
+    ("on", "off"), 1,
+    "If 'on', then the builds and tests (including the test history for each"+\
+      " test) are stored in compact fixed-field records instead of plain dicts."+\
+      "  This greatly reduces the memory used for large reports and does not"+\
+      " change the output.",
+    clp )
+
   limitTableRows = 10
 
   clp.add_option(
@@ -216,6 +435,14 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     +" the 'twim' table but typically with status 'Failed'.",
     clp )
 
+  addOptionParserChoiceOption(
+    "--flaky-tests-in-summary-line", "flakyTestsInSummaryLineStr",
+    ("on", "off"), 1,
+    "If 'on', then the number of tests with flaky test histories (which are"+\
+      " listed in the 'Flaky tests' table) is also listed as 'flaky=<N>' in"+\
+      " the summary line (i.e. the email subject).",
+    clp )
+
   addOptionParserChoiceOption(
     "--print-details", "printDetailsStr",
     ("on", "off"), 1,
@@ -251,12 +478,35 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     +" with issue trackers.  This includes the history of the tests for" \
     +" --limit-test-history-days=<days> of history.  This contains all of the" \
     +" information that appears in the generated summary tables for tests with" \
-    +" associated issue trackers.  [default = '']" )
+    +" associated issue trackers.  The format of the file is set with" \
+    +" --test-data-file-format=<format>.  [default = '']" )
+
+  addOptionParserChoiceOption(
+    "--test-data-file-format", "testDataFileFormat",
+    ("pprint", "jsonl", "npz"), 0,
+    "Format of the file written by --write-test-data-to-file=<file>.  If"+\
+      " 'pprint', then a pretty-printed Python list of dicts is written."+\
+      "  If 'jsonl', then one compact JSON dict is written per line for each"+\
+      " test.  If 'npz', then a compressed NumPy .npz file is written with"+\
+      " one typed column per field where the string values (e.g. the site,"+\
+      " build and test names) are stored once in a table of unique strings"+\
+      " and only nested values (e.g. the test history) are stored as JSON"+\
+      " (requires the Python module 'numpy').  All of these can be read back with"+\
+      " CDashQueryAnalyzeReport.readTestDataFromFile().",
+    clp )
 
   clp.add_option(
     "--write-email-to-file", dest="writeEmailToFile", type="string", default="",
     help="Write the body of the HTML email to this file. [default = '']" )
 
+  clp.add_option(
+    "--timing-report", dest="timingReport", type="string", default="",
+    help="Write the wall times, request counts, bytes downloaded and cache" \
+    +" hit ratios for the different parts of the analysis and reporting to" \
+    +" this JSON file and print a summary table of them at the end." \
+    +"  With --date-range, the data for all of the testing days is added up." \
+    +"  [default = '']" )
+
   clp.add_option(
     "--email-from-address=", dest="emailFromAddress", type="string", default="",
     help="Address reported in the sent email. [default '']" )
@@ -272,6 +522,39 @@ def injectCmndLineOptionsInParser(clp, gitoliteRootDefault=""):
     "Remove soft hyphens from emails.",
     clp )
 
+  clp.add_option(
+    "--email-smtp-server", dest="emailSmtpServer", type="string",
+    default="localhost",
+    help="SMTP server '<host>' or '<host>:<port>' used to send the emails."+\
+      "  All of the emails for a build-set are sent over one connection to"+\
+      " this server.  [default 'localhost']" )
+
+  addOptionParserChoiceOption(
+    "--email-one-message-for-all-recipients",
+    "emailOneMessageForAllRecipientsStr",
+    ("on", "off"), 1,
+    "If 'on', then one email is sent with all of the --send-email-to"+\
+      " addresses in its 'To' header instead of one email for each address.",
+    clp )
+
+  clp.add_option(
+    "--email-max-html-body-bytes", dest="emailMaxHtmlBodyBytes", type="int",
+    default=0,
+    help="If > 0 and the HTML report is larger than this many bytes, then the"+\
+      " HTML report is attached to the email (see"+\
+      " --email-large-html-body-mode) instead of being the body of the email."+\
+      "  [default '0']" )
+
+  addOptionParserChoiceOption(
+    "--email-large-html-body-mode",
+    "emailLargeHtmlBodyMode",
+    ("attachment", "gzip"), 0,
+    "How HTML reports larger than --email-max-html-body-bytes are sent.  If"+\
+      " 'attachment', then it is attached as the file 'report.html'.  If"+\
+      " 'gzip', then it is attached as the gzip compressed file"+\
+      " 'report.html.gz'.",
+    clp )
+
 
 def validateAndConvertCmndLineOptions(inOptions):
 
@@ -285,6 +568,47 @@ def validateAndConvertCmndLineOptions(inOptions):
       inOptions.date)
     inOptions.date = CBTD.getDateStrFromDateTime(dateTimeObj)
 
+  if inOptions.dateRange:
+    if inOptions.buildsetsManifestFile:
+      print("Error, can't use both --date-range and --buildsets-manifest-file!")
+      sys.exit(1)
+    try:
+      inOptions.dateRangeList = getDateRangeList(
+        inOptions.cdashProjectTestingDayStartTime, inOptions.dateRange)
+    except Exception as errMsg:
+      print(str(errMsg))
+      sys.exit(1)
+  else:
+    inOptions.dateRangeList = []
+
+  try:
+    CDQAR.setDefaultCDashQueryDataCacheFileFormat(inOptions.cdashCacheFileFormat)
+  except Exception as errMsg:
+    print(str(errMsg))
+    sys.exit(1)
+
+  # Check the test data file format before doing any CDash queries (the
+  # build-sets in --buildsets-manifest-file can also write test data files)
+  if inOptions.writeTestDataToFile or inOptions.buildsetsManifestFile:
+    try:
+      CDQAR.assertTestDataFileFormat(inOptions.testDataFileFormat)
+    except Exception as errMsg:
+      print(str(errMsg))
+      sys.exit(1)
+
+  if inOptions.cdashQueryMaxConnectionsPerHost < 1:
+    print("Error, --cdash-query-max-connections-per-host="+\
+      str(inOptions.cdashQueryMaxConnectionsPerHost)+" must be >= 1!")
+    sys.exit(1)
+
+  for (optionName, maxConcurrency) in [
+      ("--date-range-max-concurrency", inOptions.dateRangeMaxConcurrency),
+      ("--test-history-max-concurrency", inOptions.testHistoryMaxConcurrency),
+    ]:
+    if maxConcurrency < 1:
+      print("Error, "+optionName+"="+str(maxConcurrency)+" must be >= 1!")
+      sys.exit(1)
+
   # ToDo: Assert more of the options to make sure they are correct!
 
 
@@ -296,9 +620,28 @@ def setExtraCmndLineOptionsAfterParse(inOptions_inout):
   setattr(inOptions_inout, 'useCachedCDashData',
     inOptions_inout.useCachedCDashDataStr == "on")
 
+  setattr(inOptions_inout, 'migrateLegacyCacheFiles',
+    inOptions_inout.migrateLegacyCacheFilesStr == "on")
+  CDQAR.setMigrateLegacyCDashQueryDataCacheFiles(
+    inOptions_inout.migrateLegacyCacheFiles)
+
+  setTestHistoryCacheBackendFromCmndLineOptions(inOptions_inout)
+
+  setattr(inOptions_inout, 'useTestHistoryStore',
+    inOptions_inout.useTestHistoryStoreStr == "on")
+
+  setattr(inOptions_inout, 'cacheCompact',
+    inOptions_inout.cacheCompactStr == "on")
+
+  setattr(inOptions_inout, 'useCompactRecords',
+    inOptions_inout.useCompactRecordsStr == "on")
+
   setattr(inOptions_inout, 'requireTestHistoryMatchNonpassingTests',
     inOptions_inout.requireTestHistoryMatchNonpassingTestsStr == "on")
 
+  setattr(inOptions_inout, 'flakyTestsInSummaryLine',
+    inOptions_inout.flakyTestsInSummaryLineStr == "on")
+
   setattr(inOptions_inout, 'printDetails',
     inOptions_inout.printDetailsStr == "on")
 
@@ -312,6 +655,17 @@ def setExtraCmndLineOptionsAfterParse(inOptions_inout):
   setattr(inOptions_inout, 'emailWithoutSoftHyphens',
     inOptions_inout.emailWithoutSoftHyphensStr == "on")
 
+  setattr(inOptions_inout, 'emailOneMessageForAllRecipients',
+    inOptions_inout.emailOneMessageForAllRecipientsStr == "on")
+
+
+# Set up the storage of the test history cache files in CDashQueryAnalyzeReport
+# for the option --test-history-cache-backend
+def setTestHistoryCacheBackendFromCmndLineOptions(inOptions):
+  CDQAR.setCDashQueryDataCacheDirPacked(
+    inOptions.cdashQueriesCacheDir+"/test_history",
+    inOptions.testHistoryCacheBackend == "packed")
+
 
 def getCmndLineOptions():
   from optparse import OptionParser
@@ -327,31 +681,55 @@ def fwdCmndLineOptions(inOptions, lt=""):
   io = inOptions
   cmndLineOpts = \
     "  --date='"+io.date+"'"+lt+\
+    "  --date-range='"+io.dateRange+"'"+lt+\
+    "  --date-range-max-concurrency='"+str(io.dateRangeMaxConcurrency)+"'"+lt+\
     "  --cdash-project-testing-day-start-time='"+io.cdashProjectTestingDayStartTime+"'"+lt+\
     "  --cdash-project-name='"+io.cdashProjectName+"'"+lt+\
     "  --build-set-name='"+io.buildSetName+"'"+lt+\
     "  --cdash-site-url='"+io.cdashSiteUrl+"'"+lt+\
     "  --cdash-builds-filters='"+io.cdashBuildsFilters+"'"+lt+\
     "  --cdash-nonpassed-tests-filters='"+io.cdashNonpassedTestsFilters+"'"+lt+\
+    "  --cdash-nonpassed-tests-chunk-by='"+io.cdashNonpassedTestsChunkBy+"'"+lt+\
     "  --expected-builds-file='"+io.expectedBuildsFile+"'"+lt+\
     "  --tests-with-issue-trackers-file='"+io.testsWithIssueTrackersFile+"'"+lt+\
+    "  --buildsets-manifest-file='"+io.buildsetsManifestFile+"'"+lt+\
     "  --filter-out-builds-and-tests-not-matching-expected-builds='"+\
       io.filterOutBuildsAndTestsNotMatchingExpectedBuildsStr+"'"+lt+\
     "  --cdash-queries-cache-dir='"+io.cdashQueriesCacheDir+"'"+lt+\
     "  --cdash-base-cache-files-prefix='"+io.cdashBaseCacheFilesPrefix+"'"+lt+\
     "  --use-cached-cdash-data='"+io.useCachedCDashDataStr+"'"+lt+\
+    "  --cdash-cache-file-format='"+io.cdashCacheFileFormat+"'"+lt+\
+    "  --migrate-legacy-cache-files='"+io.migrateLegacyCacheFilesStr+"'"+lt+\
+    "  --test-history-cache-backend='"+io.testHistoryCacheBackend+"'"+lt+\
+    "  --cache-max-size-mb='"+str(io.cacheMaxSizeMb)+"'"+lt+\
+    "  --cache-max-age-days='"+str(io.cacheMaxAgeDays)+"'"+lt+\
+    "  --cache-compact='"+io.cacheCompactStr+"'"+lt+\
+    "  --cache-compact-min-age-days='"+str(io.cacheCompactMinAgeDays)+"'"+lt+\
+    "  --cdash-query-timeout='"+str(io.cdashQueryTimeout)+"'"+lt+\
+    "  --cdash-query-max-connections-per-host='"+str(io.cdashQueryMaxConnectionsPerHost)+"'"+lt+\
     "  --limit-test-history-days='"+str(io.testHistoryDays)+"'"+lt+\
+    "  --test-history-max-concurrency='"+str(io.testHistoryMaxConcurrency)+"'"+lt+\
+    "  --test-history-query-strategy='"+io.testHistoryQueryStrategy+"'"+lt+\
+    "  --use-test-history-store='"+io.useTestHistoryStoreStr+"'"+lt+\
+    "  --use-compact-records='"+io.useCompactRecordsStr+"'"+lt+\
     "  --limit-table-rows='"+str(io.limitTableRows)+"'"+lt+\
     "  --require-test-history-match-nonpassing-tests='"+io.requireTestHistoryMatchNonpassingTestsStr+"'"+lt+\
+    "  --flaky-tests-in-summary-line='"+io.flakyTestsInSummaryLineStr+"'"+lt+\
     "  --print-details='"+io.printDetailsStr+"'"+lt+\
     "  --list-unexpected-builds='"+io.listUnexpectedBuildsStr+"'"+lt+\
     "  --write-unexpected-builds-to-fileo='"+io.writeUnexpectedBuildsToFile+"'"+lt+\
     "  --write-failing-tests-without-issue-trackers-to-file='"+io.writeFailingTestsWithoutIssueTrackersToFile+"'"+lt+\
     "  --write-test-data-to-file='"+io.writeTestDataToFile+"'"+lt+\
+    "  --test-data-file-format='"+io.testDataFileFormat+"'"+lt+\
     "  --write-email-to-file='"+io.writeEmailToFile+"'"+lt+\
+    "  --timing-report='"+io.timingReport+"'"+lt+\
     "  --email-from-address='"+io.emailFromAddress+"'"+lt+\
     "  --send-email-to='"+io.sendEmailTo+"'"+lt+\
-    "  --email-without-soft-hyphens='"+io.emailWithoutSoftHyphensStr+"'"+lt
+    "  --email-without-soft-hyphens='"+io.emailWithoutSoftHyphensStr+"'"+lt+\
+    "  --email-smtp-server='"+io.emailSmtpServer+"'"+lt+\
+    "  --email-one-message-for-all-recipients='"+io.emailOneMessageForAllRecipientsStr+"'"+lt+\
+    "  --email-max-html-body-bytes='"+str(io.emailMaxHtmlBodyBytes)+"'"+lt+\
+    "  --email-large-html-body-mode='"+io.emailLargeHtmlBodyMode+"'"+lt
   return cmndLineOpts
 
 
@@ -375,45 +753,238 @@ def echoCmndLine(inOptions):
 class AddTestHistoryStrategy(object):
 
 
-  def __init__(self, inOptions, testHistoryCacheDir):
+  def __init__(self, inOptions, testHistoryCacheDir, testHistoryStore=None,
+      testHistoryLODCache=None,
+    ):
     self.inOptions = inOptions
     self.testHistoryCacheDir = testHistoryCacheDir
+    self.testHistoryStore = testHistoryStore
+    self.testHistoryLODCache = testHistoryLODCache
+    self.buildTestHistoryKeysList = []  # For per-build test history queries
 
 
   def getTestHistory(self, testLOD):
 
     sio = self.inOptions
 
-    CDQAR.foreachTransform(
-      testLOD,
-      CDQAR.AddTestHistoryToTestDictFunctor(
+    if sio.testHistoryQueryStrategy == "per-build" and not self.testHistoryStore:
+      CDQAR.cacheTestHistoryForBuildsOfTests(
         cdashUrl=sio.cdashSiteUrl,
         projectName=sio.cdashProjectName,
         date=sio.date,
-        testingDayStartTimeUtc=sio.cdashProjectTestingDayStartTime,
         daysOfHistory=sio.testHistoryDays,
         testCacheDir=self.testHistoryCacheDir,
-        useCachedCDashData=sio.useCachedCDashData,
-        alwaysUseCacheFileIfExists=True,
+        testsLOD=testLOD,
         verbose=True,
         printDetails=sio.printDetails,
-        requireMatchTestTopTestHistory=sio.requireTestHistoryMatchNonpassingTests,
+        maxConcurrency=sio.testHistoryMaxConcurrency,
+        useCachedCDashData=sio.useCachedCDashData,
+        keepBuildTestHistoryCacheFile=True,
         )
+      for testDict in testLOD:
+        buildKey = (testDict['site'], testDict['buildName'])
+        if not buildKey in self.buildTestHistoryKeysList:
+          self.buildTestHistoryKeysList.append(buildKey)
+
+    addTestHistoryFunctor = CDQAR.AddTestHistoryToTestDictFunctor(
+      cdashUrl=sio.cdashSiteUrl,
+      projectName=sio.cdashProjectName,
+      date=sio.date,
+      testingDayStartTimeUtc=sio.cdashProjectTestingDayStartTime,
+      daysOfHistory=sio.testHistoryDays,
+      testCacheDir=self.testHistoryCacheDir,
+      useCachedCDashData=sio.useCachedCDashData,
+      alwaysUseCacheFileIfExists=True,
+      verbose=True,
+      printDetails=sio.printDetails,
+      requireMatchTestTopTestHistory=sio.requireTestHistoryMatchNonpassingTests,
+      testHistoryStore=self.testHistoryStore,
+      useTestRecords=sio.useCompactRecords,
+      testHistoryLODCache=self.testHistoryLODCache,
       )
 
+    addTestHistoryFunctor.addTestHistoryToTestDicts(testLOD,
+      sio.testHistoryMaxConcurrency,
+      getElementDescr=CDQAR.getTestDictSiteBuildTestNameStr,
+      )
+
+
+  # Remove the per-build test history cache files kept by getTestHistory()
+  #
+  # These are kept while the test history is gotten for the different lists
+  # of tests so that each build is only queried once but are removed after
+  # that since the per-test cache files have all of the test history that is
+  # needed.
+  #
+  def removeBuildTestHistoryCacheFiles(self):
+    CDQAR.removeBuildTestHistoryCacheFiles(self.testHistoryCacheDir,
+      self.inOptions.date, self.inOptions.testHistoryDays,
+      self.buildTestHistoryKeysList)
+    self.buildTestHistoryKeysList = []
+
 
+# Create the AddTestHistoryStrategy object for the command-line options
 #
-# Run the script
+# This creates the test history cache directory
+# <cdashQueriesCacheDir>/test_history/ if it does not already exist.
 #
+def createAddTestHistoryStrategy(inOptions, testHistoryLODCache=None):
+
+  # Test history cache dir
+  testHistoryCacheDir = inOptions.cdashQueriesCacheDir+"/test_history"
+  if not os.path.exists(testHistoryCacheDir):
+    print("\nCreating new test cache directory '"+testHistoryCacheDir+"'")
+    os.mkdir(testHistoryCacheDir)
+
+  # Test history store (shared by all of the days)
+  if inOptions.useTestHistoryStore:
+    testHistoryStore = CDQAR.TestHistoryStore(
+      inOptions.cdashQueriesCacheDir+"/test_history_store.sqlite")
+  else:
+    testHistoryStore = None
 
-if __name__ == '__main__':
+  return AddTestHistoryStrategy(inOptions, testHistoryCacheDir, testHistoryStore,
+    testHistoryLODCache)
 
-  #
-  # Get commandline options
-  #
 
-  inOptions = getCmndLineOptions()
-  echoCmndLine(inOptions)
+# Set the default CDash query session from the command-line options
+def setDefaultCDashQuerySessionFromCmndLineOptions(inOptions):
+  if inOptions.cdashQueryTimeout > 0:
+    cdashQueryTimeout = inOptions.cdashQueryTimeout
+  else:
+    cdashQueryTimeout = None
+  CDQAR.setDefaultCDashQuerySession(
+    CDQAR.CDashQuerySession(
+      timeout=cdashQueryTimeout,
+      maxConnectionsPerHost=inOptions.cdashQueryMaxConnectionsPerHost,
+      )
+    )
+
+
+# Get the list of all of the builds off of cdash/index.php (or from the cache
+# file) matching --cdash-builds-filters
+def getFullBuildsLOD(inOptions, cacheDirAndBaseFilePrefix):
+
+  cdashIndexBuildsQueryUrl = CDQAR.getCDashIndexQueryUrl(
+    inOptions.cdashSiteUrl,
+    inOptions.cdashProjectName,
+    inOptions.date,
+    inOptions.cdashBuildsFilters )
+
+  fullCDashIndexBuildsJsonCacheFile = \
+    cacheDirAndBaseFilePrefix+"fullCDashIndexBuilds.json"
+
+  fullBuildsLOD = CDQAR.downloadBuildsOffCDashAndFlatten(
+    cdashIndexBuildsQueryUrl,
+    fullCDashIndexBuildsJsonCacheFile,
+    inOptions.useCachedCDashData )
+
+  if inOptions.useCompactRecords:
+    CDQAR.convertListOfDictsToRecords(fullBuildsLOD, CDQAR.BuildRecord)
+
+  return fullBuildsLOD
+
+
+# Map from --cdash-nonpassed-tests-chunk-by=<chunkBy> to the (build dict
+# key, cdash/queryTests.php filter field) for the chunks
+g_nonpassingTestsChunkByFieldsDict = {
+  'group' : ('group', 'groupname'),
+  'site' : ('site', 'site'),
+  'build' : ('buildname', 'buildname'),
+  }
+
+
+# Get an iterator over all of the nonpassing tests off of cdash/queryTests.php
+# (or from the cache file) matching --cdash-nonpassed-tests-filters
+#
+# fullBuildsLOD [in]: The builds from getFullBuildsLOD() (only used with
+# --cdash-nonpassed-tests-chunk-by to get the values for the chunks).
+#
+# NOTE: The nonpassing tests are streamed from CDash (or the cache file) so
+# that only the tests that are kept by the caller are held in memory.
+#
+def getFullNonpassingTestsIter(inOptions, cacheDirAndBaseFilePrefix,
+    fullBuildsLOD=None,
+  ):
+
+  cdashNonpassingTestsQueryUrl = CDQAR.getCDashQueryTestsQueryUrl(
+    inOptions.cdashSiteUrl, inOptions.cdashProjectName, inOptions.date,
+    inOptions.cdashNonpassedTestsFilters)
+
+  cdashNonpassingTestsQueryJsonCacheFile = \
+    cacheDirAndBaseFilePrefix+"fullCDashNonpassingTests.json"
+
+  if inOptions.cdashNonpassedTestsChunkBy != "none":
+    if fullBuildsLOD == None:
+      raise Exception("Error, fullBuildsLOD must be passed in to use"+\
+        " --cdash-nonpassed-tests-chunk-by!")
+    (buildKey, chunkField) = \
+      g_nonpassingTestsChunkByFieldsDict[inOptions.cdashNonpassedTestsChunkBy]
+    chunkValuesList = \
+      sorted(set([ buildDict[buildKey] for buildDict in fullBuildsLOD ]))
+    fullNonpassingTestsIter = CDQAR.iterateTestsOffCDashQueryTestsInChunks(
+      CDQAR.getCDashQueryUrlChunksByField(cdashNonpassingTestsQueryUrl,
+        chunkField, chunkValuesList),
+      cdashNonpassingTestsQueryJsonCacheFile,
+      inOptions.useCachedCDashData,
+      maxConcurrency=inOptions.cdashQueryMaxConnectionsPerHost )
+  else:
+    fullNonpassingTestsIter = CDQAR.iterateTestsOffCDashQueryTests(
+      cdashNonpassingTestsQueryUrl, cdashNonpassingTestsQueryJsonCacheFile,
+      inOptions.useCachedCDashData )
+  if inOptions.useCompactRecords:
+    fullNonpassingTestsIter = \
+      ( CDQAR.TestRecord(testDict) for testDict in fullNonpassingTestsIter )
+
+  return fullNonpassingTestsIter
+
+
+# Builds and nonpassing tests downloaded from CDash once for the whole project
+# and shared by the reports for multiple build-sets (see
+# --buildsets-manifest-file)
+#
+# Each report gets its own shallow copies of the build and test dicts since
+# the analysis adds fields to them.
+#
+class CDashProjectBuildsAndTestsData(object):
+
+  def __init__(self, fullBuildsLOD, fullNonpassingTestsLOD):
+    self.fullBuildsLOD = fullBuildsLOD
+    self.fullNonpassingTestsLOD = fullNonpassingTestsLOD
+
+  def getFullBuildsLOD(self):
+    return [ buildDict.copy() for buildDict in self.fullBuildsLOD ]
+
+  def iterateFullNonpassingTests(self):
+    return ( testDict.copy() for testDict in self.fullNonpassingTestsLOD )
+
+
+# Analyze the builds and tests for one build-set and create the HTML report
+# data for it
+#
+# inOptions [in]: The command-line options for this build-set.
+#
+# projectData [in]: If not None, the CDashProjectBuildsAndTestsData object
+# with the builds and nonpassing tests already downloaded for the whole
+# project.  Otherwise, they are downloaded from CDash (or read from the cache
+# files) using inOptions.
+#
+# addTestHistoryStrategy [in]: If not None, the AddTestHistoryStrategy object
+# used to get the test history.  Otherwise, one is created from inOptions.
+#
+# onHtmlReportDone [in]: If not None, the function
+# onHtmlReportDone(cdashReportData, summaryLine) that is called as soon as the
+# HTML report is done and before the CSV files for the options
+# --write-unexpected-builds-to-file, --write-failing-tests-without-issue-trackers-to-file
+# and --write-test-data-to-file are written (e.g. to start sending the emails
+# with writeAndSendCDashReport()).
+#
+# Returns the tuple (cdashReportData, summaryLine).  Any exception thrown
+# while doing the analysis is caught and reported in cdashReportData.
+#
+def analyzeAndReportBuildset(inOptions, projectData=None,
+    addTestHistoryStrategy=None, onHtmlReportDone=None,
+  ):
 
   cacheDirAndBaseFilePrefix = \
     inOptions.cdashQueriesCacheDir+"/"+inOptions.cdashBaseCacheFilesPrefix
@@ -423,9 +994,6 @@ if __name__ == '__main__':
   #
 
   tcd = CDQAR.TableColumnData
-  pp = pprint.PrettyPrinter(indent=2)
-
-  groupSiteBuildNameSortOrder = ['group', 'site', 'buildname']
 
   #
   # B) Sound off
@@ -444,19 +1012,26 @@ if __name__ == '__main__':
   # called.
   cdashReportData = CDQAR.CDashReportData()
 
-  cdashReportData.htmlEmailBodyTop += \
+  cdashReportData.appendHtmlEmailBodyTop(
    "<h2>Build and Test results for "+inOptions.buildSetName \
-      +" on "+inOptions.date+"</h2>\n\n"
+      +" on "+inOptions.date+"</h2>\n\n")
 
   #
   # D) Read data files, get data off of CDash, do analysis, and construct HTML
   # body parts
   #
 
+  # Only remove the per-build test history cache files at the end if the
+  # AddTestHistoryStrategy object is created here (and not shared)
+  removeBuildTestHistoryCacheFilesAtEnd = False
+
+  # Only write the CSV files at the end if the analysis did not crash
+  analysisCompleted = False
+
   try:
 
     # Beginning of top full bulid and tests CDash links paragraph
-    cdashReportData.htmlEmailBodyTop += "<p>\n"
+    cdashReportData.appendHtmlEmailBodyTop("<p>\n")
 
     #
     # D.1) Read data from input files, set up cache directories
@@ -475,43 +1050,49 @@ if __name__ == '__main__':
     # (requires unique builds with these key/value pairs)
     expectedBuildsSLOD = CDQAR.createSearchableListOfBuilds(expectedBuildsLOD)
 
-    # Create a SearchableListOfDicts that will look up an expected build given
-    # just a test dict fields ['site', 'buildName']. (The list of tests with
-    # issue trackers does not have 'group' since cdash/queryTests.php does not
-    # give the 'group' associated with each test.  Also, note that we need
-    # this special SearchableListOfDicts since the Build Name key name
-    # different for a cdash/queryTests.php test dict 'buildName' and a
-    # cdash/index.php build dict 'buildname'.)
-    testsToExpectedBuildsSLOD = \
-      CDQAR.createTestToBuildSearchableListOfDicts(expectedBuildsLOD)
+    # Add an index to expectedBuildsSLOD that will look up an expected build
+    # given just a test dict fields ['site', 'buildName']. (The list of tests
+    # with issue trackers does not have 'group' since cdash/queryTests.php
+    # does not give the 'group' associated with each test.  Also, note that we
+    # need this special index since the Build Name key name different for a
+    # cdash/queryTests.php test dict 'buildName' and a cdash/index.php build
+    # dict 'buildname'.)
+    testsToExpectedBuildsSLOD = CDQAR.addTestToBuildIndex(expectedBuildsSLOD)
     # ToDo: Put in try/except to print about error in duplicate rows in the
     # list of expected builds.
 
-    # Get list of tests with issue trackers from the input CSV file
+    # Get the tests with issue trackers from the input CSV file (streamed one
+    # row at a time)
     if inOptions.testsWithIssueTrackersFile:
-      fullTestsWithIssueTrackersLOD = CDQAR.getTestsWtihIssueTrackersListFromCsvFile(
-        inOptions.testsWithIssueTrackersFile)
+      testsWithIssueTrackersIter = \
+        CDQAR.iterateTestsWithIssueTrackersFromCsvFile(
+          inOptions.testsWithIssueTrackersFile)
     else:
-      fullTestsWithIssueTrackersLOD = []
-    print("\nNum tests with issue trackers read from CSV file = "+\
-      str(len(fullTestsWithIssueTrackersLOD)))
+      testsWithIssueTrackersIter = []
 
+    # Get a SearchableListOfDicts for the tests with issue trackers to allow
+    # them to be looked up based on matching ['site', 'buildName', 'testname']
+    # key/value pairs.  (When not filtering, the rows of the CSV file are
+    # loaded directly into the SearchableListOfDicts object.)
     if inOptions.filterOutBuildsAndTestsNotMatchingExpectedBuilds:
       (testsWithIssueTrackersLOD, testsWithIssueTrackersNotExpectedLOD) = \
-        CDQAR.splitTestsOnMatchExpectedBuilds(fullTestsWithIssueTrackersLOD,
+        CDQAR.splitTestsOnMatchExpectedBuilds(testsWithIssueTrackersIter,
           testsToExpectedBuildsSLOD)
+      print("\nNum tests with issue trackers read from CSV file = "+\
+        str(len(testsWithIssueTrackersLOD) +
+          len(testsWithIssueTrackersNotExpectedLOD)))
       print("Num tests with issue trackers matching expected builds = "+\
         str(len(testsWithIssueTrackersLOD)))
+      testsWithIssueTrackersSLOD = \
+        CDQAR.createSearchableListOfTests(testsWithIssueTrackersLOD)
     else:
-      testsWithIssueTrackersLOD = fullTestsWithIssueTrackersLOD
+      testsWithIssueTrackersSLOD = \
+        CDQAR.createSearchableListOfTests(testsWithIssueTrackersIter)
+      testsWithIssueTrackersLOD = testsWithIssueTrackersSLOD.getListOfDicts()
+      print("\nNum tests with issue trackers read from CSV file = "+\
+        str(len(testsWithIssueTrackersLOD)))
     print("Num tests with issue trackers = "+\
       str(len(testsWithIssueTrackersLOD)))
-
-    # Get a SearchableListOfDicts for the tests with issue trackers to allow
-    # them to be looked up based on matching ['site', 'buildName', 'testname']
-    # key/value pairs.
-    testsWithIssueTrackersSLOD = \
-      CDQAR.createSearchableListOfTests(testsWithIssueTrackersLOD)
     # ToDo: Put in try/except to print about error in duplicate rows in the
     # list of tests with issue trackers.
 
@@ -528,11 +1109,11 @@ if __name__ == '__main__':
     if not allTestsMatch:
       raise Exception(errMsg)
 
-    # Test history cache dir
-    testHistoryCacheDir = inOptions.cdashQueriesCacheDir+"/test_history"
-    if not os.path.exists(testHistoryCacheDir):
-      print("\nCreating new test cache directory '"+testHistoryCacheDir+"'")
-      os.mkdir(testHistoryCacheDir)
+    # Object to get the test history for lists of tests (which is passed in
+    # when shared with the reports for other build-sets)
+    if not addTestHistoryStrategy:
+      addTestHistoryStrategy = createAddTestHistoryStrategy(inOptions)
+      removeBuildTestHistoryCacheFilesAtEnd = True
 
     #
     # D.2) Get top-level lists of build and nonpassing tests off CDash
@@ -548,19 +1129,10 @@ if __name__ == '__main__':
 
     print("\nCDash builds browser URL:\n\n  "+cdashIndexBuildsBrowserUrl+"\n")
 
-    cdashIndexBuildsQueryUrl = CDQAR.getCDashIndexQueryUrl(
-      inOptions.cdashSiteUrl,
-      inOptions.cdashProjectName,
-      inOptions.date,
-      inOptions.cdashBuildsFilters )
-
-    fullCDashIndexBuildsJsonCacheFile = \
-      cacheDirAndBaseFilePrefix+"fullCDashIndexBuilds.json"
-
-    fullBuildsLOD = CDQAR.downloadBuildsOffCDashAndFlatten(
-      cdashIndexBuildsQueryUrl,
-      fullCDashIndexBuildsJsonCacheFile,
-      inOptions.useCachedCDashData )
+    if projectData:
+      fullBuildsLOD = projectData.getFullBuildsLOD()
+    else:
+      fullBuildsLOD = getFullBuildsLOD(inOptions, cacheDirAndBaseFilePrefix)
 
     print("\nNum builds downloaded from CDash = "+str(len(fullBuildsLOD)))
 
@@ -579,10 +1151,10 @@ if __name__ == '__main__':
     print("Num builds = "+str(len(buildsLOD)))
 
     # HTML line "Builds on CDash"
-    cdashReportData.htmlEmailBodyTop += \
+    cdashReportData.appendHtmlEmailBodyTop(
      "<a href=\""+cdashIndexBuildsBrowserUrl+"\">"+\
      "Builds on CDash</a> (num/expected="+\
-     str(len(buildsLOD))+"/"+str(len(expectedBuildsLOD))+")<br>\n"
+     str(len(buildsLOD))+"/"+str(len(expectedBuildsLOD))+")<br>\n")
 
     # Create a SearchableListOfDict object to help look up builds given a
     # build dict by key/value pairs 'group', 'site', and 'buildname' (requires
@@ -605,42 +1177,42 @@ if __name__ == '__main__':
     print("\nCDash nonpassing tests browser URL:\n\n"+\
       "  "+cdashNonpassingTestsBrowserUrl+"\n")
 
-    cdashNonpassingTestsQueryUrl = CDQAR.getCDashQueryTestsQueryUrl(
-      inOptions.cdashSiteUrl, inOptions.cdashProjectName, inOptions.date,
-      inOptions.cdashNonpassedTestsFilters)
-
-    cdashNonpassingTestsQueryJsonCacheFile = \
-      cacheDirAndBaseFilePrefix+"fullCDashNonpassingTests.json"
+    # NOTE: The nonpassing tests are streamed from CDash (or the cache file)
+    # so that only the tests matching the expected builds are kept in memory
+    # when filtering out tests not matching expected builds.
+    if projectData:
+      fullNonpassingTestsIter = projectData.iterateFullNonpassingTests()
+    else:
+      fullNonpassingTestsIter = getFullNonpassingTestsIter(inOptions,
+        cacheDirAndBaseFilePrefix, fullBuildsLOD)
+    fullNonpassingTestsIter = CDQAR.CountingIterator(fullNonpassingTestsIter)
 
-    fullNonpassingTestsLOD = CDQAR.downloadTestsOffCDashQueryTestsAndFlatten(
-      cdashNonpassingTestsQueryUrl, cdashNonpassingTestsQueryJsonCacheFile,
-      inOptions.useCachedCDashData )
+    if inOptions.filterOutBuildsAndTestsNotMatchingExpectedBuilds:
+      nonpassingTestsLOD = CDQAR.getFilteredList(fullNonpassingTestsIter,
+        CDQAR.MatchDictKeysValuesFunctor(testsToExpectedBuildsSLOD) )
+    else:
+      nonpassingTestsLOD = list(fullNonpassingTestsIter)
 
     print("\nNum nonpassing tests direct from CDash query = "+\
-      str(len(fullNonpassingTestsLOD)))
+      str(fullNonpassingTestsIter.count))
 
     if inOptions.filterOutBuildsAndTestsNotMatchingExpectedBuilds:
-      (nonpassingTestsLOD, nonpassingTestsNotExpectedLOD) = \
-        CDQAR.splitTestsOnMatchExpectedBuilds(fullNonpassingTestsLOD,
-          testsToExpectedBuildsSLOD)
       print("Num nonpassing tests matching expected builds = "+\
        str(len(nonpassingTestsLOD)))
-    else:
-      nonpassingTestsLOD = fullNonpassingTestsLOD
 
     print("Num nonpassing tests = "+\
       str(len(nonpassingTestsLOD)))
 
     # HTML line "Nonpassing Tests on CDash"
-    cdashReportData.htmlEmailBodyTop += \
+    cdashReportData.appendHtmlEmailBodyTop(
      "<a href=\""+cdashNonpassingTestsBrowserUrl+"\">"+\
-     "Non-passing Tests on CDash</a> (num="+str(len(nonpassingTestsLOD))+")<br>\n"
+     "Non-passing Tests on CDash</a> (num="+str(len(nonpassingTestsLOD))+")<br>\n")
 
     # End of full build and test link paragraph and start the next paragraph
     # for the summary of failures and other tables
-    cdashReportData.htmlEmailBodyTop += \
+    cdashReportData.appendHtmlEmailBodyTop(
       "</p>\n\n"+\
-      "<p>\n"
+      "<p>\n")
 
     # Create a SearchableListOfDicts object for looking up a nonpassing test
     # given the test dict fields 'site', 'buildName', and 'testname'.
@@ -781,7 +1353,6 @@ if __name__ == '__main__':
     #
 
     # Object to make it easy to process the different test sets
-    addTestHistoryStrategy = AddTestHistoryStrategy(inOptions, testHistoryCacheDir)
     testsetReporter = CDQAR.SingleTestsetReporter(cdashReportData,
       addTestHistoryStrategy=addTestHistoryStrategy)
 
@@ -825,23 +1396,8 @@ if __name__ == '__main__':
       print("\nGetting test history for tests with issue trackers"+\
         " passing or missing: num="+str(len(testsWithIssueTrackersPassingOrMissingLOD)))
 
-      CDQAR.foreachTransform(
-        testsWithIssueTrackersPassingOrMissingLOD,
-        CDQAR.AddTestHistoryToTestDictFunctor(
-          inOptions.cdashSiteUrl,
-          inOptions.cdashProjectName,
-          inOptions.date,
-          inOptions.cdashProjectTestingDayStartTime,
-          inOptions.testHistoryDays,
-          testHistoryCacheDir,
-          useCachedCDashData=inOptions.useCachedCDashData,
-          alwaysUseCacheFileIfExists=True,
-          verbose=True,
-          printDetails=inOptions.printDetails,
-          requireMatchTestTopTestHistory=inOptions.requireTestHistoryMatchNonpassingTests,
-
-          )
-        )
+      addTestHistoryStrategy.getTestHistory(
+        testsWithIssueTrackersPassingOrMissingLOD)
 
       # Split into lists for 'twip' and 'twim'
       (twipLOD, twimLOD) = CDQAR.splitListOnMatch(
@@ -857,14 +1413,14 @@ if __name__ == '__main__':
     # person doing the triaging are sorted to the top.
     #
 
-    testsetReporter.reportSingleTestset(
+    twoifReportedLOD = testsetReporter.reportSingleTestset(
       CDQAR.getStandardTestsetTypeInfo('twoif'),
       len(twoifLOD), twoifLOD,
       limitTableRows=inOptions.limitTableRows,
       getTestHistory=True,
       )
 
-    testsetReporter.reportSingleTestset(
+    twoinrReportedLOD = testsetReporter.reportSingleTestset(
       CDQAR.getStandardTestsetTypeInfo('twoinr'),
       len(twoinrLOD), twoinrLOD,
       limitTableRows=inOptions.limitTableRows,
@@ -885,22 +1441,85 @@ if __name__ == '__main__':
       getTestHistory=False,  # Already got it above!
       )
 
-    testsetReporter.reportSingleTestset(
+    twifReportedLOD = testsetReporter.reportSingleTestset(
       CDQAR.getStandardTestsetTypeInfo('twif', ""),
       len(twifLOD), twifLOD,
       limitTableRows=None,
       getTestHistory=True,
       )
 
-    testsetReporter.reportSingleTestset(
+    twinrReportedLOD = testsetReporter.reportSingleTestset(
       CDQAR.getStandardTestsetTypeInfo('twinr', ""),
       len(twinrLOD), twinrLOD,
       limitTableRows=None,
       getTestHistory=True,
       )
 
+    # Report the tests that have flaky test histories (only for the tests
+    # that the test history was gotten for above).  These tests are also
+    # listed in the tables above and don't cause the global fail.
+    flakyLOD = [ testDict for testDict in \
+      twoifReportedLOD + twoinrReportedLOD + twipLOD + twimLOD + \
+        twifReportedLOD + twinrReportedLOD \
+      if CDQAR.isTestFlaky(testDict) ]
+
+    flakyTestsetTypeInfo = CDQAR.getStandardTestsetTypeInfo('flaky')
+    flakyTestsetTypeInfo.inSummaryLine = inOptions.flakyTestsInSummaryLine
+    testsetReporter.reportSingleTestset(
+      flakyTestsetTypeInfo,
+      len(flakyLOD), flakyLOD,
+      limitTableRows=None,
+      getTestHistory=False,  # Already got it above!
+      )
+
+    analysisCompleted = True
+
+  except Exception:
+    # Traceback!
+    print("")
+    sys.stdout.flush()
+    traceback.print_exc()
+    # Report the error
+    cdashReportData.appendHtmlEmailBodyBottom("\n<pre><code>\n"+\
+      traceback.format_exc()+"\n</code></pre>\n")
+    print("\nError, could not compute the analysis due to"+\
+      " above error so return failed!")
+    cdashReportData.globalPass = False
+    cdashReportData.summaryLineDataNumbersList.append("SCRIPT CRASHED")
+
+  if removeBuildTestHistoryCacheFilesAtEnd:
+    addTestHistoryStrategy.removeBuildTestHistoryCacheFiles()
+
+  #
+  # E) Put together final email summary line
+  #
+
+  summaryLine = CDQAR.getOverallCDashReportSummaryLine(cdashReportData,
+    inOptions.buildSetName, inOptions.date)
+
+  #
+  # F) Finish off HTML body guts and define overall HTML body style
+  #
+
+  # Finish off the top paragraph of the summary lines
+  cdashReportData.appendHtmlEmailBodyTop(
+    "</p>\n")
+
+  if onHtmlReportDone:
+    onHtmlReportDone(cdashReportData, summaryLine)
+
+  #
+  # G) Write out the CSV files (after the HTML report is done so that the
+  # emails can be sent while they are being written)
+  #
+
+  if not analysisCompleted:
+    return (cdashReportData, summaryLine)
+
+  try:
+
     #
-    # D.6) Write out list of unexpected builds to CSV file
+    # G.1) Write out list of unexpected builds to CSV file
     #
 
     if inOptions.writeUnexpectedBuildsToFile:
@@ -911,7 +1530,7 @@ if __name__ == '__main__':
         unexpectedBuildsCsvFileName)
 
     #
-    # D.7) Write out list twiof to CSV file
+    # G.2) Write out list twiof to CSV file
     #
 
     if inOptions.writeFailingTestsWithoutIssueTrackersToFile:
@@ -920,7 +1539,7 @@ if __name__ == '__main__':
       CDQAR.writeTestsListOfDictsToCsvFile(twoifLOD, twoifCsvFileName)
 
     #
-    # D.8) Write out test data to CSV file
+    # G.3) Write out test data to CSV file
     #
 
     if inOptions.writeTestDataToFile:
@@ -930,67 +1549,589 @@ if __name__ == '__main__':
       CDQAR.foreachTransform(testDataLOD,
         CDQAR.AddCDashTestingDayFunctor(inOptions.date))
       # ToDo: Add the first inOptions.limitTableRows elements of twiofLOD and twoinrLOD?
-      CDQAR.pprintPythonDataToFile(testDataLOD, testDataFileName)
+      CDQAR.writeTestDataToFile(testDataLOD, testDataFileName,
+        inOptions.testDataFileFormat)
 
   except Exception:
     # Traceback!
     print("")
     sys.stdout.flush()
     traceback.print_exc()
-    # Report the error
-    cdashReportData.htmlEmailBodyBottom += "\n<pre><code>\n"+\
-      traceback.format_exc()+"\n</code></pre>\n"
-    print("\nError, could not compute the analysis due to"+\
+    print("\nError, could not write the output files due to"+\
       " above error so return failed!")
+    # NOTE: The HTML report is already done so only the returned summary line
+    # reports the error.
     cdashReportData.globalPass = False
     cdashReportData.summaryLineDataNumbersList.append("SCRIPT CRASHED")
+    summaryLine = CDQAR.getOverallCDashReportSummaryLine(cdashReportData,
+      inOptions.buildSetName, inOptions.date)
 
-  #
-  # E) Put together final email summary line
-  #
+  return (cdashReportData, summaryLine)
 
-  summaryLine = CDQAR.getOverallCDashReportSummaryLine(cdashReportData,
-    inOptions.buildSetName, inOptions.date)
+
+# Write the HTML report file and/or send the HTML email(s) for a build-set
+#
+# The emails are sent in the background so that other work can be done while
+# they are being sent (e.g. analyzing the next build-set and writing its
+# output files).  Returns the CDQAR.BackgroundFunctionCall object for sending
+# the emails (or None if no emails are sent).  The caller must call wait() on
+# it before exiting.
+#
+def writeAndSendCDashReport(inOptions, cdashReportData, summaryLine):
+
+  defaultPageStyle = CDQAR.getDefaultHtmlPageStyleStr()
+
+  emailSend = None
+  if inOptions.sendEmailTo:
+    htmlEmailBodyStr = CDQAR.getFullCDashHtmlReportPageStr(cdashReportData,
+      pageStyle=defaultPageStyle)
+    emailAddressesList = [ emailAddress.strip() \
+      for emailAddress in inOptions.sendEmailTo.split(',') ]
+    print("\nSending email to '"+"', '".join(emailAddressesList)+"' ...")
+    emailSender = CDQAR.HtmlEmailBatchSender(
+      smtpServer=inOptions.emailSmtpServer,
+      oneMessageForAllRecipients=inOptions.emailOneMessageForAllRecipients,
+      maxHtmlBodyBytes=inOptions.emailMaxHtmlBodyBytes,
+      largeHtmlBodyMode=inOptions.emailLargeHtmlBodyMode )
+    emailSend = emailSender.sendHtmlEmailInBackground(
+      inOptions.emailFromAddress, emailAddressesList, summaryLine,
+      htmlEmailBodyStr, inOptions.emailWithoutSoftHyphens)
+
+  if inOptions.writeEmailToFile:
+    print("\nWriting HTML file '"+inOptions.writeEmailToFile+"' ...")
+    with open(inOptions.writeEmailToFile, 'w') as outFile:
+      CDQAR.writeFullCDashHtmlReportPage(outFile.write, cdashReportData,
+        pageTitle=summaryLine, pageStyle=defaultPageStyle)
+
+  return emailSend
+
+
+
+# Required and optional columns in the --buildsets-manifest-file CSV file
+g_buildsetsManifestCsvFileHeadersRequired = [
+  'build_set_name', 'expected_builds_file' ]
+g_buildsetsManifestCsvFileHeadersOptional = [
+  'tests_with_issue_trackers_file', 'cdash_builds_filters',
+  'cdash_nonpassed_tests_filters', 'write_email_to_file', 'send_email_to',
+  'write_unexpected_builds_to_file',
+  'write_failing_tests_without_issue_trackers_to_file',
+  'write_test_data_to_file' ]
+
+# Map of the --buildsets-manifest-file columns to the inOptions fields for
+# the options that default to the command-line option if empty
+g_buildsetsManifestColumnToInheritedOptionDict = {
+  'build_set_name' : 'buildSetName',
+  'expected_builds_file' : 'expectedBuildsFile',
+  'tests_with_issue_trackers_file' : 'testsWithIssueTrackersFile',
+  'cdash_builds_filters' : 'cdashBuildsFilters',
+  'cdash_nonpassed_tests_filters' : 'cdashNonpassedTestsFilters',
+  }
+
+# Map of the --buildsets-manifest-file columns to the inOptions fields for
+# the output options that are empty unless set for the build-set
+g_buildsetsManifestColumnToOutputOptionDict = {
+  'write_email_to_file' : 'writeEmailToFile',
+  'send_email_to' : 'sendEmailTo',
+  'write_unexpected_builds_to_file' : 'writeUnexpectedBuildsToFile',
+  'write_failing_tests_without_issue_trackers_to_file' :
+    'writeFailingTestsWithoutIssueTrackersToFile',
+  'write_test_data_to_file' : 'writeTestDataToFile',
+  }
+
+
+# Get the list of build-set dicts read from the --buildsets-manifest-file CSV
+# file
+def getBuildsetsListOfDictsFromManifestFile(buildsetsManifestFile):
+  return CDQAR.readCsvFileIntoListOfDicts(buildsetsManifestFile,
+    g_buildsetsManifestCsvFileHeadersRequired,
+    g_buildsetsManifestCsvFileHeadersOptional)
+
+
+# Get the command-line options for one build-set in the manifest file
+#
+# Returns a copy of inOptions with the options set from the columns in
+# buildsetDict.  Since the builds and tests are downloaded for the whole
+# project, --filter-out-builds-and-tests-not-matching-expected-builds is
+# always set to 'on' for each build-set.
+#
+def getBuildsetCmndLineOptions(inOptions, buildsetDict):
+  buildsetOptions = copy.copy(inOptions)
+  for (columnName, optionName) in \
+    g_buildsetsManifestColumnToInheritedOptionDict.items() \
+    :
+    columnValue = buildsetDict.get(columnName, "")
+    if columnValue:
+      setattr(buildsetOptions, optionName, columnValue)
+  for (columnName, optionName) in \
+    g_buildsetsManifestColumnToOutputOptionDict.items() \
+    :
+    setattr(buildsetOptions, optionName, buildsetDict.get(columnName, ""))
+  buildsetOptions.filterOutBuildsAndTestsNotMatchingExpectedBuildsStr = "on"
+  buildsetOptions.filterOutBuildsAndTestsNotMatchingExpectedBuilds = True
+  buildsetOptions.cdashBaseCacheFilesPrefix = \
+    CDQAR.getFileNameStrFromText(buildsetOptions.buildSetName)+"_"
+  return buildsetOptions
+
+
+# Analyze and report all of the build-sets listed in --buildsets-manifest-file
+#
+# The builds and nonpassing tests for the whole project (using the
+# command-line options --cdash-builds-filters and
+# --cdash-nonpassed-tests-filters) are downloaded once and then split up for
+# each build-set by matching its expected builds.  The test history gotten
+# for a test in one build-set is reused for the same test in the other
+# build-sets.  The report for each build-set is written and/or sent using the
+# output options for that build-set.
+#
+# Returns True if all of the build-sets passed.
+#
+def analyzeAndReportBuildsetsInManifest(inOptions):
+
+  buildsetsLOD = getBuildsetsListOfDictsFromManifestFile(
+    inOptions.buildsetsManifestFile)
+  print("\nNum build-sets in manifest file = "+str(len(buildsetsLOD)))
+
+  cacheDirAndBaseFilePrefix = \
+    inOptions.cdashQueriesCacheDir+"/"+inOptions.cdashBaseCacheFilesPrefix
+
+  print("\nGetting builds and nonpassing tests for the whole project ...")
+  fullBuildsLOD = getFullBuildsLOD(inOptions, cacheDirAndBaseFilePrefix)
+  projectData = CDashProjectBuildsAndTestsData(fullBuildsLOD,
+    list(getFullNonpassingTestsIter(inOptions, cacheDirAndBaseFilePrefix,
+      fullBuildsLOD)) )
+  print("\nNum builds for the whole project = "+\
+    str(len(projectData.fullBuildsLOD)))
+  print("Num nonpassing tests for the whole project = "+\
+    str(len(projectData.fullNonpassingTestsLOD)))
+
+  addTestHistoryStrategy = createAddTestHistoryStrategy(inOptions,
+    testHistoryLODCache={})
+
+  allBuildsetsPass = True
+  summaryLinesList = []
+  emailSendsList = []
+  try:
+    for buildsetDict in buildsetsLOD:
+      buildsetOptions = getBuildsetCmndLineOptions(inOptions, buildsetDict)
+      def writeAndSendBuildsetReport(cdashReportData, summaryLine):
+        emailSend = writeAndSendCDashReport(buildsetOptions, cdashReportData,
+          summaryLine)
+        if emailSend: emailSendsList.append(emailSend)
+      (cdashReportData, summaryLine) = analyzeAndReportBuildset(buildsetOptions,
+        projectData, addTestHistoryStrategy,
+        onHtmlReportDone=writeAndSendBuildsetReport)
+      print("\n"+summaryLine+"\n")
+      if not cdashReportData.globalPass:
+        allBuildsetsPass = False
+      summaryLinesList.append(summaryLine)
+    addTestHistoryStrategy.removeBuildTestHistoryCacheFiles()
+  finally:
+    # Wait for all of the emails already started (even if a later build-set
+    # failed)
+    emailSendsError = CDQAR.waitForBackgroundFunctionCalls(emailSendsList)
+  if emailSendsError:
+    raise emailSendsError
+
+  print("\n***")
+  print("*** Summary of all of the build-sets")
+  print("***\n")
+  for summaryLine in summaryLinesList:
+    print(summaryLine)
+
+  return allBuildsetsPass
+
+
+# Get the list of testing days <YYYY-MM-DD> (in order) for the --date-range
+# <begin>:<end> argument
+def getDateRangeList(cdashProjectTestingDayStartTime, dateRange):
+  dateRangeParts = dateRange.split(":")
+  if len(dateRangeParts) != 2:
+    raise Exception("Error, --date-range='"+dateRange+"' must be of the form"+\
+      " <begin>:<end>!")
+  beginDateTime = CDQAR.convertInputDateArgToYYYYMMDD(
+    cdashProjectTestingDayStartTime, dateRangeParts[0].strip())
+  endDateTime = CDQAR.convertInputDateArgToYYYYMMDD(
+    cdashProjectTestingDayStartTime, dateRangeParts[1].strip())
+  if beginDateTime > endDateTime:
+    raise Exception("Error, --date-range='"+dateRange+"' has a begin date"+\
+      " after the end date!")
+  numDays = (endDateTime - beginDateTime).days + 1
+  return [ CBTD.getDateStrFromDateTime(beginDateTime + datetime.timedelta(days=i)) \
+    for i in range(numDays) ]
+
+
+# Options for the files written for each testing day with --date-range
+g_dateRangeDayOutputFileOptionsList = [
+  'writeEmailToFile',
+  'writeUnexpectedBuildsToFile',
+  'writeFailingTestsWithoutIssueTrackersToFile',
+  'writeTestDataToFile',
+  ]
+
+
+# Get the file name '<base>-<YYYY-MM-DD><ext>' for an output file '<base><ext>'
+# for a testing day with --date-range (or '' if fileName is '')
+def getDateRangeDayFileName(fileName, date):
+  if not fileName:
+    return ""
+  (fileNameBase, fileNameExt) = os.path.splitext(fileName)
+  return fileNameBase+"-"+date+fileNameExt
+
+
+# Get the command-line options for one testing day with --date-range
+#
+# Returns a copy of inOptions for the testing day 'date' with the day's own
+# base cache files and output files.  The test history store is always used
+# so that the test history is shared between the testing days.
+#
+def getDateRangeDayCmndLineOptions(inOptions, date):
+  dayOptions = copy.copy(inOptions)
+  dayOptions.date = date
+  dayOptions.dateRange = ""
+  dayOptions.cdashBaseCacheFilesPrefix = \
+    inOptions.cdashBaseCacheFilesPrefix+date+"_"
+  for optionName in g_dateRangeDayOutputFileOptionsList:
+    setattr(dayOptions, optionName,
+      getDateRangeDayFileName(getattr(inOptions, optionName), date))
+  dayOptions.sendEmailTo = ""
+  dayOptions.useTestHistoryStoreStr = "on"
+  dayOptions.useTestHistoryStore = True
+  return dayOptions
+
+
+# Set up the global state in CDashQueryAnalyzeReport for the command-line
+# options in a process running the testing days for --date-range
+def initDateRangeProcess(inOptions):
+  CDQAR.setDefaultCDashQueryDataCacheFileFormat(inOptions.cdashCacheFileFormat)
+  CDQAR.setMigrateLegacyCDashQueryDataCacheFiles(
+    inOptions.migrateLegacyCacheFiles)
+  setTestHistoryCacheBackendFromCmndLineOptions(inOptions)
+  setDefaultCDashQuerySessionFromCmndLineOptions(inOptions)
+
+
+# Collects the strings written to it (used to capture the STDOUT for a
+# testing day)
+class StrPartsWriter(object):
+  def __init__(self):
+    self.strParts = []
+  def write(self, s):
+    self.strParts.append(s)
+  def flush(self):
+    None
+  def getStr(self):
+    return "".join(self.strParts)
+
+
+# Result of analyzing and reporting one testing day with --date-range
+#
+# This is returned from the process that ran that testing day so it only
+# holds simple data.
+#
+class DateRangeDayResult(object):
+  def __init__(self, date, globalPass, summaryLine, summaryLineDataNumbersList,
+      stdoutStr, timingDataDict=None,
+    ):
+    self.date = date
+    self.globalPass = globalPass
+    self.summaryLine = summaryLine
+    self.summaryLineDataNumbersList = summaryLineDataNumbersList
+    self.stdoutStr = stdoutStr
+    self.timingDataDict = timingDataDict
+
+
+# Analyze and report one testing day with --date-range and return its
+# DateRangeDayResult object
+#
+# The STDOUT for the testing day is captured and returned in the result so
+# that the output for the testing days run at the same time is not mixed up.
+# The timers and counters for the testing day are collected in their own
+# CDQAR.TimingRegistry object and returned in the result as well so that they
+# can be added up in the parent process.  The CDash queries for the testing
+# day are coalesced with their own CDQAR.CDashQueryDataCoalescer object so
+# the data for a testing day is not kept after it is done.
+#
+def analyzeAndReportDateRangeDay(dayOptions):
+  stdoutWriter = StrPartsWriter()
+  origStdout = sys.stdout
+  sys.stdout = stdoutWriter
+  dayTimingRegistry = CDQAR.TimingRegistry()
+  origTimingRegistry = CDQAR.setDefaultTimingRegistry(dayTimingRegistry)
+  origCDashQueryDataCoalescer = CDQAR.setDefaultCDashQueryDataCoalescer(
+    CDQAR.CDashQueryDataCoalescer())
+  try:
+    (cdashReportData, summaryLine) = analyzeAndReportBuildset(dayOptions)
+    writeAndSendCDashReport(dayOptions, cdashReportData, summaryLine)
+    print("\n"+summaryLine+"\n")
+  finally:
+    sys.stdout = origStdout
+    CDQAR.setDefaultTimingRegistry(origTimingRegistry)
+    CDQAR.setDefaultCDashQueryDataCoalescer(origCDashQueryDataCoalescer)
+  return DateRangeDayResult(dayOptions.date, cdashReportData.globalPass,
+    summaryLine, cdashReportData.summaryLineDataNumbersList,
+    stdoutWriter.getStr(), dayTimingRegistry.getDataDict() )
+
+
+# Get the list of row dicts for the --date-range summary table with the
+# columns 'date', 'result' and one column for each of the acronyms in
+# acroList (e.g. 'bm', 'twoif') with the counts for each testing day
+#
+# The acronyms in acroList_inout are added in the order they are found in the
+# summary line data numbers for the testing days.
+#
+def getDateRangeSummaryRowsLOD(dateRangeDayResultsList, acroList_inout,
+    dayFileNames=None,
+  ):
+  rowsLOD = []
+  for dayResult in dateRangeDayResultsList:
+    rowDict = { 'date' : dayResult.date }
+    if dayFileNames:
+      rowDict['date_url'] = os.path.basename(dayFileNames[dayResult.date])
+    otherDataList = []
+    for dataNumberStr in dayResult.summaryLineDataNumbersList:
+      dataNumberParts = dataNumberStr.split("=")
+      if len(dataNumberParts) == 2:
+        (acro, num) = dataNumberParts
+        rowDict[acro] = num
+        if not acro in acroList_inout:
+          acroList_inout.append(acro)
+      else:
+        otherDataList.append(dataNumberStr)
+    if dayResult.globalPass:
+      rowDict['result'] = "PASSED"
+      rowDict['result_color'] = CDQAR.cdashColorPassed()
+    else:
+      rowDict['result'] = "FAILED"
+      rowDict['result_color'] = CDQAR.cdashColorFailed()
+    if otherDataList:
+      rowDict['result'] += " ("+", ".join(otherDataList)+")"
+    rowsLOD.append(rowDict)
+  for rowDict in rowsLOD:
+    for acro in acroList_inout:
+      rowDict.setdefault(acro, "0")
+  return rowsLOD
+
+
+# Analyze and report each of the testing days in --date-range
+#
+# The testing days are run in --date-range-max-concurrency processes at the
+# same time (in order from the first testing day).  The reports for the
+# testing days are written to the files named by getDateRangeDayFileName()
+# and the summary table with the results for all of the testing days is
+# written to --write-email-to-file (if set).
+#
+# Returns True if all of the testing days passed.
+#
+def analyzeAndReportDateRange(inOptions):
+
+  dateRangeList = inOptions.dateRangeList
+  print("\nNum testing days in date range = "+str(len(dateRangeList)))
+
+  # Create the test history cache dir up front (and not in each process)
+  testHistoryCacheDir = inOptions.cdashQueriesCacheDir+"/test_history"
+  if not os.path.exists(testHistoryCacheDir):
+    print("\nCreating new test cache directory '"+testHistoryCacheDir+"'")
+    os.mkdir(testHistoryCacheDir)
+
+  dayOptionsList = [ getDateRangeDayCmndLineOptions(inOptions, date) \
+    for date in dateRangeList ]
+
+  maxConcurrency = min(inOptions.dateRangeMaxConcurrency, len(dayOptionsList))
+  dateRangeDayResultsList = []
+  if maxConcurrency > 1:
+    import multiprocessing
+    pool = multiprocessing.Pool(maxConcurrency,
+      initializer=initDateRangeProcess, initargs=(inOptions,))
+    try:
+      for dayResult in pool.imap(analyzeAndReportDateRangeDay, dayOptionsList):
+        sys.stdout.write(dayResult.stdoutStr)
+        sys.stdout.flush()
+        CDQAR.getDefaultTimingRegistry().addDataDict(dayResult.timingDataDict)
+        dateRangeDayResultsList.append(dayResult)
+      pool.close()
+    except:
+      pool.terminate()
+      raise
+    finally:
+      pool.join()
+  else:
+    for dayOptions in dayOptionsList:
+      dayResult = analyzeAndReportDateRangeDay(dayOptions)
+      sys.stdout.write(dayResult.stdoutStr)
+      CDQAR.getDefaultTimingRegistry().addDataDict(dayResult.timingDataDict)
+      dateRangeDayResultsList.append(dayResult)
+
+  # Summary of all of the testing days
+
+  numDaysPassed = len(
+    [ dayResult for dayResult in dateRangeDayResultsList if dayResult.globalPass ] )
+  numDaysFailed = len(dateRangeDayResultsList) - numDaysPassed
+  dateRangePass = (numDaysFailed == 0)
+
+  if dateRangePass: summaryLine = "PASSED"
+  else: summaryLine = "FAILED"
+  summaryLine += " (days passed="+str(numDaysPassed)+\
+    ", days failed="+str(numDaysFailed)+"): "+inOptions.buildSetName+\
+    " from "+dateRangeList[0]+" to "+dateRangeList[-1]
+
+  print("\n***")
+  print("*** Summary of all of the testing days")
+  print("***\n")
+  for dayResult in dateRangeDayResultsList:
+    print(dayResult.summaryLine)
+
+  if inOptions.writeEmailToFile:
+    dayFileNames = dict( (date, getDateRangeDayFileName(
+      inOptions.writeEmailToFile, date)) for date in dateRangeList )
+    acroList = []
+    summaryRowsLOD = getDateRangeSummaryRowsLOD(dateRangeDayResultsList,
+      acroList, dayFileNames)
+    tcd = CDQAR.TableColumnData
+    summaryColDataList = [ tcd("Testing Day", 'date'), tcd("Result", 'result') ] +\
+      [ tcd(acro, acro, 'right') for acro in acroList ]
+    cdashReportData = CDQAR.CDashReportData()
+    cdashReportData.globalPass = dateRangePass
+    cdashReportData.appendHtmlEmailBodyTop(
+      "<h2>Build and Test results for "+inOptions.buildSetName+\
+      " from "+dateRangeList[0]+" to "+dateRangeList[-1]+"</h2>\n\n")
+    CDQAR.writeHtmlTable(cdashReportData.appendHtmlEmailBodyBottom,
+      "Results for each testing day: days passed="+str(numDaysPassed)+\
+        ", days failed="+str(numDaysFailed),
+      summaryColDataList, summaryRowsLOD, htmlStyle="")
+    print("\nWriting HTML file '"+inOptions.writeEmailToFile+"' ...")
+    with open(inOptions.writeEmailToFile, 'w') as outFile:
+      CDQAR.writeFullCDashHtmlReportPage(outFile.write, cdashReportData,
+        pageTitle=summaryLine,
+        pageStyle=CDQAR.getDefaultHtmlPageStyleStr())
+
+  print("\n"+summaryLine+"\n")
+
+  return dateRangePass
+
+
+# Apply the size and age caps to the test history cache and print the cache
+# statistics
+#
+# If compact==True, then the old test history cache files are packed into the
+# cache archive file as well (see CDQAR.CDashQueryCacheManager).
+#
+def manageTestHistoryCache(inOptions, compact=False):
+  testHistoryCacheDir = inOptions.cdashQueriesCacheDir+"/test_history"
+  if not os.path.exists(testHistoryCacheDir):
+    print("\nThe test history cache directory '"+testHistoryCacheDir+"'"+\
+      " does not exist!")
+    return
+  maxTotalBytes = None
+  if inOptions.cacheMaxSizeMb > 0:
+    maxTotalBytes = int(inOptions.cacheMaxSizeMb*1024*1024)
+  maxAgeDays = None
+  if inOptions.cacheMaxAgeDays > 0:
+    maxAgeDays = inOptions.cacheMaxAgeDays
+  cacheManager = CDQAR.CDashQueryCacheManager(testHistoryCacheDir,
+    maxTotalBytes=maxTotalBytes, maxAgeDays=maxAgeDays,
+    verbose=inOptions.printDetails)
+  print("\nManaging the test history cache '"+testHistoryCacheDir+"' ...")
+  evictStatsDict = cacheManager.evictCacheFiles()
+  print("\n  Evicted "+str(evictStatsDict['num_evicted_files'])+" cache files"+\
+    " ("+str(evictStatsDict['evicted_bytes'])+" bytes)")
+  if compact:
+    compactStatsDict = cacheManager.compactCacheFiles(
+      inOptions.cacheCompactMinAgeDays)
+    print("  Packed "+str(compactStatsDict['num_packed_files'])+" cache files"+\
+      " ("+str(compactStatsDict['packed_bytes'])+" bytes) into the cache archive")
+    print("  Dropped "+str(compactStatsDict['num_expired_archived_files'])+\
+      " expired cache files from the cache archive")
+    print("  Dropped "+str(compactStatsDict['dropped_pack_bytes'])+" bytes of"+\
+      " superseded records from "+\
+      str(compactStatsDict['num_compacted_pack_files'])+" pack files")
+  print("\nTest history cache statistics:\n")
+  for (statName, statValue) in sorted(cacheManager.getStats().items()):
+    print("  "+statName+" = "+str(statValue))
+
+
+# Write the timers and counters in timingRegistry to the JSON file
+# --timing-report and print the summary table for them
+def writeTimingReport(inOptions, timingRegistry):
+  print("\nWriting timing report file '"+inOptions.timingReport+"' ...")
+  with open(inOptions.timingReport, 'w') as timingReportFile:
+    json.dump(timingRegistry.getDataDict(), timingReportFile, indent=2,
+      sort_keys=True)
+  print("\nTiming report:\n")
+  print(timingRegistry.getSummaryTableStr())
+
+
+#
+# Run the script
+#
+
+if __name__ == '__main__':
 
   #
-  # F) Finish off HTML body guts and define overall HTML body style
+  # Get commandline options
   #
 
-  # Finish off the top paragraph of the summary lines
-  cdashReportData.htmlEmailBodyTop += \
-    "</p>\n"
+  inOptions = getCmndLineOptions()
+  echoCmndLine(inOptions)
+
+  if inOptions.cacheCompact:
+    manageTestHistoryCache(inOptions, compact=True)
+    sys.exit(0)
+
+  setDefaultCDashQuerySessionFromCmndLineOptions(inOptions)
+
+  # Share the data for the same CDash query URL (e.g. the test history for a
+  # test in more than one test-set or build-set)
+  CDQAR.setDefaultCDashQueryDataCoalescer(CDQAR.CDashQueryDataCoalescer())
 
   #
-  # G) Write HTML body file and/or send HTML email(s)
+  # Analyze and report the build-set(s)
   #
 
-  defaultPageStyle = CDQAR.getDefaultHtmlPageStyleStr()
+  timingRegistry = CDQAR.getDefaultTimingRegistry()
+  startTime = timingRegistry.getTime()
 
-  if inOptions.writeEmailToFile:
-    print("\nWriting HTML file '"+inOptions.writeEmailToFile+"' ...")
-    fullCDashHtmlReportPageStr = CDQAR.getFullCDashHtmlReportPageStr(cdashReportData,
-      pageTitle=summaryLine, pageStyle=defaultPageStyle)
-    with open(inOptions.writeEmailToFile, 'w') as outFile:
-      outFile.write(fullCDashHtmlReportPageStr)
+  if inOptions.dateRange:
 
-  if inOptions.sendEmailTo:
-    htmlEmailBodyStr = CDQAR.getFullCDashHtmlReportPageStr(cdashReportData,
-      pageStyle=defaultPageStyle)
-    for emailAddress in inOptions.sendEmailTo.split(','):
-      emailAddress = emailAddress.strip()
-      print("\nSending email to '"+emailAddress+"' ...")
-      msg=CDQAR.createHtmlMimeEmail(
-        inOptions.emailFromAddress, emailAddress, summaryLine, "",
-        htmlEmailBodyStr, inOptions.emailWithoutSoftHyphens)
-      CDQAR.sendMineEmail(msg)
+    globalPass = analyzeAndReportDateRange(inOptions)
+
+  elif inOptions.buildsetsManifestFile:
+
+    globalPass = analyzeAndReportBuildsetsInManifest(inOptions)
+    print("")
+
+  else:
+
+    # Start sending the emails as soon as the HTML report is done and then
+    # wait for them after the CSV files are written
+    emailSendsList = []
+    def writeAndSendReport(cdashReportData, summaryLine):
+      emailSend = writeAndSendCDashReport(inOptions, cdashReportData,
+        summaryLine)
+      if emailSend: emailSendsList.append(emailSend)
+    (cdashReportData, summaryLine) = analyzeAndReportBuildset(inOptions,
+      onHtmlReportDone=writeAndSendReport)
+    for emailSend in emailSendsList: emailSend.wait()
+
+    print("\n"+summaryLine+"\n")
+
+    globalPass = cdashReportData.globalPass
+
+  timingRegistry.addTime('total', timingRegistry.getTime() - startTime)
+
+  if inOptions.cacheMaxSizeMb > 0 or inOptions.cacheMaxAgeDays > 0:
+    manageTestHistoryCache(inOptions)
 
   #
-  # H) Return final global pass/fail
+  # Write the timing report
   #
 
-  print("\n"+summaryLine+"\n")
+  if inOptions.timingReport:
+    writeTimingReport(inOptions, timingRegistry)
+
+  #
+  # Return final global pass/fail
+  #
 
-  if cdashReportData.globalPass:
+  if globalPass:
     sys.exit(0)
   else:
     sys.exit(1)
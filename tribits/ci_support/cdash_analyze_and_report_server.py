@@ -0,0 +1,443 @@
+#!/usr/bin/env python
+
+# @HEADER
+# ************************************************************************
+#
+#            TriBITS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+import os
+import sys
+import copy
+import time
+import threading
+import traceback
+
+try:
+  # Python 2
+  from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+  from SocketServer import ThreadingMixIn
+  from urlparse import urlparse, parse_qs
+  from urllib import quote_plus
+  from cgi import escape as htmlEscape
+except ImportError:
+  # Python 3
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from socketserver import ThreadingMixIn
+  from urllib.parse import urlparse, parse_qs, quote_plus
+  from html import escape as htmlEscape
+
+import CDashQueryAnalyzeReport as CDQAR
+import cdash_build_testing_date as CBTD
+import cdash_analyze_and_report as CAAR
+
+#
+# Help message
+#
+
+
+usageHelp = r"""cdash_analyze_and_report_server.py [options]
+
+This script runs a local HTTP server that creates the same HTML reports as
+cdash_analyze_and_report.py on demand for the URL:
+
+  http://<host>:<port>/report?buildset=<build_set_name>&date=<date>
+
+where <date> is <YYYY-MM-DD> or the special values 'today' or 'yesterday'
+(the default if 'date' is not given).  The URL http://<host>:<port>/ lists
+the build-sets that can be reported.
+
+The build-sets are given by --buildsets-manifest-file=<csv-file> (see
+cdash_analyze_and_report.py --help) or just the one build-set given by the
+other options as for cdash_analyze_and_report.py (in which case the
+'buildset' field can be left off of the URL).  The output options like
+--write-email-to-file and --send-email-to are ignored.
+
+The builds and nonpassing tests downloaded from CDash for each testing day,
+the test history for each test and the created reports are kept in memory
+for --cache-ttl=<seconds> so that a repeated request for a report only takes
+the time to send the report.  After that time, the data is gotten again
+(from CDash or the cache files as for cdash_analyze_and_report.py) the next
+time it is needed.
+"""
+
+
+#
+# Helper functions
+#
+
+
+def injectServerCmndLineOptionsInParser(clp):
+
+  serverHostDefault = "127.0.0.1"
+
+  clp.add_option(
+    "--host", dest="serverHost", type="string", default=serverHostDefault,
+    help="Host name or IP address the server listens on."+\
+      "  [default = '"+serverHostDefault+"']" )
+
+  serverPortDefault = 8080
+
+  clp.add_option(
+    "--port", dest="serverPort", type="int", default=serverPortDefault,
+    help="Port the server listens on.  If set to '0', then a free port is"+\
+      " picked and printed.  [default = '"+str(serverPortDefault)+"']" )
+
+  cacheTtlDefault = 600
+
+  clp.add_option(
+    "--cache-ttl", dest="cacheTtl", type="float", default=cacheTtlDefault,
+    help="Time in seconds that the data gotten from CDash (and the cache files)"+\
+      " and the created reports are kept in memory and reused."+\
+      "  [default = '"+str(cacheTtlDefault)+"']" )
+
+
+def getCmndLineOptions(cmndLineArgs=None):
+  from optparse import OptionParser
+  clp = OptionParser(usage=usageHelp)
+  CAAR.injectCmndLineOptionsInParser(clp)
+  injectServerCmndLineOptionsInParser(clp)
+  (options, args) = clp.parse_args(cmndLineArgs)
+  CAAR.validateAndConvertCmndLineOptions(options)
+  CAAR.setExtraCmndLineOptionsAfterParse(options)
+  return options
+
+
+# Dict-like cache where each entry expires cacheTtl seconds after it was set
+#
+# This supports the dict functions get(key, default) and cache[key]=value (as
+# used for testHistoryLODCache in CDQAR.AddTestHistoryToTestDictFunctor) and
+# can be used by multiple threads at the same time.  Expired entries are
+# removed when they are looked up or by removeExpiredEntries().
+#
+class TimedCache(object):
+
+  def __init__(self, cacheTtl, getTime_in=time.time):
+    self.cacheTtl = cacheTtl
+    self.getTime = getTime_in
+    self.lock = threading.Lock()
+    self.entriesDict = {}
+
+  def get(self, key, default=None):
+    with self.lock:
+      entry = self.entriesDict.get(key, None)
+      if entry is None:
+        return default
+      (setTime, value) = entry
+      if self.getTime() - setTime >= self.cacheTtl:
+        del self.entriesDict[key]
+        return default
+      return value
+
+  def __setitem__(self, key, value):
+    with self.lock:
+      self.entriesDict[key] = (self.getTime(), value)
+
+  def __len__(self):
+    with self.lock:
+      return len(self.entriesDict)
+
+  def removeExpiredEntries(self):
+    with self.lock:
+      currentTime = self.getTime()
+      expiredKeys = [ key for (key, (setTime, value)) in self.entriesDict.items() \
+        if currentTime - setTime >= self.cacheTtl ]
+      for key in expiredKeys:
+        del self.entriesDict[key]
+
+  def clear(self):
+    with self.lock:
+      self.entriesDict = {}
+
+
+# Output options of cdash_analyze_and_report.py that are ignored by the server
+g_ignoredOutputOptionsList = [
+  'writeEmailToFile',
+  'sendEmailTo',
+  'writeUnexpectedBuildsToFile',
+  'writeFailingTestsWithoutIssueTrackersToFile',
+  'writeTestDataToFile',
+  ]
+
+
+# Report created by CDashReportService for a build-set and testing day
+class CDashReport(object):
+  def __init__(self, buildSetName, date, summaryLine, globalPass, htmlPageStr):
+    self.buildSetName = buildSetName
+    self.date = date
+    self.summaryLine = summaryLine
+    self.globalPass = globalPass
+    self.htmlPageStr = htmlPageStr
+
+
+# Creates the reports for the build-sets and keeps the data used to create
+# them in memory
+#
+# Usage:
+#
+#   cdashReportService = CDashReportService(inOptions)
+#   cdashReportService.getBuildsetNames()
+#   cdashReportReport = cdashReportService.getReport(buildSetName, date)
+#
+# The builds and nonpassing tests for the whole project for each testing day
+# (see CAAR.CDashProjectBuildsAndTestsData), the test history for each test
+# and the CDashReport objects are kept in TimedCache objects for
+# inOptions.cacheTtl seconds.  Only one report is created at a time.
+#
+class CDashReportService(object):
+
+  def __init__(self, inOptions, getTime_in=time.time):
+
+    self.inOptions = inOptions
+
+    # Command-line options for each build-set
+    if inOptions.buildsetsManifestFile:
+      buildsetsLOD = CAAR.getBuildsetsListOfDictsFromManifestFile(
+        inOptions.buildsetsManifestFile)
+      buildsetOptionsList = [ CAAR.getBuildsetCmndLineOptions(inOptions, buildsetDict) \
+        for buildsetDict in buildsetsLOD ]
+    else:
+      buildsetOptionsList = [ copy.copy(inOptions) ]
+    self.buildsetNames = []
+    self.buildsetOptionsDict = {}
+    for buildsetOptions in buildsetOptionsList:
+      for optionName in g_ignoredOutputOptionsList:
+        setattr(buildsetOptions, optionName, "")
+      self.buildsetNames.append(buildsetOptions.buildSetName)
+      self.buildsetOptionsDict[buildsetOptions.buildSetName] = buildsetOptions
+
+    # Test history cache dir and store shared by all of the reports
+    self.testHistoryCacheDir = inOptions.cdashQueriesCacheDir+"/test_history"
+    if not os.path.exists(self.testHistoryCacheDir):
+      print("\nCreating new test cache directory '"+self.testHistoryCacheDir+"'")
+      os.mkdir(self.testHistoryCacheDir)
+    if inOptions.useTestHistoryStore:
+      self.testHistoryStore = CDQAR.TestHistoryStore(
+        inOptions.cdashQueriesCacheDir+"/test_history_store.sqlite")
+    else:
+      self.testHistoryStore = None
+
+    # In-memory caches
+    self.projectDataCache = TimedCache(inOptions.cacheTtl, getTime_in)
+    self.testHistoryLODCache = TimedCache(inOptions.cacheTtl, getTime_in)
+    self.reportCache = TimedCache(inOptions.cacheTtl, getTime_in)
+    self.reportLock = threading.Lock()
+    self.numReportsCreated = 0
+
+  # Return the list of the names of the build-sets (in order)
+  def getBuildsetNames(self):
+    return self.buildsetNames
+
+  # Return the testing day <YYYY-MM-DD> for a date argument <YYYY-MM-DD>,
+  # 'today' or 'yesterday' (raises ValueError if invalid)
+  def getDateStr(self, dateArg):
+    return CBTD.getDateStrFromDateTime(CDQAR.convertInputDateArgToYYYYMMDD(
+      self.inOptions.cdashProjectTestingDayStartTime, dateArg))
+
+  # Return the CDashReport object for a build-set and date argument
+  #
+  # The report is created if it is not already in memory.  Raises an
+  # exception if the build-set is not known or the date is not valid.
+  #
+  def getReport(self, buildSetName, dateArg):
+    if not buildSetName in self.buildsetOptionsDict:
+      raise Exception("Error, the build-set '"+buildSetName+"' is not one of"+\
+        " the build-sets ['"+"', '".join(self.buildsetNames)+"']!")
+    date = self.getDateStr(dateArg)
+    reportKey = (buildSetName, date)
+    cdashReport = self.reportCache.get(reportKey)
+    if cdashReport:
+      return cdashReport
+    with self.reportLock:
+      # Another thread may have created the report while waiting for the lock
+      cdashReport = self.reportCache.get(reportKey)
+      if not cdashReport:
+        self.removeExpiredEntries()
+        cdashReport = self.createReport(buildSetName, date)
+        self.reportCache[reportKey] = cdashReport
+    return cdashReport
+
+  # Remove the expired entries from all of the in-memory caches
+  def removeExpiredEntries(self):
+    self.projectDataCache.removeExpiredEntries()
+    self.testHistoryLODCache.removeExpiredEntries()
+    self.reportCache.removeExpiredEntries()
+
+  # Get the CAAR.CDashProjectBuildsAndTestsData object for a testing day
+  #
+  # The base cache files for the testing day are given the prefix
+  # <cdash-base-cache-files-prefix><YYYY-MM-DD>_ (same as for --date-range).
+  #
+  def getProjectData(self, date):
+    projectData = self.projectDataCache.get(date)
+    if projectData:
+      return projectData
+    dayOptions = copy.copy(self.inOptions)
+    dayOptions.date = date
+    cacheDirAndBaseFilePrefix = dayOptions.cdashQueriesCacheDir+"/"+\
+      dayOptions.cdashBaseCacheFilesPrefix+date+"_"
+    print("\nGetting builds and nonpassing tests for the whole project for"+\
+      " testing day "+date+" ...")
+    fullBuildsLOD = CAAR.getFullBuildsLOD(dayOptions, cacheDirAndBaseFilePrefix)
+    projectData = CAAR.CDashProjectBuildsAndTestsData(fullBuildsLOD,
+      list(CAAR.getFullNonpassingTestsIter(dayOptions, cacheDirAndBaseFilePrefix,
+        fullBuildsLOD)) )
+    self.projectDataCache[date] = projectData
+    return projectData
+
+  # Create the CDashReport object for a build-set and testing day
+  def createReport(self, buildSetName, date):
+    buildsetOptions = copy.copy(self.buildsetOptionsDict[buildSetName])
+    buildsetOptions.date = date
+    addTestHistoryStrategy = CAAR.AddTestHistoryStrategy(buildsetOptions,
+      self.testHistoryCacheDir, self.testHistoryStore, self.testHistoryLODCache)
+    (cdashReportData, summaryLine) = CAAR.analyzeAndReportBuildset(
+      buildsetOptions, self.getProjectData(date), addTestHistoryStrategy)
+    addTestHistoryStrategy.removeBuildTestHistoryCacheFiles()
+    print("\n"+summaryLine+"\n")
+    htmlPageStr = CDQAR.getFullCDashHtmlReportPageStr(cdashReportData,
+      pageTitle=summaryLine, pageStyle=CDQAR.getDefaultHtmlPageStyleStr())
+    self.numReportsCreated += 1
+    return CDashReport(buildSetName, date, summaryLine,
+      cdashReportData.globalPass, htmlPageStr)
+
+
+# HTTP server for the reports created by a CDashReportService object
+class CDashReportServer(ThreadingMixIn, HTTPServer):
+
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self, serverAddress, cdashReportService, logRequests=True):
+    HTTPServer.__init__(self, serverAddress, CDashReportRequestHandler)
+    self.cdashReportService = cdashReportService
+    self.logRequests = logRequests
+
+  # Return the base URL 'http://<host>:<port>' for the server
+  def getBaseUrl(self):
+    (host, port) = self.server_address[0:2]
+    return "http://"+host+":"+str(port)
+
+
+# Request handler for CDashReportServer
+#
+# Supported paths:
+#
+# * /report?buildset=<build_set_name>&date=<date>: Returns the HTML report
+#   (status 404 if the build-set is not known and 400 if the date is not
+#   valid)
+# * /: Returns an HTML page with links to the reports for the build-sets for
+#   yesterday
+#
+class CDashReportRequestHandler(BaseHTTPRequestHandler):
+
+  def do_GET(self):
+    cdashReportService = self.server.cdashReportService
+    url = urlparse(self.path)
+    queryDict = parse_qs(url.query)
+    if url.path == "/report":
+      buildsetNames = cdashReportService.getBuildsetNames()
+      if len(buildsetNames) == 1: buildSetNameDefault = buildsetNames[0]
+      else: buildSetNameDefault = ""
+      buildSetName = queryDict.get('buildset', [buildSetNameDefault])[0]
+      dateArg = queryDict.get('date', ['yesterday'])[0]
+      if not buildSetName in buildsetNames:
+        self.sendText(404, "Error, unknown build-set '"+buildSetName+"'!\n")
+        return
+      try:
+        cdashReportService.getDateStr(dateArg)
+      except ValueError as errMsg:
+        self.sendText(400, str(errMsg)+"\n")
+        return
+      try:
+        cdashReport = cdashReportService.getReport(buildSetName, dateArg)
+      except Exception:
+        self.sendText(500, traceback.format_exc())
+        return
+      self.sendBody(200, cdashReport.htmlPageStr.encode('utf-8'),
+        "text/html; charset=utf-8")
+    elif url.path == "/":
+      htmlStr = "<html>\n<body>\n<h2>Build-sets</h2>\n<ul>\n"
+      for buildSetName in cdashReportService.getBuildsetNames():
+        htmlStr += "<li><a href=\"/report?buildset="+\
+          htmlEscape(quote_plus(buildSetName), True)+"\">"+\
+          htmlEscape(buildSetName, True)+"</a></li>\n"
+      htmlStr += "</ul>\n</body>\n</html>\n"
+      self.sendBody(200, htmlStr.encode('utf-8'), "text/html; charset=utf-8")
+    else:
+      self.sendText(404, "Error, unknown path '"+url.path+"'!\n")
+
+  def sendText(self, status, text):
+    self.sendBody(status, text.encode('utf-8'), "text/plain; charset=utf-8")
+
+  def sendBody(self, status, body, contentType):
+    self.send_response(status)
+    self.send_header('Content-Type', contentType)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    if self.server.logRequests:
+      BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+#
+# Run the script
+#
+
+if __name__ == '__main__':
+
+  inOptions = getCmndLineOptions()
+
+  CAAR.setDefaultCDashQuerySessionFromCmndLineOptions(inOptions)
+
+  cdashReportService = CDashReportService(inOptions)
+
+  cdashReportServer = CDashReportServer(
+    (inOptions.serverHost, inOptions.serverPort), cdashReportService)
+
+  print("\nServing the reports for the build-sets ['"+\
+    "', '".join(cdashReportService.getBuildsetNames())+"'] at:\n\n"+\
+    "  "+cdashReportServer.getBaseUrl()+"/report?buildset=<build_set_name>&date=<date>\n")
+  sys.stdout.flush()
+
+  try:
+    cdashReportServer.serve_forever()
+  except KeyboardInterrupt:
+    print("\nStopping the server")
+
+  cdashReportServer.server_close()
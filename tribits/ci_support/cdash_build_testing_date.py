@@ -40,6 +40,14 @@
 # @HEADER
 
 import datetime
+import re
+
+try:
+  # Python 3
+  from functools import lru_cache
+except ImportError:
+  # Python 2
+  lru_cache = None
 
 #
 # Help message
@@ -107,6 +115,40 @@ def getCurrentDateTimeUtc():
   return datetime.datetime.utcnow()
 
 
+# Decorator to memoize a function of hashable arguments in a cache holding the
+# results for the maxSize most recently used sets of arguments.
+#
+# On Python 2 (where functools.lru_cache() does not exist), the cache is just
+# cleared once it gets full.
+#
+# The memoized function has the function cache_clear() to clear the cache.
+#
+def lruMemoize(maxSize):
+  if lru_cache:
+    return lru_cache(maxsize=maxSize)
+  def memoizeFunc(func):
+    cache = {}
+    def memoizedFunc(*args):
+      try:
+        return cache[args]
+      except KeyError:
+        pass
+      value = func(*args)
+      if len(cache) >= maxSize:
+        cache.clear()
+      cache[args] = value
+      return value
+    memoizedFunc.cache_clear = cache.clear
+    return memoizedFunc
+  return memoizeFunc
+
+
+# Max number of unique 'buildstarttime' strings whose conversions are
+# remembered.  (A report with 60 days of test history for 1000 builds has
+# about 60000 unique 'buildstarttime' values.)
+g_buildStartTimeCacheSize = 131072
+
+
 # Get the timezone offset as a timedelta object w.r.t to UTC
 #
 # The supported timezones for timeZoneStr are the strings:
@@ -122,16 +164,27 @@ def getCurrentDateTimeUtc():
 # NOTE: Any timezone that CDash returns for the 'buildstarttime' field must be
 # added below.
 #
+g_timeZoneOffsetsDict = {
+  "UTC" : datetime.timedelta(hours=0),
+  "EDT" : datetime.timedelta(hours=4),
+  "EST" : datetime.timedelta(hours=5),
+  "CDT" : datetime.timedelta(hours=5),
+  "CST" : datetime.timedelta(hours=6),
+  "MDT" : datetime.timedelta(hours=6),
+  "MST" : datetime.timedelta(hours=7),
+  }
+
 def getTimeZoneOffset(timeZoneStr):
-  if timeZoneStr == "UTC": timezoneOffsetInt = 0
-  elif timeZoneStr == "EDT": timezoneOffsetInt = 4
-  elif timeZoneStr == "EST": timezoneOffsetInt = 5
-  elif timeZoneStr == "CDT": timezoneOffsetInt = 5
-  elif timeZoneStr == "CST": timezoneOffsetInt = 6
-  elif timeZoneStr == "MDT": timezoneOffsetInt = 6
-  elif timeZoneStr == "MST": timezoneOffsetInt = 7
-  else: raise Exception("Error, unrecognized timezone '"+timeZoneStr+"'!")
-  return datetime.timedelta(hours=timezoneOffsetInt)
+  timezoneOffset = g_timeZoneOffsetsDict.get(timeZoneStr, None)
+  if timezoneOffset == None:
+    raise Exception("Error, unrecognized timezone '"+timeZoneStr+"'!")
+  return timezoneOffset
+
+
+# Regex for the 'buildstarttime' format "YYYY-MM-DDThh:mm:ss <TZ>" that CDash
+# emits
+g_buildStartTimeRegex = re.compile(
+  "^([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2}) ([A-Z]+)$")
 
 
 # Return a timezone aware datetime object given an input date and time given
@@ -139,7 +192,25 @@ def getTimeZoneOffset(timeZoneStr):
 #
 # Note. the timzone <TZ> can be any of those supported by the function
 # getTimeZoneOffset()
+#
+# The result for each unique buildStartTimeStr is remembered (see
+# lruMemoize()) and the exact format "YYYY-MM-DDThh:mm:ss <TZ>" that CDash
+# emits is parsed directly without calling datetime.strptime().
+#
+@lruMemoize(g_buildStartTimeCacheSize)
 def getBuildStartTimeUtcFromStr(buildStartTimeStr):
+  buildStartTimeMatch = g_buildStartTimeRegex.match(buildStartTimeStr)
+  if buildStartTimeMatch:
+    (year, month, day, hour, minute, second, timeZoneStr) = \
+      buildStartTimeMatch.groups()
+    return datetime.datetime(int(year), int(month), int(day),
+      int(hour), int(minute), int(second)) + getTimeZoneOffset(timeZoneStr)
+  return getBuildStartTimeUtcFromStrUsingStrptime(buildStartTimeStr)
+
+
+# Slower version of getBuildStartTimeUtcFromStr() that handles any format
+# that datetime.strptime() accepts (e.g. fields that are not zero padded)
+def getBuildStartTimeUtcFromStrUsingStrptime(buildStartTimeStr):
   buildStartTimeStrArray = buildStartTimeStr.split(" ")
   if len(buildStartTimeStrArray) == 2:
     timezoneOffset = getTimeZoneOffset(buildStartTimeStrArray[1])
@@ -156,6 +227,10 @@ def getProjectTestingDayStartTimeDeltaFromStr(cdashProjectStartTimeUtcStr):
   return datetime.timedelta(hours=t.hour, minutes=t.minute, seconds=t.second)
 
 
+g_oneDayTD = datetime.timedelta(days=1)
+g_noonTD = getProjectTestingDayStartTimeDeltaFromStr("12:00")
+
+
 # Return a timedelta object for a day increment pass in as an signed integer.
 def getDayIncrTimeDeltaFromInt(dayIncrInt):
   return datetime.timedelta(days=dayIncrInt)
@@ -195,6 +270,7 @@ def getDateOnlyFromDateTime(dateTime):
 # ToDo: Take into account the CDash server timezone which determine what noon
 # means!
 # 
+@lruMemoize(g_buildStartTimeCacheSize)
 def getTestingDayDateFromBuildStartTimeDT(
   buildStartTimeStr, testingDayStartTimeUtcTD,
   ):
@@ -204,8 +280,8 @@ def getTestingDayDateFromBuildStartTimeDT(
   #print("testingDayStartTimeUtcTD.seconds = "+str(testingDayStartTimeUtcTD.seconds))
 
   # Constants
-  oneDayTD = datetime.timedelta(days=1)
-  noonTD = getProjectTestingDayStartTimeDeltaFromStr("12:00")
+  oneDayTD = g_oneDayTD
+  noonTD = g_noonTD
 
   # Convert input 'buildstartime' to datetime object in UtC
   buildStartTimeUtcDT = getBuildStartTimeUtcFromStr(buildStartTimeStr)
@@ -237,6 +313,7 @@ def getTestingDayDateFromBuildStartTimeDT(
 #
 # See getTestingDayDateFromBuildStartTimeDT()
 #
+@lruMemoize(g_buildStartTimeCacheSize)
 def getTestingDayDateFromBuildStartTimeStr(
   buildStartTimeStr, testingDayStartTimeUtcTD,
   ):
@@ -244,6 +321,24 @@ def getTestingDayDateFromBuildStartTimeStr(
     getTestingDayDateFromBuildStartTimeDT(buildStartTimeStr, testingDayStartTimeUtcTD) )
 
 
+# Compute the CDash testing days "YYYY-MM-DD" for a list of 'buildstarttime'
+# strings
+#
+# Returns a list of the testing day strings in the same order as
+# buildStartTimeStrList.  Each unique 'buildstarttime' string in the list is
+# only converted once.
+#
+def getTestingDayDatesFromBuildStartTimeStrList(
+  buildStartTimeStrList, testingDayStartTimeUtcTD,
+  ):
+  testingDayDatesDict = dict(
+    (buildStartTimeStr,
+     getTestingDayDateFromBuildStartTimeStr(buildStartTimeStr, testingDayStartTimeUtcTD)) \
+    for buildStartTimeStr in set(buildStartTimeStrList) )
+  return [ testingDayDatesDict[buildStartTimeStr] \
+    for buildStartTimeStr in buildStartTimeStrList ]
+
+
 # Return the shifted CDash build start relative to the given CDash project
 # testing day start time (as configured on CDash).
 #
@@ -367,8 +462,14 @@ class CDashProjectTestingDay(object):
   # Return the testing day string "YYYY-MM-DD" for the input 'buildstartime'
   # string.
   def getTestingDayDateFromBuildStartTimeStr(self, buildStartTimeStr):
-    return getDateStrFromDateTime(
-       self.getTestingDayDateFromBuildStartTimeDT(buildStartTimeStr) )
+    return getTestingDayDateFromBuildStartTimeStr(
+      buildStartTimeStr, self.__projectTestingDayStartTimeUtcTD)
+
+  # Return the list of testing day strings "YYYY-MM-DD" for the input list of
+  # 'buildstartime' strings.
+  def getTestingDayDatesFromBuildStartTimeStrList(self, buildStartTimeStrList):
+    return getTestingDayDatesFromBuildStartTimeStrList(
+      buildStartTimeStrList, self.__projectTestingDayStartTimeUtcTD)
 
 
 #
@@ -0,0 +1,724 @@
+#!/usr/bin/env python
+
+# @HEADER
+# ************************************************************************
+#
+#            TriBITS: Tribal Build, Integrate, and Test System
+#                    Copyright 2013 Sandia Corporation
+#
+# Under the terms of Contract DE-AC04-94AL85000 with Sandia Corporation,
+# the U.S. Government retains certain rights in this software.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+#
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+#
+# 3. Neither the name of the Corporation nor the names of the
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY SANDIA CORPORATION "AS IS" AND ANY
+# EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL SANDIA CORPORATION OR THE
+# CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL,
+# EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT LIMITED TO,
+# PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE, DATA, OR
+# PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY THEORY OF
+# LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT (INCLUDING
+# NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE OF THIS
+# SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+#
+# ************************************************************************
+# @HEADER
+
+import os
+import sys
+import json
+import time
+import random
+import datetime
+import threading
+import traceback
+
+try:
+  # Python 2
+  from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+  from SocketServer import ThreadingMixIn
+  from urlparse import urlparse, parse_qs
+except ImportError:
+  # Python 3
+  from http.server import HTTPServer, BaseHTTPRequestHandler
+  from socketserver import ThreadingMixIn
+  from urllib.parse import urlparse, parse_qs
+
+import CDashQueryAnalyzeReport as CDQAR
+import cdash_build_testing_date as CBTD
+
+#
+# Help message
+#
+
+
+usageHelp = r"""cdash_replay_server.py --fixtures-dir=<dir> [options]
+
+This script runs a local HTTP server that stands in for a CDash site and
+replays recorded CDash query data for the URLs:
+
+  http://<host>:<port>/api/v1/index.php?project=<project>&date=<date>&<filters>
+  http://<host>:<port>/api/v1/queryTests.php?project=<project>&date=<date>&<filters>
+
+so that cdash_analyze_and_report.py (with
+--cdash-site-url=http://<host>:<port>) and the other code that downloads data
+from CDash can be run and timed end-to-end without network access.
+
+The recorded data is read from all of the JSON files under
+--fixtures-dir=<dir> (e.g. the cache dir --cdash-queries-cache-dir=<dir> of a
+run of cdash_analyze_and_report.py with the files
+*fullCDashIndexBuilds.json, *fullCDashNonpassingTests.json and
+test_history/*.json).  The files with the field 'buildgroups' are replayed
+for cdash/api/v1/index.php and the files with the field 'builds' for
+cdash/api/v1/queryTests.php.
+
+The query fields 'date' or 'begin' and 'end' and the filter fields
+'filtercombine', 'field<N>', 'compare<N>' and 'value<N>' are applied to the
+recorded data as CDash would.  For index.php, the builds are taken from the
+recorded files with a matching 'date' field.  For queryTests.php, the tests
+are taken from all of the recorded files (with duplicate tests removed) that
+have a 'buildstarttime' in the testing days (using
+--cdash-project-testing-day-start-time).  The supported filter fields are
+'buildname', 'site' and 'groupname' for index.php and also 'testname',
+'status' and 'details' for queryTests.php with the string comparisons 61
+(is), 62 (is not), 63 (contains), 64 (does not contain), 65 (starts with)
+and 66 (ends with) which (like CDash) ignore case.  A query with an
+unsupported filter gets the HTTP status 400.
+
+To test the performance and the error handling of the clients, the server can
+add latency to each request (--latency, --latency-jitter), limit the rate
+the data is sent (--bytes-per-sec), limit the number of requests handled at
+the same time (--max-concurrent-requests), return an HTTP error status for a
+random fraction of the requests (--error-rate, --error-status) and close the
+connection without sending a response for a random fraction of the requests
+(--drop-rate).
+
+The URL http://<host>:<port>/stats returns a JSON dict with the number of
+requests, the number of injected errors and dropped connections and the
+number of bytes sent.
+"""
+
+
+#
+# Helper functions
+#
+
+
+def injectCmndLineOptionsInParser(clp):
+
+  clp.add_option(
+    "--fixtures-dir", dest="fixturesDir", type="string", default="",
+    help="Directory with the recorded CDash query data JSON files (searched"+\
+      " recursively).  [Required]" )
+
+  clp.add_option(
+    "--cdash-project-testing-day-start-time", dest="cdashProjectTestingDayStartTime",
+    type="string", default="00:00",
+    help="The CDash project testing day build star time in UTC in format"+\
+      " '<hh>:<mm>' used to get the testing day for each test."+\
+      "  [default = '00:00']" )
+
+  clp.add_option(
+    "--host", dest="serverHost", type="string", default="127.0.0.1",
+    help="Host name or IP address the server listens on."+\
+      "  [default = '127.0.0.1']" )
+
+  clp.add_option(
+    "--port", dest="serverPort", type="int", default=0,
+    help="Port the server listens on.  If set to '0', then a free port is"+\
+      " picked and printed.  [default = '0']" )
+
+  clp.add_option(
+    "--latency", dest="latency", type="float", default=0.0,
+    help="Time in seconds added before the response for each request."+\
+      "  [default = '0.0']" )
+
+  clp.add_option(
+    "--latency-jitter", dest="latencyJitter", type="float", default=0.0,
+    help="Maximum random time in seconds added to --latency for each request."+\
+      "  [default = '0.0']" )
+
+  clp.add_option(
+    "--bytes-per-sec", dest="bytesPerSec", type="int", default=0,
+    help="Limit the rate the body of each response is sent to this many bytes"+\
+      " per second.  If '0', then there is no limit.  [default = '0']" )
+
+  clp.add_option(
+    "--max-concurrent-requests", dest="maxConcurrentRequests", type="int",
+    default=0,
+    help="Maximum number of requests handled at the same time (other requests"+\
+      " wait).  If '0', then there is no limit.  [default = '0']" )
+
+  clp.add_option(
+    "--error-rate", dest="errorRate", type="float", default=0.0,
+    help="Fraction of the requests (between 0 and 1) that get the HTTP status"+\
+      " --error-status instead of the data.  [default = '0.0']" )
+
+  clp.add_option(
+    "--error-status", dest="errorStatus", type="int", default=503,
+    help="HTTP status for the requests picked by --error-rate."+\
+      "  [default = '503']" )
+
+  clp.add_option(
+    "--drop-rate", dest="dropRate", type="float", default=0.0,
+    help="Fraction of the requests (between 0 and 1) where the connection is"+\
+      " closed without sending a response.  [default = '0.0']" )
+
+  clp.add_option(
+    "--seed", dest="seed", type="int", default=None,
+    help="Seed for the random latency, errors and dropped connections to"+\
+      " make them repeatable.  [default = None]" )
+
+
+def validateAndConvertCmndLineOptions(inOptions):
+  if not inOptions.fixturesDir:
+    raise Exception("Error, --fixtures-dir=<dir> must be set!")
+  if not os.path.isdir(inOptions.fixturesDir):
+    raise Exception("Error, --fixtures-dir='"+inOptions.fixturesDir+"' is not"+\
+      " a directory!")
+  for (optionName, rate) in [ ("--error-rate", inOptions.errorRate),
+    ("--drop-rate", inOptions.dropRate) ]:
+    if rate < 0.0 or rate > 1.0:
+      raise Exception("Error, "+optionName+"="+str(rate)+" must be between"+\
+        " 0 and 1!")
+  if inOptions.errorRate + inOptions.dropRate > 1.0:
+    raise Exception("Error, --error-rate="+str(inOptions.errorRate)+" plus"+\
+      " --drop-rate="+str(inOptions.dropRate)+" must not be greater than 1!")
+  for (optionName, value) in [ ("--latency", inOptions.latency),
+    ("--latency-jitter", inOptions.latencyJitter),
+    ("--bytes-per-sec", inOptions.bytesPerSec),
+    ("--max-concurrent-requests", inOptions.maxConcurrentRequests) ]:
+    if value < 0:
+      raise Exception("Error, "+optionName+"="+str(value)+" must not be"+\
+        " negative!")
+
+
+def getCmndLineOptions(cmndLineArgs=None):
+  from optparse import OptionParser
+  clp = OptionParser(usage=usageHelp)
+  injectCmndLineOptionsInParser(clp)
+  (options, args) = clp.parse_args(cmndLineArgs)
+  validateAndConvertCmndLineOptions(options)
+  return options
+
+
+# Raised for a CDash query that uses a filter that is not supported
+class CDashQueryFilterError(Exception):
+  pass
+
+
+# CDash string filter comparisons (which ignore case like CDash does)
+g_cdashStringCompareFuncsDict = {
+  '61' : lambda value, filterValue: value == filterValue,
+  '62' : lambda value, filterValue: value != filterValue,
+  '63' : lambda value, filterValue: filterValue in value,
+  '64' : lambda value, filterValue: not filterValue in value,
+  '65' : lambda value, filterValue: value.startswith(filterValue),
+  '66' : lambda value, filterValue: value.endswith(filterValue),
+  }
+
+
+# Get the list of filters [(field, compare, value), ...] and if they are
+# combined with 'or' from the query dict returned from parse_qs() for a CDash
+# query URL
+#
+# The filters are the query fields 'field<N>', 'compare<N>' and 'value<N>'.
+# They are combined with 'or' if one of the 'filtercombine' fields is 'or'
+# (CDash query URLs can have several 'filtercombine' fields, see
+# CDQAR.getBuildHistoryQueryFilters()).
+#
+def getCDashQueryFilters(queryDict):
+  filtersList = []
+  for key in queryDict.keys():
+    if key.startswith('field') and key[len('field'):].isdigit():
+      filterIdx = key[len('field'):]
+      filtersList.append( ( int(filterIdx), queryDict[key][0],
+        queryDict.get('compare'+filterIdx, [''])[0],
+        queryDict.get('value'+filterIdx, [''])[0] ) )
+  filtersList.sort()
+  combineWithOr = ('or' in [ filterCombine.lower() \
+    for filterCombine in queryDict.get('filtercombine', []) ])
+  return ([ (field, compare, value) for (idx, field, compare, value) \
+    in filtersList ], combineWithOr)
+
+
+# Return a function matchFunc(dict) that returns True if a dict matches the
+# filters in a query dict
+#
+# fieldValueFuncsDict [in]: Dict {<cdash-filter-field>:<func>, ...} where
+# <func>(dict) returns the value of the field for a dict (see
+# getCDashIndexFilterFieldValueFuncsDict()).
+#
+# pageName [in]: Name of the CDash page used in error messages.
+#
+# Raises CDashQueryFilterError if a field or comparison is not supported.
+#
+def getCDashQueryFiltersMatchFunc(queryDict, fieldValueFuncsDict, pageName):
+  (filtersList, combineWithOr) = getCDashQueryFilters(queryDict)
+  filterMatchFuncsList = []
+  for (field, compare, filterValue) in filtersList:
+    fieldValueFunc = fieldValueFuncsDict.get(field, None)
+    if fieldValueFunc is None:
+      raise CDashQueryFilterError("Error, the filter field '"+field+"' is not"+\
+        " supported for "+pageName+"!")
+    compareFunc = g_cdashStringCompareFuncsDict.get(compare, None)
+    if compareFunc is None:
+      raise CDashQueryFilterError("Error, the filter compare '"+compare+"' for"+\
+        " the field '"+field+"' is not supported for "+pageName+"!")
+    filterMatchFuncsList.append(
+      getFilterMatchFunc(fieldValueFunc, compareFunc, filterValue.lower()) )
+  if not filterMatchFuncsList:
+    return lambda dictObj: True
+  if combineWithOr:
+    return lambda dictObj: any([ matchFunc(dictObj) \
+      for matchFunc in filterMatchFuncsList ])
+  return lambda dictObj: all([ matchFunc(dictObj) \
+    for matchFunc in filterMatchFuncsList ])
+
+
+def getFilterMatchFunc(fieldValueFunc, compareFunc, filterValue):
+  def filterMatchFunc(dictObj):
+    value = fieldValueFunc(dictObj)
+    if value is None:
+      return False
+    return compareFunc(str(value).lower(), filterValue)
+  return filterMatchFunc
+
+
+# Get the list of testing days (as 'YYYY-MM-DD' strings) for the 'date' or
+# 'begin' and 'end' fields in a query dict (or None if none of these fields
+# are given)
+def getCDashQueryTestingDays(queryDict):
+  beginDate = queryDict.get('begin', [''])[0]
+  endDate = queryDict.get('end', [''])[0]
+  if beginDate or endDate:
+    if not (beginDate and endDate):
+      raise CDashQueryFilterError("Error, both 'begin' and 'end' must be"+\
+        " given!")
+    beginDT = CDQAR.validateAndConvertYYYYMMDD(beginDate)
+    endDT = CDQAR.validateAndConvertYYYYMMDD(endDate)
+    numDays = (endDT - beginDT).days + 1
+    return [ CBTD.getDateStrFromDateTime(beginDT + datetime.timedelta(days=i)) \
+      for i in range(max(numDays, 0)) ]
+  date = queryDict.get('date', [''])[0]
+  if date:
+    CDQAR.validateAndConvertYYYYMMDD(date)
+    return [date]
+  return None
+
+
+# Recorded CDash query data replayed by CDashReplayServer
+#
+# Usage:
+#
+#   cdashFixtureData = CDashFixtureData(fixturesDir, "04:00")
+#   indexQueryData = cdashFixtureData.getIndexQueryData(queryDict)
+#   queryTestsQueryData = cdashFixtureData.getQueryTestsQueryData(queryDict)
+#
+# where queryDict is returned from parse_qs() for the query URL (with
+# keep_blank_values=True).  Raises CDashQueryFilterError for an unsupported
+# query.
+#
+class CDashFixtureData(object):
+
+  def __init__(self, fixturesDir, testingDayStartTime="00:00"):
+    self.indexQueryDataList = []
+    self.queryTestsQueryDataList = []
+    for fixtureFile in getFixtureFilesList(fixturesDir):
+      fixtureData = CDQAR.readCDashQueryDataCacheFile(fixtureFile)
+      if not isinstance(fixtureData, dict):
+        continue
+      if 'buildgroups' in fixtureData:
+        self.indexQueryDataList.append(fixtureData)
+      elif isinstance(fixtureData.get('builds', None), list):
+        self.queryTestsQueryDataList.append(fixtureData)
+    self.indexQueryDataList.sort(key=lambda data: data.get('date', ''))
+    # Group of each build (for the 'groupname' filter for queryTests.php)
+    self.buildGroupsDict = {}
+    for indexQueryData in self.indexQueryDataList:
+      for buildgroup in indexQueryData['buildgroups']:
+        for build in buildgroup['builds']:
+          self.buildGroupsDict[(build.get('site'), build.get('buildname'))] = \
+            buildgroup['name']
+    # Unique tests binned by testing day
+    cdashProjectTestingDay = CBTD.CDashProjectTestingDay("2000-01-01",
+      testingDayStartTime)
+    self.testsByTestingDayDict = {}
+    testKeysSet = set()
+    self.numTests = 0
+    for queryTestsQueryData in self.queryTestsQueryDataList:
+      for testDict in queryTestsQueryData['builds']:
+        testKey = (testDict.get('site'), testDict.get('buildName'),
+          testDict.get('testname'), testDict.get('buildstarttime'))
+        if testKey in testKeysSet:
+          continue
+        testKeysSet.add(testKey)
+        testingDay = cdashProjectTestingDay.getTestingDayDateFromBuildStartTimeStr(
+          testDict['buildstarttime'])
+        self.testsByTestingDayDict.setdefault(testingDay, []).append(testDict)
+        self.numTests += 1
+
+  # Return the number of unique builds in all of the recorded index.php data
+  def getNumBuilds(self):
+    return len(self.buildGroupsDict)
+
+  # Return the number of unique tests in all of the recorded queryTests.php
+  # data
+  def getNumTests(self):
+    return self.numTests
+
+  # Return the cdash/api/v1/index.php data for a query
+  #
+  # The builds are taken from the recorded data with the field 'date' in the
+  # testing days for the query (or the last recorded data if no date is
+  # given).  Build groups with no matching builds are left out.
+  #
+  def getIndexQueryData(self, queryDict):
+    matchFunc = getCDashQueryFiltersMatchFunc(queryDict,
+      g_cdashIndexFilterFieldValueFuncsDict, "index.php")
+    testingDays = getCDashQueryTestingDays(queryDict)
+    if testingDays is None:
+      indexQueryDataList = self.indexQueryDataList[-1:]
+    else:
+      testingDaysSet = set(testingDays)
+      indexQueryDataList = [ indexQueryData \
+        for indexQueryData in self.indexQueryDataList \
+        if indexQueryData.get('date', None) in testingDaysSet ]
+    buildgroups = []
+    buildgroupsDict = {}
+    for indexQueryData in indexQueryDataList:
+      for buildgroup in indexQueryData['buildgroups']:
+        groupName = buildgroup['name']
+        matchingBuilds = [ build for build in buildgroup['builds'] \
+          if matchFunc((build, groupName)) ]
+        if not matchingBuilds:
+          continue
+        outBuildgroup = buildgroupsDict.get(groupName, None)
+        if outBuildgroup is None:
+          outBuildgroup = dict(buildgroup)
+          outBuildgroup['builds'] = []
+          buildgroupsDict[groupName] = outBuildgroup
+          buildgroups.append(outBuildgroup)
+        outBuildgroup['builds'].extend(matchingBuilds)
+    if indexQueryDataList:
+      indexQueryData = dict(indexQueryDataList[0])
+    else:
+      indexQueryData = {}
+    if testingDays and len(testingDays) == 1:
+      indexQueryData['date'] = testingDays[0]
+    indexQueryData['buildgroups'] = buildgroups
+    return indexQueryData
+
+  # Return the cdash/api/v1/queryTests.php data for a query
+  #
+  # The tests are taken from all of the recorded data for the testing days
+  # for the query (or all of the testing days if no date is given).
+  #
+  def getQueryTestsQueryData(self, queryDict):
+    buildGroupsDict = self.buildGroupsDict
+    fieldValueFuncsDict = dict(g_cdashQueryTestsFilterFieldValueFuncsDict)
+    fieldValueFuncsDict['groupname'] = lambda testDict: \
+      buildGroupsDict.get((testDict.get('site'), testDict.get('buildName')), None)
+    matchFunc = getCDashQueryFiltersMatchFunc(queryDict, fieldValueFuncsDict,
+      "queryTests.php")
+    testingDays = getCDashQueryTestingDays(queryDict)
+    if testingDays is None:
+      testingDays = sorted(self.testsByTestingDayDict.keys())
+    testsLOD = []
+    for testingDay in testingDays:
+      for testDict in self.testsByTestingDayDict.get(testingDay, []):
+        if matchFunc(testDict):
+          testsLOD.append(testDict)
+    if self.queryTestsQueryDataList:
+      queryTestsQueryData = dict(self.queryTestsQueryDataList[0])
+    else:
+      queryTestsQueryData = {}
+    if len(testingDays) == 1:
+      queryTestsQueryData['date'] = testingDays[0]
+    queryTestsQueryData['builds'] = testsLOD
+    return queryTestsQueryData
+
+
+# Return the sorted list of the paths to the *.json files under a directory
+def getFixtureFilesList(fixturesDir):
+  fixtureFilesList = []
+  for (dirPath, dirNames, fileNames) in os.walk(fixturesDir):
+    for fileName in fileNames:
+      if fileName.endswith(".json"):
+        fixtureFilesList.append(os.path.join(dirPath, fileName))
+  fixtureFilesList.sort()
+  return fixtureFilesList
+
+
+# Functions that return the values of the filter fields for index.php for a
+# (build, groupName) tuple
+g_cdashIndexFilterFieldValueFuncsDict = {
+  'buildname' : lambda buildAndGroup: buildAndGroup[0].get('buildname', None),
+  'site' : lambda buildAndGroup: buildAndGroup[0].get('site', None),
+  'groupname' : lambda buildAndGroup: buildAndGroup[1],
+  }
+
+
+# Functions that return the values of the filter fields for queryTests.php
+# for a test dict (the field 'groupname' is added by CDashFixtureData)
+g_cdashQueryTestsFilterFieldValueFuncsDict = {
+  'buildname' : lambda testDict: testDict.get('buildName', None),
+  'site' : lambda testDict: testDict.get('site', None),
+  'testname' : lambda testDict: testDict.get('testname', None),
+  'status' : lambda testDict: testDict.get('status', None),
+  'details' : lambda testDict: testDict.get('details', None),
+  }
+
+
+# HTTP server that replays the data in a CDashFixtureData object with
+# latency, rate limits and failures injected
+#
+# The random choices for the latency, errors and dropped connections are made
+# with a random.Random(seed) object so that they are repeatable for a given
+# seed.  The function sleep_in(seconds) is used for all of the waits (which
+# can be replaced for unit testing).
+#
+class CDashReplayServer(ThreadingMixIn, HTTPServer):
+
+  daemon_threads = True
+  allow_reuse_address = True
+
+  def __init__(self, serverAddress, cdashFixtureData,
+      latency=0.0, latencyJitter=0.0, bytesPerSec=0, maxConcurrentRequests=0,
+      errorRate=0.0, errorStatus=503, dropRate=0.0, seed=None,
+      logRequests=True, sleep_in=time.sleep,
+    ):
+    HTTPServer.__init__(self, serverAddress, CDashReplayRequestHandler)
+    self.cdashFixtureData = cdashFixtureData
+    self.latency = latency
+    self.latencyJitter = latencyJitter
+    self.bytesPerSec = bytesPerSec
+    if maxConcurrentRequests > 0:
+      self.requestSemaphore = threading.Semaphore(maxConcurrentRequests)
+    else:
+      self.requestSemaphore = None
+    self.errorRate = errorRate
+    self.errorStatus = errorStatus
+    self.dropRate = dropRate
+    self.random = random.Random(seed)
+    self.logRequests = logRequests
+    self.sleep = sleep_in
+    self.statsLock = threading.Lock()
+    self.resetStats()
+
+  # Return the base URL 'http://<host>:<port>' for the server (to pass in
+  # for --cdash-site-url)
+  def getBaseUrl(self):
+    (host, port) = self.server_address[0:2]
+    return "http://"+host+":"+str(port)
+
+  def resetStats(self):
+    with self.statsLock:
+      self.statsDict = {
+        'num_requests' : 0,
+        'num_errors_injected' : 0,
+        'num_drops_injected' : 0,
+        'num_bytes_sent' : 0,
+        'max_concurrent_requests' : 0,
+        }
+      self.numConcurrentRequests = 0
+
+  # Return a copy of the stats dict
+  def getStatsDict(self):
+    with self.statsLock:
+      return dict(self.statsDict)
+
+  def incrementStat(self, statName, incr=1):
+    with self.statsLock:
+      self.statsDict[statName] += incr
+
+  # Pick the fault for a request: 'error', 'drop' or None
+  def pickFault(self):
+    with self.statsLock:
+      randomValue = self.random.random()
+    if randomValue < self.errorRate:
+      return 'error'
+    if randomValue < self.errorRate + self.dropRate:
+      return 'drop'
+    return None
+
+  # Return the latency in seconds for a request
+  def pickLatency(self):
+    if self.latencyJitter > 0.0:
+      with self.statsLock:
+        return self.latency + self.random.uniform(0.0, self.latencyJitter)
+    return self.latency
+
+  def beginRequest(self):
+    if self.requestSemaphore:
+      self.requestSemaphore.acquire()
+    with self.statsLock:
+      self.statsDict['num_requests'] += 1
+      self.numConcurrentRequests += 1
+      self.statsDict['max_concurrent_requests'] = max(
+        self.statsDict['max_concurrent_requests'], self.numConcurrentRequests)
+
+  def endRequest(self):
+    with self.statsLock:
+      self.numConcurrentRequests -= 1
+    if self.requestSemaphore:
+      self.requestSemaphore.release()
+
+
+# Request handler for CDashReplayServer
+#
+# Supported paths:
+#
+# * /api/v1/index.php?<query>: Returns the builds JSON data (see
+#   CDashFixtureData.getIndexQueryData())
+# * /api/v1/queryTests.php?<query>: Returns the tests JSON data (see
+#   CDashFixtureData.getQueryTestsQueryData())
+# * /stats: Returns CDashReplayServer.getStatsDict() as JSON (without injected
+#   latency or failures and not counted in the stats)
+#
+# A query with an unsupported filter gets the status 400 and an unknown path
+# gets the status 404.
+#
+class CDashReplayRequestHandler(BaseHTTPRequestHandler):
+
+  protocol_version = "HTTP/1.1"
+
+  def do_GET(self):
+    server = self.server
+    url = urlparse(self.path)
+    if url.path == "/stats":
+      self.sendBody(200, json.dumps(server.getStatsDict()).encode('utf-8'),
+        "application/json")
+      return
+    server.beginRequest()
+    try:
+      self.handleCDashQuery(url)
+    finally:
+      server.endRequest()
+
+  def handleCDashQuery(self, url):
+    server = self.server
+    latency = server.pickLatency()
+    if latency > 0.0:
+      server.sleep(latency)
+    fault = server.pickFault()
+    if fault == 'drop':
+      server.incrementStat('num_drops_injected')
+      self.close_connection = True
+      return
+    if fault == 'error':
+      server.incrementStat('num_errors_injected')
+      self.sendText(server.errorStatus, "Error, injected error for '"+\
+        self.path+"'!\n")
+      return
+    queryDict = parse_qs(url.query, keep_blank_values=True)
+    try:
+      if url.path.endswith("/api/v1/index.php"):
+        queryData = server.cdashFixtureData.getIndexQueryData(queryDict)
+      elif url.path.endswith("/api/v1/queryTests.php"):
+        queryData = server.cdashFixtureData.getQueryTestsQueryData(queryDict)
+      else:
+        self.sendText(404, "Error, unknown path '"+url.path+"'!\n")
+        return
+    except (CDashQueryFilterError, ValueError) as errMsg:
+      self.sendText(400, str(errMsg)+"\n")
+      return
+    except Exception:
+      self.sendText(500, traceback.format_exc())
+      return
+    body = json.dumps(queryData).encode('utf-8')
+    contentEncoding = None
+    if acceptsGzipEncoding(self.headers.get('Accept-Encoding', '')):
+      body = CDQAR.gzipCompressBytes(body)
+      contentEncoding = 'gzip'
+    self.sendBody(200, body, "application/json", contentEncoding)
+
+  def sendText(self, status, text):
+    self.sendBody(status, text.encode('utf-8'), "text/plain; charset=utf-8")
+
+  # Send the response with the body (at the rate server.bytesPerSec if set)
+  def sendBody(self, status, body, contentType, contentEncoding=None):
+    server = self.server
+    self.send_response(status)
+    self.send_header('Content-Type', contentType)
+    if contentEncoding:
+      self.send_header('Content-Encoding', contentEncoding)
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    # Count the bytes before writing them so the client never sees stats that
+    # lag behind the body it has already received
+    server.incrementStat('num_bytes_sent', len(body))
+    if server.bytesPerSec > 0:
+      chunkSize = max(server.bytesPerSec // 10, 1)
+      for chunkBegin in range(0, len(body), chunkSize):
+        chunk = body[chunkBegin:chunkBegin+chunkSize]
+        server.sleep(float(len(chunk)) / server.bytesPerSec)
+        self.wfile.write(chunk)
+        self.wfile.flush()
+    else:
+      self.wfile.write(body)
+
+  def log_message(self, format, *args):
+    if self.server.logRequests:
+      BaseHTTPRequestHandler.log_message(self, format, *args)
+
+
+# Return True if the 'Accept-Encoding' header value allows 'gzip'
+def acceptsGzipEncoding(acceptEncoding):
+  for encoding in acceptEncoding.split(","):
+    if CDQAR.isGzipContentEncoding(encoding.split(";")[0]):
+      return True
+  return False
+
+
+# Create the CDashReplayServer object for the command-line options
+def createCDashReplayServer(inOptions, logRequests=True, sleep_in=time.sleep):
+  cdashFixtureData = CDashFixtureData(inOptions.fixturesDir,
+    inOptions.cdashProjectTestingDayStartTime)
+  return CDashReplayServer((inOptions.serverHost, inOptions.serverPort),
+    cdashFixtureData,
+    latency=inOptions.latency, latencyJitter=inOptions.latencyJitter,
+    bytesPerSec=inOptions.bytesPerSec,
+    maxConcurrentRequests=inOptions.maxConcurrentRequests,
+    errorRate=inOptions.errorRate, errorStatus=inOptions.errorStatus,
+    dropRate=inOptions.dropRate, seed=inOptions.seed,
+    logRequests=logRequests, sleep_in=sleep_in )
+
+
+#
+# Run the script
+#
+
+if __name__ == '__main__':
+
+  inOptions = getCmndLineOptions()
+
+  cdashReplayServer = createCDashReplayServer(inOptions)
+
+  print("\nReplaying "+str(cdashReplayServer.cdashFixtureData.getNumBuilds())+\
+    " builds and "+str(cdashReplayServer.cdashFixtureData.getNumTests())+\
+    " tests from '"+inOptions.fixturesDir+"' at:\n\n"+\
+    "  "+cdashReplayServer.getBaseUrl()+"\n")
+  sys.stdout.flush()
+
+  try:
+    cdashReplayServer.serve_forever()
+  except KeyboardInterrupt:
+    print("\nStopping the server")
+
+  cdashReplayServer.server_close()